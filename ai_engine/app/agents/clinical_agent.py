@@ -4,19 +4,24 @@ PharmaLens Clinical Agent
 Specialized agent for clinical trial analysis and safety profiling.
 
 Provides:
-- Clinical trial database search
-- Safety signal detection
+- Clinical trial database search (local ClinicalTrials.gov store when built)
+- Safety signal detection (FAERS disproportionality tables when built)
 - Efficacy analysis
 - Indication identification
 """
 
 import random
-import asyncio
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import structlog
 
+from app.core.bulkhead import offload
+from app.core.latency import latency_model
+from app.services.safety_signals import get_signal_store
+from app.services.trial_similarity import get_similarity_index, similar_indications
+from app.services.trial_store import get_trial_store
+
 logger = structlog.get_logger(__name__)
 
 
@@ -56,36 +61,24 @@ class ClinicalAgent:
             model=llm_config.get("model")
         )
         
-        # Simulate processing
-        await asyncio.sleep(random.uniform(0.8, 2.0))
-        
-        # Generate mock clinical data
-        trials_count = random.randint(15, 60)
+        # Store scans (postings, similarity, signal tables) run on the clinical bulkhead's threads
+        trial_data = await offload("clinical", self._query_trial_store, molecule)
+        safety_data = await offload("clinical", self._query_safety_signals, molecule)
+        if trial_data is None:
+            # Simulate processing
+            await latency_model.wait("clinical.analyze", 0.8, 2.0)
+            trial_data = self._generate_trial_data()
+        trials_count = trial_data["total_trials_found"]
         
         result = {
             "molecule": molecule,
             "analysis_date": datetime.now().isoformat(),
             
-            # Trial Overview
-            "total_trials_found": trials_count,
-            "active_trials": random.randint(3, 15),
-            "completed_trials": trials_count - random.randint(3, 15),
-            
-            # Phase Distribution
-            "phase_distribution": {
-                "phase_1": random.randint(5, 15),
-                "phase_2": random.randint(8, 20),
-                "phase_3": random.randint(3, 12),
-                "phase_4": random.randint(2, 8)
-            },
-            
-            # Indications
-            "current_indications": self._generate_indications(random.randint(2, 4)),
-            "potential_new_indications": self._generate_indications(random.randint(2, 5)),
+            # Trial Overview, Phase Distribution, Indications
+            **trial_data,
             
             # Safety Profile
-            "safety_score": round(random.uniform(7.0, 9.5), 1),
-            "adverse_events": self._generate_adverse_events(),
+            **(safety_data or self._generate_safety_data()),
             "black_box_warning": random.choice([True, False, False, False]),
             
             # Efficacy
@@ -114,6 +107,89 @@ class ClinicalAgent:
         
         return result
     
+    def _query_trial_store(self, molecule: str) -> Optional[Dict[str, Any]]:
+        """Trial counts, phases and indications from the local trial store, or None when it is not built."""
+        store = get_trial_store()
+        if store is None:
+            return None
+        rows = store.trials_for_intervention(molecule)
+        summary = store.summarize(rows)
+        potential = [item["condition"] for item in summary.potential_new_indications]
+        
+        # Conditions of trials that read like this molecule's trials but never included it
+        index = get_similarity_index()
+        similar = similar_indications(store, index, rows) if index is not None else []
+        potential += [item["condition"] for item in similar if item["condition"] not in potential]
+        
+        return {
+            "total_trials_found": summary.total,
+            "active_trials": summary.active,
+            "completed_trials": summary.completed,
+            "phase_distribution": summary.phase_distribution,
+            "current_indications": [item["condition"] for item in summary.current_indications],
+            "potential_new_indications": potential,
+            "trial_evidence": {
+                "status_breakdown": summary.status_breakdown,
+                "trials_with_results": summary.with_results,
+                "total_enrollment": summary.enrollment,
+                "indication_trial_counts": summary.current_indications + summary.potential_new_indications,
+                "similar_trial_indications": similar,
+                "recent_trials": store.nct_ids_for(rows, limit=5)
+            },
+            "trial_data_source": "clinicaltrials_gov_local"
+        }
+    
+    def _generate_trial_data(self) -> Dict[str, Any]:
+        """Generate mock trial counts, phases and indications"""
+        trials_count = random.randint(15, 60)
+        return {
+            "total_trials_found": trials_count,
+            "active_trials": random.randint(3, 15),
+            "completed_trials": trials_count - random.randint(3, 15),
+            "phase_distribution": {
+                "phase_1": random.randint(5, 15),
+                "phase_2": random.randint(8, 20),
+                "phase_3": random.randint(3, 12),
+                "phase_4": random.randint(2, 8)
+            },
+            "current_indications": self._generate_indications(random.randint(2, 4)),
+            "potential_new_indications": self._generate_indications(random.randint(2, 5)),
+            "trial_data_source": "simulated"
+        }
+    
+    def _query_safety_signals(self, molecule: str) -> Optional[Dict[str, Any]]:
+        """Safety score and adverse events from the FAERS signal tables, or None without data for the molecule."""
+        store = get_signal_store()
+        profile = store.profile(molecule) if store is not None else None
+        if profile is None:
+            return None
+        return {
+            "safety_score": profile.safety_score,
+            "adverse_events": [
+                {
+                    "event": signal["event"],
+                    "frequency": signal["frequency"],
+                    "severity": "Serious" if signal["serious_fraction"] >= 0.5 else "Non-serious"
+                }
+                for signal in profile.signals[:5]
+            ],
+            "safety_signals": profile.signals,
+            "pharmacovigilance": {
+                "faers_reports": profile.reports,
+                "serious_fraction": profile.serious_fraction,
+                "signal_count": profile.signal_count
+            },
+            "safety_data_source": "faers"
+        }
+    
+    def _generate_safety_data(self) -> Dict[str, Any]:
+        """Generate mock safety score and adverse events"""
+        return {
+            "safety_score": round(random.uniform(7.0, 9.5), 1),
+            "adverse_events": self._generate_adverse_events(),
+            "safety_data_source": "simulated"
+        }
+    
     def _generate_indications(self, count: int) -> List[str]:
         """Generate random therapeutic indications"""
         indications = [
@@ -11,12 +11,13 @@ Responsibilities:
 """
 
 import random
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -61,7 +62,7 @@ class EXIMAgent:
         )
         
         # Simulate API query to EXIM server
-        await asyncio.sleep(random.uniform(0.5, 1.2))
+        await latency_model.wait("exim.analyze", 0.5, 1.2)
         
         # Generate trade analysis
         trade_flows = self._analyze_trade_flows(molecule)
@@ -11,12 +11,13 @@ Responsibilities:
 """
 
 import random
-import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -116,7 +117,7 @@ class InternalKnowledgeAgent:
         is_secure = llm_config.get("provider") == "local"
         
         # Simulate document search
-        await asyncio.sleep(random.uniform(0.5, 1.0))
+        await latency_model.wait("internal_knowledge.analyze", 0.5, 1.0)
         
         # Search relevant documents
         relevant_docs = self._search_documents(molecule, query)
@@ -379,7 +380,7 @@ class InternalKnowledgeAgent:
         )
         
         # Simulate document processing
-        await asyncio.sleep(random.uniform(1.0, 2.0))
+        await latency_model.wait("internal_knowledge.ingest_document", 1.0, 2.0)
         
         # Generate document ID
         doc_id = f"DOC{random.randint(100, 999)}"
@@ -9,17 +9,24 @@ Responsibilities:
 - Identify Volume Shifts (Tablet → Injectable, etc.)
 - List Top Competitors by market share
 - Generate Sales Trend analytics
+- Risk-adjusted NPV / ROI of the repurposing opportunity
 """
 
 import random
-import asyncio
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import structlog
 
+from app.core.latency import latency_model
+from app.services.rnpv import value_programmes
+from app.services.roi_simulation import RoiAssumptions
+
 logger = structlog.get_logger(__name__)
 
+# Share of the molecule's market a repurposed indication reaches at peak
+REPURPOSED_INDICATION_SHARE = 0.05
+
 
 class IQVIAInsightsAgent:
     """
@@ -69,7 +76,7 @@ class IQVIAInsightsAgent:
         )
         
         # Simulate IQVIA API query
-        await asyncio.sleep(random.uniform(0.6, 1.3))
+        await latency_model.wait("iqvia.analyze", 0.6, 1.3)
         
         # Determine therapy area
         therapy_area = self._infer_therapy_area(molecule)
@@ -296,7 +303,9 @@ class IQVIAInsightsAgent:
         
         for i, company in enumerate(selected):
             if i < 4:
-                share = random.randint(max(5, remaining // 3), min(35, remaining - 10))
+                # Leave at least 5% for each company still to be ranked
+                upper = min(35, remaining - 5 * (4 - i))
+                share = random.randint(min(max(5, remaining // 3), upper), upper)
                 remaining -= share
             else:
                 share = remaining
@@ -364,21 +373,53 @@ class IQVIAInsightsAgent:
             "emerging_opportunities": ["China", "India", "Brazil"]
         }
     
-    async def calculate_roi(self, molecule: str) -> Dict[str, Any]:
-        """Calculate ROI metrics (backward compatibility)."""
-        llm_config = {"model": "internal", "provider": "internal"}
-        analysis = await self.analyze(molecule, llm_config)
+    async def calculate_roi(
+        self,
+        molecule: str,
+        disease: Optional[str] = None,
+        llm_config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate risk-adjusted ROI metrics from the market analysis.
+        
+        The molecule's market and time to peak sales define a repurposing
+        programme whose expected-case cash flows are valued by the rNPV
+        engine (discounted, weighted by phase-transition probabilities).
+        """
+        analysis = await self.analyze(molecule, llm_config or {"model": "internal", "provider": "internal"})
+        
+        time_to_peak = float(analysis["investment_metrics"]["time_to_peak_sales_years"])
+        programme = RoiAssumptions(
+            peak_sales_millions=analysis["market_size"]["molecule_market_usd_bn"] * 1000 * REPURPOSED_INDICATION_SHARE,
+            ramp_years=(time_to_peak, time_to_peak)
+        )
+        valuation = value_programmes([molecule], [programme]).candidate(0)
+        roi_percentage = valuation["risk_adjusted_roi_percent"]
+        probability = valuation["probability_of_launch"]
+        
+        if roi_percentage > 200:
+            recommendation = "STRONG_BUY"
+        elif roi_percentage > 100:
+            recommendation = "BUY"
+        elif roi_percentage > 50:
+            recommendation = "HOLD"
+        else:
+            recommendation = "REVIEW"
         
         # Extract ROI-relevant data
         return {
             "molecule": molecule,
+            "disease": disease,
             "market_size_billions": analysis["global_market_size_usd_bn"],
             "five_year_cagr": analysis["cagr_analysis"]["five_year_cagr"],
-            "roi_percentage": round(random.uniform(150, 400), 1),
-            "probability_of_success": f"{random.randint(55, 85)}%",
-            "time_to_market_years": random.uniform(2.5, 5.0),
-            "npv_millions": round(random.uniform(100, 800), 1),
-            "recommendation": random.choice(["STRONG_BUY", "BUY", "HOLD"]),
-            "risk_level": random.choice(["LOW", "MEDIUM", "MEDIUM"]),
+            "roi_percentage": roi_percentage,
+            "probability_of_success": f"{round(probability * 100)}%",
+            "time_to_market_years": valuation["years_to_launch"],
+            "npv_millions": valuation["rnpv_millions"],
+            "unadjusted_npv_millions": valuation["npv_millions"],
+            "risk_adjusted_cost_millions": valuation["risk_adjusted_cost_millions"],
+            "peak_sales_millions": round(programme.peak_sales_millions, 1),
+            "recommendation": recommendation,
+            "risk_level": "LOW" if probability >= 0.5 else "MEDIUM" if probability >= 0.3 else "HIGH",
             "processing_time_ms": analysis["processing_time_ms"]
         }
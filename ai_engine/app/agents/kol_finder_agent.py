@@ -11,12 +11,13 @@ Responsibilities:
 """
 
 import random
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -89,7 +90,7 @@ class KOLFinderAgent:
         )
         
         # Simulate API/database query
-        await asyncio.sleep(random.uniform(0.5, 1.2))
+        await latency_model.wait("kol.analyze", 0.5, 1.2)
         
         # Determine relevant therapeutic areas
         therapeutic_areas = self._infer_therapeutic_areas(molecule)
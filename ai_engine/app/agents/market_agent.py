@@ -9,17 +9,27 @@ Provides:
 - Market size analysis
 - Competitive landscape assessment
 - Investment recommendations
+- Monte Carlo ROI/NPV distributions (probability of loss, percentiles)
+- ROI sensitivity (tornado) analysis
 """
 
 import random
-import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 import structlog
 
+from app.core.bulkhead import offload
+from app.core.config import settings
+from app.core.latency import latency_model
+from app.services.roi_sensitivity import DEFAULT_POINTS, DEFAULT_SPREAD, sensitivity, with_values
+from app.services.roi_simulation import RoiAssumptions, simulate
+
 logger = structlog.get_logger(__name__)
 
+# Share of the addressable market captured at peak, by competitive landscape
+PEAK_CAPTURE = {"Low": 0.30, "Moderate": 0.25, "High": 0.18}
+
 
 class MarketAgent:
     """
@@ -38,19 +48,22 @@ class MarketAgent:
         self.version = "1.0.0"
         logger.info(f"Initialized {self.name} v{self.version}")
     
-    async def calculate_roi(self, molecule: str) -> Dict[str, Any]:
+    async def calculate_roi(self, molecule: str, seed: Optional[int] = None) -> Dict[str, Any]:
         """
         Calculate comprehensive ROI for drug repurposing.
         
-        This is a mock implementation that simulates market analysis.
-        In production, this would:
-        - Query market databases (IQVIA, Evaluate Pharma)
-        - Analyze competitor pipelines
-        - Use ML models for revenue forecasting
-        - Calculate risk-adjusted NPV
+        Market inputs (market size, addressable share, phase success
+        benchmarks) are simulated; in production they would come from
+        market databases (IQVIA, Evaluate Pharma) and competitor pipelines.
+        The ROI itself is a Monte Carlo simulation over those inputs
+        (see app/services/roi_simulation.py): phase outcomes, timelines,
+        peak sales, erosion and discount rate, with the NPV/ROI
+        distribution returned alongside the risk-adjusted point figures.
         
         Args:
             molecule: Name of the drug/compound to analyze
+            seed: Makes the simulated inputs and the simulation
+                reproducible (defaults to ROI_SIMULATION_SEED)
             
         Returns:
             Dictionary containing ROI metrics and recommendations
@@ -60,23 +73,31 @@ class MarketAgent:
         logger.info("roi_calculation_started", molecule=molecule, agent=self.name)
         
         # Simulate processing time (real API would take longer)
-        await asyncio.sleep(random.uniform(0.5, 1.5))
+        await latency_model.wait("market.calculate_roi", 0.5, 1.5)
         
-        # Generate simulated ROI data
-        # Revenue projection: $100M - $500M range
-        projected_revenue = random.randint(100, 500)
+        if seed is None:
+            seed = settings.ROI_SIMULATION_SEED
+        rng = self._rng(molecule, seed)
+        market = self._market_inputs(rng)
+        market_size = market["market_size_billions"]
+        cagr = market["market_cagr_percent"]
+        market_share = market["addressable_market_share_percent"]
+        competition = market["competitive_landscape"]
+        assumptions = market["assumptions"]
         
-        # Development cost: $40M - $120M range
-        development_cost = random.randint(40, 120)
+        distribution = await offload("market", simulate, assumptions, settings.ROI_SIMULATION_SCENARIOS, seed)
         
-        # Calculate ROI percentage
-        roi_percentage = round(((projected_revenue - development_cost) / development_cost) * 100, 1)
+        projected_revenue = distribution.expected_revenue_millions
+        development_cost = distribution.expected_cost_millions
+        roi_percentage = distribution.risk_adjusted_roi_percent
+        probability_success = round(distribution.probability_of_approval * 100)
         
-        # Market metrics
-        market_size = round(random.uniform(5, 25), 1)  # Billions
-        cagr = round(random.uniform(4, 12), 1)  # Compound Annual Growth Rate
-        time_to_market = round(random.uniform(2, 5), 1)  # Years
-        probability_success = random.randint(50, 80)  # Percentage
+        if distribution.probability_of_loss > 0.6:
+            risk_level = "HIGH"
+        elif distribution.probability_of_loss > 0.3:
+            risk_level = "MEDIUM"
+        else:
+            risk_level = "LOW"
         
         # Generate recommendation based on ROI
         if roi_percentage > 200:
@@ -99,26 +120,28 @@ class MarketAgent:
             "molecule": molecule,
             "analysis_date": datetime.now().isoformat(),
             
-            # Financial Projections
+            # Financial Projections (risk-adjusted present values)
             "projected_revenue_millions": projected_revenue,
             "development_cost_millions": development_cost,
             "roi_percentage": roi_percentage,
-            "net_present_value_millions": projected_revenue - development_cost,
+            "net_present_value_millions": distribution.expected_npv_millions,
+            "roi_distribution": distribution.to_dict(),
+            "roi_assumptions": assumptions.to_dict(),
             
             # Market Metrics
             "market_size_billions": market_size,
             "market_cagr_percent": cagr,
-            "addressable_market_share_percent": round(random.uniform(5, 20), 1),
+            "addressable_market_share_percent": market_share,
             
             # Timeline & Risk
-            "time_to_market_years": time_to_market,
+            "time_to_market_years": distribution.time_to_market_years,
             "probability_of_success": f"{probability_success}%",
-            "risk_level": "MEDIUM" if probability_success > 60 else "HIGH",
+            "risk_level": risk_level,
             
             # Competitive Analysis
-            "competitive_landscape": random.choice(["Low", "Moderate", "High"]),
-            "key_competitors": self._generate_competitors(),
-            "patent_cliff_risk": random.choice(["Low", "Medium", "High"]),
+            "competitive_landscape": competition,
+            "key_competitors": self._generate_competitors(rng),
+            "patent_cliff_risk": rng.choice(["Low", "Medium", "High"]),
             
             # Recommendation
             "recommendation": recommendation,
@@ -135,20 +158,90 @@ class MarketAgent:
             "roi_calculation_completed",
             molecule=molecule,
             roi=roi_percentage,
+            probability_of_loss=distribution.probability_of_loss,
             recommendation=recommendation,
+            simulation_ms=distribution.simulation_ms,
             processing_ms=round(processing_time, 2)
         )
         
         return result
     
-    def _generate_competitors(self) -> list:
+    async def roi_sensitivity(
+        self,
+        molecule: str,
+        seed: Optional[int] = None,
+        overrides: Optional[Dict[str, float]] = None,
+        spread: float = DEFAULT_SPREAD,
+        points: int = DEFAULT_POINTS,
+        parameters: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Tornado analysis of the molecule's ROI model.
+        
+        Starts from the same market inputs as calculate_roi (pass the same
+        seed to hold them between calls), moves any inputs named in
+        ``overrides`` (slider positions) and sweeps every input while the
+        others stay fixed; see app/services/roi_sensitivity.py.
+        """
+        if seed is None:
+            seed = settings.ROI_SIMULATION_SEED
+        market = self._market_inputs(self._rng(molecule, seed))
+        assumptions = with_values(market["assumptions"], overrides or {})
+        result = await offload("market", sensitivity, assumptions, spread, points, parameters)
+        
+        logger.info(
+            "roi_sensitivity_completed",
+            molecule=molecule,
+            perturbations=result["perturbations"],
+            top_driver=result["tornado"][0]["parameter"] if result["tornado"] else None,
+            elapsed_ms=result["elapsed_ms"]
+        )
+        
+        return {
+            "molecule": molecule,
+            "seed": seed,
+            "overrides": overrides or {},
+            **result,
+            "agent": self.name,
+            "version": self.version
+        }
+    
+    @staticmethod
+    def _rng(molecule: str, seed: Optional[int]):
+        """Source of the simulated market inputs: reproducible per molecule when seeded."""
+        return random.Random(f"{seed}:{molecule.lower()}") if seed is not None else random
+    
+    def _market_inputs(self, rng) -> Dict[str, Any]:
+        """Simulated market metrics and the ROI model assumptions derived from them."""
+        market_size = round(rng.uniform(5, 25), 1)  # Billions
+        cagr = round(rng.uniform(4, 12), 1)  # Compound Annual Growth Rate
+        market_share = round(rng.uniform(5, 20), 1)  # Addressable share (%)
+        competition = rng.choice(["Low", "Moderate", "High"])
+        
+        assumptions = RoiAssumptions(
+            peak_sales_millions=market_size * 1000 * market_share / 100 * PEAK_CAPTURE[competition],
+            phase_probabilities=(
+                round(rng.uniform(0.55, 0.80), 2),  # Phase 2 -> Phase 3
+                round(rng.uniform(0.65, 0.85), 2),  # Phase 3 -> filing
+                round(rng.uniform(0.90, 0.95), 2)   # filing -> approval
+            )
+        )
+        return {
+            "market_size_billions": market_size,
+            "market_cagr_percent": cagr,
+            "addressable_market_share_percent": market_share,
+            "competitive_landscape": competition,
+            "assumptions": assumptions
+        }
+    
+    def _generate_competitors(self, rng=random) -> list:
         """Generate list of simulated competitors"""
         pharma_companies = [
             "Pfizer", "Novartis", "Roche", "Johnson & Johnson",
             "Merck", "AstraZeneca", "Sanofi", "GSK",
             "AbbVie", "Bristol-Myers Squibb", "Eli Lilly", "Amgen"
         ]
-        return random.sample(pharma_companies, k=random.randint(2, 4))
+        return rng.sample(pharma_companies, k=rng.randint(2, 4))
     
     def _generate_thesis(self, molecule: str, roi: float) -> str:
         """Generate investment thesis based on analysis"""
@@ -171,7 +264,7 @@ class MarketAgent:
         Returns:
             Market trend analysis
         """
-        await asyncio.sleep(0.3)
+        await latency_model.wait("market.analyze_market_trends", 0.3)
         
         return {
             "therapeutic_area": therapeutic_area,
@@ -11,10 +11,14 @@ Responsibilities:
 """
 
 import asyncio
+import inspect
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 import structlog
 
+from app.core.bulkhead import agent_slot
+from app.core.metrics import record_work_avoided
+from app.core.tracing import span
 from .clinical_agent import ClinicalAgent
 from .patent_agent import PatentAgent
 from .market_agent import MarketAgent
@@ -83,80 +87,82 @@ class MasterOrchestrator:
         Returns:
             Comprehensive analysis results from all agents
         """
-        start_time = datetime.now()
-        request_id = f"orch_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        logger.info(
-            "orchestration_started",
-            request_id=request_id,
-            query=query[:100],
-            molecule=molecule
-        )
-        
-        # Step 1: Decompose query into sub-tasks
-        sub_tasks = self._decompose_query(query, molecule)
-        
-        # Step 2: Determine agents to engage
-        agents_to_run = requested_agents or self._determine_agents(sub_tasks)
-        
-        logger.info(
-            "agents_selected",
-            request_id=request_id,
-            agents=agents_to_run
-        )
-        
-        # Step 3: Execute agents in parallel
-        results = await self._execute_agents(
-            molecule=molecule,
-            agents=agents_to_run,
-            llm_config=llm_config,
-            request_id=request_id
-        )
-        
-        # Step 4: Run validation agent on results
-        if "validation" in agents_to_run or True:  # Always validate
-            validation_result = await self.agents["validation"].analyze(
+        with span("orchestrator.process_query", molecule=molecule):
+            start_time = datetime.now()
+            request_id = f"orch_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            
+            logger.info(
+                "orchestration_started",
+                request_id=request_id,
+                query=query[:100],
+                molecule=molecule
+            )
+            
+            # Step 1: Decompose query into sub-tasks
+            sub_tasks = self._decompose_query(query, molecule)
+            
+            # Step 2: Determine agents to engage
+            agents_to_run = requested_agents or self._determine_agents(sub_tasks)
+            
+            logger.info(
+                "agents_selected",
+                request_id=request_id,
+                agents=agents_to_run
+            )
+            
+            # Step 3: Execute agents in parallel
+            results = await self._execute_agents(
                 molecule=molecule,
-                agent_results=results,
-                llm_config=llm_config
+                agents=agents_to_run,
+                llm_config=llm_config,
+                request_id=request_id
             )
-            results["validation"] = validation_result
-        
-        # Step 5: Aggregate and generate summary
-        summary = self._generate_summary(results, molecule)
-        
-        # Calculate total processing time
-        total_time_ms = (datetime.now() - start_time).total_seconds() * 1000
-        
-        final_result = {
-            "request_id": request_id,
-            "query": query,
-            "molecule": molecule,
-            "processing_mode": llm_config.get("provider"),
-            "model_used": llm_config.get("model"),
-            "sub_tasks": sub_tasks,
-            "agents_executed": [
-                {
-                    "name": agent_name,
-                    "status": "completed" if agent_name in results else "skipped",
-                    "duration_ms": results.get(agent_name, {}).get("processing_time_ms", 0)
-                }
-                for agent_name in agents_to_run
-            ],
-            "results": results,
-            "summary": summary,
-            "total_processing_time_ms": round(total_time_ms, 2),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        logger.info(
-            "orchestration_completed",
-            request_id=request_id,
-            agents_count=len(results),
-            total_time_ms=round(total_time_ms, 2)
-        )
-        
-        return final_result
+            
+            # Step 4: Run validation agent on results
+            if "validation" in agents_to_run or True:  # Always validate
+                async with agent_slot("validation", llm_config):
+                    validation_result = await self.agents["validation"].analyze(
+                        molecule=molecule,
+                        agent_results=results,
+                        llm_config=llm_config
+                    )
+                results["validation"] = validation_result
+            
+            # Step 5: Aggregate and generate summary
+            summary = self._generate_summary(results, molecule)
+            
+            # Calculate total processing time
+            total_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+            
+            final_result = {
+                "request_id": request_id,
+                "query": query,
+                "molecule": molecule,
+                "processing_mode": llm_config.get("provider"),
+                "model_used": llm_config.get("model"),
+                "sub_tasks": sub_tasks,
+                "agents_executed": [
+                    {
+                        "name": agent_name,
+                        "status": "completed" if agent_name in results else "skipped",
+                        "duration_ms": results.get(agent_name, {}).get("processing_time_ms", 0)
+                    }
+                    for agent_name in agents_to_run
+                ],
+                "results": results,
+                "summary": summary,
+                "total_processing_time_ms": round(total_time_ms, 2),
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            logger.info(
+                "orchestration_completed",
+                request_id=request_id,
+                agents_count=len(results),
+                total_time_ms=round(total_time_ms, 2)
+            )
+            
+            return final_result
     
     def _decompose_query(self, query: str, molecule: str) -> List[Dict[str, Any]]:
         """
@@ -313,15 +319,24 @@ class MasterOrchestrator:
                 tasks.append((agent_name, task))
         
         # Execute all tasks concurrently
-        for agent_name, task in tasks:
+        for index, (agent_name, task) in enumerate(tasks):
             try:
-                result = await task
+                async with agent_slot(agent_name, llm_config):
+                    result = await task
                 results[agent_name] = result
                 logger.info(f"agent_completed", agent=agent_name, request_id=request_id)
+            except asyncio.CancelledError:
+                # Client went away: the agents not yet started are never run
+                for pending_name, pending in tasks[index:]:
+                    if inspect.getcoroutinestate(pending) == inspect.CORO_CREATED:
+                        record_work_avoided(pending_name, started=False)
+                    pending.close()
+                logger.info("agents_cancelled", request_id=request_id, completed=list(results))
+                raise
             except Exception as e:
                 logger.error(f"agent_failed", agent=agent_name, error=str(e))
                 results[agent_name] = {"error": str(e), "status": "failed"}
-        
+
         return results
     
     def _generate_summary(self, results: Dict[str, Any], molecule: str) -> Dict[str, Any]:
@@ -4,19 +4,26 @@ PharmaLens Patent Agent
 Specialized agent for intellectual property analysis.
 
 Provides:
-- Patent landscape mapping
-- Freedom to operate analysis
-- Patent expiration tracking
+- Patent landscape mapping (local patent index when built)
+- Continuation-family and citation-cluster analysis (patent graph when built)
+- Freedom to operate analysis (near-duplicate claim screening when built)
+- Patent expiration tracking (loss of exclusivity from the patent cliff index when built)
 - IP strategy recommendations
 """
 
 import random
-import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 import structlog
 
+from app.core.bulkhead import offload
+from app.core.latency import latency_model
+from app.services.claim_screening import BLOCKING_SIMILARITY, candidate_claims, get_claim_index
+from app.services.patent_cliff import get_patent_cliff_index
+from app.services.patent_graph import get_patent_graph
+from app.services.patent_index import get_patent_index
+
 logger = structlog.get_logger(__name__)
 
 
@@ -56,46 +63,26 @@ class PatentAgent:
             model=llm_config.get("model")
         )
         
-        # Simulate processing
-        await asyncio.sleep(random.uniform(0.5, 1.2))
+        patent_data = await self._query_patent_index(molecule)
+        if patent_data is None:
+            # Simulate processing
+            await latency_model.wait("patent.analyze", 0.5, 1.2)
+            patent_data = self._generate_patent_data()
         
-        # Generate expiration date (2-8 years from now)
-        expiration_date = datetime.now() + timedelta(days=random.randint(730, 2920))
+        cliff_index = get_patent_cliff_index()
+        if cliff_index is not None:
+            loss_of_exclusivity = cliff_index.loss_of_exclusivity(molecule)
+            if loss_of_exclusivity is not None:
+                patent_data["loss_of_exclusivity"] = loss_of_exclusivity
         
         result = {
             "molecule": molecule,
             "analysis_date": datetime.now().isoformat(),
             
-            # Patent Overview
-            "total_patents": random.randint(10, 50),
-            "active_patents": random.randint(5, 25),
-            "pending_applications": random.randint(2, 10),
-            
-            # Key Dates
-            "earliest_expiration": expiration_date.strftime("%Y-%m-%d"),
-            "latest_expiration": (expiration_date + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "patent_term_extensions": random.choice([True, False]),
-            
-            # Freedom to Operate
-            "freedom_to_operate": random.choice(["Clear", "Moderate Risk", "High Risk"]),
-            "fto_score": round(random.uniform(6.0, 9.5), 1),
-            "blocking_patents": random.randint(0, 3),
-            
-            # IP Holders
-            "key_patent_holders": self._generate_patent_holders(),
+            # Patent Overview, Key Dates, Freedom to Operate, IP Holders,
+            # Geographic Coverage, Risk Assessment
+            **patent_data,
             "licensing_opportunities": random.choice(["Available", "Limited", "None"]),
-            
-            # Geographic Coverage
-            "geographic_coverage": {
-                "us": True,
-                "eu": True,
-                "japan": random.choice([True, False]),
-                "china": random.choice([True, False]),
-                "row": random.choice([True, False])
-            },
-            
-            # Risk Assessment
-            "ip_risk_level": random.choice(["Low", "Medium", "High"]),
             "litigation_history": random.randint(0, 5),
             
             # Recommendations
@@ -116,6 +103,111 @@ class PatentAgent:
         
         return result
     
+    async def _query_patent_index(self, molecule: str) -> Optional[Dict[str, Any]]:
+        """Landscape from the local patent index, or None when it is not built."""
+        index = get_patent_index()
+        if index is None:
+            return None
+        landscape = await offload("patent", index.landscape, molecule)
+        
+        # FTO from patents claiming the molecule that are still in force, plus
+        # in-force patents whose claims nearly duplicate claims drafted around it
+        blocking_numbers = list(landscape.blocking_patent_numbers)
+        screening = await self._screen_claims(candidate_claims(molecule))
+        if screening is not None:
+            known = set(blocking_numbers)
+            blocking_numbers.extend(row["number"] for row in screening["blocking_claims"] if row["number"] not in known)
+        blocking = len(blocking_numbers)
+        fto, risk = self._fto_status(blocking)
+        
+        result = {
+            "total_patents": landscape.total_patents,
+            "active_patents": landscape.active_patents,
+            "pending_applications": landscape.pending_applications,
+            "earliest_expiration": landscape.earliest_expiration or "No active patents",
+            "latest_expiration": landscape.latest_expiration or "No active patents",
+            "patent_term_extensions": landscape.patent_term_extensions,
+            "freedom_to_operate": fto,
+            "fto_score": round(max(0.0, 9.5 - 1.5 * blocking), 1),
+            "blocking_patents": blocking,
+            "blocking_patent_numbers": blocking_numbers[:10],
+            "key_patent_holders": landscape.key_patent_holders,
+            "geographic_coverage": landscape.geographic_coverage,
+            "upcoming_expirations": landscape.upcoming_expirations,
+            "ip_risk_level": risk,
+            "patent_data_source": "local_patent_index"
+        }
+        graph = get_patent_graph()
+        if graph is not None:
+            families = await offload("patent", graph.family_landscape, molecule)
+            result["patent_families"] = {
+                "core_families": families.core_families,
+                "blocking_families": families.blocking_families,
+                "blocking_family_members": families.blocking_family_members,
+                "continuations_in_force": families.continuations_in_force,
+                "litigation_clusters": families.litigation_clusters
+            }
+        if screening is not None:
+            result["claim_screening"] = {
+                "candidate_claims": screening["queries"],
+                "blocking_patents": screening["blocking_patents"],
+                "blocking_claims": screening["blocking_claims"][:5],
+                "similar_claims": screening["similar_claims"][:5]
+            }
+        return result
+    
+    async def screen_claims(self, claims: List[str], threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Freedom-to-operate screening of candidate claim text against the
+        claim index; None when the index is not built.
+        """
+        screening = await self._screen_claims(claims, threshold)
+        if screening is None:
+            return None
+        fto, risk = self._fto_status(screening["blocking_patents"])
+        return {**screening, "freedom_to_operate": fto, "ip_risk_level": risk}
+    
+    async def _screen_claims(self, claims: List[str], threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        claim_index = get_claim_index()
+        if claim_index is None:
+            return None
+        return await offload("patent", claim_index.blocking_claims, claims, None, threshold or BLOCKING_SIMILARITY)
+    
+    @staticmethod
+    def _fto_status(blocking: int) -> Tuple[str, str]:
+        """Freedom-to-operate status and IP risk level from a blocking patent count."""
+        if blocking == 0:
+            return "Clear", "Low"
+        if blocking <= 2:
+            return "Moderate Risk", "Medium"
+        return "High Risk", "High"
+    
+    def _generate_patent_data(self) -> Dict[str, Any]:
+        """Generate mock patent counts, dates, FTO and holders"""
+        # Generate expiration date (2-8 years from now)
+        expiration_date = datetime.now() + timedelta(days=random.randint(730, 2920))
+        return {
+            "total_patents": random.randint(10, 50),
+            "active_patents": random.randint(5, 25),
+            "pending_applications": random.randint(2, 10),
+            "earliest_expiration": expiration_date.strftime("%Y-%m-%d"),
+            "latest_expiration": (expiration_date + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
+            "patent_term_extensions": random.choice([True, False]),
+            "freedom_to_operate": random.choice(["Clear", "Moderate Risk", "High Risk"]),
+            "fto_score": round(random.uniform(6.0, 9.5), 1),
+            "blocking_patents": random.randint(0, 3),
+            "key_patent_holders": self._generate_patent_holders(),
+            "geographic_coverage": {
+                "us": True,
+                "eu": True,
+                "japan": random.choice([True, False]),
+                "china": random.choice([True, False]),
+                "row": random.choice([True, False])
+            },
+            "ip_risk_level": random.choice(["Low", "Medium", "High"]),
+            "patent_data_source": "simulated"
+        }
+    
     def _generate_patent_holders(self) -> List[Dict[str, Any]]:
         """Generate list of patent holders"""
         companies = [
@@ -11,12 +11,13 @@ Responsibilities:
 """
 
 import random
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -90,7 +91,7 @@ class MolecularPathfinderAgent:
         )
         
         # Simulate knowledge graph query
-        await asyncio.sleep(random.uniform(0.8, 1.5))
+        await latency_model.wait("pathfinder.analyze", 0.8, 1.5)
         
         # Query knowledge graph
         primary_targets = self._find_primary_targets(molecule)
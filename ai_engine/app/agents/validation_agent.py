@@ -11,12 +11,13 @@ Responsibilities:
 """
 
 import random
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -74,7 +75,7 @@ class ValidationAgent:
         )
         
         # Simulate processing
-        await asyncio.sleep(random.uniform(0.5, 1.0))
+        await latency_model.wait("validation.analyze", 0.5, 1.0)
         
         # Perform validations
         risk_flags = self._identify_risks(agent_results)
@@ -148,6 +149,14 @@ class ValidationAgent:
             if isinstance(safety_score, (int, float)) and safety_score < 7:
                 risks.append("🔴 Safety concerns detected (low safety score)")
             
+            # Disproportionate reporting of serious adverse events (FAERS)
+            serious_signals = [
+                signal["event"] for signal in clinical.get("safety_signals", [])
+                if "IC" in signal.get("methods", []) and signal.get("serious_fraction", 0) >= 0.5
+            ]
+            if serious_signals:
+                risks.append(f"🔴 Safety signal for serious adverse events: {', '.join(serious_signals[:3])}")
+            
             # Black box warning
             if clinical.get("black_box_warning"):
                 risks.append("⚠️ FDA Black Box Warning present")
@@ -172,6 +181,16 @@ class ValidationAgent:
             if patent.get("blocking_patents", 0) > 2:
                 risks.append(f"⚠️ {patent['blocking_patents']} blocking patents identified")
             
+            # In-force claims nearly duplicating the molecule's own
+            screened = patent.get("claim_screening", {}).get("blocking_claims", [])
+            if screened:
+                risks.append(f"⚠️ Near-duplicate in-force claims (e.g. {screened[0]['number']} claim {screened[0]['claim']})")
+            
+            # In-force third-party families citing (or cited by) the molecule's patent families
+            clusters = [c for c in patent.get("patent_families", {}).get("litigation_clusters", []) if c.get("third_party")]
+            if clusters:
+                risks.append(f"⚠️ {len(clusters)} third-party patent families linked by citations (e.g. {clusters[0]['lead_patent']})")
+            
             # Litigation history
             if patent.get("litigation_history", 0) > 3:
                 risks.append("⚠️ Significant patent litigation history")
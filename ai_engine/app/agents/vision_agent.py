@@ -11,12 +11,13 @@ Provides:
 """
 
 import random
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -57,7 +58,7 @@ class VisionAgent:
         )
         
         # Simulate processing (vision models typically take longer)
-        await asyncio.sleep(random.uniform(1.0, 2.5))
+        await latency_model.wait("vision.analyze", 1.0, 2.5)
         
         result = {
             "molecule": molecule,
@@ -11,12 +11,13 @@ Responsibilities:
 """
 
 import random
-import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
 import structlog
 
+from app.core.latency import latency_model
+
 logger = structlog.get_logger(__name__)
 
 
@@ -64,7 +65,7 @@ class WebIntelligenceAgent:
         )
         
         # Simulate web crawling
-        await asyncio.sleep(random.uniform(0.8, 1.5))
+        await latency_model.wait("web_intelligence.analyze", 0.8, 1.5)
         
         # Gather intelligence from multiple sources
         pubmed_results = self._search_pubmed(molecule)
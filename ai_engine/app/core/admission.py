@@ -0,0 +1,213 @@
+"""
+PharmaLens Admission Control
+=============================
+Load shedding at the FastAPI layer so admitted requests keep bounded
+latency instead of piling up until the Node server's 120 s timeout.
+
+Provides:
+- Endpoint classes (orchestrate, single_agent, ingest), each with its own
+  concurrency limit and bounded wait queue
+- Fast rejection when the queue is full, or when a queued request waits
+  longer than the queue timeout, with a Retry-After estimate
+- A stale-result cache of recent successful responses that is served
+  instead of a 429 when the same request was answered before, restamped
+  with the request_id of the request it now answers
+"""
+
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import structlog
+
+from .config import settings
+from .limiter import BoundedLimiter
+from .metrics import registry, record_cache_lookup
+from .serialization import dumps, is_msgpack, load_body, packb
+
+logger = structlog.get_logger(__name__)
+
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "pharmalens_admission_queue_depth",
+    "Requests waiting for an execution slot",
+    ("endpoint_class",)
+)
+ADMISSION_QUEUE_WAIT = registry.histogram(
+    "pharmalens_admission_queue_wait_seconds",
+    "Time admitted requests spent waiting for an execution slot",
+    ("endpoint_class",)
+)
+ADMISSION_REJECTED = registry.counter(
+    "pharmalens_admission_rejected_total",
+    "Requests shed by admission control",
+    ("endpoint_class", "reason")
+)
+ADMISSION_STALE_SERVED = registry.counter(
+    "pharmalens_admission_stale_served_total",
+    "Shed requests answered from the stale-result cache",
+    ("endpoint_class",)
+)
+
+ORCHESTRATE_PATHS = {"/api/orchestrate", "/api/analyze"}
+INGEST_PATHS = {"/api/agents/internal-knowledge/ingest"}
+UNLIMITED_PATHS = {"/api/agents/status"}
+# Portfolio-wide analytics are batch work, admitted like orchestrated analyses
+PORTFOLIO_PREFIX = "/api/portfolio/"
+
+# Endpoint classes whose successful responses may be served stale
+STALE_CLASSES = {"orchestrate", "single_agent"}
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Endpoint class of a request, or None when it is not admission-controlled."""
+    if path in ORCHESTRATE_PATHS:
+        return "orchestrate"
+    if path in INGEST_PATHS:
+        return "ingest"
+    if path.startswith(PORTFOLIO_PREFIX):
+        return "orchestrate"
+    if path.startswith("/api/agents/") and path not in UNLIMITED_PATHS:
+        return "single_agent"
+    return None
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries the Retry-After estimate."""
+
+    def __init__(self, endpoint_class: str, reason: str, retry_after: int):
+        super().__init__(f"{endpoint_class} {reason}")
+        self.endpoint_class = endpoint_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController(BoundedLimiter):
+    """
+    Concurrency limit plus bounded FIFO wait queue for one endpoint class.
+
+    Up to ``max_concurrency`` requests execute at once and up to
+    ``max_queue`` more wait for a slot. A request arriving to a full queue,
+    or waiting longer than ``queue_timeout`` seconds, is rejected. The
+    Retry-After hint is the time the current queue needs to drain at the
+    observed (EWMA) service time.
+    """
+
+    def _reject(self, reason: str):
+        ADMISSION_REJECTED.inc(endpoint_class=self.name, reason=reason)
+        raise AdmissionRejected(self.name, reason, self.retry_after())
+
+    def _on_queue_depth(self):
+        ADMISSION_QUEUE_DEPTH.set(self.waiting, endpoint_class=self.name)
+
+    def _on_wait(self, seconds: float):
+        ADMISSION_QUEUE_WAIT.observe(seconds, endpoint_class=self.name)
+
+
+class StaleResultCache:
+    """Bounded LRU of recent successful response bodies, keyed by request content."""
+
+    def __init__(self, max_entries: int = 512, max_age_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+
+    @staticmethod
+    def key(method: str, path: str, body: bytes, content_type: Optional[str] = None) -> Optional[str]:
+        """
+        Cache key from the request; the request_id is ignored so repeat
+        questions from different clients share an entry.
+        """
+        try:
+            payload = load_body(body, content_type) if body else {}
+        except ValueError:
+            return None
+        if isinstance(payload, dict):
+            payload.pop("request_id", None)
+        canonical = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha1(f"{method} {path} {canonical}".encode("utf-8")).hexdigest()
+
+    def put(self, key: str, body: bytes, media_type: str):
+        self._entries[key] = (time.time(), body, media_type)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes, str]]:
+        """Return ``(age_seconds, body, media_type)`` or None when missing or too old."""
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[0] > self.max_age_seconds:
+            del self._entries[key]
+            entry = None
+        record_cache_lookup("stale_results", entry is not None)
+        if entry is None:
+            return None
+        stored_at, body, media_type = entry
+        return time.time() - stored_at, body, media_type
+
+    @staticmethod
+    def restamp(body: bytes, media_type: str, request_body: bytes, content_type: Optional[str] = None) -> bytes:
+        """
+        The cached body with its top-level request_id replaced by the one in
+        ``request_body``, so a client never receives another client's id.
+        Bodies without a request_id (or requests without one) are unchanged.
+        """
+        try:
+            request = load_body(request_body, content_type) if request_body else {}
+            payload = load_body(body, media_type)
+        except ValueError:
+            return body
+        if not (isinstance(request, dict) and isinstance(payload, dict)):
+            return body
+        if "request_id" not in payload or "request_id" not in request:
+            return body
+        payload["request_id"] = request["request_id"]
+        return packb(payload) if is_msgpack(media_type) else dumps(payload)
+
+
+class AdmissionControl:
+    """Admission controllers for every endpoint class plus the stale-result cache."""
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[int, int]],
+        queue_timeout: float,
+        stale_cache: Optional[StaleResultCache] = None
+    ):
+        self.controllers = {
+            name: AdmissionController(name, concurrency, queue, queue_timeout)
+            for name, (concurrency, queue) in limits.items()
+        }
+        self.stale_cache = stale_cache
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionControl":
+        stale_cache = None
+        if settings.ADMISSION_SERVE_STALE:
+            stale_cache = StaleResultCache(
+                max_entries=settings.ADMISSION_STALE_MAX_ENTRIES,
+                max_age_seconds=settings.ADMISSION_STALE_MAX_AGE_SECONDS
+            )
+        return cls(
+            limits={
+                "orchestrate": (settings.ADMISSION_ORCHESTRATE_CONCURRENCY, settings.ADMISSION_ORCHESTRATE_QUEUE),
+                "single_agent": (settings.ADMISSION_SINGLE_AGENT_CONCURRENCY, settings.ADMISSION_SINGLE_AGENT_QUEUE),
+                "ingest": (settings.ADMISSION_INGEST_CONCURRENCY, settings.ADMISSION_INGEST_QUEUE)
+            },
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            stale_cache=stale_cache
+        )
+
+    def controller_for(self, method: str, path: str) -> Optional[AdmissionController]:
+        endpoint_class = classify(method, path)
+        return self.controllers.get(endpoint_class) if endpoint_class else None
+
+    def caches_stale(self, controller: AdmissionController) -> bool:
+        return self.stale_cache is not None and controller.name in STALE_CLASSES
+
+    def status(self) -> Dict[str, Dict[str, float]]:
+        return {name: controller.status() for name, controller in self.controllers.items()}
+
+
+admission_control = AdmissionControl.from_settings()
@@ -0,0 +1,242 @@
+"""
+PharmaLens Bulkheads
+=====================
+Isolated execution pools keyed by privacy mode and work class, so a
+burst of secure-mode (local Llama) work cannot starve cloud-mode requests
+or the default thread pool that serves everything else.
+
+Provides:
+- ExecutionPool: concurrency limit, bounded wait queue and a dedicated
+  thread pool for blocking calls
+- Pools named ``<mode>.<class>``: mode is ``secure`` or ``cloud`` and
+  class is ``llm`` (model inference), ``documents`` (internal document
+  work) or ``agents`` (all other agent analysis)
+- Per-pool capacity, active, queue depth, wait time, busy time and
+  utilization metrics for tuning
+
+Pool sizes come from BULKHEAD_POOLS, e.g.
+``secure.llm=1/8,cloud.agents=32/128`` (concurrency/queue).
+"""
+
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import structlog
+
+from .config import settings
+from .limiter import BoundedLimiter
+from .metrics import registry, track_agent
+
+logger = structlog.get_logger(__name__)
+
+POOL_CAPACITY = registry.gauge(
+    "pharmalens_pool_capacity",
+    "Concurrency limit of each execution pool",
+    ("pool",)
+)
+POOL_ACTIVE = registry.gauge(
+    "pharmalens_pool_active",
+    "Work items currently executing in each pool",
+    ("pool",)
+)
+POOL_UTILIZATION = registry.gauge(
+    "pharmalens_pool_utilization",
+    "Active work items divided by pool capacity",
+    ("pool",)
+)
+POOL_QUEUE_DEPTH = registry.gauge(
+    "pharmalens_pool_queue_depth",
+    "Work items waiting for a pool slot",
+    ("pool",)
+)
+POOL_WAIT = registry.histogram(
+    "pharmalens_pool_wait_seconds",
+    "Time work items waited for a pool slot",
+    ("pool",)
+)
+POOL_BUSY_SECONDS = registry.counter(
+    "pharmalens_pool_busy_seconds_total",
+    "Slot-seconds spent executing; rate() / capacity gives utilization",
+    ("pool",)
+)
+POOL_REJECTED = registry.counter(
+    "pharmalens_pool_rejected_total",
+    "Work items rejected because a pool's queue was full or timed out",
+    ("pool", "reason")
+)
+
+DEFAULT_POOLS = "secure.llm=1/8,secure.documents=2/16,secure.agents=8/64,cloud.llm=16/64,cloud.documents=4/32,cloud.agents=32/128"
+
+# Agents whose work gets a pool of its own; everything else is "agents"
+AGENT_CLASSES = {"internal_knowledge": "documents"}
+
+
+class BulkheadFull(Exception):
+    """Raised when a pool's wait queue is full or the wait timed out."""
+
+    def __init__(self, pool: str, reason: str, retry_after: int):
+        super().__init__(f"Execution pool {pool} is saturated ({reason})")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_pool_sizes(spec: Optional[str]) -> Dict[str, Tuple[int, int]]:
+    """Parse ``name=concurrency/queue,...``, ignoring malformed entries."""
+    sizes: Dict[str, Tuple[int, int]] = {}
+    for item in (spec or "").split(","):
+        name, _, size = item.partition("=")
+        concurrency, _, queue = size.partition("/")
+        try:
+            sizes[name.strip()] = (max(int(concurrency), 1), max(int(queue or 0), 0))
+        except ValueError:
+            continue
+    return sizes
+
+
+def mode_of(llm_config: Optional[Dict[str, Any]]) -> str:
+    """Privacy mode of an LLM config: local models are secure, everything else cloud."""
+    return "secure" if llm_config and llm_config.get("provider") == "local" else "cloud"
+
+
+class ExecutionPool(BoundedLimiter):
+    """
+    One bulkhead: at most ``max_concurrency`` work items run at once and at
+    most ``max_queue`` wait. Blocking calls submitted with ``run`` execute
+    on the pool's own threads, never the loop's default executor.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        super().__init__(name, max_concurrency, max_queue, queue_timeout)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        POOL_CAPACITY.set(max_concurrency, pool=name)
+
+    def _reject(self, reason: str):
+        POOL_REJECTED.inc(pool=self.name, reason=reason)
+        raise BulkheadFull(self.name, reason, self.retry_after())
+
+    def _on_queue_depth(self):
+        POOL_QUEUE_DEPTH.set(self.waiting, pool=self.name)
+
+    def _on_wait(self, seconds: float):
+        POOL_WAIT.observe(seconds, pool=self.name)
+
+    def _on_active(self):
+        POOL_ACTIVE.set(self.active, pool=self.name)
+        POOL_UTILIZATION.set(round(self.active / self.max_concurrency, 4), pool=self.name)
+
+    def _on_busy(self, seconds: float):
+        POOL_BUSY_SECONDS.inc(seconds, pool=self.name)
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking callable on this pool's threads without taking a
+        slot: for work done by a caller that already holds one.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"pharmalens-{self.name}"
+            )
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(context.run, fn, *args)
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking callable on this pool's threads under a slot."""
+        async with self.slot():
+            return await self.submit(fn, *args)
+
+    def status(self) -> Dict[str, Any]:
+        status = super().status()
+        status["utilization"] = round(self.active / self.max_concurrency, 4)
+        return status
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class Bulkheads:
+    """Registry of execution pools keyed by ``<mode>.<class>``."""
+
+    def __init__(self, sizes: Dict[str, Tuple[int, int]], queue_timeout: float):
+        self.queue_timeout = queue_timeout
+        self.pools: Dict[str, ExecutionPool] = {
+            name: ExecutionPool(name, concurrency, queue, queue_timeout)
+            for name, (concurrency, queue) in sizes.items()
+        }
+
+    @classmethod
+    def from_settings(cls) -> "Bulkheads":
+        sizes = parse_pool_sizes(DEFAULT_POOLS)
+        sizes.update(parse_pool_sizes(settings.BULKHEAD_POOLS))
+        return cls(sizes, settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS)
+
+    def pool(self, mode: str, work_class: str) -> ExecutionPool:
+        name = f"{mode}.{work_class}"
+        pool = self.pools.get(name)
+        if pool is None:
+            # Unconfigured combinations get a small pool of their own rather than sharing one
+            pool = self.pools[name] = ExecutionPool(name, 4, 16, self.queue_timeout)
+            logger.warning("execution_pool_not_configured", pool=name)
+        return pool
+
+    def for_agent(self, agent: str, mode: str) -> ExecutionPool:
+        return self.pool(mode, AGENT_CLASSES.get(agent, "agents"))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.status() for name, pool in sorted(self.pools.items())}
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown()
+
+
+bulkheads = Bulkheads.from_settings()
+
+
+# Pool whose slot the current task holds, so agents can offload onto its threads
+_current_pool: contextvars.ContextVar[Optional[ExecutionPool]] = contextvars.ContextVar(
+    "pharmalens_current_pool", default=None
+)
+
+
+@asynccontextmanager
+async def agent_slot(
+    agent: str,
+    llm_config: Optional[Dict[str, Any]] = None,
+    mode: Optional[str] = None
+) -> AsyncIterator[None]:
+    """
+    Run one agent execution inside its bulkhead, with agent metrics and tracing.
+
+    The pool's mode is ``mode`` when given, otherwise derived from ``llm_config``.
+    """
+    pool = bulkheads.for_agent(agent, mode or mode_of(llm_config))
+    async with pool.slot():
+        token = _current_pool.set(pool)
+        try:
+            with track_agent(agent):
+                yield
+        finally:
+            _current_pool.reset(token)
+
+
+async def offload(agent: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run an agent's blocking (CPU or I/O) work off the event loop on its
+    bulkhead's threads. Inside ``agent_slot`` the slot already held is
+    used; called outside one, the work takes a slot of ``agent``'s cloud
+    pool first.
+    """
+    pool = _current_pool.get()
+    if pool is not None:
+        return await pool.submit(fn, *args)
+    return await bulkheads.for_agent(agent, "cloud").run(fn, *args)
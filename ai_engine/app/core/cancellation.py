@@ -0,0 +1,88 @@
+"""
+PharmaLens Request Cancellation
+================================
+Stops work for clients that have gone away (Node server timeout, user
+navigated off the page) instead of running every agent and LLM call to
+completion for a response nobody will read.
+
+Provides:
+- ``cancel_on_disconnect``: an async context manager that listens on the
+  ASGI connection and cancels the enclosing request task when the client
+  disconnects. The CancelledError propagates through the orchestrator's
+  agent awaits and into LLMService, which aborts in-flight OpenAI
+  requests and stops Llama generation at the next token.
+- ClientDisconnected, raised in place of the cancellation so the app can
+  answer with 499 (Client Closed Request) for the access log
+- Cancelled-request metrics (agent and LLM work avoided is recorded by
+  ``track_agent`` and LLMService)
+"""
+
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import structlog
+from fastapi import Request
+
+from .config import settings
+from .metrics import registry
+
+logger = structlog.get_logger(__name__)
+
+REQUESTS_CANCELLED = registry.counter(
+    "pharmalens_requests_cancelled_total",
+    "Requests cancelled because the client disconnected",
+    ("route",)
+)
+
+
+class ClientDisconnected(Exception):
+    """The client disconnected and the request's work was cancelled."""
+
+    def __init__(self, route: str, elapsed_seconds: float):
+        super().__init__(f"Client disconnected from {route} after {elapsed_seconds:.2f}s")
+        self.route = route
+        self.elapsed_seconds = elapsed_seconds
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request, route: str) -> AsyncIterator[None]:
+    """
+    Cancel the enclosing block when the client disconnects.
+
+    FastAPI has already read the request body, so the only message left on
+    the ASGI receive channel is ``http.disconnect``; a watcher task waits
+    for it and cancels the current task. The block's CancelledError is
+    converted into ClientDisconnected on exit.
+    """
+    if not settings.CANCEL_ON_DISCONNECT:
+        yield
+        return
+
+    task = asyncio.current_task()
+    started = time.perf_counter()
+    disconnected = False
+
+    async def watch():
+        nonlocal disconnected
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                disconnected = True
+                task.cancel()
+                return
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        task.uncancel()
+        elapsed = time.perf_counter() - started
+        REQUESTS_CANCELLED.inc(route=route)
+        logger.info("request_cancelled_client_disconnected", route=route, elapsed_ms=round(elapsed * 1000, 2))
+        raise ClientDisconnected(route, elapsed)
+    finally:
+        watcher.cancel()
@@ -6,6 +6,7 @@ Application settings and configuration management.
 
 import os
 from typing import Optional
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
@@ -33,6 +34,12 @@ class Settings(BaseSettings):
     LOCAL_MODEL_NAME: str = "llama-3-8b"
     LOCAL_ENABLED: bool = True
     
+    # Simulated backend latency (see app/core/latency.py)
+    LATENCY_MODE: str = "uniform"  # uniform | zero | fixed | recorded
+    LATENCY_PERCENTILE: float = 0.5
+    LATENCY_SCALE: float = 1.0
+    LATENCY_RECORDED_FILE: Optional[str] = None
+    
     # Node.js Backend
     NODE_BACKEND_URL: str = "http://localhost:3001"
     
@@ -43,6 +50,107 @@ class Settings(BaseSettings):
     
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "console"  # "console" (dev) or "json" (production, async writer)
+    LOG_FILE: Optional[str] = None  # json mode writes to stdout when unset
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 256
+    LOG_ROTATE_BYTES: int = 50 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_SAMPLE_RATES: str = ""  # e.g. "agent_completed=0.1,request_processed=0.5"
+    
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    
+    # Tracing
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "jsonl"  # "jsonl" or "otlp"
+    TRACING_JSONL_PATH: str = "traces/traces.jsonl"
+    TRACING_JSONL_MAX_BYTES: int = 50 * 1024 * 1024  # rotated beyond this size
+    TRACING_JSONL_BACKUP_COUNT: int = 3
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATE: float = 1.0
+    
+    # On-demand request profiling
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 200  # oldest stored profiles are pruned beyond this
+    
+    # /api/debug/* endpoints (traces, profiles, event loop, pools)
+    DEBUG_ENDPOINTS_ENABLED: bool = False
+    DEBUG_TOKEN: Optional[str] = None  # required in X-Debug-Token when set
+    
+    # Event-loop lag monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: float = 100.0
+    LOOP_MONITOR_BLOCK_THRESHOLD_MS: float = 100.0
+    
+    # Admission control (per endpoint class: concurrency limit + bounded queue)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_ORCHESTRATE_CONCURRENCY: int = 8
+    ADMISSION_ORCHESTRATE_QUEUE: int = 32
+    ADMISSION_SINGLE_AGENT_CONCURRENCY: int = 32
+    ADMISSION_SINGLE_AGENT_QUEUE: int = 128
+    ADMISSION_INGEST_CONCURRENCY: int = 2
+    ADMISSION_INGEST_QUEUE: int = 8
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    ADMISSION_SERVE_STALE: bool = True
+    ADMISSION_STALE_MAX_AGE_SECONDS: float = 3600.0
+    ADMISSION_STALE_MAX_ENTRIES: int = 512
+    
+    # Bulkheads: execution pools per privacy mode and work class (see app/core/bulkhead.py)
+    BULKHEAD_POOLS: str = ""  # overrides, e.g. "secure.llm=1/8,cloud.agents=32/128"
+    BULKHEAD_QUEUE_TIMEOUT_SECONDS: float = 60.0
+    
+    # Cancel agent and LLM work when the client disconnects
+    CANCEL_ON_DISCONNECT: bool = True
+
+    # Idempotent requests: retries with the same request_id replay the original
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_STORE_PATH: str = "idempotency/responses.sqlite3"
+    IDEMPOTENCY_RETENTION_SECONDS: float = 3600.0
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS: float = 180.0
+    IDEMPOTENCY_MAX_STORED_BYTES: int = 4_000_000
+
+    # Response compression (gzip, or brotli when installed) for large bodies
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 4096
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # MessagePack responses for clients sending Accept: application/msgpack (needs msgpack)
+    MSGPACK_ENABLED: bool = True
+
+    # HTTP caching: ETags of result content, If-None-Match -> 304, Cache-Control per agent TTL
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_TTLS: str = ""  # overrides, e.g. "market=600,web_intelligence=60"
+    HTTP_CACHE_DEFAULT_TTL_SECONDS: int = 300
+
+    # Local ClinicalTrials.gov store (build: python -m app.services.trial_store ingest <export>)
+    TRIAL_STORE_DIR: str = "data/trials"
+
+    # FAERS disproportionality signals (build: python -m app.services.safety_signals ingest <quarters>)
+    SAFETY_SIGNALS_DIR: str = "data/faers"
+
+    # Local patent index: FTS5 + expiry index (build: python -m app.services.patent_index ingest <bulk files>)
+    PATENT_INDEX_PATH: str = "data/patents/patents.sqlite3"
+
+    # MinHash/LSH claim screening over the patent index (build: python -m app.services.claim_screening build)
+    CLAIM_INDEX_DIR: str = "data/patents/claims"
+
+    # Patent citation/family graph over the patent index (build: python -m app.services.patent_graph build)
+    PATENT_GRAPH_DIR: str = "data/patents/graph"
+
+    # Patent cliff interval index (build: python -m app.services.patent_cliff build --orange-book <release>)
+    PATENT_CLIFF_DIR: str = "data/patent_cliff"
+
+    # Monte Carlo ROI simulation in MarketAgent (seed makes ROI outputs reproducible)
+    ROI_SIMULATION_SCENARIOS: int = Field(100000, ge=1)
+    ROI_SIMULATION_SEED: Optional[int] = None
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,201 @@
+"""
+PharmaLens HTTP Caching
+========================
+Conditional requests for agent and orchestration results, so the UI and
+the Node server revalidate a 100+ KB payload they already hold instead of
+downloading it again.
+
+Provides:
+- Weak ETags from a hash of the response's content without the echoed
+  request_id and per-call timestamps and timings, so the same result
+  asked for by a new request (the Node server sends a fresh request_id
+  every time) revalidates; compressed variants carry a ``-gzip``/``-br``
+  suffix so each encoding has its own validator. Endpoint payloads are
+  tagged once, from the payload, when the response is built
+  (``payload_etag``); other bodies are parsed back (``etag_for``)
+- ``If-None-Match`` evaluation answering 304 Not Modified. The analysis
+  endpoints are read-only POSTs, so they get the GET/HEAD rule (304)
+  rather than 412
+- ``Cache-Control`` max-age from per-agent TTLs that follow how often each
+  agent's source data changes (HTTP_CACHE_TTLS overrides, e.g.
+  ``market=600,web_intelligence=60``); a multi-agent response uses the
+  shortest TTL among its agents
+"""
+
+import re
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from .config import settings
+from .metrics import registry
+from .serialization import canonical_dumps, load_body
+
+CONDITIONAL_REQUESTS = registry.counter(
+    "pharmalens_conditional_requests_total",
+    "Requests carrying If-None-Match, by outcome (not_modified/modified)",
+    ("result",)
+)
+
+DEFAULT_CACHE_TTLS = (
+    "clinical=21600,patent=86400,market=3600,iqvia=3600,exim=21600,vision=86400,"
+    "kol=86400,pathfinder=86400,web_intelligence=900,internal_knowledge=300,validation=3600"
+)
+
+# Suffixes appended to an ETag for each Content-Encoding
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+# Fields that differ on every call without changing the result: left out of ETags
+VOLATILE_FIELDS = frozenset({
+    "request_id", "analysis_date", "timestamp", "last_updated",
+    "processing_time_ms", "total_processing_time_ms", "duration_ms", "elapsed_ms", "simulation_ms"
+})
+
+
+def parse_ttls(spec: Optional[str]) -> Dict[str, int]:
+    """Parse ``agent=seconds,...``, ignoring malformed entries."""
+    ttls: Dict[str, int] = {}
+    for item in (spec or "").split(","):
+        name, _, seconds = item.partition("=")
+        try:
+            ttls[name.strip()] = max(int(seconds), 0)
+        except ValueError:
+            continue
+    return ttls
+
+
+class CachePolicy:
+    """Per-agent TTLs turned into Cache-Control headers."""
+
+    def __init__(self, ttls: Dict[str, int], default_ttl: int):
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+
+    @classmethod
+    def from_settings(cls) -> "CachePolicy":
+        ttls = parse_ttls(DEFAULT_CACHE_TTLS)
+        ttls.update(parse_ttls(settings.HTTP_CACHE_TTLS))
+        return cls(ttls, settings.HTTP_CACHE_DEFAULT_TTL_SECONDS)
+
+    def ttl(self, agents: Iterable[str]) -> int:
+        ttls = [self.ttls.get(agent, self.default_ttl) for agent in agents]
+        return min(ttls) if ttls else self.default_ttl
+
+    def cache_control(self, agents: Iterable[str]) -> str:
+        ttl = self.ttl(agents)
+        # private: results depend on the caller's privacy mode and must not sit in shared caches
+        return f"private, max-age={ttl}" if ttl > 0 else "private, no-cache"
+
+
+cache_policy = CachePolicy.from_settings()
+
+
+# Volatile keys as they appear in canonical JSON. Inside JSON strings quotes
+# are escaped, so a match is always a real key.
+_VOLATILE_KEYS = tuple(f'"{field}":'.encode("ascii") for field in sorted(VOLATILE_FIELDS))
+_SCALAR_END = re.compile(rb"[,}\]]")
+
+
+def _value_end(content: bytes, start: int) -> Optional[int]:
+    """End of the scalar JSON value at ``start`` (None for an object or array)."""
+    if content[start] == 0x22:  # a string: find the closing, unescaped quote
+        end = start + 1
+        while True:
+            end = content.index(b'"', end)
+            escapes = 0
+            while content[end - 1 - escapes] == 0x5C:
+                escapes += 1
+            if escapes % 2 == 0:
+                return end + 1
+            end += 1
+    if content[start] in b"{[":
+        return None
+    match = _SCALAR_END.search(content, start)
+    return match.start() if match else len(content)
+
+
+def _blank_volatile(content: bytes) -> bytes:
+    """Canonical JSON with the scalar value of every volatile field replaced by null."""
+    spans = []
+    for key in _VOLATILE_KEYS:
+        found = content.find(key)
+        while found != -1:
+            start = found + len(key)
+            end = _value_end(content, start)
+            if end is not None:
+                spans.append((start, end))
+            found = content.find(key, start)
+    if not spans:
+        return content
+    spans.sort()
+    parts = []
+    cursor = 0
+    for start, end in spans:
+        parts.append(content[cursor:start])
+        parts.append(b"null")
+        cursor = end
+    parts.append(content[cursor:])
+    return b"".join(parts)
+
+
+def _weak_etag(media_type: Optional[str], content: bytes) -> str:
+    digest = hashlib.blake2b(f"{media_type or ''}\n".encode("utf-8"), digest_size=16)
+    digest.update(content)
+    return 'W/"' + digest.hexdigest() + '"'
+
+
+def payload_etag(payload: Any, media_type: Optional[str] = None) -> str:
+    """
+    Weak ETag of a payload: a hash of its sorted-key JSON encoding with the
+    values of VOLATILE_FIELDS blanked, so no copy of the payload is made.
+    The media type is hashed too, so each format has its own validator.
+    """
+    return _weak_etag(media_type, _blank_volatile(canonical_dumps(payload)))
+
+
+def etag_for(body: bytes, media_type: Optional[str] = None) -> str:
+    """
+    Weak ETag of an encoded JSON or MessagePack body, equal to the
+    payload_etag of its content (bodies that do not parse are hashed as
+    they are).
+    """
+    try:
+        content = load_body(body, media_type)
+    except ValueError:
+        return _weak_etag(media_type, body)
+    return payload_etag(content, media_type)
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """The ETag of a ``coding``-encoded variant of the body tagged ``etag``."""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    """Weak-compare form: no W/ prefix, no quotes, no encoding suffix."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)]
+    return tag
+
+
+def if_none_match(header: Optional[str], etag: str) -> Optional[str]:
+    """
+    The client's tag from ``If-None-Match`` that matches ``etag`` (its copy
+    is current), or None. Echoing that tag in the 304 keeps the validator
+    of whichever encoding the client holds.
+    """
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    current = _opaque_tag(etag)
+    for tag in header.split(","):
+        if _opaque_tag(tag) == current:
+            return tag.strip()
+    return None
@@ -0,0 +1,278 @@
+"""
+PharmaLens Idempotent Requests
+===============================
+Retries of a request the engine has already seen (the Node server retries
+shed and failed calls with the same ``request_id``) are answered from the
+original execution instead of running every agent again.
+
+Provides:
+- Request keys: ``request_id`` plus route, with a hash of the full JSON
+  payload so a reused request_id carrying different content is rejected
+  (422) rather than answered with someone else's result
+- In-flight deduplication: a duplicate arriving while the original is
+  still running waits for it and receives the same response (or the 422
+  when its payload differs)
+- ResponseStore: a compact SQLite store (zlib-compressed bodies, WAL mode)
+  shared by all uvicorn workers, so a duplicate that lands on another
+  worker attaches to or replays the original too; entries expire after
+  the retention window
+"""
+
+import os
+import json
+import time
+import zlib
+import asyncio
+import hashlib
+import functools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import structlog
+
+from .config import settings
+from .metrics import registry, record_cache_lookup
+from .serialization import load_body
+
+logger = structlog.get_logger(__name__)
+
+IDEMPOTENT_REQUESTS = registry.counter(
+    "pharmalens_idempotent_requests_total",
+    "Requests carrying a request_id, by how they were answered",
+    ("result",)
+)
+
+# Seconds between store polls while another worker runs the original
+PENDING_POLL_SECONDS = 0.25
+
+# Expired entries are purged once every this many claims
+PURGE_EVERY = 256
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    media_type: str
+    body: bytes
+    cache_control: Optional[str] = None
+
+
+def request_key(method: str, path: str, body: bytes, content_type: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """
+    ``(key, payload_hash)`` for a JSON or MessagePack request carrying a
+    request_id, or None when the request cannot be deduplicated.
+    """
+    try:
+        payload = load_body(body, content_type) if body else None
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    request_id = payload.get("request_id")
+    if not isinstance(request_id, str) or not request_id:
+        return None
+    key = hashlib.blake2b(f"{method} {path} {request_id}".encode("utf-8"), digest_size=16).hexdigest()
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    payload_hash = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+    return key, payload_hash
+
+
+class ResponseStore:
+    """
+    Completed and pending requests in one SQLite table.
+
+    A row is inserted as ``pending`` when a worker claims a key (the claim
+    is a single IMMEDIATE transaction, so exactly one worker wins) and is
+    filled in with the compressed response when the request succeeds, or
+    deleted when it fails so a retry can run it again. Pending rows older
+    than ``pending_timeout`` belong to a crashed worker and are taken over.
+    """
+
+    def __init__(self, path: str, retention_seconds: float, pending_timeout: float):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.pending_timeout = pending_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._claims = 0
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a store method on the store's own thread: off the event loop,
+        and out of the default executor and the agents' bulkheads.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pharmalens-idempotency")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " payload_hash TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " status_code INTEGER,"
+                " media_type TEXT,"
+                " cache_control TEXT,"
+                " body BLOB,"
+                " created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._conn = conn
+        return self._conn
+
+    def claim(self, key: str, payload_hash: str) -> Tuple[str, Optional[StoredResponse]]:
+        """
+        Claim ``key`` for execution. Returns ``("claimed", None)``,
+        ``("done", response)``, ``("pending", None)`` or ``("conflict", None)``.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT payload_hash, state, status_code, media_type, body, created, cache_control FROM responses WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                expired = row is not None and (
+                    row[5] < now - self.retention_seconds
+                    or (row[1] == "pending" and row[5] < now - self.pending_timeout)
+                )
+                if row is None or expired:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, payload_hash, state, created) VALUES (?, ?, 'pending', ?)",
+                        (key, payload_hash, now)
+                    )
+                    outcome: Tuple[str, Optional[StoredResponse]] = ("claimed", None)
+                elif row[0] != payload_hash:
+                    outcome = ("conflict", None)
+                elif row[1] == "done":
+                    outcome = ("done", StoredResponse(row[2], row[3], zlib.decompress(row[4]), row[6]))
+                else:
+                    outcome = ("pending", None)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            self._claims += 1
+            if self._claims % PURGE_EVERY == 0:
+                conn.execute("DELETE FROM responses WHERE created < ?", (now - self.retention_seconds,))
+        return outcome
+
+    def complete(self, key: str, response: Optional[StoredResponse]):
+        """Store the response for a claimed key, or release the claim when None."""
+        with self._lock:
+            conn = self._connect()
+            if response is None:
+                conn.execute("DELETE FROM responses WHERE key = ? AND state = 'pending'", (key,))
+            else:
+                conn.execute(
+                    "UPDATE responses SET state = 'done', status_code = ?, media_type = ?, body = ?, cache_control = ?"
+                    " WHERE key = ?",
+                    (response.status_code, response.media_type, zlib.compress(response.body, 6), response.cache_control, key)
+                )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class Idempotency:
+    """In-flight request futures for this worker in front of the shared ResponseStore."""
+
+    def __init__(self, store: ResponseStore, max_stored_bytes: int):
+        self.store = store
+        self.max_stored_bytes = max_stored_bytes
+        # key -> (payload hash, future of the original's response)
+        self._inflight: Dict[str, Tuple[str, "asyncio.Future[Optional[StoredResponse]]"]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "Idempotency":
+        return cls(
+            ResponseStore(
+                settings.IDEMPOTENCY_STORE_PATH,
+                settings.IDEMPOTENCY_RETENTION_SECONDS,
+                settings.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS
+            ),
+            settings.IDEMPOTENCY_MAX_STORED_BYTES
+        )
+
+    async def begin(self, key: str, payload_hash: str) -> Tuple[str, Optional[StoredResponse]]:
+        """
+        Decide how to answer a request. Returns ``("execute", None)`` when
+        the caller must run it and then call ``finish``; ``("attached", r)``
+        or ``("replayed", r)`` with the original's response; or
+        ``("conflict", None)`` when the request_id was used for a
+        different payload.
+        """
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                inflight_hash, future = inflight
+                if inflight_hash != payload_hash:
+                    return "conflict", None
+                response = await asyncio.shield(future)
+                if response is not None:
+                    return "attached", response
+                continue  # the original failed; run it (or attach to whoever does)
+
+            # Placeholder first, so same-worker duplicates attach while the claim is in the store
+            self._inflight[key] = (payload_hash, asyncio.get_running_loop().create_future())
+            try:
+                state, response = await self.store.call(self.store.claim, key, payload_hash)
+            except sqlite3.Error as e:
+                # Without the store only this worker deduplicates; run the request rather than fail it
+                logger.warning("idempotency_store_failed", error=str(e))
+                record_cache_lookup("idempotency", False)
+                return "execute", None
+            except BaseException:
+                self._release(key, None)
+                raise
+            if state == "claimed":
+                record_cache_lookup("idempotency", False)
+                return "execute", None
+            self._release(key, response)
+            if state == "done":
+                record_cache_lookup("idempotency", True)
+                return "replayed", response
+            if state == "conflict":
+                return "conflict", None
+            # Pending on another worker: wait for it to finish (or be taken over)
+            await asyncio.sleep(PENDING_POLL_SECONDS)
+
+    def _release(self, key: str, response: Optional[StoredResponse]):
+        inflight = self._inflight.pop(key, None)
+        if inflight is not None and not inflight[1].done():
+            inflight[1].set_result(response)
+
+    async def finish(self, key: str, response: Optional[StoredResponse]):
+        """Publish the original's response (None when it is not replayable) to duplicates and the store."""
+        self._release(key, response)
+        if response is not None and len(response.body) > self.max_stored_bytes:
+            logger.info("idempotent_response_not_stored", size=len(response.body))
+            response = None
+        try:
+            await self.store.call(self.store.complete, key, response)
+        except sqlite3.Error as e:
+            logger.warning("idempotency_store_failed", error=str(e))
+
+
+idempotency = Idempotency.from_settings()
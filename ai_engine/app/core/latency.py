@@ -0,0 +1,105 @@
+"""
+PharmaLens Latency Model
+=========================
+Central control over the simulated backend latency of every agent.
+
+Agents call ``await latency_model.wait(key, low, high)`` where ``key``
+names the simulated backend call (e.g. ``clinical.analyze``) and
+``low``/``high`` are the agent's default latency range in seconds.
+
+Modes (LATENCY_MODE):
+- uniform: random.uniform(low, high), the historical behaviour (default)
+- zero: no delay at all, so benchmarks measure only real compute
+- fixed: a fixed percentile (LATENCY_PERCENTILE) of the recorded samples
+  for the key, or of the default range when none were recorded
+- recorded: draw from recorded production samples (LATENCY_RECORDED_FILE),
+  falling back to uniform for keys without samples
+
+The recorded file is JSON mapping each key to latency samples in seconds::
+
+    {"clinical.analyze": [0.91, 1.12, 1.4], "vision.analyze": [1.8, 2.2]}
+
+All delays are multiplied by LATENCY_SCALE.
+"""
+
+import json
+import random
+import asyncio
+from typing import Dict, List, Optional
+
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger(__name__)
+
+LATENCY_MODES = ("uniform", "zero", "fixed", "recorded")
+
+
+class LatencyModel:
+    """Decides how long each simulated backend call takes."""
+
+    def __init__(
+        self,
+        mode: str = "uniform",
+        percentile: float = 0.5,
+        scale: float = 1.0,
+        recorded: Optional[Dict[str, List[float]]] = None
+    ):
+        if mode not in LATENCY_MODES:
+            raise ValueError(f"Unknown latency mode: {mode} (expected one of {', '.join(LATENCY_MODES)})")
+        self.mode = mode
+        self.percentile = min(max(percentile, 0.0), 1.0)
+        self.scale = scale
+        self.recorded = {key: sorted(samples) for key, samples in (recorded or {}).items() if samples}
+
+    @classmethod
+    def from_settings(cls) -> "LatencyModel":
+        recorded = None
+        if settings.LATENCY_RECORDED_FILE:
+            try:
+                with open(settings.LATENCY_RECORDED_FILE, encoding="utf-8") as handle:
+                    recorded = json.load(handle)
+            except (OSError, ValueError) as e:
+                logger.warning("latency_recording_unreadable", path=settings.LATENCY_RECORDED_FILE, error=str(e))
+        return cls(
+            mode=settings.LATENCY_MODE,
+            percentile=settings.LATENCY_PERCENTILE,
+            scale=settings.LATENCY_SCALE,
+            recorded=recorded
+        )
+
+    def delay(self, key: str, low: float, high: float) -> float:
+        """Delay in seconds for one simulated call."""
+        if self.mode == "zero":
+            return 0.0
+
+        samples = self.recorded.get(key)
+        if self.mode == "fixed":
+            if samples:
+                index = min(int(self.percentile * len(samples)), len(samples) - 1)
+                seconds = samples[index]
+            else:
+                seconds = low + self.percentile * (high - low)
+        elif self.mode == "recorded" and samples:
+            seconds = random.choice(samples)
+        else:
+            seconds = random.uniform(low, high)
+
+        return seconds * self.scale
+
+    async def wait(self, key: str, low: float, high: Optional[float] = None):
+        """
+        Simulate the latency of a backend call.
+
+        Args:
+            key: Simulated call name, ``<agent>.<operation>``
+            low: Lower bound of the default latency range (seconds)
+            high: Upper bound of the default range; defaults to ``low``
+        """
+        seconds = self.delay(key, low, low if high is None else high)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+
+latency_model = LatencyModel.from_settings()
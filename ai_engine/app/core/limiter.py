@@ -0,0 +1,101 @@
+"""
+PharmaLens Bounded Limiter
+===========================
+Concurrency limit plus bounded FIFO wait queue, shared by admission
+control (per endpoint class) and the bulkheads (per execution pool).
+
+Provides:
+- BoundedLimiter: up to ``max_concurrency`` holders at once and up to
+  ``max_queue`` waiters; a waiter arriving to a full queue, or waiting
+  longer than ``queue_timeout`` seconds, is rejected
+- A Retry-After estimate: the time the current queue needs to drain at
+  the observed (EWMA) service time
+- Hooks for subclasses to publish queue depth, wait, active and busy
+  time under their own metric names and to raise their own rejection
+"""
+
+import abc
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, NoReturn
+
+
+class BoundedLimiter(abc.ABC):
+    """
+    Semaphore with a bounded wait queue. Subclasses implement ``_reject``
+    (which must raise) and may override the ``_on_*`` metric hooks.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.active = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._service_seconds = 1.0
+
+    def retry_after(self) -> int:
+        drain = self._service_seconds * (self.waiting + 1) / self.max_concurrency
+        return min(max(math.ceil(drain), 1), 120)
+
+    @abc.abstractmethod
+    def _reject(self, reason: str) -> NoReturn:
+        """Raise the subclass's rejection for ``reason`` (queue_full or queue_timeout)."""
+
+    def _on_queue_depth(self):
+        pass
+
+    def _on_wait(self, seconds: float):
+        pass
+
+    def _on_active(self):
+        pass
+
+    def _on_busy(self, seconds: float):
+        pass
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot for the duration of the block."""
+        queued_at = time.perf_counter()
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            self.waiting += 1
+            self._on_queue_depth()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("queue_timeout")
+            finally:
+                self.waiting -= 1
+                self._on_queue_depth()
+        else:
+            await self._semaphore.acquire()
+        self._on_wait(time.perf_counter() - queued_at)
+
+        self.active += 1
+        self._on_active()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            busy = time.perf_counter() - started
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * busy
+            self.active -= 1
+            self._on_active()
+            self._on_busy(busy)
+            self._semaphore.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "service_seconds_ewma": round(self._service_seconds, 3)
+        }
@@ -0,0 +1,295 @@
+"""
+PharmaLens Logging Pipeline
+============================
+structlog configuration for development and production.
+
+Modes (LOG_FORMAT):
+- console: human-readable ConsoleRenderer printed synchronously (default)
+- json: production mode; the event loop only runs the cheap processors
+  and appends the event dict to a bounded buffer. A background writer
+  thread formats timestamps, renders JSON, batches writes to LOG_FILE
+  (or stdout), rotates by size and drops records with a counter when
+  the buffer is full.
+
+High-volume events can be sampled with LOG_SAMPLE_RATES, e.g.
+``agent_completed=0.1,request_processed=0.5``.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import structlog
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+from .metrics import registry
+
+LOG_RECORDS_DROPPED = registry.counter(
+    "pharmalens_log_records_dropped_total",
+    "Log records dropped because the log queue was full"
+)
+LOG_RECORDS_SAMPLED_OUT = registry.counter(
+    "pharmalens_log_records_sampled_out_total",
+    "Log records skipped by event sampling",
+    ("event",)
+)
+
+
+def _dumps(event_dict: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(event_dict, default=str).decode("utf-8")
+    return json.dumps(event_dict, default=str)
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    """Parse ``event=rate,event=rate`` into a dict, ignoring malformed entries."""
+    rates: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        event, _, rate = item.partition("=")
+        try:
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class EventSampler:
+    """structlog processor that keeps only a fraction of selected events."""
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        event = event_dict.get("event")
+        rate = self.rates.get(event)
+        if rate is None or method_name in ("warning", "error", "critical", "exception"):
+            return event_dict
+        if random.random() >= rate:
+            LOG_RECORDS_SAMPLED_OUT.inc(event=event)
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def _raw_timestamp(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a float timestamp; the writer thread formats it as ISO-8601."""
+    event_dict["timestamp"] = time.time()
+    return event_dict
+
+
+def _defer_rendering(logger, method_name: str, event_dict: Dict[str, Any]):
+    """Final processor: hand the raw event dict to the queue logger."""
+    return (event_dict,), {}
+
+
+class AsyncLogWriter:
+    """
+    Bounded buffer plus background thread that writes log lines in batches.
+
+    ``submit`` never blocks and takes no lock: it appends to a deque, or
+    drops and counts the record when ``max_queue_size`` records are
+    already waiting. The writer thread wakes every ``flush_interval_seconds``,
+    renders JSON, writes up to ``batch_size`` records per write call and
+    rotates the file once it exceeds ``max_bytes`` (keeping
+    ``backup_count`` old files).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_queue_size: int = 10000,
+        batch_size: int = 256,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        flush_interval_seconds: float = 0.05
+    ):
+        self.path = path
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval_seconds = flush_interval_seconds
+        self.dropped = 0
+        self.written = 0
+        self._dropped_reported = 0
+        self._buffer: deque = deque()
+        self._stop = threading.Event()
+        self._stream = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="pharmalens-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, event_dict: Dict[str, Any]):
+        if len(self._buffer) >= self.max_queue_size:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self._buffer.append(event_dict)
+
+    def _open(self):
+        if self.path is None:
+            self._stream = sys.stdout
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._stream = open(self.path, "a", encoding="utf-8")
+        self._size = self._stream.tell()
+
+    def _rotate(self):
+        self._stream.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    @staticmethod
+    def _render(record: Dict[str, Any]) -> str:
+        timestamp = record.get("timestamp")
+        if isinstance(timestamp, float):
+            record["timestamp"] = datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+        return _dumps(record)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        if self._stream is None:
+            self._open()
+        dropped = self.dropped
+        if dropped != self._dropped_reported:
+            batch.append({"event": "log_records_dropped", "level": "warning", "dropped_total": dropped})
+            self._dropped_reported = dropped
+        data = "".join(self._render(record) + "\n" for record in batch)
+        self._stream.write(data)
+        self._stream.flush()
+        self.written += len(batch)
+        if self.path is not None:
+            self._size += len(data.encode("utf-8"))
+            if self.max_bytes and self._size >= self.max_bytes:
+                self._rotate()
+
+    def _drain(self):
+        buffer = self._buffer
+        while buffer:
+            batch = []
+            while buffer and len(batch) < self.batch_size:
+                batch.append(buffer.popleft())
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"log writer failed: {e}", file=sys.stderr)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            self._drain()
+        self._drain()
+
+    def close(self, timeout: float = 5.0):
+        """Flush buffered records and stop the writer thread."""
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        if self._stream is not None and self._stream is not sys.stdout:
+            self._stream.close()
+
+
+class QueueLogger:
+    """structlog-compatible logger that forwards event dicts to a writer."""
+
+    def __init__(self, writer: AsyncLogWriter):
+        self._writer = writer
+
+    def msg(self, event_dict: Dict[str, Any]):
+        self._writer.submit(event_dict)
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+
+class QueueLoggerFactory:
+    def __init__(self, writer: AsyncLogWriter):
+        self.writer = writer
+
+    def __call__(self, *args) -> QueueLogger:
+        return QueueLogger(self.writer)
+
+
+_writer: Optional[AsyncLogWriter] = None
+
+
+def configure_logging(settings) -> Optional[AsyncLogWriter]:
+    """
+    Configure stdlib logging and structlog from application settings.
+
+    Returns:
+        The background writer in json mode, otherwise None
+    """
+    global _writer
+
+    level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+    logging.basicConfig(
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        level=level
+    )
+
+    sampler = EventSampler(parse_sample_rates(settings.LOG_SAMPLE_RATES))
+
+    if settings.LOG_FORMAT != "json":
+        structlog.configure(
+            processors=[
+                sampler,
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.add_log_level,
+                structlog.processors.StackInfoRenderer(),
+                structlog.processors.format_exc_info,
+                structlog.processors.UnicodeDecoder(),
+                structlog.dev.ConsoleRenderer()
+            ],
+            wrapper_class=structlog.make_filtering_bound_logger(level),
+            context_class=dict,
+            logger_factory=structlog.PrintLoggerFactory(),
+            cache_logger_on_first_use=True
+        )
+        return None
+
+    _writer = AsyncLogWriter(
+        path=settings.LOG_FILE,
+        max_queue_size=settings.LOG_QUEUE_SIZE,
+        batch_size=settings.LOG_BATCH_SIZE,
+        max_bytes=settings.LOG_ROTATE_BYTES,
+        backup_count=settings.LOG_BACKUP_COUNT
+    )
+    structlog.configure(
+        processors=[
+            sampler,
+            _raw_timestamp,
+            structlog.processors.add_log_level,
+            structlog.processors.format_exc_info,
+            _defer_rendering
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        context_class=dict,
+        logger_factory=QueueLoggerFactory(_writer),
+        cache_logger_on_first_use=True
+    )
+    return _writer
+
+
+def shutdown_logging():
+    """Flush and stop the background writer, if any."""
+    if _writer is not None:
+        _writer.close()
@@ -0,0 +1,205 @@
+"""
+PharmaLens Event-Loop Monitor
+==============================
+Detects synchronous work that stalls the asyncio event loop.
+
+Provides:
+- A heartbeat task that measures scheduling lag into a histogram
+- A watchdog thread that captures the loop thread's stack when a
+  heartbeat is overdue by more than the blocking threshold
+- Attribution of each stall to the agent and route on the stack
+- A worst-offenders report for the debug endpoint
+
+Agent ``analyze`` methods are async but run their ``_analyze_*``,
+``_find_*`` and ``_identify_*`` helpers inline, so any slow helper shows
+up here with the agent module and helper name that blocked.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Dict, Any, Optional, Tuple
+
+import structlog
+
+from .config import settings
+from .metrics import registry
+
+logger = structlog.get_logger(__name__)
+
+EVENT_LOOP_LAG = registry.histogram(
+    "pharmalens_event_loop_lag_seconds",
+    "Delay between a heartbeat's scheduled and actual wake-up time",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EVENT_LOOP_BLOCKS = registry.counter(
+    "pharmalens_event_loop_blocks_total",
+    "Event-loop stalls longer than the blocking threshold",
+    ("agent", "route")
+)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_AGENTS_DIR = os.path.join(_APP_DIR, "agents")
+_MAIN_FILE = os.path.join(_APP_DIR, "main.py")
+
+
+def attribute_stack(frame) -> Dict[str, Optional[str]]:
+    """
+    Attribute a captured stack to the agent and route it belongs to.
+
+    Returns:
+        Dict with agent (agent module), route (endpoint function in
+        app/main.py) and culprit (innermost application frame)
+    """
+    agent = route = culprit = None
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_DIR):
+            location = f"{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.f_lineno} {frame.f_code.co_name}"
+            if culprit is None:
+                culprit = location
+            if agent is None and filename.startswith(_AGENTS_DIR):
+                agent = os.path.splitext(os.path.basename(filename))[0]
+            if route is None and filename == _MAIN_FILE:
+                route = frame.f_code.co_name
+        frame = frame.f_back
+    return {"agent": agent, "route": route, "culprit": culprit}
+
+
+class EventLoopMonitor:
+    """
+    Measures event-loop lag and captures the stacks of blocking callbacks.
+
+    The heartbeat coroutine sleeps for ``interval_seconds`` and records how
+    late it woke up. The watchdog thread notices a heartbeat that is more
+    than ``block_threshold_seconds`` overdue and snapshots the loop thread's
+    stack while it is still blocked; when the heartbeat finally runs, the
+    stall's full duration is recorded against that stack.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 0.1,
+        block_threshold_seconds: float = 0.1,
+        max_offenders: int = 200
+    ):
+        self.interval_seconds = interval_seconds
+        self.block_threshold_seconds = block_threshold_seconds
+        self.max_offenders = max_offenders
+        self.offenders: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.max_lag_seconds = 0.0
+        self._expected_wake = 0.0
+        self._beat = 0
+        self._pending: Optional[Tuple[int, Dict[str, Any]]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the heartbeat task on the running loop and the watchdog thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wake = time.monotonic() + self.interval_seconds
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="pharmalens-loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            "event_loop_monitor_started",
+            interval_ms=self.interval_seconds * 1000,
+            block_threshold_ms=self.block_threshold_seconds * 1000
+        )
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+        if self._watchdog:
+            self._watchdog.join(timeout=1.0)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            now = time.monotonic()
+            lag = max(now - self._expected_wake, 0.0)
+            EVENT_LOOP_LAG.observe(lag)
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+            pending = self._pending
+            if pending is not None and pending[0] == self._beat:
+                self._record_block(pending[1], lag)
+            self._pending = None
+
+            self._expected_wake = now + self.interval_seconds
+            self._beat += 1
+
+    def _watch(self):
+        poll_seconds = max(self.block_threshold_seconds / 4, 0.005)
+        while not self._stop.wait(poll_seconds):
+            overdue = time.monotonic() - self._expected_wake
+            if overdue < self.block_threshold_seconds:
+                continue
+            beat = self._beat
+            if self._pending is not None and self._pending[0] == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            capture = attribute_stack(frame)
+            capture["stack"] = "".join(traceback.format_stack(frame, limit=30))
+            self._pending = (beat, capture)
+
+    def _record_block(self, capture: Dict[str, Any], blocked_seconds: float):
+        agent = capture["agent"] or "none"
+        route = capture["route"] or "none"
+        culprit = capture["culprit"] or "outside app"
+        EVENT_LOOP_BLOCKS.inc(agent=agent, route=route)
+
+        key = (agent, route, culprit)
+        blocked_ms = round(blocked_seconds * 1000, 2)
+        entry = self.offenders.get(key)
+        if entry is None:
+            if len(self.offenders) >= self.max_offenders:
+                smallest = min(self.offenders, key=lambda k: self.offenders[k]["max_blocked_ms"])
+                if self.offenders[smallest]["max_blocked_ms"] >= blocked_ms:
+                    return
+                del self.offenders[smallest]
+            entry = {
+                "agent": agent,
+                "route": route,
+                "culprit": culprit,
+                "count": 0,
+                "total_blocked_ms": 0.0,
+                "max_blocked_ms": 0.0,
+                "stack": capture["stack"]
+            }
+            self.offenders[key] = entry
+
+        entry["count"] += 1
+        entry["total_blocked_ms"] = round(entry["total_blocked_ms"] + blocked_ms, 2)
+        entry["last_seen"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        if blocked_ms >= entry["max_blocked_ms"]:
+            entry["max_blocked_ms"] = blocked_ms
+            entry["stack"] = capture["stack"]
+
+        logger.warning("event_loop_blocked", agent=agent, route=route, culprit=culprit, blocked_ms=blocked_ms)
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        """Lag summary and the worst blocking offenders (by max stall)."""
+        worst = sorted(self.offenders.values(), key=lambda e: e["max_blocked_ms"], reverse=True)
+        return {
+            "interval_ms": self.interval_seconds * 1000,
+            "block_threshold_ms": self.block_threshold_seconds * 1000,
+            "max_lag_ms": round(self.max_lag_seconds * 1000, 2),
+            "blocks_recorded": sum(e["count"] for e in self.offenders.values()),
+            "worst_offenders": worst[:limit]
+        }
+
+
+loop_monitor = EventLoopMonitor(
+    interval_seconds=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    block_threshold_seconds=settings.LOOP_MONITOR_BLOCK_THRESHOLD_MS / 1000
+)
@@ -0,0 +1,499 @@
+"""
+PharmaLens Metrics Registry
+============================
+Prometheus-compatible instrumentation for the AI Engine.
+
+Provides:
+- Counters, gauges and latency histograms with label support
+- Thread-safe recording (one short lock per metric), so agents' bulkhead
+  threads can record directly
+- Text exposition for the /metrics endpoint
+- Multi-worker aggregation through a shared snapshot directory
+
+Every uvicorn worker keeps its own in-memory registry. When
+METRICS_MULTIPROC_DIR is set, each worker periodically writes a JSON
+snapshot of its registry into that directory and /metrics merges all
+snapshots, so any worker can answer a scrape for the whole service.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+import structlog
+
+from .config import settings
+from .tracing import span
+
+logger = structlog.get_logger(__name__)
+
+
+# Latency buckets in seconds, tuned for agent calls that range from
+# sub-millisecond (fast mode) up to multi-second LLM generations.
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+
+class _Metric:
+    """Base class for all metric types."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable view of the metric used for multi-worker merging."""
+        return {
+            "type": self.type_name,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": self._copy_values()
+        }
+
+    def _copy_values(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(key), _copy_value(value)] for key, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Gauge that can go up and down (in-flight requests, queue depth)."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels) -> Iterator[None]:
+        """Increment the gauge for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """
+    Latency histogram with fixed upper-bound buckets.
+
+    Each label set maps to ``[bucket_counts, sum]`` where bucket_counts has
+    one slot per bucket plus a final +Inf slot. Counts are stored
+    non-cumulatively and accumulated at render time.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0]
+                self._values[key] = state
+            state[0][bucket] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall-clock duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def mean(self, **labels) -> float:
+        """Mean observed value for a label set (0 when nothing was observed)."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if not state:
+                return 0.0
+            count = sum(state[0])
+            return state[1] / count if count else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics with Prometheus text exposition.
+
+    Metrics are recorded from the event loop and from bulkhead threads
+    (store queries offloaded by the agents), so each metric guards its
+    read-modify-write updates with its own lock. Snapshotting copies the
+    values under that lock, so rendering never sees a torn histogram.
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self._metrics: Dict[str, _Metric] = {}
+        self.multiproc_dir = multiproc_dir
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable snapshot of every registered metric."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    # ----------------------
+    # Multi-worker support
+    # ----------------------
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{os.getpid()}.json")
+
+    def write_snapshot(self):
+        """Persist this worker's snapshot for other workers to merge."""
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = self._snapshot_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp_path, path)
+
+    def remove_snapshot(self):
+        """Remove this worker's snapshot on shutdown."""
+        if not self.multiproc_dir:
+            return
+        try:
+            os.remove(self._snapshot_path())
+        except FileNotFoundError:
+            pass
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Collect metrics for exposition.
+
+        In single-process mode this is the local snapshot. In multi-worker
+        mode the local snapshot is written first and then merged with the
+        latest snapshot of every other worker.
+        """
+        if not self.multiproc_dir:
+            return self.snapshot()
+
+        self.write_snapshot()
+        merged: Dict[str, Any] = {}
+        for filename in sorted(os.listdir(self.multiproc_dir)):
+            if not (filename.startswith("metrics_") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, filename), encoding="utf-8") as handle:
+                    worker_snapshot = json.load(handle)
+            except (OSError, ValueError) as e:
+                logger.warning("metrics_snapshot_unreadable", file=filename, error=str(e))
+                continue
+            _merge_snapshot(merged, worker_snapshot)
+        return merged
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return _render_snapshot(self.collect())
+
+
+def _merge_snapshot(target: Dict[str, Any], source: Dict[str, Any]):
+    """Sum counters, gauges and histogram buckets of two snapshots."""
+    for name, data in source.items():
+        existing = target.get(name)
+        if existing is None:
+            target[name] = {
+                **data,
+                "values": [[list(labels), _copy_value(value)] for labels, value in data["values"]]
+            }
+            continue
+
+        index = {tuple(labels): entry for labels, entry in
+                 ((tuple(item[0]), item) for item in existing["values"])}
+        for labels, value in data["values"]:
+            entry = index.get(tuple(labels))
+            if entry is None:
+                existing["values"].append([list(labels), _copy_value(value)])
+            elif data["type"] == "histogram":
+                entry[1][0] = [a + b for a, b in zip(entry[1][0], value[0])]
+                entry[1][1] += value[1]
+            else:
+                entry[1] += value
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return [list(value[0]), value[1]]
+    return value
+
+
+def _format_labels(labelnames: List[str], labels: List[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [(name, value) for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _render_snapshot(snapshot: Dict[str, Any]) -> str:
+    lines: List[str] = []
+    for name, data in snapshot.items():
+        labelnames = data["labelnames"]
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+
+        for labels, value in data["values"]:
+            if data["type"] == "histogram":
+                cumulative = 0
+                for upper, count in zip(data["buckets"] + [float("inf")], value[0]):
+                    cumulative += count
+                    le = _format_value(upper)
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value[1])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+
+    lines.extend(_render_cache_ratios(snapshot))
+    return "\n".join(lines) + "\n"
+
+
+def _render_cache_ratios(snapshot: Dict[str, Any]) -> List[str]:
+    """Derive per-cache hit ratios from the cache request counter."""
+    data = snapshot.get("pharmalens_cache_requests_total")
+    if not data or not data["values"]:
+        return []
+
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in data["values"]:
+        hits_total = totals.setdefault(cache, [0.0, 0.0])
+        if result == "hit":
+            hits_total[0] += value
+        hits_total[1] += value
+
+    lines = [
+        "# HELP pharmalens_cache_hit_ratio Cache hit ratio since process start",
+        "# TYPE pharmalens_cache_hit_ratio gauge"
+    ]
+    for cache, (hits, total) in sorted(totals.items()):
+        ratio = hits / total if total else 0.0
+        lines.append(f"pharmalens_cache_hit_ratio{_format_labels(['cache'], [cache])} {_format_value(round(ratio, 6))}")
+    return lines
+
+
+async def run_snapshot_writer(registry: "MetricsRegistry", interval_seconds: float):
+    """Background task that periodically persists this worker's snapshot."""
+    while True:
+        try:
+            registry.write_snapshot()
+        except OSError as e:
+            logger.warning("metrics_snapshot_write_failed", error=str(e))
+        await asyncio.sleep(interval_seconds)
+
+
+# ======================
+# GLOBAL REGISTRY
+# ======================
+
+registry = MetricsRegistry(multiproc_dir=settings.METRICS_MULTIPROC_DIR)
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "pharmalens_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "pharmalens_http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ("method", "route")
+)
+HTTP_REQUEST_ERRORS = registry.counter(
+    "pharmalens_http_request_errors_total",
+    "HTTP requests that ended with a 5xx status or an unhandled exception",
+    ("method", "route", "status")
+)
+AGENT_DURATION = registry.histogram(
+    "pharmalens_agent_duration_seconds",
+    "Agent execution latency",
+    ("agent",)
+)
+AGENTS_IN_FLIGHT = registry.gauge(
+    "pharmalens_agents_in_flight",
+    "Agent executions currently running",
+    ("agent",)
+)
+AGENT_ERRORS = registry.counter(
+    "pharmalens_agent_errors_total",
+    "Agent executions that raised an exception",
+    ("agent",)
+)
+AGENTS_CANCELLED = registry.counter(
+    "pharmalens_agents_cancelled_total",
+    "Agent executions cancelled mid-run (client disconnected)",
+    ("agent",)
+)
+AGENT_RUNS_AVOIDED = registry.counter(
+    "pharmalens_agent_runs_avoided_total",
+    "Agent executions never started because the request was cancelled",
+    ("agent",)
+)
+WORK_SECONDS_AVOIDED = registry.counter(
+    "pharmalens_cancelled_work_avoided_seconds_total",
+    "Estimated agent time saved by cancellation (mean duration minus elapsed)",
+    ("agent",)
+)
+LLM_REQUEST_DURATION = registry.histogram(
+    "pharmalens_llm_request_duration_seconds",
+    "LLM completion latency by provider",
+    ("provider", "model")
+)
+LLM_ERRORS = registry.counter(
+    "pharmalens_llm_errors_total",
+    "LLM completions that failed",
+    ("provider",)
+)
+LLM_CANCELLED = registry.counter(
+    "pharmalens_llm_cancelled_total",
+    "LLM completions aborted because the request was cancelled",
+    ("provider",)
+)
+LLM_TOKENS_AVOIDED = registry.counter(
+    "pharmalens_llm_tokens_avoided_total",
+    "Completion tokens not generated because generation was stopped early",
+    ("provider",)
+)
+RATE_LIMITER_WAIT = registry.histogram(
+    "pharmalens_rate_limiter_wait_seconds",
+    "Time spent waiting for a rate limiter slot",
+    ("limiter",)
+)
+CACHE_REQUESTS = registry.counter(
+    "pharmalens_cache_requests_total",
+    "Cache lookups by outcome (hit/miss)",
+    ("cache", "result")
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Record a cache lookup outcome; hit ratios are derived at render time."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_work_avoided(agent: str, elapsed: float = 0.0, started: bool = True):
+    """Count a cancelled (or never started) agent run and the time it would have taken."""
+    if started:
+        AGENTS_CANCELLED.inc(agent=agent)
+    else:
+        AGENT_RUNS_AVOIDED.inc(agent=agent)
+    WORK_SECONDS_AVOIDED.inc(max(AGENT_DURATION.mean(agent=agent) - elapsed, 0.0), agent=agent)
+
+
+@contextmanager
+def track_agent(agent: str) -> Iterator[None]:
+    """Record latency, in-flight count, errors and a trace span for one agent execution."""
+    AGENTS_IN_FLIGHT.inc(agent=agent)
+    start = time.perf_counter()
+    cancelled = False
+    try:
+        with span(f"agent.{agent}", agent=agent):
+            yield
+    except asyncio.CancelledError:
+        # Cancelled runs are kept out of AGENT_DURATION so the mean used
+        # for the work-avoided estimate reflects completed runs only
+        cancelled = True
+        record_work_avoided(agent, time.perf_counter() - start)
+        raise
+    except BaseException:
+        AGENT_ERRORS.inc(agent=agent)
+        raise
+    finally:
+        if not cancelled:
+            AGENT_DURATION.observe(time.perf_counter() - start, agent=agent)
+        AGENTS_IN_FLIGHT.dec(agent=agent)
@@ -0,0 +1,251 @@
+"""
+PharmaLens Request Profiler
+============================
+Opt-in statistical profiling of individual requests.
+
+Provides:
+- A stack sampler that periodically captures the event-loop thread's stack
+- Speedscope-format profiles (open at https://www.speedscope.app)
+- A JSON summary of the hottest functions per request
+- Lookup of stored profiles by request_id, keeping only the newest
+  PROFILING_MAX_PROFILES on disk
+
+The sampler runs on its own thread and reads ``sys._current_frames()``,
+so the profiled code is not instrumented. Because every coroutine shares
+the event-loop thread, concurrently running requests appear in the same
+profile.
+"""
+
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import random
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger(__name__)
+
+# (function name, file, first line) of one stack frame
+FrameKey = Tuple[str, str, int]
+
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval_seconds: float = 0.005, max_depth: int = 128):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.started_at = 0.0
+        self.duration_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="pharmalens-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration_seconds = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[FrameKey] = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """Export samples in the speedscope ``sampled`` profile format."""
+        frame_index: Dict[FrameKey, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+
+        for stack, count in self.samples.items():
+            indices = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                indices.append(frame_index[key])
+            samples.append(indices)
+            weights.append(round(count * self.interval_seconds, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "pharmalens-ai-engine",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration_seconds, 6),
+                "samples": samples,
+                "weights": weights
+            }]
+        }
+
+    def top_functions(self, limit: int = 25) -> Dict[str, List[Dict[str, Any]]]:
+        """Hottest functions by self time (leaf frame) and total time (anywhere on stack)."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.samples.items():
+            self_counts[stack[-1]] += count
+            for key in set(stack):
+                total_counts[key] += count
+
+        total = self.sample_count or 1
+
+        def rows(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "function": key[0],
+                    "location": f"{key[1]}:{key[2]}",
+                    "samples": count,
+                    "percent": round(100.0 * count / total, 1)
+                }
+                for key, count in counter.most_common(limit)
+            ]
+
+        return {"by_self_time": rows(self_counts), "by_total_time": rows(total_counts)}
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles."""
+
+    def __init__(
+        self,
+        profiles_dir: str,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        interval_seconds: float = 0.005,
+        max_profiles: int = 200
+    ):
+        self.profiles_dir = profiles_dir
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.max_profiles = max_profiles
+
+    def should_profile(self, headers, query_params) -> bool:
+        """
+        A request is profiled when it carries a valid profiling token
+        (``X-Profile-Token`` header or ``profile_token`` query parameter)
+        together with ``X-Profile: 1`` / ``?profile=1``, or when it is
+        picked by random sampling at PROFILING_SAMPLE_RATE.
+        """
+        requested = headers.get("x-profile") == "1" or query_params.get("profile") == "1"
+        if requested and self.token:
+            supplied = headers.get("x-profile-token") or query_params.get("profile_token")
+            if supplied and hmac.compare_digest(supplied.encode("utf-8"), self.token.encode("utf-8")):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> StackSampler:
+        sampler = StackSampler(threading.get_ident(), self.interval_seconds)
+        sampler.start()
+        return sampler
+
+    def _paths(self, request_id: str) -> Tuple[str, str]:
+        safe_id = _SAFE_ID.sub("_", request_id)[:128]
+        base = os.path.join(self.profiles_dir, safe_id)
+        return f"{base}.speedscope.json", f"{base}.summary.json"
+
+    def save(self, sampler: StackSampler, request_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the speedscope profile and summary; returns the summary."""
+        os.makedirs(self.profiles_dir, exist_ok=True)
+        speedscope_path, summary_path = self._paths(request_id)
+
+        summary = {
+            "request_id": request_id,
+            "profiled_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_ms": round(sampler.duration_seconds * 1000, 2),
+            "sample_count": sampler.sample_count,
+            "interval_ms": self.interval_seconds * 1000,
+            **details,
+            **sampler.top_functions()
+        }
+
+        with open(speedscope_path, "w", encoding="utf-8") as handle:
+            json.dump(sampler.to_speedscope(f"{details.get('route', '')} {request_id}"), handle)
+        with open(summary_path, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+
+        logger.info(
+            "request_profiled",
+            request_id=request_id,
+            duration_ms=summary["duration_ms"],
+            samples=summary["sample_count"]
+        )
+        self.prune()
+        return summary
+
+    def prune(self) -> int:
+        """Delete the oldest profiles beyond ``max_profiles``; returns how many were removed."""
+        if self.max_profiles <= 0:
+            return 0
+        summaries = []
+        for entry in os.scandir(self.profiles_dir):
+            if entry.name.endswith(".summary.json"):
+                try:
+                    summaries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        excess = len(summaries) - self.max_profiles
+        if excess <= 0:
+            return 0
+        summaries.sort()
+        for _, summary_path in summaries[:excess]:
+            base = summary_path[:-len(".summary.json")]
+            for path in (summary_path, f"{base}.speedscope.json"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        logger.info("profiles_pruned", removed=excess, kept=self.max_profiles)
+        return excess
+
+    def load(self, request_id: str, speedscope: bool = False) -> Optional[Dict[str, Any]]:
+        """Load a stored summary (or speedscope profile) by request_id."""
+        speedscope_path, summary_path = self._paths(request_id)
+        path = speedscope_path if speedscope else summary_path
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+
+profiler = RequestProfiler(
+    profiles_dir=settings.PROFILING_DIR,
+    token=settings.PROFILING_TOKEN,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval_seconds=settings.PROFILING_INTERVAL_MS / 1000,
+    max_profiles=settings.PROFILING_MAX_PROFILES
+)
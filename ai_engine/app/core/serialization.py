@@ -0,0 +1,380 @@
+"""
+PharmaLens Response Serialization
+==================================
+Fast path for the large nested payloads the orchestrator and domain agents
+return (charts, trade flows, graph nodes and edges, news arrays).
+
+Provides:
+- ``dumps``: orjson encoding when the optional package is installed
+  (numpy values, datetimes and dataclasses natively, no jsonable_encoder
+  pass); falls back to the standard encoder otherwise
+- PayloadResponse: the app's default response class, rendering with
+  ``dumps``, or as MessagePack when the client's Accept header prefers
+  ``application/msgpack`` (optional package); numeric chart arrays and
+  numpy arrays travel as packed little-endian buffers (ext types below)
+- PayloadRoute: accepts MessagePack request bodies on every endpoint
+- Field projection: ``?fields=`` keeps and ``?exclude=`` drops dotted
+  paths, e.g. ``fields=success,request_id,data.summary`` or
+  ``exclude=data.results.pathfinder.graph``; a path continues through
+  lists element by element
+- Content-Encoding negotiation (brotli when the optional package is
+  installed, otherwise gzip) for bodies above a size threshold
+"""
+
+import json
+import gzip
+import struct
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional transport
+    msgpack = None
+
+from .config import settings
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson", MSGPACK_MEDIA_TYPE)
+
+# MessagePack ext type code -> little-endian element format of a packed array
+PACKED_ARRAY_FORMATS = {1: "d", 2: "f", 3: "i", 4: "q"}
+PACKED_DTYPES = {np.dtype("<f8"): 1, np.dtype("<f4"): 2, np.dtype("<i4"): 3, np.dtype("<i8"): 4}
+
+# Shortest lists packed as buffers: floats (9 B each in MessagePack) win from
+# a handful of values, small ints (1-3 B each) only in long series
+PACK_MIN_FLOATS = 4
+PACK_MIN_INTS = 32
+
+NUMBER_TYPES = {int, float}
+CONTAINER_TYPES = {dict, list, tuple}
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+# Set per request by ``negotiate_format``; read when the response renders
+_response_format: ContextVar[str] = ContextVar("response_format", default="json")
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a payload as compact UTF-8 JSON."""
+    if orjson is not None:
+        # Types orjson does not know (pydantic models, sets, Decimals) go through FastAPI's encoder
+        return orjson.dumps(payload, default=jsonable_encoder, option=ORJSON_OPTIONS)
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    ).encode("utf-8")
+
+
+def canonical_dumps(payload: Any) -> bytes:
+    """Compact JSON with sorted keys: equal content gives equal bytes (for hashing)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=jsonable_encoder, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)
+        except TypeError:  # keys of mixed types cannot be sorted
+            pass
+    return json.dumps(
+        jsonable_encoder(payload), sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+# ======================
+# MESSAGEPACK
+# ======================
+
+def msgpack_enabled() -> bool:
+    return msgpack is not None and settings.MSGPACK_ENABLED
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+def _packed(code: int, fmt: str, values: List[Any]) -> "msgpack.ExtType":
+    return msgpack.ExtType(code, struct.pack(f"<{len(values)}{fmt}", *values))
+
+
+def _pack_list(values: List[Any]) -> Any:
+    """
+    A numeric list as a packed ext buffer, or the list with its containers
+    prepared. Lists mixing ints and floats stay plain so their ints arrive
+    as ints, exactly as in JSON.
+    """
+    count = len(values)
+    if count >= PACK_MIN_FLOATS and type(values[0]) in NUMBER_TYPES:
+        kinds = set(map(type, values))
+        if kinds == {float}:
+            return _packed(1, "d", values)
+        if kinds == {int} and count >= PACK_MIN_INTS:
+            low, high = min(values), max(values)
+            if INT32_MIN <= low and high <= INT32_MAX:
+                return _packed(3, "i", values)
+            if INT64_MIN <= low and high <= INT64_MAX:
+                return _packed(4, "q", values)
+        if kinds <= NUMBER_TYPES:
+            return values
+    return [_prepare(value) if type(value) in CONTAINER_TYPES else value for value in values]
+
+
+def _prepare(value: Any) -> Any:
+    """Copy of the containers in ``value`` with numeric lists packed; scalars are shared."""
+    if type(value) is dict:
+        return {key: _prepare(item) if type(item) in CONTAINER_TYPES else item for key, item in value.items()}
+    return _pack_list(value)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        array = obj.astype(obj.dtype.newbyteorder("<"), copy=False)
+        code = PACKED_DTYPES.get(array.dtype)
+        if code is None:
+            return _prepare(obj.tolist())
+        return msgpack.ExtType(code, np.ascontiguousarray(array).tobytes())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return jsonable_encoder(obj)
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    fmt = PACKED_ARRAY_FORMATS.get(code)
+    if fmt is None:
+        return msgpack.ExtType(code, data)
+    return list(struct.unpack(f"<{len(data) // struct.calcsize(fmt)}{fmt}", data))
+
+
+def packb(payload: Any) -> bytes:
+    """Encode a payload as MessagePack with numeric arrays packed."""
+    if type(payload) in CONTAINER_TYPES:
+        payload = _prepare(payload)
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+def unpackb(body: bytes) -> Any:
+    """Decode MessagePack, expanding packed arrays back into lists."""
+    return msgpack.unpackb(body, raw=False, ext_hook=_ext_hook, strict_map_key=False)
+
+
+def load_body(body: bytes, content_type: Optional[str]) -> Any:
+    """Decode a JSON or MessagePack request body; raises ValueError when malformed."""
+    if is_msgpack(content_type) and msgpack is not None:
+        try:
+            return unpackb(body)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack body: {e}") from e
+    return json.loads(body)
+
+
+def _media_quality(accept: str, media_types: Tuple[str, ...]) -> float:
+    best = 0.0
+    for item in accept.split(","):
+        media_type, _, params = item.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type not in media_types:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        best = max(best, quality)
+    return best
+
+
+def preferred_format(accept: Optional[str]) -> str:
+    """``msgpack`` when the Accept header ranks it above JSON and it is enabled, else ``json``."""
+    if not accept or not msgpack_enabled():
+        return "json"
+    msgpack_quality = _media_quality(accept, MSGPACK_MEDIA_TYPES)
+    if msgpack_quality > 0 and msgpack_quality >= _media_quality(accept, ("application/json",)):
+        return "msgpack"
+    return "json"
+
+
+def response_media_type() -> str:
+    """Media type PayloadResponse renders this request's payloads in."""
+    return MSGPACK_MEDIA_TYPE if _response_format.get() == "msgpack" else "application/json"
+
+
+async def negotiate_format(request: Request):
+    """App-wide dependency: choose this request's response format from its Accept header."""
+    _response_format.set(preferred_format(request.headers.get("accept")))
+
+
+class PayloadResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if _response_format.get() == "msgpack":
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return packb(content)
+        return dumps(content)
+
+
+class PayloadRoute(APIRoute):
+    """
+    Route that also accepts MessagePack bodies: the body is decoded here
+    and handed to FastAPI's validation as if it had arrived as JSON.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if not is_msgpack(request.headers.get("content-type")) or not msgpack_enabled():
+                return await handler(request)
+            body = await request.body()
+            scope = dict(request.scope)
+            scope["headers"] = [
+                (name, b"application/json" if name == b"content-type" else value)
+                for name, value in request.scope["headers"]
+            ]
+            decoded = Request(scope, request.receive)
+            decoded._body = body
+            try:
+                decoded._json = unpackb(body) if body else None
+            except Exception:
+                return Response(
+                    content=dumps({"success": False, "error": "Invalid MessagePack body", "path": request.url.path}),
+                    status_code=400,
+                    media_type="application/json"
+                )
+            return await handler(decoded)
+
+        return route_handler
+
+
+# ======================
+# FIELD PROJECTION
+# ======================
+
+PathTree = Dict[str, Any]
+
+
+def _path_tree(spec: Optional[str]) -> Optional[PathTree]:
+    """``a.b,a.c,d`` -> ``{"a": {"b": {}, "c": {}}, "d": {}}``; an empty dict marks a leaf."""
+    tree: PathTree = {}
+    for path in (spec or "").split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+        node = tree
+        for depth, part in enumerate(parts):
+            if depth == len(parts) - 1:
+                node[part] = {}  # a whole subtree wins over narrower paths below it
+            elif part in node and not node[part]:
+                break
+            else:
+                node = node.setdefault(part, {})
+    return tree or None
+
+
+def _keep(value: Any, tree: PathTree) -> Any:
+    if isinstance(value, list):
+        return [_keep(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    kept = {}
+    for key, subtree in tree.items():
+        if key in value:
+            kept[key] = _keep(value[key], subtree) if subtree else value[key]
+    return kept
+
+
+def _drop(value: Any, tree: PathTree) -> Any:
+    if isinstance(value, list):
+        return [_drop(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    pruned = {}
+    for key, item in value.items():
+        subtree = tree.get(key)
+        if subtree is None:
+            pruned[key] = item
+        elif subtree:
+            pruned[key] = _drop(item, subtree)
+    return pruned
+
+
+def project(payload: Any, fields: Optional[str] = None, exclude: Optional[str] = None) -> Any:
+    """
+    Apply a ``fields``/``exclude`` projection. Only the containers along a
+    projected path are copied; everything else is shared with ``payload``.
+    """
+    keep = _path_tree(fields)
+    if keep is not None:
+        payload = _keep(payload, keep)
+    drop = _path_tree(exclude)
+    if drop is not None:
+        payload = _drop(payload, drop)
+    return payload
+
+
+# ======================
+# COMPRESSION
+# ======================
+
+def _accepted_codings(accept_encoding: str) -> Dict[str, float]:
+    codings: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            codings[coding.strip().lower()] = quality
+    return codings
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported Content-Encoding for an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    codings = _accepted_codings(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    candidates: List[Tuple[float, int, str]] = []
+    if brotli is not None:
+        candidates.append((codings.get("br", wildcard), 1, "br"))
+    candidates.append((codings.get("gzip", wildcard), 0, "gzip"))
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+
+def compressible(media_type: Optional[str], size: int) -> bool:
+    return size >= settings.COMPRESSION_MIN_BYTES and bool(media_type) and media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
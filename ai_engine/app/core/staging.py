@@ -0,0 +1,47 @@
+"""
+PharmaLens Staged Directories
+==============================
+Index and store builders write into a fresh sibling directory that
+replaces the live one by rename only once it is complete, so serving
+workers never read a half-written build and files they have
+memory-mapped are never truncated underneath them (the old files are
+unlinked, and stay readable until the mapping is dropped).
+
+Provides:
+- staged_directory(): context manager yielding the staging directory
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def staged_directory(directory: str) -> Iterator[str]:
+    """
+    Yield an empty directory next to ``directory`` to build into. When the
+    block succeeds it takes the place of ``directory`` (whose previous
+    contents are removed); when it fails it is deleted and ``directory``
+    is left untouched.
+    """
+    directory = os.path.abspath(directory)
+    parent, name = os.path.split(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{name}.building-", dir=parent)
+    try:
+        os.chmod(staging, 0o755)
+        yield staging
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    previous = None
+    if os.path.exists(directory):
+        previous = tempfile.mkdtemp(prefix=f".{name}.previous-", dir=parent)
+        os.rmdir(previous)
+        os.rename(directory, previous)
+    os.rename(staging, directory)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
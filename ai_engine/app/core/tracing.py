@@ -0,0 +1,443 @@
+"""
+PharmaLens Request Tracing
+===========================
+Lightweight structured tracing for the AI Engine.
+
+Provides:
+- A root span per HTTP request with child spans for orchestration,
+  agents, LLM calls and response serialization
+- W3C ``traceparent`` propagation from the Node.js server
+- Batched export to a JSON-lines file or an OTLP/HTTP collector
+- Critical-path extraction for slow-request analysis
+
+Spans are tracked with ``contextvars`` so concurrently running agent
+tasks each attach to the span that was current when they were created.
+Export happens on a background thread and never blocks the event loop.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import secrets
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Iterator
+
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger(__name__)
+
+
+class Span:
+    """A single timed operation within a trace."""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "attributes",
+        "start_ns", "end_ns", "status", "sampled"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        sampled: bool = True,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.sampled = sampled
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        """W3C traceparent header value for this span."""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("pharmalens_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Return the span active in the current task, if any."""
+    return _current_span.get()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a W3C traceparent header (``00-<trace_id>-<parent_id>-<flags>``).
+
+    Returns:
+        Dict with trace_id, parent_id and sampled, or None if invalid
+    """
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return {"trace_id": parts[1], "parent_id": parts[2], "sampled": bool(flags & 0x01)}
+
+
+# ======================
+# EXPORTERS
+# ======================
+
+class JsonLinesExporter:
+    """
+    Append finished spans to a JSON-lines file, one span per line. The file
+    is rotated once it exceeds ``max_bytes`` (keeping ``backup_count`` old
+    files as ``path.1`` .. ``path.N``), so the trace log stays bounded.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._size = 0
+
+    def export(self, spans: List[Span]):
+        data = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans).encode("utf-8")
+        with open(self.path, "ab") as handle:
+            handle.write(data)
+        self._size += len(data)
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+
+class OTLPHttpExporter:
+    """Send finished spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str = "pharmalens-ai-engine"):
+        self.endpoint = endpoint
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]):
+        import httpx
+
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "pharmalens.tracing"},
+                    "spans": [self._encode(span) for span in spans]
+                }]
+            }]
+        }
+        httpx.post(self.endpoint, json=payload, timeout=5.0).raise_for_status()
+
+    @staticmethod
+    def _encode(span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 2 if span.parent_id is None else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2 if span.status == "error" else 1}
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# ======================
+# TRACER
+# ======================
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to a background export thread.
+
+    When tracing is disabled, ``span()`` and ``start_trace()`` yield None
+    without allocating anything.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        exporter=None,
+        sample_rate: float = 1.0,
+        batch_size: int = 256,
+        flush_interval_seconds: float = 1.0,
+        max_queue_size: int = 10000
+    ):
+        self.enabled = enabled and exporter is not None
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.dropped_spans = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue_size)
+        self._worker: Optional[threading.Thread] = None
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Open the root span of a request.
+
+        Args:
+            name: Span name (e.g. ``POST /api/orchestrate``)
+            traceparent: Incoming W3C traceparent header from the caller
+            **attributes: Span attributes
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent["trace_id"], parent["parent_id"], parent["sampled"]
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_rate
+
+        span = Span(name, trace_id, parent_id, sampled, attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Open a child span of the current span (no-op outside a trace)."""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        span = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            if span.sampled:
+                self._enqueue(span)
+
+    def _enqueue(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped_spans += 1
+            return
+        if self._worker is None:
+            self._start_worker()
+
+    def _start_worker(self):
+        self._worker = threading.Thread(target=self._run_exporter, name="pharmalens-trace-exporter", daemon=True)
+        self._worker.start()
+
+    def _run_exporter(self):
+        while True:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval_seconds
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    self.dropped_spans += len(batch)
+                    logger.warning("trace_export_failed", spans=len(batch), error=str(e))
+            if stop:
+                return
+
+    def shutdown(self):
+        """Flush pending spans and stop the export thread."""
+        if self._worker is None:
+            return
+        self._queue.put(None)
+        self._worker.join(timeout=5.0)
+        self._worker = None
+
+
+def _build_tracer() -> Tracer:
+    exporter = None
+    if settings.TRACING_ENABLED:
+        if settings.TRACING_EXPORTER == "otlp":
+            exporter = OTLPHttpExporter(settings.TRACING_OTLP_ENDPOINT)
+        else:
+            exporter = JsonLinesExporter(
+                settings.TRACING_JSONL_PATH,
+                max_bytes=settings.TRACING_JSONL_MAX_BYTES,
+                backup_count=settings.TRACING_JSONL_BACKUP_COUNT
+            )
+    return Tracer(
+        enabled=settings.TRACING_ENABLED,
+        exporter=exporter,
+        sample_rate=settings.TRACING_SAMPLE_RATE
+    )
+
+
+tracer = _build_tracer()
+
+
+def span(name: str, **attributes):
+    """Open a child span on the global tracer."""
+    return tracer.span(name, **attributes)
+
+
+# ======================
+# ANALYSIS HELPERS
+# ======================
+
+def load_trace(path: str, trace_id: str, backup_count: int = 0) -> List[Dict[str, Any]]:
+    """
+    Load all spans of one trace from a JSON-lines trace log and up to
+    ``backup_count`` of its rotated files (a trace may straddle a rotation).
+    Blocking file I/O: call it from a worker thread.
+    """
+    spans = []
+    for file_path in [f"{path}.{index}" for index in range(backup_count, 0, -1)] + [path]:
+        try:
+            handle = open(file_path, encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with handle:
+            for line in handle:
+                if trace_id not in line:
+                    continue
+                record = json.loads(line)
+                if record.get("trace_id") == trace_id:
+                    spans.append(record)
+    return spans
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Compute the critical path of a trace.
+
+    Within every span, walk backwards from its end: take the child that
+    finished last, then the child that finished last before that one
+    started, and so on. That chain of children is what the parent actually
+    waited for; each child on the chain is expanded the same way.
+
+    Args:
+        spans: Span dicts as written by JsonLinesExporter
+
+    Returns:
+        Ordered list of ``{name, span_id, depth, duration_ms, self_time_ms}``
+    """
+    if not spans:
+        return []
+
+    ids = {s["span_id"] for s in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    roots = []
+    for s in spans:
+        if s.get("parent_id") in ids:
+            children.setdefault(s["parent_id"], []).append(s)
+        else:
+            roots.append(s)
+
+    path: List[Dict[str, Any]] = []
+
+    def walk(node: Dict[str, Any], depth: int):
+        kids = children.get(node["span_id"], [])
+        chain = []
+        cursor = node["end_ns"]
+        while True:
+            candidates = [k for k in kids if k["end_ns"] <= cursor and k not in chain]
+            if not candidates:
+                break
+            last = max(candidates, key=lambda k: k["end_ns"])
+            chain.append(last)
+            cursor = last["start_ns"]
+        chain.reverse()
+
+        waited_ms = sum(k["duration_ms"] for k in chain)
+        path.append({
+            "name": node["name"],
+            "span_id": node["span_id"],
+            "depth": depth,
+            "duration_ms": node["duration_ms"],
+            "self_time_ms": round(max(node["duration_ms"] - waited_ms, 0.0), 3)
+        })
+        for kid in chain:
+            walk(kid, depth + 1)
+
+    walk(max(roots, key=lambda s: s["duration_ms"]), 0)
+    return path
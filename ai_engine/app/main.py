@@ -11,39 +11,26 @@ This engine provides:
 """
 
 import os
+import hmac
+import time
 import random
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, List, Optional, Sequence
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi import Depends, FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Match
 from pydantic import BaseModel, Field
 import structlog
-import logging
 
-# Configure standard logging
-logging.basicConfig(
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    level=logging.INFO
-)
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging, shutdown_logging
 
-# Configure structured logging with simpler configuration
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.add_log_level,
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.dev.ConsoleRenderer()
-    ],
-    wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
-    context_class=dict,
-    logger_factory=structlog.PrintLoggerFactory(),
-    cache_logger_on_first_use=True
-)
+# Configure stdlib + structured logging (console in dev, queued JSON in production)
+configure_logging(settings)
 
 logger = structlog.get_logger(__name__)
 
@@ -60,8 +47,27 @@ from app.agents.exim_agent import EXIMAgent
 from app.agents.web_intelligence_agent import WebIntelligenceAgent
 from app.agents.internal_knowledge_agent import InternalKnowledgeAgent
 from app.agents.orchestrator import MasterOrchestrator
-from app.core.config import settings
+from app.services.claim_screening import candidate_claims, get_claim_index
+from app.services.patent_cliff import get_patent_cliff_index
+from app.services.rnpv import value_portfolio
+from app.services.roi_sensitivity import PARAMETERS as SENSITIVITY_PARAMETERS
+from app.services.roi_simulation import PHASES
 from app.core.privacy_toggle import PrivacyManager
+from app.core import metrics
+from app.core.tracing import tracer, span, load_trace, critical_path
+from app.core.profiling import profiler
+from app.core.loop_monitor import loop_monitor
+from app.core.admission import admission_control, AdmissionRejected, ADMISSION_STALE_SERVED
+from app.core.bulkhead import bulkheads, agent_slot, offload, BulkheadFull
+from app.core.cancellation import cancel_on_disconnect, ClientDisconnected
+from app.core.serialization import (
+    PayloadResponse, PayloadRoute, negotiate_format, preferred_format, response_media_type, project,
+    negotiate_encoding, compressible, compress
+)
+from app.core.http_cache import (
+    cache_policy, etag_for, payload_etag, encoded_etag, if_none_match, CONDITIONAL_REQUESTS
+)
+from app.core.idempotency import idempotency, request_key, StoredResponse, IDEMPOTENT_REQUESTS
 
 
 # ======================
@@ -107,6 +113,18 @@ class ROIRequest(BaseModel):
     """Request model for ROI calculation"""
     molecule: str = Field(..., min_length=2, description="Name of the drug/compound")
     request_id: str = Field(..., description="Unique request identifier")
+    seed: Optional[int] = Field(None, description="Seed for a reproducible Monte Carlo ROI simulation")
+
+
+class ROISensitivityRequest(BaseModel):
+    """Request for an ROI sensitivity (tornado) analysis"""
+    molecule: str = Field(..., min_length=2, description="Name of the drug/compound")
+    request_id: str = Field(..., description="Unique request identifier")
+    seed: Optional[int] = Field(None, description="Holds the simulated market inputs fixed across calls")
+    overrides: dict[str, float] = Field(default={}, description="Base values of named inputs (slider positions)")
+    spread: float = Field(default=0.3, gt=0, lt=1, description="Relative change swept either side of each input")
+    points: int = Field(default=7, ge=3, le=41, description="Grid points per input")
+    parameters: Optional[list[str]] = Field(default=None, description="Inputs to sweep (default: all)")
 
 
 class EXIMRequest(BaseModel):
@@ -137,6 +155,43 @@ class InternalKnowledgeRequest(BaseModel):
     request_id: str = Field(..., description="Unique request identifier")
 
 
+class ClaimScreenRequest(BaseModel):
+    """Request for freedom-to-operate claim screening"""
+    claims: list[str] = Field(default=[], max_length=100, description="Candidate claim text, one claim per entry")
+    molecule: Optional[str] = Field(default=None, min_length=2, description="Screen claims drafted around this molecule")
+    threshold: Optional[float] = Field(default=None, ge=0.5, le=1.0, description="Similarity for a claim to count as blocking")
+    request_id: str = Field(..., description="Unique request identifier")
+
+
+class PatentCliffRequest(BaseModel):
+    """Request for a portfolio patent-cliff report"""
+    molecules: list[str] = Field(default=[], max_length=20000, description="Portfolio molecules (empty: every indexed molecule)")
+    start_year: int = Field(..., ge=1982, le=2100, description="First year of the loss-of-exclusivity window")
+    end_year: int = Field(..., ge=1982, le=2100, description="Last year of the loss-of-exclusivity window")
+    timeline_years: Optional[list[Annotated[int, Field(ge=1982, le=2100)]]] = Field(default=None, max_length=50, description="Years of the coverage timeline")
+    limit: int = Field(default=500, ge=1, le=5000, description="Maximum molecules listed in the report")
+    request_id: str = Field(..., description="Unique request identifier")
+
+
+class RNPVCandidate(BaseModel):
+    """Portfolio candidate: explicit yearly cash flows, or a programme valued on its expected case"""
+    molecule: str = Field(..., min_length=1, description="Molecule name")
+    cash_flows: Optional[list[float]] = Field(default=None, max_length=60, description="Cash flow per year from now ($M, year 0 = current year)")
+    phase_gates: Optional[list[float]] = Field(default=None, max_length=8, description="Years from now at which each phase resolves")
+    phase_probabilities: Optional[list[float]] = Field(default=None, max_length=8, description="Transition probability of each phase")
+    peak_sales_millions: Optional[float] = Field(default=None, ge=0, description="Median peak annual sales of a modelled programme ($M)")
+    discount_rate: Optional[float] = Field(default=None, ge=0, le=1, description="Discount rate of this candidate")
+
+
+class RNPVRequest(BaseModel):
+    """Request for a portfolio risk-adjusted NPV valuation"""
+    candidates: list[RNPVCandidate] = Field(..., min_length=1, max_length=20000, description="Portfolio candidates")
+    discount_rate: Optional[float] = Field(default=None, ge=0, le=1, description="Discount rate for every candidate")
+    horizon_years: int = Field(default=30, ge=1, le=60, description="Years of cash flows valued")
+    limit: int = Field(default=100, ge=1, le=20000, description="Maximum candidates listed in the ranking")
+    request_id: str = Field(..., description="Unique request identifier")
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
@@ -181,9 +236,29 @@ async def lifespan(app: FastAPI):
     
     logger.info("✅ All agents initialized successfully (12 agents total)")
     
+    # Share metrics with sibling uvicorn workers when a multiproc dir is set
+    metrics_writer = None
+    if settings.METRICS_ENABLED and metrics.registry.multiproc_dir:
+        metrics_writer = asyncio.create_task(
+            metrics.run_snapshot_writer(metrics.registry, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+        )
+    
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    
     yield
     
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.stop()
+    if metrics_writer:
+        metrics_writer.cancel()
+        metrics.registry.remove_snapshot()
+    tracer.shutdown()
+    bulkheads.shutdown()
+    idempotency.store.close()
+    
     logger.info("👋 Shutting down PharmaLens AI Engine")
+    shutdown_logging()
 
 
 # ======================
@@ -196,42 +271,310 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=PayloadResponse,
+    dependencies=[Depends(negotiate_format)],
     lifespan=lifespan
 )
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3001", "http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Every route accepts MessagePack bodies as well as JSON
+app.router.route_class = PayloadRoute
 
 
 # ======================
 # MIDDLEWARE
 # ======================
 
+def _request_target(request: Request) -> str:
+    """Path, query string (field projection) and response format: what selects a response's representation"""
+    query = request.url.query
+    target = f"{request.url.path}?{query}" if query else request.url.path
+    response_format = preferred_format(request.headers.get("accept"))
+    return target if response_format == "json" else f"{target} {response_format}"
+
+
+def _route_template(request: Request) -> str:
+    """Resolve the route path template so metric labels stay low-cardinality"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+async def _replay_body(body: bytes):
+    yield body
+
+
+async def admit_requests(request: Request, call_next):
+    """Shed load per endpoint class: 429 + Retry-After, or a stale cached result"""
+    controller = admission_control.controller_for(request.method, request.url.path)
+    if controller is None:
+        return await call_next(request)
+
+    stale_cache = admission_control.stale_cache if admission_control.caches_stale(controller) else None
+    cache_key = None
+    if stale_cache is not None:
+        cache_key = stale_cache.key(
+            request.method, _request_target(request), await request.body(), request.headers.get("content-type")
+        )
+
+    try:
+        async with controller.slot():
+            response = await call_next(request)
+    except AdmissionRejected as rejected:
+        stale = stale_cache.get(cache_key) if cache_key else None
+        logger.warning(
+            "request_shed",
+            endpoint_class=rejected.endpoint_class,
+            reason=rejected.reason,
+            path=request.url.path,
+            served_stale=stale is not None
+        )
+        if stale is not None:
+            age, body, media_type = stale
+            ADMISSION_STALE_SERVED.inc(endpoint_class=rejected.endpoint_class)
+            return Response(
+                content=stale_cache.restamp(body, media_type, await request.body(), request.headers.get("content-type")),
+                media_type=media_type,
+                headers={"X-Cache": "stale", "Age": str(int(age))}
+            )
+        return JSONResponse(
+            status_code=429,
+            content={
+                "success": False,
+                "error": "Server busy, retry later",
+                "endpoint_class": rejected.endpoint_class,
+                "reason": rejected.reason
+            },
+            headers={"Retry-After": str(rejected.retry_after)}
+        )
+
+    if cache_key and response.status_code == 200:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        stale_cache.put(cache_key, body, response.media_type or response.headers.get("content-type", "application/json"))
+        response.body_iterator = _replay_body(body)
+    return response
+
+
+# Registered before log_requests so shed requests are still logged and measured
+if settings.ADMISSION_ENABLED:
+    app.middleware("http")(admit_requests)
+
+
+async def deduplicate_requests(request: Request, call_next):
+    """Answer retries of a request_id from the original execution instead of re-running it"""
+    if request.method != "POST" or not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    keys = request_key(request.method, _request_target(request), await request.body(), request.headers.get("content-type"))
+    if keys is None:
+        return await call_next(request)
+
+    key, payload_hash = keys
+    outcome, stored = await idempotency.begin(key, payload_hash)
+    IDEMPOTENT_REQUESTS.inc(result=outcome)
+    if outcome == "conflict":
+        return JSONResponse(
+            status_code=422,
+            content={
+                "success": False,
+                "error": "request_id was already used for a different request",
+                "path": str(request.url.path)
+            }
+        )
+    if stored is not None:
+        logger.info("idempotent_request_replayed", path=request.url.path, source=outcome)
+        headers = {"X-Idempotent-Replay": outcome}
+        if stored.cache_control:
+            headers["Cache-Control"] = stored.cache_control
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type=stored.media_type,
+            headers=headers
+        )
+
+    replayable = None
+    try:
+        response = await call_next(request)
+        if 200 <= response.status_code < 300:
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            replayable = StoredResponse(
+                response.status_code,
+                response.media_type or response.headers.get("content-type", "application/json"),
+                body,
+                response.headers.get("cache-control")
+            )
+            response.body_iterator = _replay_body(body)
+        return response
+    finally:
+        await idempotency.finish(key, replayable)
+
+
+# Outside admission control so retries of admitted work never queue again
+if settings.IDEMPOTENCY_ENABLED:
+    app.middleware("http")(deduplicate_requests)
+
+
+async def revalidate_responses(request: Request, call_next):
+    """Tag successful API responses with an ETag of their content; a matching If-None-Match gets 304"""
+    response = await call_next(request)
+    if response.status_code != 200 or not request.url.path.startswith("/api/"):
+        return response
+
+    # Endpoint payloads arrive tagged (_payload_response); other bodies are tagged here
+    etag = response.headers.get("etag")
+    if etag is None:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = etag_for(body, response.media_type or response.headers.get("content-type"))
+        response.headers["ETag"] = etag
+        response.body_iterator = _replay_body(body)
+
+    client_tag = request.headers.get("if-none-match")
+    if client_tag:
+        matched = if_none_match(client_tag, etag)
+        CONDITIONAL_REQUESTS.inc(result="not_modified" if matched else "modified")
+        if matched:
+            headers = {"ETag": matched}
+            for name in ("cache-control", "vary"):
+                if name in response.headers:
+                    headers[name] = response.headers[name]
+            return Response(status_code=304, headers=headers)
+    return response
+
+
+# Inside compression: ETags are computed over the identity-encoded body
+if settings.HTTP_CACHE_ENABLED:
+    app.middleware("http")(revalidate_responses)
+
+
+async def compress_responses(request: Request, call_next):
+    """Compress large JSON bodies with the best Content-Encoding the client accepts"""
+    coding = negotiate_encoding(request.headers.get("accept-encoding"))
+    response = await call_next(request)
+    if (
+        coding is None
+        or "content-encoding" in response.headers
+        or not compressible(response.media_type or response.headers.get("content-type"),
+                            int(response.headers.get("content-length", 0)))
+    ):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    with span("response.compress", coding=coding, size=len(body)):
+        compressed = compress(body, coding)
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    vary = headers.pop("vary", None)
+    headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    headers["Content-Encoding"] = coding
+    if "etag" in headers:
+        headers["etag"] = encoded_etag(headers["etag"], coding)
+    return Response(content=compressed, status_code=response.status_code, headers=headers)
+
+
+# Outside the idempotency and stale-result stores, which keep identity-encoded bodies
+if settings.COMPRESSION_ENABLED:
+    app.middleware("http")(compress_responses)
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    start_time = datetime.now()
+    """Log all incoming requests and record request metrics"""
+    start_time = time.perf_counter()
+    route = _route_template(request) if settings.METRICS_ENABLED else request.url.path
     
-    response = await call_next(request)
+    if settings.METRICS_ENABLED:
+        metrics.HTTP_REQUESTS_IN_FLIGHT.inc(method=request.method, route=route)
+    status_code = 500
+    try:
+        with tracer.start_trace(
+            f"{request.method} {route}",
+            traceparent=request.headers.get("traceparent"),
+            request_id=request.headers.get("x-request-id", ""),
+            path=request.url.path
+        ) as root_span:
+            response = await call_next(request)
+            status_code = response.status_code
+            if root_span is not None:
+                root_span.set_attribute("status_code", status_code)
+                response.headers["X-Trace-Id"] = root_span.trace_id
+    finally:
+        duration = time.perf_counter() - start_time
+        if settings.METRICS_ENABLED:
+            metrics.HTTP_REQUESTS_IN_FLIGHT.dec(method=request.method, route=route)
+            metrics.HTTP_REQUEST_DURATION.observe(
+                duration, method=request.method, route=route, status=status_code
+            )
+            if status_code >= 500:
+                metrics.HTTP_REQUEST_ERRORS.inc(method=request.method, route=route, status=status_code)
     
-    duration = (datetime.now() - start_time).total_seconds() * 1000
     logger.info(
         "request_processed",
         method=request.method,
         path=request.url.path,
         status_code=response.status_code,
-        duration_ms=round(duration, 2)
+        duration_ms=round(duration * 1000, 2)
     )
     
     return response
 
 
+def _payload_response(
+    payload: dict,
+    request: Optional[Request] = None,
+    agents: Sequence[str] = ()
+) -> PayloadResponse:
+    """
+    Serialize an endpoint payload (JSON or MessagePack) inside its own trace
+    span, applying any ?fields=/?exclude= projection. ``agents`` that produced
+    the payload set its Cache-Control max-age. With HTTP caching on, the
+    ETag is computed here from the payload, so revalidation does not have
+    to parse the rendered body back.
+    """
+    with span("response.serialize"):
+        if request is not None:
+            payload = project(payload, request.query_params.get("fields"), request.query_params.get("exclude"))
+        headers = {"Cache-Control": cache_policy.cache_control(agents)} if agents else {}
+        if settings.HTTP_CACHE_ENABLED:
+            headers["ETag"] = payload_etag(payload, response_media_type())
+        return PayloadResponse(content=payload, headers=headers)
+
+
+async def profile_requests(request: Request, call_next):
+    """Run privileged or sampled requests under the statistical profiler"""
+    if not profiler.should_profile(request.headers, request.query_params):
+        return await call_next(request)
+    
+    request_id = request.headers.get("x-request-id") or f"prof_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+    sampler = profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+    
+    await asyncio.to_thread(
+        profiler.save,
+        sampler,
+        request_id,
+        {"method": request.method, "route": request.url.path, "status_code": response.status_code}
+    )
+    response.headers["X-Profile-Id"] = request_id
+    return response
+
+
+# Registered only when enabled so the hook costs nothing otherwise
+if settings.PROFILING_ENABLED:
+    app.middleware("http")(profile_requests)
+
+# CORS is added last so it is outermost: shed (429), stale, replayed and
+# 304 responses produced by the middleware above carry its headers too
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3001", "http://localhost:5173"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
 # ======================
 # API ENDPOINTS
 # ======================
@@ -254,8 +597,23 @@ async def health_check():
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint.
+    Exposes route, agent and LLM latency histograms, in-flight gauges,
+    cache hit ratios, rate-limiter waits and error counters.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/api/analyze")
-async def analyze_compound(request: AnalyzeRequest):
+async def analyze_compound(request: AnalyzeRequest, http_request: Request):
     """
     Main analysis endpoint - orchestrates all agents.
     
@@ -279,104 +637,111 @@ async def analyze_compound(request: AnalyzeRequest):
         agents=request.agents
     )
     
-    try:
-        # Determine LLM based on mode
-        privacy_manager: PrivacyManager = app.state.privacy_manager
-        llm_config = privacy_manager.get_llm_config(request.mode)
+    async with cancel_on_disconnect(http_request, "/api/analyze"):
+        try:
+            # Determine LLM based on mode
+            privacy_manager: PrivacyManager = app.state.privacy_manager
+            llm_config = privacy_manager.get_llm_config(request.mode)
         
-        logger.info(
-            "processing_mode_selected",
-            mode=request.mode,
-            model=llm_config["model"],
-            request_id=request.request_id
-        )
+            logger.info(
+                "processing_mode_selected",
+                mode=request.mode,
+                model=llm_config["model"],
+                request_id=request.request_id
+            )
         
-        # Execute agents in parallel (simulated)
-        results = {
-            "request_id": request.request_id,
-            "molecule": request.molecule,
-            "processing_mode": request.mode,
-            "model_used": llm_config["model"],
-            "agents_executed": []
-        }
+            # Execute agents in parallel (simulated)
+            results = {
+                "request_id": request.request_id,
+                "molecule": request.molecule,
+                "processing_mode": request.mode,
+                "model_used": llm_config["model"],
+                "agents_executed": []
+            }
         
-        # Run selected agents
-        if "clinical" in request.agents:
-            clinical_result = await app.state.clinical_agent.analyze(
-                request.molecule, 
-                llm_config
-            )
-            results["clinical"] = clinical_result
-            results["agents_executed"].append({
-                "name": "ClinicalAgent",
-                "status": "completed",
-                "duration_ms": clinical_result.get("processing_time_ms", 0)
-            })
-        
-        if "patent" in request.agents:
-            patent_result = await app.state.patent_agent.analyze(
-                request.molecule,
-                llm_config
-            )
-            results["patent"] = patent_result
-            results["agents_executed"].append({
-                "name": "PatentAgent", 
-                "status": "completed",
-                "duration_ms": patent_result.get("processing_time_ms", 0)
-            })
-        
-        if "market" in request.agents:
-            market_result = await app.state.market_agent.calculate_roi(
-                request.molecule
-            )
-            results["market"] = market_result
-            results["agents_executed"].append({
-                "name": "MarketAgent",
-                "status": "completed", 
-                "duration_ms": market_result.get("processing_time_ms", 0)
-            })
-        
-        if "vision" in request.agents:
-            vision_result = await app.state.vision_agent.analyze(
-                request.molecule,
-                llm_config
-            )
-            results["vision"] = vision_result
-            results["agents_executed"].append({
-                "name": "VisionAgent",
-                "status": "completed",
-                "duration_ms": vision_result.get("processing_time_ms", 0)
-            })
-        
-        # Add knowledge graph summary
-        results["knowledge_graph"] = {
-            "nodes": random.randint(100, 300),
-            "edges": random.randint(300, 800),
-            "key_pathways": ["PI3K/AKT", "MAPK/ERK", "JAK/STAT", "NF-κB"]
-        }
+            # Run selected agents
+            if "clinical" in request.agents:
+                async with agent_slot("clinical", llm_config):
+                    clinical_result = await app.state.clinical_agent.analyze(
+                        request.molecule, 
+                        llm_config
+                    )
+                results["clinical"] = clinical_result
+                results["agents_executed"].append({
+                    "name": "ClinicalAgent",
+                    "status": "completed",
+                    "duration_ms": clinical_result.get("processing_time_ms", 0)
+                })
         
-        logger.info(
-            "analysis_completed",
-            request_id=request.request_id,
-            agents_count=len(results["agents_executed"])
-        )
+            if "patent" in request.agents:
+                async with agent_slot("patent", llm_config):
+                    patent_result = await app.state.patent_agent.analyze(
+                        request.molecule,
+                        llm_config
+                    )
+                results["patent"] = patent_result
+                results["agents_executed"].append({
+                    "name": "PatentAgent", 
+                    "status": "completed",
+                    "duration_ms": patent_result.get("processing_time_ms", 0)
+                })
         
-        return results
+            if "market" in request.agents:
+                async with agent_slot("market", llm_config):
+                    market_result = await app.state.market_agent.calculate_roi(
+                        request.molecule
+                    )
+                results["market"] = market_result
+                results["agents_executed"].append({
+                    "name": "MarketAgent",
+                    "status": "completed", 
+                    "duration_ms": market_result.get("processing_time_ms", 0)
+                })
         
-    except Exception as e:
-        logger.error(
-            "analysis_failed",
-            request_id=request.request_id,
-            error=str(e)
-        )
-        raise HTTPException(
-            status_code=500,
-            detail=f"Analysis failed: {str(e)}"
-        )
+            if "vision" in request.agents:
+                async with agent_slot("vision", llm_config):
+                    vision_result = await app.state.vision_agent.analyze(
+                        request.molecule,
+                        llm_config
+                    )
+                results["vision"] = vision_result
+                results["agents_executed"].append({
+                    "name": "VisionAgent",
+                    "status": "completed",
+                    "duration_ms": vision_result.get("processing_time_ms", 0)
+                })
+        
+            # Add knowledge graph summary
+            results["knowledge_graph"] = {
+                "nodes": random.randint(100, 300),
+                "edges": random.randint(300, 800),
+                "key_pathways": ["PI3K/AKT", "MAPK/ERK", "JAK/STAT", "NF-κB"]
+            }
+        
+            logger.info(
+                "analysis_completed",
+                request_id=request.request_id,
+                agents_count=len(results["agents_executed"])
+            )
+        
+            return _payload_response(results, http_request, agents=request.agents)
+        
+        except BulkheadFull:
+            raise
+        except Exception as e:
+            logger.error(
+                "analysis_failed",
+                request_id=request.request_id,
+                error=str(e)
+            )
+            raise HTTPException(
+                status_code=500,
+                detail=f"Analysis failed: {str(e)}"
+            )
 
 
 @app.post("/api/agents/market/roi")
-async def get_roi_calculation(request: ROIRequest):
+async def get_roi_calculation(request: ROIRequest, http_request: Request):
     """
     Dedicated ROI calculation endpoint.
     
@@ -390,14 +755,17 @@ async def get_roi_calculation(request: ROIRequest):
     
     try:
         market_agent: MarketAgent = app.state.market_agent
-        result = await market_agent.calculate_roi(request.molecule)
+        async with agent_slot("market"):
+            result = await market_agent.calculate_roi(request.molecule, seed=request.seed)
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "data": result
-        }
+        }, http_request, agents=("market",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error(
             "roi_calculation_failed",
@@ -410,6 +778,57 @@ async def get_roi_calculation(request: ROIRequest):
         )
 
 
+@app.post("/api/agents/market/sensitivity")
+async def calculate_roi_sensitivity(request: ROISensitivityRequest, http_request: Request):
+    """
+    ROI sensitivity analysis.
+    
+    Sweeps each input of the ROI model over a grid while holding the
+    others fixed, valuing all perturbations in one batch, and returns
+    tornado data and elasticities. Cheap enough to call on every slider
+    move: pass the slider positions as overrides and keep the seed fixed.
+    """
+    requested = set(request.overrides) | set(request.parameters or ())
+    unknown = sorted(name for name in requested if name not in SENSITIVITY_PARAMETERS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown ROI inputs: {', '.join(unknown)}")
+    if any(value <= 0 for value in request.overrides.values()):
+        raise HTTPException(status_code=422, detail="Overrides must be positive")
+    if any(value > 1 for name, value in request.overrides.items() if name.endswith("_probability")):
+        raise HTTPException(status_code=422, detail="Phase probabilities must not exceed 1")
+    
+    logger.info(
+        "roi_sensitivity_requested",
+        molecule=request.molecule,
+        overrides=len(request.overrides),
+        request_id=request.request_id
+    )
+    
+    try:
+        market_agent: MarketAgent = app.state.market_agent
+        async with agent_slot("market"):
+            result = await market_agent.roi_sensitivity(
+                request.molecule,
+                seed=request.seed,
+                overrides=request.overrides,
+                spread=request.spread,
+                points=request.points,
+                parameters=request.parameters
+            )
+        
+        return _payload_response({
+            "success": True,
+            "request_id": request.request_id,
+            "data": result
+        }, http_request, agents=("market",))
+        
+    except BulkheadFull:
+        raise
+    except Exception as e:
+        logger.error("roi_sensitivity_failed", request_id=request.request_id, error=str(e))
+        raise HTTPException(status_code=500, detail=f"ROI sensitivity analysis failed: {str(e)}")
+
+
 @app.get("/api/agents/status")
 async def get_agents_status():
     """
@@ -432,7 +851,7 @@ async def get_agents_status():
 
 
 @app.post("/api/orchestrate")
-async def orchestrate_analysis(request: OrchestratedRequest):
+async def orchestrate_analysis(request: OrchestratedRequest, http_request: Request):
     """
     Master orchestration endpoint - coordinates all agents intelligently.
     
@@ -450,37 +869,40 @@ async def orchestrate_analysis(request: OrchestratedRequest):
         request_id=request.request_id
     )
     
-    try:
-        orchestrator: MasterOrchestrator = app.state.orchestrator
-        privacy_manager: PrivacyManager = app.state.privacy_manager
-        llm_config = privacy_manager.get_llm_config(request.mode)
+    async with cancel_on_disconnect(http_request, "/api/orchestrate"):
+        try:
+            orchestrator: MasterOrchestrator = app.state.orchestrator
+            privacy_manager: PrivacyManager = app.state.privacy_manager
+            llm_config = privacy_manager.get_llm_config(request.mode)
         
-        result = await orchestrator.process_query(
-            query=request.query,
-            molecule=request.molecule or "Unknown",
-            llm_config=llm_config
-        )
+            result = await orchestrator.process_query(
+                query=request.query,
+                molecule=request.molecule or "Unknown",
+                llm_config=llm_config
+            )
         
-        return {
-            "success": True,
-            "request_id": request.request_id,
-            "data": result
-        }
+            return _payload_response({
+                "success": True,
+                "request_id": request.request_id,
+                "data": result
+            }, http_request, agents=[agent["name"] for agent in result["agents_executed"]])
         
-    except Exception as e:
-        logger.error(
-            "orchestration_failed",
-            request_id=request.request_id,
-            error=str(e)
-        )
-        raise HTTPException(
-            status_code=500,
-            detail=f"Orchestration failed: {str(e)}"
-        )
+        except BulkheadFull:
+            raise
+        except Exception as e:
+            logger.error(
+                "orchestration_failed",
+                request_id=request.request_id,
+                error=str(e)
+            )
+            raise HTTPException(
+                status_code=500,
+                detail=f"Orchestration failed: {str(e)}"
+            )
 
 
 @app.post("/api/agents/validate")
-async def validate_findings(request: dict):
+async def validate_findings(request: dict, http_request: Request):
     """
     Skeptic validation endpoint - validates findings from other agents.
     Returns risk flags, confidence scores, and recommendations.
@@ -490,24 +912,27 @@ async def validate_findings(request: dict):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await validation_agent.analyze(
-            molecule=request.get("molecule", "Unknown"),
-            agent_results=request.get("findings", {}),
-            llm_config=llm_config
-        )
+        async with agent_slot("validation", llm_config):
+            result = await validation_agent.analyze(
+                molecule=request.get("molecule", "Unknown"),
+                agent_results=request.get("findings", {}),
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "validation": result
-        }
+        }, http_request, agents=("validation",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("validation_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
 
 @app.post("/api/agents/kol")
-async def find_kol(request: KOLRequest):
+async def find_kol(request: KOLRequest, http_request: Request):
     """
     Key Opinion Leader search endpoint.
     Finds top researchers and labs for a molecule-disease pair.
@@ -524,24 +949,27 @@ async def find_kol(request: KOLRequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await kol_finder.analyze(
-            molecule=request.molecule,
-            llm_config=llm_config
-        )
+        async with agent_slot("kol", llm_config):
+            result = await kol_finder.analyze(
+                molecule=request.molecule,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "data": result
-        }
+        }, http_request, agents=("kol",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("kol_search_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"KOL search failed: {str(e)}")
 
 
 @app.post("/api/agents/pathways")
-async def find_pathways(request: PathwayRequest):
+async def find_pathways(request: PathwayRequest, http_request: Request):
     """
     Molecular pathway analysis using GraphRAG.
     Finds biological connections between molecule and disease.
@@ -559,28 +987,114 @@ async def find_pathways(request: PathwayRequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await pathfinder.analyze(
-            molecule=request.molecule,
-            llm_config=llm_config
-        )
+        async with agent_slot("pathfinder", llm_config):
+            result = await pathfinder.analyze(
+                molecule=request.molecule,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "data": result
-        }
+        }, http_request, agents=("pathfinder",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("pathway_analysis_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Pathway analysis failed: {str(e)}")
 
 
+def require_debug_access(request: Request):
+    """
+    Debug endpoints are off unless DEBUG_ENDPOINTS_ENABLED; when DEBUG_TOKEN
+    is set, requests must also carry it in ``X-Debug-Token``.
+    """
+    if not settings.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.DEBUG_TOKEN:
+        supplied = request.headers.get("x-debug-token", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), settings.DEBUG_TOKEN.encode("utf-8")):
+            raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+DEBUG_ACCESS = [Depends(require_debug_access)]
+
+
+@app.get("/api/debug/traces/{trace_id}", include_in_schema=False, dependencies=DEBUG_ACCESS)
+async def get_trace(trace_id: str):
+    """
+    Return all spans of a trace plus its critical path.
+    Only available with the JSON-lines trace exporter.
+    """
+    if not settings.TRACING_ENABLED or settings.TRACING_EXPORTER != "jsonl":
+        raise HTTPException(status_code=404, detail="JSON-lines tracing is not enabled")
+    
+    spans = await asyncio.to_thread(
+        load_trace, settings.TRACING_JSONL_PATH, trace_id, settings.TRACING_JSONL_BACKUP_COUNT
+    )
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"Trace not found: {trace_id}")
+    
+    return {
+        "success": True,
+        "trace_id": trace_id,
+        "span_count": len(spans),
+        "critical_path": critical_path(spans),
+        "spans": sorted(spans, key=lambda s: s["start_ns"])
+    }
+
+
+@app.get("/api/debug/profiles/{request_id}", include_in_schema=False, dependencies=DEBUG_ACCESS)
+async def get_profile(request_id: str, format: str = "summary"):
+    """
+    Return a stored request profile.
+    Use format=speedscope for the full profile (open in speedscope.app).
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    
+    profile = await asyncio.to_thread(profiler.load, request_id, format == "speedscope")
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {request_id}")
+    
+    return profile
+
+
+@app.get("/api/debug/event-loop", include_in_schema=False, dependencies=DEBUG_ACCESS)
+async def get_event_loop_report(limit: int = 20):
+    """
+    Event-loop lag summary and the callbacks that blocked it the longest,
+    attributed to the agent module and route on the captured stack.
+    """
+    if not settings.LOOP_MONITOR_ENABLED:
+        raise HTTPException(status_code=404, detail="Event-loop monitor is not enabled")
+    
+    return {
+        "success": True,
+        "data": loop_monitor.report(limit)
+    }
+
+
+@app.get("/api/debug/pools", include_in_schema=False, dependencies=DEBUG_ACCESS)
+async def get_pool_status():
+    """Current load of every execution pool (bulkhead) and admission class"""
+    return {
+        "success": True,
+        "data": {
+            "pools": bulkheads.status(),
+            "admission": admission_control.status()
+        }
+    }
+
+
 # ======================
 # EXIM TRADE INTELLIGENCE
 # ======================
 
 @app.post("/api/agents/exim")
-async def analyze_trade_intelligence(request: EXIMRequest):
+async def analyze_trade_intelligence(request: EXIMRequest, http_request: Request):
     """
     EXIM Trends Agent - Trade Intelligence Analysis.
     Provides global trade flows, sourcing hubs, supply risk flags.
@@ -597,18 +1111,21 @@ async def analyze_trade_intelligence(request: EXIMRequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await exim_agent.analyze(
-            molecule=request.molecule,
-            llm_config=llm_config
-        )
+        async with agent_slot("exim", llm_config):
+            result = await exim_agent.analyze(
+                molecule=request.molecule,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "agent": "EXIM Trends Agent",
             "data": result
-        }
+        }, http_request, agents=("exim",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("exim_analysis_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"EXIM analysis failed: {str(e)}")
@@ -629,7 +1146,7 @@ async def get_sourcing_hubs():
 # ======================
 
 @app.post("/api/agents/iqvia")
-async def analyze_market_intelligence(request: IQVIARequest):
+async def analyze_market_intelligence(request: IQVIARequest, http_request: Request):
     """
     IQVIA Insights Agent - Commercial Viability Analysis.
     Provides market size, CAGR, volume shifts, competitor analysis.
@@ -646,26 +1163,29 @@ async def analyze_market_intelligence(request: IQVIARequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await iqvia_agent.analyze(
-            molecule=request.molecule,
-            disease=request.disease,
-            llm_config=llm_config
-        )
+        async with agent_slot("iqvia", llm_config):
+            result = await iqvia_agent.analyze(
+                molecule=request.molecule,
+                disease=request.disease,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "agent": "IQVIA Insights Agent",
             "data": result
-        }
+        }, http_request, agents=("iqvia",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("iqvia_analysis_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"IQVIA analysis failed: {str(e)}")
 
 
 @app.post("/api/agents/iqvia/roi")
-async def calculate_market_roi(request: IQVIARequest):
+async def calculate_market_roi(request: IQVIARequest, http_request: Request):
     """Calculate ROI estimation using IQVIA market data"""
     logger.info(
         "iqvia_roi_requested",
@@ -679,19 +1199,22 @@ async def calculate_market_roi(request: IQVIARequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await iqvia_agent.calculate_roi(
-            molecule=request.molecule,
-            disease=request.disease,
-            llm_config=llm_config
-        )
+        async with agent_slot("iqvia", llm_config):
+            result = await iqvia_agent.calculate_roi(
+                molecule=request.molecule,
+                disease=request.disease,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "agent": "IQVIA Insights Agent",
             "data": result
-        }
+        }, http_request, agents=("iqvia",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("iqvia_roi_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"IQVIA ROI calculation failed: {str(e)}")
@@ -702,7 +1225,7 @@ async def calculate_market_roi(request: IQVIARequest):
 # ======================
 
 @app.post("/api/agents/web-intel")
-async def gather_web_intelligence(request: WebIntelRequest):
+async def gather_web_intelligence(request: WebIntelRequest, http_request: Request):
     """
     Web Intelligence Agent - Real-Time Signals.
     Gathers data from PubMed, news, regulatory sources.
@@ -719,18 +1242,21 @@ async def gather_web_intelligence(request: WebIntelRequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("cloud")
         
-        result = await web_agent.analyze(
-            query=request.query,
-            llm_config=llm_config
-        )
+        async with agent_slot("web_intelligence", llm_config):
+            result = await web_agent.analyze(
+                query=request.query,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "agent": "Web Intelligence Agent",
             "data": result
-        }
+        }, http_request, agents=("web_intelligence",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("web_intel_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Web intelligence gathering failed: {str(e)}")
@@ -775,7 +1301,7 @@ async def search_news(query: str, limit: int = 10):
 # ======================
 
 @app.post("/api/agents/internal-knowledge")
-async def search_internal_knowledge(request: InternalKnowledgeRequest):
+async def search_internal_knowledge(request: InternalKnowledgeRequest, http_request: Request):
     """
     Internal Knowledge Agent - Proprietary Intelligence.
     Searches internal documents using Local LLM for privacy.
@@ -792,19 +1318,22 @@ async def search_internal_knowledge(request: InternalKnowledgeRequest):
         privacy_manager: PrivacyManager = app.state.privacy_manager
         llm_config = privacy_manager.get_llm_config("local")  # Always use local LLM for internal docs
         
-        result = await internal_agent.analyze(
-            query=request.query,
-            llm_config=llm_config
-        )
+        async with agent_slot("internal_knowledge", llm_config):
+            result = await internal_agent.analyze(
+                query=request.query,
+                llm_config=llm_config
+            )
         
-        return {
+        return _payload_response({
             "success": True,
             "request_id": request.request_id,
             "agent": "Internal Knowledge Agent",
             "privacy_mode": "local",
             "data": result
-        }
+        }, http_request, agents=("internal_knowledge",))
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("internal_knowledge_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Internal knowledge search failed: {str(e)}")
@@ -824,11 +1353,12 @@ async def ingest_document(file: UploadFile = File(...)):
         # Read file content
         content = await file.read()
         
-        result = await internal_agent.ingest_document(
-            filename=file.filename,
-            content=content,
-            content_type=file.content_type
-        )
+        async with agent_slot("internal_knowledge", mode="secure"):
+            result = await internal_agent.ingest_document(
+                filename=file.filename,
+                content=content,
+                content_type=file.content_type
+            )
         
         return {
             "success": True,
@@ -836,6 +1366,8 @@ async def ingest_document(file: UploadFile = File(...)):
             "data": result
         }
         
+    except BulkheadFull:
+        raise
     except Exception as e:
         logger.error("document_ingestion_failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Document ingestion failed: {str(e)}")
@@ -852,6 +1384,148 @@ async def list_internal_documents():
     }
 
 
+@app.post("/api/agents/patent/claim-screen")
+async def screen_patent_claims(request: ClaimScreenRequest, http_request: Request):
+    """
+    Freedom-to-operate claim screening.
+    
+    Matches candidate claims (or claims drafted around a molecule) against
+    every indexed independent claim and returns in-force near-duplicates.
+    """
+    claims = list(request.claims)
+    if request.molecule:
+        claims.extend(candidate_claims(request.molecule))
+    if not claims:
+        raise HTTPException(status_code=422, detail="Provide claims or a molecule to screen")
+    if get_claim_index() is None:
+        raise HTTPException(status_code=503, detail="Claim screening index has not been built")
+    
+    logger.info(
+        "claim_screening_requested",
+        claims=len(claims),
+        request_id=request.request_id
+    )
+    
+    try:
+        patent_agent: PatentAgent = app.state.patent_agent
+        async with agent_slot("patent"):
+            result = await patent_agent.screen_claims(claims, request.threshold)
+        
+        return _payload_response({
+            "success": True,
+            "request_id": request.request_id,
+            "data": result
+        }, http_request, agents=("patent",))
+        
+    except BulkheadFull:
+        raise
+    except Exception as e:
+        logger.error("claim_screening_failed", request_id=request.request_id, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Claim screening failed: {str(e)}")
+
+
+# ======================
+# PORTFOLIO ANALYTICS
+# ======================
+
+@app.post("/api/portfolio/patent-cliff")
+async def get_patent_cliff(request: PatentCliffRequest, http_request: Request):
+    """
+    Portfolio patent cliff.
+    
+    Lists the molecules that lose all patent and exclusivity protection
+    within the requested years, with yearly coverage timelines, from the
+    patent cliff index in one batch query.
+    """
+    if request.end_year < request.start_year:
+        raise HTTPException(status_code=422, detail="end_year must not precede start_year")
+    cliff_index = get_patent_cliff_index()
+    if cliff_index is None:
+        raise HTTPException(status_code=503, detail="Patent cliff index has not been built")
+    
+    logger.info(
+        "patent_cliff_requested",
+        molecules=len(request.molecules),
+        start_year=request.start_year,
+        end_year=request.end_year,
+        request_id=request.request_id
+    )
+    
+    try:
+        async with agent_slot("patent"):
+            result = await offload(
+                "patent",
+                cliff_index.cliff,
+                request.molecules,
+                request.start_year,
+                request.end_year,
+                request.timeline_years,
+                request.limit
+            )
+        
+        return _payload_response({
+            "success": True,
+            "request_id": request.request_id,
+            "data": result
+        }, http_request, agents=("patent",))
+        
+    except BulkheadFull:
+        raise
+    except Exception as e:
+        logger.error("patent_cliff_failed", request_id=request.request_id, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Patent cliff analysis failed: {str(e)}")
+
+
+@app.post("/api/portfolio/rnpv")
+async def get_portfolio_rnpv(request: RNPVRequest, http_request: Request):
+    """
+    Portfolio risk-adjusted NPV.
+    
+    Values every candidate in one batch: explicit cash flows, or modelled
+    programmes' expected-case cash flows, discounted and weighted by the
+    probability of passing each phase gate. Returns the ranking by rNPV
+    and the portfolio's expected yearly cash flows.
+    """
+    for candidate in request.candidates:
+        if candidate.cash_flows is None and candidate.peak_sales_millions is None:
+            raise HTTPException(status_code=422, detail=f"{candidate.molecule}: cash_flows or peak_sales_millions is required")
+        if len(candidate.phase_gates or ()) != len(candidate.phase_probabilities or ()) and candidate.cash_flows is not None:
+            raise HTTPException(status_code=422, detail=f"{candidate.molecule}: phase_gates and phase_probabilities differ in length")
+        if candidate.cash_flows is None and candidate.phase_probabilities and len(candidate.phase_probabilities) != len(PHASES):
+            raise HTTPException(status_code=422, detail=f"{candidate.molecule}: a programme takes {len(PHASES)} phase probabilities")
+        if any(not 0 <= p <= 1 for p in candidate.phase_probabilities or ()):
+            raise HTTPException(status_code=422, detail=f"{candidate.molecule}: phase probabilities must lie in [0, 1]")
+    
+    logger.info(
+        "portfolio_rnpv_requested",
+        candidates=len(request.candidates),
+        horizon_years=request.horizon_years,
+        request_id=request.request_id
+    )
+    
+    try:
+        async with agent_slot("market"):
+            valuation = await offload(
+                "market",
+                value_portfolio,
+                [candidate.model_dump() for candidate in request.candidates],
+                request.discount_rate,
+                request.horizon_years
+            )
+        
+        return _payload_response({
+            "success": True,
+            "request_id": request.request_id,
+            "data": valuation.to_dict(request.limit)
+        }, http_request, agents=("market",))
+        
+    except BulkheadFull:
+        raise
+    except Exception as e:
+        logger.error("portfolio_rnpv_failed", request_id=request.request_id, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Portfolio rNPV valuation failed: {str(e)}")
+
+
 # ======================
 # ERROR HANDLERS
 # ======================
@@ -869,6 +1543,26 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
+@app.exception_handler(BulkheadFull)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFull):
+    """A saturated execution pool is retryable: 503 with the pool's drain estimate"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "success": False,
+            "error": str(exc),
+            "path": str(request.url.path)
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    """Nobody is listening any more; 499 (Client Closed Request) marks it in the access log"""
+    return Response(status_code=499)
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected exceptions"""
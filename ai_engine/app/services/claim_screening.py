@@ -0,0 +1,407 @@
+"""
+PharmaLens Claim Screening
+===========================
+Near-duplicate screening of patent claims for freedom-to-operate: a
+candidate's claim text (or claims drafted around a molecule) is matched
+against every independent claim in the local patent index without
+comparing it to each of them.
+
+Provides:
+- Word shingles (k consecutive normalized words) hashed to 32 bits with
+  vectorized multiply-add mixing of per-word CRC32s
+- MinHash signatures (NUM_PERM multiply-shift hash functions) computed for
+  a batch of claims at a time: one hash matrix per block of functions and
+  a per-claim minimum with ``np.minimum.reduceat``
+- An LSH table of BANDS bands of ROWS signature rows each, persisted as
+  per-band sorted bucket keys and claim ids; a query is one binary search
+  per band, so candidate lookup is sublinear in the number of claims, and
+  candidates are ranked by the Jaccard estimate of their full signatures
+- ClaimScreeningIndex.screen(): best-matching claims per query, joined with
+  patent status, holder and expiry from the patent index;
+  blocking_claims() keeps granted, unexpired patents above the blocking
+  similarity
+
+Only independent claims are indexed: a dependent claim is narrower than the
+claim it refers to, so it cannot block anything its parent does not.
+
+Build the index from the patent index (from the ai_engine directory):
+
+    python -m app.services.claim_screening build --index data/patents/patents.sqlite3 --out data/patents/claims
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+import threading
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.staging import staged_directory
+from app.services.patent_index import EPOCH, PatentIndex, get_patent_index
+
+logger = structlog.get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS  # candidate threshold ~ (1 / BANDS) ** (1 / ROWS) = 0.42
+
+# Claims signed per batch while building, and hash functions per hash matrix
+BUILD_BATCH = 2048
+PERM_BLOCK = 32
+
+# Buckets holding more claims than this are boilerplate shared by whole
+# families of claims and are skipped (keeps lookups bounded)
+MAX_BUCKET = 5000
+
+# Estimated Jaccard similarity for a claim to be reported, and to count as blocking
+MATCH_SIMILARITY = 0.5
+BLOCKING_SIMILARITY = 0.85
+
+# Fixed seed: signatures of queries must use the build's hash functions
+SEED = 0x5EED
+
+WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+STOPWORDS = frozenset("a an the of and or to in on by with said wherein thereof therein which is are be".split())
+DEPENDENT = re.compile(r"\bclaims? \d")
+
+# Claims drafted around a molecule when no candidate claim text is given
+CANDIDATE_CLAIMS = [
+    "A compound which is {molecule} or a pharmaceutically acceptable salt thereof.",
+    "A pharmaceutical composition comprising {molecule} and a pharmaceutically acceptable carrier.",
+    "A method of treating a disease in a subject comprising administering {molecule}.",
+    "An oral dosage form comprising a therapeutically effective amount of {molecule}."
+]
+
+_rng = np.random.default_rng(SEED)
+PERM_A = _rng.integers(1, 1 << 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+PERM_B = _rng.integers(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+MIX = np.uint64(0x9E3779B97F4A7C15)
+del _rng
+
+
+def candidate_claims(molecule: str) -> List[str]:
+    return [template.format(molecule=molecule) for template in CANDIDATE_CLAIMS]
+
+
+def _word_hashes(text: str) -> np.ndarray:
+    words = [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+    return np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words))
+
+
+def shingles(text: str) -> np.ndarray:
+    """Distinct 32-bit hashes of the text's word shingles (its words when shorter than a shingle)."""
+    words = _word_hashes(text)
+    if len(words) < SHINGLE_WORDS:
+        return np.unique(words)
+    count = len(words) - SHINGLE_WORDS + 1
+    mixed = words[:count].copy()
+    for offset in range(1, SHINGLE_WORDS):
+        mixed = mixed * MIX + words[offset:offset + count]
+    return np.unique((mixed ^ (mixed >> np.uint64(29))) & np.uint64(0xFFFFFFFF))
+
+
+def signatures(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    MinHash signatures of ``texts`` (uint32, one row each) and a mask of
+    the texts that had any words; rows of empty texts are all zero.
+    """
+    sets = [shingles(text) for text in texts]
+    nonempty = np.array([len(s) > 0 for s in sets], dtype=bool)
+    result = np.zeros((len(texts), NUM_PERM), dtype=np.uint32)
+    if not nonempty.any():
+        return result, nonempty
+    lengths = np.array([len(s) for s in sets if len(s)], dtype=np.int64)
+    values = np.concatenate([s for s in sets if len(s)])[:, None]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    rows = np.flatnonzero(nonempty)
+    for block in range(0, NUM_PERM, PERM_BLOCK):
+        hashed = (values * PERM_A[None, block:block + PERM_BLOCK] + PERM_B[None, block:block + PERM_BLOCK]) >> np.uint64(32)
+        result[rows, block:block + PERM_BLOCK] = np.minimum.reduceat(hashed, starts, axis=0)
+    return result, nonempty
+
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """LSH bucket key of every signature in every band: shape ``(BANDS, len(sigs))``."""
+    keys = np.empty((BANDS, len(sigs)), dtype=np.uint64)
+    for band in range(BANDS):
+        key = np.full(len(sigs), band, dtype=np.uint64)
+        for row in range(band * ROWS, (band + 1) * ROWS):
+            key = key * MIX + sigs[:, row].astype(np.uint64)
+        keys[band] = key
+    return keys
+
+
+# ======================
+# BUILD
+# ======================
+
+def iter_independent_claims(patent_index_path: str) -> Iterator[Tuple[int, int, str]]:
+    """``(patent id, claim number, text)`` of every independent claim in the patent index."""
+    conn = sqlite3.connect(f"file:{patent_index_path}?mode=ro", uri=True)
+    try:
+        for patent_id, claims in conn.execute("SELECT rowid, claims FROM patent_text"):
+            for number, claim in enumerate((claims or "").split("\n"), 1):
+                if claim and not DEPENDENT.search(claim[:200]):
+                    yield patent_id, number, claim
+    finally:
+        conn.close()
+
+
+def build_index(patent_index_path: str, directory: str, progress_every: int = 500000) -> Dict[str, Any]:
+    """
+    Sign every independent claim of the patent index and write the LSH
+    table to ``directory``. The index is built in a staging directory that
+    replaces ``directory`` when complete, so workers with the old files
+    memory-mapped keep reading them intact.
+    """
+    with staged_directory(directory) as staging:
+        meta = _build(patent_index_path, staging, progress_every)
+    logger.info("claim_index_built", directory=directory, claims=meta["claims"], elapsed_s=meta["elapsed_s"])
+    return meta
+
+
+def _build(patent_index_path: str, directory: str, progress_every: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    raw_path = os.path.join(directory, "signatures.tmp")
+    patent_ids: List[int] = []
+    claim_numbers: List[int] = []
+
+    with open(raw_path, "wb") as raw:
+        batch: List[Tuple[int, int, str]] = []
+
+        def flush():
+            sigs, nonempty = signatures([text for _, _, text in batch])
+            raw.write(sigs[nonempty].tobytes())
+            for (patent_id, number, _), keep in zip(batch, nonempty):
+                if keep:
+                    patent_ids.append(patent_id)
+                    claim_numbers.append(number)
+            batch.clear()
+
+        for claim in iter_independent_claims(patent_index_path):
+            batch.append(claim)
+            if len(batch) == BUILD_BATCH:
+                flush()
+                if progress_every and len(patent_ids) % progress_every < BUILD_BATCH:
+                    logger.info("claim_index_progress", claims=len(patent_ids))
+        if batch:
+            flush()
+
+    count = len(patent_ids)
+    raw_sigs = np.memmap(raw_path, dtype=np.uint32, mode="r", shape=(count, NUM_PERM)) if count else np.zeros((0, NUM_PERM), dtype=np.uint32)
+    sigs = np.lib.format.open_memmap(os.path.join(directory, "signatures.npy"), mode="w+", dtype=np.uint32, shape=(count, NUM_PERM))
+    keys = np.empty((BANDS, count), dtype=np.uint64)
+    for start in range(0, count, 1 << 18):
+        chunk = np.asarray(raw_sigs[start:start + (1 << 18)])
+        sigs[start:start + len(chunk)] = chunk
+        keys[:, start:start + len(chunk)] = band_keys(chunk)
+    sigs.flush()
+    del sigs, raw_sigs
+    os.remove(raw_path)
+
+    order = np.argsort(keys, axis=1, kind="stable")
+    np.save(os.path.join(directory, "band_keys.npy"), np.take_along_axis(keys, order, axis=1))
+    np.save(os.path.join(directory, "band_claims.npy"), order.astype(np.uint32))
+    np.save(os.path.join(directory, "claim_patents.npy"), np.array(patent_ids, dtype=np.int64))
+    np.save(os.path.join(directory, "claim_numbers.npy"), np.array(claim_numbers, dtype=np.int32))
+
+    meta = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "claims": count,
+        "patents": len(set(patent_ids)),
+        "num_perm": NUM_PERM,
+        "bands": BANDS,
+        "shingle_words": SHINGLE_WORDS,
+        "elapsed_s": round(time.perf_counter() - started, 1)
+    }
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# ======================
+# QUERIES
+# ======================
+
+class ClaimScreeningIndex:
+    """Memory-mapped MinHash signatures and LSH buckets of indexed claims."""
+
+    def __init__(self, directory: str, patent_index: PatentIndex):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if (self.meta.get("format_version") != INDEX_FORMAT_VERSION or self.meta.get("num_perm") != NUM_PERM
+                or self.meta.get("bands") != BANDS or self.meta.get("shingle_words") != SHINGLE_WORDS):
+            raise ValueError(f"Unsupported claim index in {directory}")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self.signatures = load("signatures")
+        self.band_keys = load("band_keys")
+        self.band_claims = load("band_claims")
+        self.claim_patents = load("claim_patents")
+        self.claim_numbers = load("claim_numbers")
+        self.patent_index = patent_index
+
+    def __len__(self) -> int:
+        return self.signatures.shape[0]
+
+    def candidates(self, sigs: np.ndarray) -> List[np.ndarray]:
+        """Sorted claim ids sharing at least one LSH bucket with each signature."""
+        keys = band_keys(sigs)
+        found: List[List[np.ndarray]] = [[] for _ in range(len(sigs))]
+        for band in range(BANDS):
+            sorted_keys = self.band_keys[band]
+            lo = np.searchsorted(sorted_keys, keys[band], side="left")
+            hi = np.searchsorted(sorted_keys, keys[band], side="right")
+            for query in np.flatnonzero((hi > lo) & (hi - lo <= MAX_BUCKET)):
+                found[query].append(np.asarray(self.band_claims[band, lo[query]:hi[query]]))
+        return [np.unique(np.concatenate(ids)).astype(np.int64) if ids else np.zeros(0, dtype=np.int64) for ids in found]
+
+    def similar_claims(
+        self, texts: Sequence[str], limit: Optional[int] = 20, threshold: float = MATCH_SIMILARITY
+    ) -> List[List[Tuple[float, int]]]:
+        """``(similarity, claim id)`` of the claims most similar to each text (all of them when ``limit`` is None), best first."""
+        sigs, nonempty = signatures(texts)
+        results: List[List[Tuple[float, int]]] = [[] for _ in texts]
+        rows = np.flatnonzero(nonempty)
+        for row, claims in zip(rows, self.candidates(sigs[rows])):
+            if not len(claims):
+                continue
+            similarity = (np.asarray(self.signatures[claims]) == sigs[row]).mean(axis=1)
+            keep = similarity >= threshold
+            claims, similarity = claims[keep], similarity[keep]
+            top = np.argsort(-similarity, kind="stable")[:limit]
+            results[row] = [(float(similarity[i]), int(claims[i])) for i in top]
+        return results
+
+    def _resolve(self, matches: Sequence[Tuple[float, int, int]]) -> List[Dict[str, Any]]:
+        """``(similarity, claim id, query)`` matches as rows with their patents' bibliographic data."""
+        patents = self.patent_index.patents(sorted({int(self.claim_patents[claim]) for _, claim, _ in matches}))
+        rows = []
+        for similarity, claim, query in matches:
+            patent = patents.get(int(self.claim_patents[claim]))
+            if patent is None:
+                continue  # replaced in the patent index since the claim index was built
+            rows.append({
+                "query": query,
+                "number": patent["number"],
+                "claim": int(self.claim_numbers[claim]),
+                "similarity": round(similarity, 3),
+                "status": patent["status"],
+                "assignee": patent["assignee"],
+                "expiry_date": patent["expiry_date"],
+                "expiry_day": patent["expiry_day"],
+                "claim_type": patent["claim_type"]
+            })
+        return rows
+
+    def screen(
+        self, texts: Sequence[str], limit: Optional[int] = 20, threshold: float = MATCH_SIMILARITY
+    ) -> List[List[Dict[str, Any]]]:
+        """Similar indexed claims of each text, with the patents they belong to."""
+        matches = self.similar_claims(texts, limit, threshold)
+        rows = self._resolve([(similarity, claim, query) for query, found in enumerate(matches) for similarity, claim in found])
+        results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        for row in rows:
+            results[row.pop("query")].append(row)
+        return results
+
+    def blocking_claims(
+        self,
+        texts: Sequence[str],
+        today: Optional[date] = None,
+        threshold: float = BLOCKING_SIMILARITY,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Granted, unexpired patents with a claim at least ``threshold``
+        similar to any of ``texts``: the claims a candidate would need a
+        freedom-to-operate opinion on. ``similar_claims`` lists the ``limit``
+        closest claims of any status.
+        """
+        today_day = ((today or date.today()) - EPOCH).days
+        matches = self.similar_claims(texts, limit=None, threshold=min(threshold, MATCH_SIMILARITY))
+        ranked = sorted(
+            ((similarity, claim, query) for query, found in enumerate(matches) for similarity, claim in found),
+            key=lambda match: -match[0]
+        )
+        # Only claims that can block, and the closest few, need their patents looked up
+        above = sum(1 for similarity, _, _ in ranked if similarity >= threshold)
+        rows = self._resolve(ranked[:max(above, limit)])
+
+        best: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            expiry_day = row.pop("expiry_day")
+            in_force = row["status"] == "granted" and expiry_day is not None and expiry_day >= today_day
+            if in_force and row["similarity"] >= threshold and row["number"] not in best:
+                best[row["number"]] = row
+        return {
+            "queries": len(texts),
+            "similar_claims": rows[:limit],
+            "blocking_patents": len(best),
+            "blocking_claims": list(best.values())
+        }
+
+
+_index: Optional[ClaimScreeningIndex] = None
+_index_checked = False
+_index_lock = threading.Lock()
+
+
+def get_claim_index() -> Optional[ClaimScreeningIndex]:
+    """The claim index in CLAIM_INDEX_DIR, opened once per process; None when it or the patent index is missing."""
+    global _index, _index_checked
+    if not _index_checked:
+        with _index_lock:
+            if not _index_checked:
+                directory = settings.CLAIM_INDEX_DIR
+                patent_index = get_patent_index()
+                if patent_index is not None and directory and os.path.exists(os.path.join(directory, "meta.json")):
+                    try:
+                        _index = ClaimScreeningIndex(directory, patent_index)
+                        logger.info("claim_index_opened", directory=directory, claims=len(_index))
+                    except (OSError, ValueError) as e:
+                        logger.warning("claim_index_unavailable", directory=directory, error=str(e))
+                _index_checked = True
+    return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the MinHash/LSH claim screening index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Sign the independent claims of the patent index")
+    build.add_argument("--index", default=settings.PATENT_INDEX_PATH, help="Patent index database (default: PATENT_INDEX_PATH)")
+    build.add_argument("--out", default=settings.CLAIM_INDEX_DIR, help="Claim index directory (default: CLAIM_INDEX_DIR)")
+    screen = subparsers.add_parser("screen", help="Screen claim text (or a molecule's candidate claims) for blocking claims")
+    screen.add_argument("text", help="Claim text, or a molecule name with --molecule")
+    screen.add_argument("--molecule", action="store_true", help="Screen the candidate claims drafted around a molecule")
+    screen.add_argument("--index", default=settings.PATENT_INDEX_PATH)
+    screen.add_argument("--claims", default=settings.CLAIM_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(json.dumps(build_index(args.index, args.out), indent=2))
+    else:
+        index = ClaimScreeningIndex(args.claims, PatentIndex(args.index))
+        texts = candidate_claims(args.text) if args.molecule else [args.text]
+        started = time.perf_counter()
+        result = index.blocking_claims(texts)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps(result, indent=2))
+        print(f"{elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ Supports both OpenAI (cloud) and Llama (local) models.
 
 import time
 import asyncio
+import functools
+import threading
 from typing import Dict, Any, Optional, List
 from tenacity import (
     retry,
@@ -16,24 +18,34 @@ from tenacity import (
 )
 import structlog
 
+from app.core import metrics
+from app.core.bulkhead import bulkheads
+from app.core.tracing import span
+
 logger = structlog.get_logger(__name__)
 
 
 class RateLimiter:
     """Simple rate limiter for API calls"""
     
-    def __init__(self, max_calls: int = 60, time_window: int = 60):
+    def __init__(self, max_calls: int = 60, time_window: int = 60, name: str = "llm"):
         """
         Args:
             max_calls: Maximum number of calls allowed in time_window
             time_window: Time window in seconds
+            name: Limiter name used as the metrics label
         """
         self.max_calls = max_calls
         self.time_window = time_window
+        self.name = name
         self.calls = []
     
     async def acquire(self):
         """Wait if rate limit is exceeded"""
+        with metrics.RATE_LIMITER_WAIT.time(limiter=self.name):
+            await self._acquire()
+    
+    async def _acquire(self):
         now = time.time()
         # Remove old calls outside the time window
         self.calls = [call_time for call_time in self.calls if now - call_time < self.time_window]
@@ -44,7 +56,7 @@ class RateLimiter:
             wait_time = self.time_window - (now - oldest_call) + 0.1
             logger.warning(f"Rate limit reached, waiting {wait_time:.2f}s")
             await asyncio.sleep(wait_time)
-            return await self.acquire()
+            return await self._acquire()
         
         self.calls.append(now)
 
@@ -131,29 +143,44 @@ class LLMService:
         # Apply rate limiting
         await self.rate_limiter.acquire()
         
+        start_time = time.perf_counter()
         try:
-            if provider == "openai":
-                return await self._generate_openai(
-                    prompt=prompt,
-                    llm_config=llm_config,
-                    system_prompt=system_prompt,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-            elif provider == "local":
-                return await self._generate_llama(
-                    prompt=prompt,
-                    llm_config=llm_config,
-                    system_prompt=system_prompt,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-            else:
-                raise ValueError(f"Unknown provider: {provider}")
+            with span("llm.generate_completion", provider=provider, model=llm_config.get("model", "unknown")):
+                if provider == "openai":
+                    return await self._generate_openai(
+                        prompt=prompt,
+                        llm_config=llm_config,
+                        system_prompt=system_prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                elif provider == "local":
+                    return await self._generate_llama(
+                        prompt=prompt,
+                        llm_config=llm_config,
+                        system_prompt=system_prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                else:
+                    raise ValueError(f"Unknown provider: {provider}")
+        
+        except asyncio.CancelledError:
+            # In-flight OpenAI requests are aborted by the cancellation itself
+            metrics.LLM_CANCELLED.inc(provider=provider)
+            raise
         
         except Exception as e:
+            metrics.LLM_ERRORS.inc(provider=provider)
             logger.error(f"LLM generation failed: {e}", provider=provider)
             raise
+        
+        finally:
+            metrics.LLM_REQUEST_DURATION.observe(
+                time.perf_counter() - start_time,
+                provider=provider,
+                model=llm_config.get("model", "unknown")
+            )
     
     async def _generate_openai(
         self,
@@ -178,14 +205,15 @@ class LLMService:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        # Call OpenAI API
+        # Call OpenAI API (bounded by the cloud LLM bulkhead)
         try:
-            response = await self.openai_client.chat.completions.create(
-                model=llm_config.get("model", "gpt-4"),
-                messages=messages,
-                temperature=temperature or llm_config.get("temperature", 0.7),
-                max_tokens=max_tokens or llm_config.get("max_tokens", 4096),
-            )
+            async with bulkheads.pool("cloud", "llm").slot():
+                response = await self.openai_client.chat.completions.create(
+                    model=llm_config.get("model", "gpt-4"),
+                    messages=messages,
+                    temperature=temperature or llm_config.get("temperature", 0.7),
+                    max_tokens=max_tokens or llm_config.get("max_tokens", 4096),
+                )
             
             result = response.choices[0].message.content
             logger.info(
@@ -223,27 +251,46 @@ class LLMService:
         else:
             full_prompt = f"User: {prompt}\n\nAssistant:"
         
-        # Run inference in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
+        max_tokens = max_tokens or llm_config.get("max_tokens", 2048)
+        temperature = temperature or llm_config.get("temperature", 0.7)
+        stop_event = threading.Event()
+        loop = asyncio.get_running_loop()
+        
+        def generate() -> Dict[str, Any]:
+            # Stream tokens so a cancelled request stops at the next token
+            chunks = []
+            for chunk in self.llama_model(
+                full_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stop=["User:", "\n\n"],
+                stream=True,
+            ):
+                if stop_event.is_set():
+                    loop.call_soon_threadsafe(
+                        functools.partial(metrics.LLM_TOKENS_AVOIDED.inc, max_tokens - len(chunks), provider="local")
+                    )
+                    break
+                chunks.append(chunk["choices"][0]["text"])
+            return {"text": "".join(chunks), "tokens": len(chunks)}
+        
+        # Run inference on the secure LLM bulkhead's own threads so local
+        # model load never starves the default executor or cloud requests
         try:
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.llama_model(
-                    full_prompt,
-                    max_tokens=max_tokens or llm_config.get("max_tokens", 2048),
-                    temperature=temperature or llm_config.get("temperature", 0.7),
-                    stop=["User:", "\n\n"],
-                )
-            )
+            result = await bulkheads.pool("secure", "llm").run(generate)
             
-            generated_text = result["choices"][0]["text"].strip()
+            generated_text = result["text"].strip()
             logger.info(
                 "Llama completion generated",
                 model=llm_config.get("model"),
-                tokens=result["usage"]["total_tokens"]
+                tokens=result["tokens"]
             )
             return generated_text
         
+        except asyncio.CancelledError:
+            stop_event.set()
+            raise
+        
         except Exception as e:
             logger.error(f"Llama inference error: {e}")
             raise
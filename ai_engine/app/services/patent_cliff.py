@@ -0,0 +1,570 @@
+"""
+PharmaLens Patent Cliff Index
+==============================
+Protection windows (patents and regulatory exclusivities) per molecule,
+merged into coverage intervals, for portfolio-wide loss-of-exclusivity
+questions ("which of these 2,000 molecules lose all protection between
+2027 and 2029") answered with array operations instead of one PatentAgent
+call per molecule.
+
+Provides:
+- Readers for the FDA Orange Book data files (``products.txt``,
+  ``patent.txt``, ``exclusivity.txt``; zip or directory) and for the local
+  patent index (granted patents claiming each of a list of molecules)
+- PatentCliffBuilder: windows keyed by active-moiety key (combination
+  products keep their own key), deduplicated per patent number or per
+  exclusivity listing (code, application, product and expiry), sorted by molecule then start day and written as CSR arrays, plus
+  the merged coverage intervals (a running maximum of window ends per
+  molecule) and the last protected day of every molecule in sorted order
+- PatentCliffIndex: batch range-overlap queries over the coverage
+  intervals, loss of exclusivity inside a window (a binary search over
+  sorted protection ends for the whole corpus), yearly coverage timelines
+  and the portfolio patent-cliff report served by
+  ``POST /api/portfolio/patent-cliff``
+
+Build an index from the ai_engine directory:
+
+    python -m app.services.patent_cliff build --orange-book EOBZIP_2024_06.zip --out data/patent_cliff
+    python -m app.services.patent_cliff build --patent-index data/patents/patents.sqlite3 --molecules portfolio.txt
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import zipfile
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.staging import staged_directory
+from app.services.safety_signals import drug_keys
+
+logger = structlog.get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+EPOCH = date(1970, 1, 1)
+
+# Window kinds, stored as uint8 codes
+KINDS = ["substance_patent", "product_patent", "use_patent", "patent", "exclusivity"]
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+EXCLUSIVITY = KIND_CODES["exclusivity"]
+
+# Patent index claim types -> window kinds
+CLAIM_KINDS = {
+    "Composition": "substance_patent",
+    "Formulation": "product_patent",
+    "Method of Use": "use_patent",
+    "Process": "patent"
+}
+
+# Orange Book products approved before this date carry no exact approval date
+PRE_1982 = date(1982, 1, 1)
+
+# Windows whose start is unknown are assumed to open this long before they end
+PATENT_TERM_DAYS = 20 * 365
+
+# Day values are offset into [0, DAY_SPAN) for the per-molecule running maximum
+DAY_OFFSET = 1 << 16
+DAY_SPAN = 1 << 18
+
+MAX_REPORTED = 500
+
+
+def molecule_key(name: str) -> str:
+    """Active-moiety key of a product or molecule name; combination ingredients are sorted and joined with ``; ``."""
+    keys = {key for part in name.split(";") for key in drug_keys(part)}
+    return "; ".join(sorted(keys))
+
+
+def day(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def iso(day_number: int) -> str:
+    return (EPOCH + timedelta(days=int(day_number))).isoformat()
+
+
+def _orange_book_date(text: str) -> Optional[date]:
+    text = text.strip()
+    if not text:
+        return None
+    if text.lower().startswith("approved prior to"):
+        return PRE_1982
+    for fmt in ("%b %d, %Y", "%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+# ======================
+# ORANGE BOOK READER
+# ======================
+
+def _orange_book_tables(path: str) -> Dict[str, Any]:
+    """``{"products": opener, "patent": opener, "exclusivity": opener}`` for an Orange Book zip or directory."""
+    tables: Dict[str, Any] = {}
+
+    def classify(name: str, opener):
+        stem = os.path.splitext(os.path.basename(name))[0].lower()
+        if stem in ("products", "patent", "exclusivity"):
+            tables[stem] = opener
+
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        for name in archive.namelist():
+            classify(name, lambda name=name: io.TextIOWrapper(archive.open(name), encoding="latin-1", newline=""))
+    else:
+        for name in os.listdir(path):
+            full = os.path.join(path, name)
+            classify(name, lambda full=full: open(full, encoding="latin-1", newline=""))
+    if "products" not in tables:
+        raise ValueError(f"{path} has no Orange Book products.txt")
+    return tables
+
+
+def _rows(opener) -> Iterator[Dict[str, str]]:
+    with opener() as f:
+        for row in csv.DictReader(f, delimiter="~", quoting=csv.QUOTE_NONE):
+            yield {key.strip(): (value or "").strip() for key, value in row.items() if key}
+
+
+def iter_orange_book(path: str) -> Iterator[Tuple[str, Optional[date], date, str, str]]:
+    """``(molecule_key, start, end, kind, reference)`` for every listed patent and exclusivity of an Orange Book release."""
+    tables = _orange_book_tables(path)
+
+    # (application type, number, product) -> (molecule key, approval date)
+    products: Dict[Tuple[str, str, str], Tuple[str, Optional[date]]] = {}
+    for row in _rows(tables["products"]):
+        key = molecule_key(row.get("Ingredient", ""))
+        if key:
+            products[(row.get("Appl_Type", ""), row.get("Appl_No", ""), row.get("Product_No", ""))] = (
+                key, _orange_book_date(row.get("Approval_Date", ""))
+            )
+
+    if "patent" in tables:
+        for row in _rows(tables["patent"]):
+            product = products.get((row.get("Appl_Type", ""), row.get("Appl_No", ""), row.get("Product_No", "")))
+            expires = _orange_book_date(row.get("Patent_Expire_Date_Text", ""))
+            if product is None or expires is None:
+                continue
+            if row.get("Drug_Substance_Flag") == "Y":
+                kind = "substance_patent"
+            elif row.get("Drug_Product_Flag") == "Y":
+                kind = "product_patent"
+            elif row.get("Patent_Use_Code"):
+                kind = "use_patent"
+            else:
+                kind = "patent"
+            yield product[0], product[1], expires, kind, row.get("Patent_No", "")
+
+    if "exclusivity" in tables:
+        for row in _rows(tables["exclusivity"]):
+            product = products.get((row.get("Appl_Type", ""), row.get("Appl_No", ""), row.get("Product_No", "")))
+            expires = _orange_book_date(row.get("Exclusivity_Date", ""))
+            if product is None or expires is None:
+                continue
+            # Generic codes (NCE, NP, PED...) recur across products and grants; each listing is its own window
+            reference = "{} {}{}-{} {}".format(
+                row.get("Exclusivity_Code", ""), row.get("Appl_Type", ""), row.get("Appl_No", ""),
+                row.get("Product_No", ""), expires.isoformat()
+            )
+            yield product[0], product[1], expires, "exclusivity", reference
+
+
+# ======================
+# BUILDER
+# ======================
+
+class PatentCliffBuilder:
+    """Accumulates protection windows and writes the interval index."""
+
+    def __init__(self):
+        # (molecule key, reference) -> [start day, end day, kind code]
+        self.windows: Dict[Tuple[str, str], List[int]] = {}
+
+    def add(self, molecule: str, start: Optional[date], end: date, kind: str, reference: str):
+        end_day = day(end)
+        start_day = day(start) if start else end_day - PATENT_TERM_DAYS
+        start_day = min(start_day, end_day)
+        window = self.windows.get((molecule, reference))
+        if window is None:
+            self.windows[(molecule, reference)] = [start_day, end_day, KIND_CODES[kind]]
+        else:
+            # The same patent listed for several products of the molecule
+            window[0] = min(window[0], start_day)
+            window[1] = max(window[1], end_day)
+
+    def add_orange_book(self, path: str) -> int:
+        before = len(self.windows)
+        for molecule, start, end, kind, reference in iter_orange_book(path):
+            self.add(molecule, start, end, kind, reference)
+        return len(self.windows) - before
+
+    def add_patent_index(self, index, molecules: Sequence[str]) -> int:
+        """Windows from grant to expiry of the local index's granted patents claiming each molecule."""
+        before = len(self.windows)
+        for name in molecules:
+            key = molecule_key(name)
+            if not key:
+                continue
+            for patent in index.protection_windows(name):
+                start = date.fromisoformat(patent["grant_date"]) if patent["grant_date"] else None
+                self.add(
+                    key, start, date.fromisoformat(patent["expiry_date"]),
+                    CLAIM_KINDS.get(patent["claim_type"], "patent"), patent["number"]
+                )
+        return len(self.windows) - before
+
+    def write(self, directory: str) -> Dict[str, Any]:
+        with staged_directory(directory) as staging:
+            return self._write(staging)
+
+    def _write(self, directory: str) -> Dict[str, Any]:
+        names = sorted({molecule for molecule, _ in self.windows})
+        ids = {name: i for i, name in enumerate(names)}
+        items = sorted(self.windows.items(), key=lambda item: (ids[item[0][0]], item[1][0], item[1][1]))
+
+        molecules = np.fromiter((ids[molecule] for (molecule, _), _ in items), dtype=np.int64, count=len(items))
+        starts = np.fromiter((window[0] for _, window in items), dtype=np.int64, count=len(items))
+        ends = np.fromiter((window[1] for _, window in items), dtype=np.int64, count=len(items))
+        kinds = np.fromiter((window[2] for _, window in items), dtype=np.uint8, count=len(items))
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(molecules, minlength=len(names)), out=offsets[1:])
+
+        coverage_offsets, coverage_starts, coverage_ends = _merge(molecules, starts, ends, len(names))
+
+        # Last protected day per molecule, overall, by patents and by exclusivities
+        protection_end = np.full(len(names), np.iinfo(np.int32).min, dtype=np.int64)
+        patent_end = protection_end.copy()
+        exclusivity_end = protection_end.copy()
+        np.maximum.at(protection_end, molecules, ends)
+        is_exclusivity = kinds == EXCLUSIVITY
+        np.maximum.at(patent_end, molecules[~is_exclusivity], ends[~is_exclusivity])
+        np.maximum.at(exclusivity_end, molecules[is_exclusivity], ends[is_exclusivity])
+        # The window that sets each molecule's protection end (latest end, then latest start)
+        last_window = np.lexsort((starts, ends, molecules))[offsets[1:] - 1]
+
+        arrays = {
+            "offsets": offsets,
+            "starts": starts.astype(np.int32),
+            "ends": ends.astype(np.int32),
+            "kinds": kinds,
+            "coverage_offsets": coverage_offsets,
+            "coverage_starts": coverage_starts.astype(np.int32),
+            "coverage_ends": coverage_ends.astype(np.int32),
+            "protection_end": protection_end.astype(np.int32),
+            "patent_end": patent_end.astype(np.int32),
+            "exclusivity_end": exclusivity_end.astype(np.int32),
+            "last_window": last_window,
+            "by_protection_end": np.argsort(protection_end, kind="stable")
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, "molecules.json"), "w", encoding="utf-8") as f:
+            json.dump(names, f)
+        with open(os.path.join(directory, "references.json"), "w", encoding="utf-8") as f:
+            json.dump([reference for (_, reference), _ in items], f)
+
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "molecules": len(names),
+            "windows": len(items),
+            "coverage_intervals": int(len(coverage_starts))
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+
+def _merge(
+    molecules: np.ndarray, starts: np.ndarray, ends: np.ndarray, count: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Union of each molecule's windows (sorted by molecule, then start) as
+    CSR coverage intervals; windows that touch or overlap are merged.
+    """
+    if not len(starts):
+        return np.zeros(count + 1, dtype=np.int64), starts, ends
+    # Running maximum of ends that restarts at every molecule: keys of a later molecule always dominate
+    keyed = molecules * DAY_SPAN + np.clip(ends + DAY_OFFSET, 0, DAY_SPAN - 1)
+    running_end = np.maximum.accumulate(keyed) - molecules * DAY_SPAN - DAY_OFFSET
+    opens = np.ones(len(starts), dtype=bool)
+    opens[1:] = (molecules[1:] != molecules[:-1]) | (starts[1:] > running_end[:-1] + 1)
+    first = np.flatnonzero(opens)
+    last = np.append(first[1:], len(starts)) - 1
+
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(molecules[first], minlength=count), out=offsets[1:])
+    return offsets, starts[first], running_end[last]
+
+
+def build_index(
+    directory: str,
+    orange_book: Sequence[str] = (),
+    patent_index: Optional[str] = None,
+    molecules: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """Build the index in ``directory`` from Orange Book releases and/or the local patent index."""
+    started = time.perf_counter()
+    builder = PatentCliffBuilder()
+    for path in orange_book:
+        added = builder.add_orange_book(path)
+        logger.info("patent_cliff_orange_book_read", path=path, windows=added)
+    if patent_index:
+        from app.services.patent_index import PatentIndex
+        added = builder.add_patent_index(PatentIndex(patent_index), molecules)
+        logger.info("patent_cliff_patent_index_read", path=patent_index, windows=added)
+    meta = builder.write(directory)
+    meta["elapsed_s"] = round(time.perf_counter() - started, 2)
+    logger.info("patent_cliff_index_built", directory=directory, **meta)
+    return meta
+
+
+# ======================
+# QUERIES
+# ======================
+
+class PatentCliffIndex:
+    """Per-molecule protection windows and coverage intervals with batch range queries."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported patent cliff index in {directory}")
+        with open(os.path.join(directory, "molecules.json"), encoding="utf-8") as f:
+            self.molecule_names: List[str] = json.load(f)
+        with open(os.path.join(directory, "references.json"), encoding="utf-8") as f:
+            self.references: List[str] = json.load(f)
+        self.ids = {name: i for i, name in enumerate(self.molecule_names)}
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"))
+
+        self.offsets = load("offsets")
+        self.starts = load("starts").astype(np.int64)
+        self.ends = load("ends").astype(np.int64)
+        self.kinds = load("kinds")
+        self.coverage_offsets = load("coverage_offsets")
+        self.coverage_starts = load("coverage_starts").astype(np.int64)
+        self.coverage_ends = load("coverage_ends").astype(np.int64)
+        self.protection_end = load("protection_end").astype(np.int64)
+        self.patent_end = load("patent_end").astype(np.int64)
+        self.exclusivity_end = load("exclusivity_end").astype(np.int64)
+        self.last_window = load("last_window")
+        self.by_protection_end = load("by_protection_end")
+        self.sorted_protection_end = self.protection_end[self.by_protection_end]
+
+    def __len__(self) -> int:
+        return len(self.molecule_names)
+
+    def molecule_ids(self, names: Sequence[str]) -> np.ndarray:
+        """Molecule id of each name, -1 where the index has no windows for it."""
+        return np.fromiter((self.ids.get(molecule_key(name), -1) for name in names), dtype=np.int64, count=len(names))
+
+    def _coverage_of(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of the coverage intervals of ``ids`` (concatenated) and the CSR offsets into them."""
+        lo = self.coverage_offsets[ids]
+        lengths = self.coverage_offsets[ids + 1] - lo
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.arange(offsets[-1], dtype=np.int64) + np.repeat(lo - offsets[:-1], lengths)
+        return positions, offsets
+
+    def covered_days(self, ids: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Protected days of each molecule inside each inclusive day range:
+        shape ``(len(ids), len(starts))``.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        positions, offsets = self._coverage_of(ids)
+        overlap = (
+            np.minimum(self.coverage_ends[positions, None], np.asarray(ends)[None, :])
+            - np.maximum(self.coverage_starts[positions, None], np.asarray(starts)[None, :]) + 1
+        ).clip(min=0)
+        totals = np.zeros((len(positions) + 1, len(starts)), dtype=np.int64)
+        np.cumsum(overlap, axis=0, out=totals[1:])
+        return totals[offsets[1:]] - totals[offsets[:-1]]
+
+    def overlaps(self, ids: np.ndarray, start: date, end: date) -> np.ndarray:
+        """Whether each molecule is protected on any day of ``[start, end]``."""
+        return self.covered_days(ids, np.array([day(start)]), np.array([day(end)]))[:, 0] > 0
+
+    def losing_exclusivity(self, start: date, end: date, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Molecules whose last protected day falls in ``[start, end]``, ordered
+        by that day: a binary search of the sorted ends for the whole index,
+        a mask over ``ids`` otherwise.
+        """
+        lo, hi = day(start), day(end)
+        if ids is None:
+            left = np.searchsorted(self.sorted_protection_end, lo, side="left")
+            right = np.searchsorted(self.sorted_protection_end, hi, side="right")
+            return self.by_protection_end[left:right]
+        ids = np.asarray(ids, dtype=np.int64)
+        ends = self.protection_end[ids]
+        found = ids[(ends >= lo) & (ends <= hi)]
+        return found[np.argsort(self.protection_end[found], kind="stable")]
+
+    def timeline(self, ids: np.ndarray, years: Sequence[int]) -> np.ndarray:
+        """Fraction of each year each molecule is protected: shape ``(len(ids), len(years))``."""
+        starts = np.array([day(date(year, 1, 1)) for year in years])
+        ends = np.array([day(date(year, 12, 31)) for year in years])
+        return self.covered_days(ids, starts, ends) / (ends - starts + 1)
+
+    def windows(self, molecule_id: int) -> List[Dict[str, Any]]:
+        lo, hi = self.offsets[molecule_id], self.offsets[molecule_id + 1]
+        return [
+            {
+                "kind": KINDS[int(self.kinds[i])],
+                "reference": self.references[i],
+                "start": iso(self.starts[i]),
+                "end": iso(self.ends[i])
+            }
+            for i in range(lo, hi)
+        ]
+
+    def loss_of_exclusivity(self, molecule: str) -> Optional[Dict[str, Any]]:
+        """Protection summary of one molecule, or None when the index has no windows for it."""
+        molecule_id = self.ids.get(molecule_key(molecule))
+        if molecule_id is None:
+            return None
+        return self._entry(molecule_id, molecule)
+
+    def _entry(self, molecule_id: int, name: str) -> Dict[str, Any]:
+        last = int(self.last_window[molecule_id])
+        return {
+            "molecule": name,
+            "protection_end": iso(self.protection_end[molecule_id]),
+            "last_patent_expiry": iso(self.patent_end[molecule_id]) if self.patent_end[molecule_id] > np.iinfo(np.int32).min else None,
+            "last_exclusivity_expiry": iso(self.exclusivity_end[molecule_id]) if self.exclusivity_end[molecule_id] > np.iinfo(np.int32).min else None,
+            "last_protection": {"kind": KINDS[int(self.kinds[last])], "reference": self.references[last]},
+            "windows": int(self.offsets[molecule_id + 1] - self.offsets[molecule_id])
+        }
+
+    def cliff(
+        self,
+        molecules: Sequence[str],
+        start_year: int,
+        end_year: int,
+        timeline_years: Optional[Sequence[int]] = None,
+        limit: int = MAX_REPORTED
+    ) -> Dict[str, Any]:
+        """
+        Portfolio patent cliff: molecules of ``molecules`` (every indexed
+        molecule when empty) losing all protection between the start of
+        ``start_year`` and the end of ``end_year``, with a yearly coverage
+        timeline for the portfolio and for each molecule reported.
+        """
+        start, end = date(start_year, 1, 1), date(end_year, 12, 31)
+        years = list(timeline_years or range(start_year - 2, end_year + 3))
+        if molecules:
+            ids = self.molecule_ids(molecules)
+            not_found = [name for name, molecule_id in zip(molecules, ids) if molecule_id < 0]
+            names = {int(molecule_id): name for name, molecule_id in zip(molecules, ids) if molecule_id >= 0}
+            ids = np.unique(ids[ids >= 0])
+            losing = self.losing_exclusivity(start, end, ids)
+        else:
+            ids, not_found, names = np.arange(len(self), dtype=np.int64), [], {}
+            losing = self.losing_exclusivity(start, end)
+
+        lost_years = self.protection_end[losing].astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+        counts = np.bincount(lost_years - start_year, minlength=end_year - start_year + 1)
+        by_year = {start_year + offset: int(count) for offset, count in enumerate(counts)}
+
+        reported = losing[:limit]
+        coverage = self.timeline(reported, years)
+        entries = []
+        for molecule_id, row in zip(reported, coverage):
+            entry = self._entry(int(molecule_id), names.get(int(molecule_id), self.molecule_names[int(molecule_id)].title()))
+            entry["coverage"] = [round(float(value), 3) for value in row]
+            entries.append(entry)
+
+        portfolio = self.timeline(ids, years).mean(axis=0) if len(ids) else np.zeros(len(years))
+        already_lost = int((self.protection_end[ids] < day(start)).sum())
+        return {
+            "window": {"start": start.isoformat(), "end": end.isoformat()},
+            "molecules_queried": len(molecules) if molecules else len(self),
+            "molecules_indexed": int(len(ids)),
+            "not_found": not_found[:limit],
+            "losing_exclusivity_count": int(len(losing)),
+            "protected_beyond_window": int(len(ids) - len(losing) - already_lost),
+            "already_unprotected": already_lost,
+            "losses_by_year": by_year,
+            "timeline": {
+                "years": years,
+                "portfolio_coverage": [round(float(value), 3) for value in portfolio]
+            },
+            "losing_exclusivity": entries,
+            "truncated": len(losing) > limit
+        }
+
+
+_index: Optional[PatentCliffIndex] = None
+_index_checked = False
+_index_lock = threading.Lock()
+
+
+def get_patent_cliff_index() -> Optional[PatentCliffIndex]:
+    """The index in PATENT_CLIFF_DIR, opened once per process; None when it has not been built."""
+    global _index, _index_checked
+    if not _index_checked:
+        with _index_lock:
+            if not _index_checked:
+                directory = settings.PATENT_CLIFF_DIR
+                if directory and os.path.exists(os.path.join(directory, "meta.json")):
+                    try:
+                        _index = PatentCliffIndex(directory)
+                        logger.info("patent_cliff_index_opened", directory=directory, molecules=len(_index))
+                    except (OSError, ValueError) as e:
+                        logger.warning("patent_cliff_index_unavailable", directory=directory, error=str(e))
+                _index_checked = True
+    return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the patent cliff interval index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build from Orange Book releases and/or the local patent index")
+    build.add_argument("--orange-book", nargs="*", default=[], help="Orange Book zips or directories")
+    build.add_argument("--patent-index", help="Local patent index database to read windows from")
+    build.add_argument("--molecules", help="File with one molecule per line (required with --patent-index)")
+    build.add_argument("--out", default=settings.PATENT_CLIFF_DIR, help="Index directory (default: PATENT_CLIFF_DIR)")
+    query = subparsers.add_parser("query", help="Molecules losing all protection between two years")
+    query.add_argument("start_year", type=int)
+    query.add_argument("end_year", type=int)
+    query.add_argument("molecules", nargs="*", help="Portfolio molecules (default: every indexed molecule)")
+    query.add_argument("--index", default=settings.PATENT_CLIFF_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not args.orange_book and not args.patent_index:
+            parser.error("build needs --orange-book and/or --patent-index")
+        molecules: List[str] = []
+        if args.patent_index:
+            if not args.molecules:
+                parser.error("--patent-index needs --molecules")
+            with open(args.molecules, encoding="utf-8") as f:
+                molecules = [line.strip() for line in f if line.strip()]
+        print(json.dumps(build_index(args.out, args.orange_book, args.patent_index, molecules), indent=2))
+    else:
+        index = PatentCliffIndex(args.index)
+        started = time.perf_counter()
+        report = index.cliff(args.molecules, args.start_year, args.end_year, limit=20)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps(report, indent=2))
+        print(f"{elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+PharmaLens Patent Graph
+========================
+Citation and family links of the local patent index as compact CSR
+arrays, so blocking patents hidden in continuation families and citation
+neighbourhoods are found by a bounded traversal from a molecule's core
+patents instead of a scan of the corpus.
+
+Provides:
+- build_graph(): reads ``patent_links`` once; citations become CSR
+  adjacency in both directions (backward: cited patents, forward: citing
+  patents, both restricted to patents in the index); patents sharing an
+  application number (their own, or a parent, child or provisional one)
+  or a family id are grouped into families by vectorized label
+  propagation, stored as a family label per patent plus a CSR of members
+- PatentGraph.expand(): bounded breadth-first search from core patents,
+  taking whole families at every level and following citations up to a
+  depth and node budget
+- PatentGraph.family_landscape(): family-level blocking counts (families
+  of the molecule's core patents with an in-force, non-process member)
+  and litigation-relevant clusters (in-force families linked by citations
+  to the core, third-party holders flagged), cached per molecule
+
+Build the graph from the patent index (from the ai_engine directory):
+
+    python -m app.services.patent_graph build --index data/patents/patents.sqlite3 --out data/patents/graph
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.staging import staged_directory
+from app.services.patent_index import EPOCH, PatentIndex, get_patent_index
+
+logger = structlog.get_logger(__name__)
+
+GRAPH_FORMAT_VERSION = 1
+
+# Citation hops from the core families, and the most patents one traversal may reach
+MAX_DEPTH = 2
+MAX_NODES = 10000
+
+# Molecules whose family landscapes are kept (per day: in-force status changes daily)
+CACHE_ENTRIES = 256
+
+MAX_CLUSTERS = 5
+
+# Families most linked to the core families that are considered as clusters
+CANDIDATE_FAMILIES = 50
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR offsets and targets of ``sources -> targets`` edges (deduplicated, targets sorted per source)."""
+    edges = np.unique(sources * count + targets)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edges // count, minlength=count), out=offsets[1:])
+    return offsets, (edges % count).astype(np.int32)
+
+
+def _components(left: np.ndarray, right: np.ndarray, count: int) -> np.ndarray:
+    """Connected component label (smallest member) of every vertex of an undirected edge list."""
+    labels = np.arange(count, dtype=np.int64)
+    while True:
+        smaller = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, smaller)
+        np.minimum.at(updated, right, smaller)
+        # Pointer jumping: follow labels to their own labels until they settle
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def build_graph(patent_index_path: str, directory: str) -> Dict[str, Any]:
+    """
+    Write the citation and family graph of the patent index to ``directory``.
+    The graph is built in a staging directory that replaces ``directory``
+    when complete, so workers with the old arrays memory-mapped keep
+    reading them intact.
+    """
+    with staged_directory(directory) as staging:
+        meta = _build(patent_index_path, staging)
+    logger.info("patent_graph_built", directory=directory, **meta)
+    return meta
+
+
+def _build(patent_index_path: str, directory: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    conn = sqlite3.connect(f"file:{patent_index_path}?mode=ro", uri=True)
+    try:
+        patent_ids, numbers = [], {}
+        for node, (patent_id, number) in enumerate(conn.execute("SELECT id, number FROM patents ORDER BY id")):
+            patent_ids.append(patent_id)
+            numbers[number] = node
+        node_ids = np.array(patent_ids, dtype=np.int64)
+        count = len(node_ids)
+
+        cite_from, cite_to = [], []
+        member_of, keys = [], {}
+        for patent_id, relation, target in conn.execute("SELECT patent_id, relation, target FROM patent_links"):
+            if relation == "cites":
+                cited = numbers.get(target)
+                if cited is not None:
+                    cite_from.append(patent_id)
+                    cite_to.append(cited)
+            else:
+                # Application numbers and family ids are shared keys; families are their components
+                key = ("family:" if relation == "family" else "application:") + target
+                member_of.append((patent_id, keys.setdefault(key, len(keys))))
+    finally:
+        conn.close()
+
+    def nodes_of(ids: List[int]) -> np.ndarray:
+        return np.searchsorted(node_ids, np.array(ids, dtype=np.int64))
+
+    sources, targets = nodes_of(cite_from), np.array(cite_to, dtype=np.int64)
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    cites_offsets, cites_targets = _csr(sources, targets, max(count, 1))
+    cited_by_offsets, cited_by_targets = _csr(targets, sources, max(count, 1))
+
+    if member_of:
+        patents = nodes_of([patent_id for patent_id, _ in member_of])
+        key_nodes = count + np.array([key for _, key in member_of], dtype=np.int64)
+        labels = _components(patents, key_nodes, count + len(keys))[:count]
+    else:
+        labels = np.arange(count, dtype=np.int64)
+    _, family = np.unique(labels, return_inverse=True)
+    family = family.astype(np.int32)
+    families = int(family.max()) + 1 if count else 0
+    family_offsets = np.zeros(families + 1, dtype=np.int64)
+    np.cumsum(np.bincount(family, minlength=families), out=family_offsets[1:])
+    family_members = np.argsort(family, kind="stable").astype(np.int32)
+
+    arrays = {
+        "node_ids": node_ids,
+        "family": family,
+        "family_offsets": family_offsets,
+        "family_members": family_members,
+        "cites_offsets": cites_offsets[:count + 1],
+        "cites_targets": cites_targets,
+        "cited_by_offsets": cited_by_offsets[:count + 1],
+        "cited_by_targets": cited_by_targets
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+    meta = {
+        "format_version": GRAPH_FORMAT_VERSION,
+        "patents": count,
+        "citations": int(len(cites_targets)),
+        "families": families,
+        "multi_patent_families": int((np.diff(family_offsets) > 1).sum()),
+        "elapsed_s": round(time.perf_counter() - started, 1)
+    }
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+@dataclass
+class FamilyLandscape:
+    core_patents: int
+    core_families: int
+    blocking_families: int
+    blocking_family_members: int
+    continuations_in_force: int
+    reached_patents: int
+    litigation_clusters: List[Dict[str, Any]] = field(default_factory=list)
+    truncated: bool = False
+
+
+class PatentGraph:
+    """Memory-mapped citation CSR and family groups with bounded traversal."""
+
+    def __init__(self, directory: str, patent_index: PatentIndex):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != GRAPH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported patent graph in {directory}")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self.node_ids = load("node_ids")
+        self.family = load("family")
+        self.family_offsets = load("family_offsets")
+        self.family_members = load("family_members")
+        self.cites_offsets = load("cites_offsets")
+        self.cites_targets = load("cites_targets")
+        self.cited_by_offsets = load("cited_by_offsets")
+        self.cited_by_targets = load("cited_by_targets")
+        self.patent_index = patent_index
+        self._cache: "OrderedDict[Tuple[str, int], FamilyLandscape]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def nodes(self, patent_ids: List[int]) -> np.ndarray:
+        """Graph nodes of patent ids (ids added to the index after the graph was built are left out)."""
+        ids = np.asarray(patent_ids, dtype=np.int64)
+        positions = np.searchsorted(self.node_ids, ids)
+        inside = positions < len(self.node_ids)
+        positions, ids = positions[inside], ids[inside]
+        return np.unique(positions[np.asarray(self.node_ids[positions]) == ids])
+
+    @staticmethod
+    def _gather(offsets: np.ndarray, targets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """Concatenated CSR rows of ``nodes``."""
+        if not len(nodes):
+            return np.zeros(0, dtype=np.int64)
+        lo = np.asarray(offsets[nodes])
+        lengths = np.asarray(offsets[nodes + 1]) - lo
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64)
+        positions = np.arange(total, dtype=np.int64) + np.repeat(lo - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return np.asarray(targets[positions], dtype=np.int64)
+
+    def family_closure(self, nodes: np.ndarray) -> np.ndarray:
+        """Every member of the families of ``nodes``."""
+        families = np.unique(np.asarray(self.family[nodes]))
+        return np.unique(self._gather(self.family_offsets, self.family_members, families))
+
+    def neighbours(self, nodes: np.ndarray) -> np.ndarray:
+        """Patents cited by or citing ``nodes``."""
+        return np.unique(np.concatenate((
+            self._gather(self.cites_offsets, self.cites_targets, nodes),
+            self._gather(self.cited_by_offsets, self.cited_by_targets, nodes)
+        )))
+
+    def expand(
+        self, core: np.ndarray, depth: int = MAX_DEPTH, max_nodes: int = MAX_NODES
+    ) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Bounded BFS from ``core``: whole families at every level, citations
+        between levels. Returns reached nodes, their level (0 for the core
+        families) and whether the node budget cut the search short.
+        """
+        visited = self.family_closure(np.asarray(core, dtype=np.int64))[:max_nodes]
+        levels = [np.zeros(len(visited), dtype=np.int8)]
+        reached = [visited]
+        frontier = visited
+        truncated = len(visited) == max_nodes
+        for level in range(1, depth + 1):
+            if not len(frontier) or truncated:
+                break
+            found = self.neighbours(frontier)
+            found = self.family_closure(found) if len(found) else found
+            frontier = np.setdiff1d(found, visited, assume_unique=True)
+            room = max_nodes - len(visited)
+            if len(frontier) > room:
+                frontier, truncated = frontier[:room], True
+            visited = np.union1d(visited, frontier)
+            reached.append(frontier)
+            levels.append(np.full(len(frontier), level, dtype=np.int8))
+        return np.concatenate(reached), np.concatenate(levels), truncated
+
+    def family_landscape(self, molecule: str, today: Optional[date] = None) -> FamilyLandscape:
+        """Family-level view of a molecule's patents, cached per molecule and day."""
+        today_day = ((today or date.today()) - EPOCH).days
+        key = (" ".join(molecule.lower().split()), today_day)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        record_cache_lookup("patent_families", cached is not None)
+        if cached is not None:
+            return cached
+
+        landscape = self._family_landscape(molecule, today_day)
+        with self._cache_lock:
+            self._cache[key] = landscape
+            while len(self._cache) > CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return landscape
+
+    def _family_landscape(self, molecule: str, today_day: int) -> FamilyLandscape:
+        core = self.nodes(self.patent_index.claiming(molecule))
+        if not len(core):
+            return FamilyLandscape(0, 0, 0, 0, 0, 0)
+        nodes, levels, truncated = self.expand(core)
+        families = np.asarray(self.family[nodes], dtype=np.int64)
+        core_family_nodes = nodes[levels == 0]
+        core_families = np.unique(families[levels == 0])
+
+        # Citation links from other reached families into the core families; the
+        # most linked ones are the cluster candidates and need bibliographic data
+        links = np.concatenate((
+            self._gather(self.cites_offsets, self.cites_targets, core_family_nodes),
+            self._gather(self.cited_by_offsets, self.cited_by_targets, core_family_nodes)
+        ))
+        linked, link_counts = np.unique(np.asarray(self.family[links], dtype=np.int64), return_counts=True)
+        outside = np.isin(linked, families[levels > 0])
+        linked, link_counts = linked[outside], link_counts[outside]
+        top = np.argsort(-link_counts, kind="stable")[:CANDIDATE_FAMILIES]
+        linked, link_counts = linked[top], link_counts[top]
+
+        detail = np.flatnonzero((levels == 0) | np.isin(families, linked))
+        patents = self.patent_index.patents(np.asarray(self.node_ids[nodes[detail]]).tolist())
+        rows = [patents.get(int(patent_id)) for patent_id in np.asarray(self.node_ids[nodes[detail]])]
+        in_force = np.array([
+            row is not None and row["status"] == "granted" and row["expiry_day"] is not None and row["expiry_day"] >= today_day
+            for row in rows
+        ], dtype=bool)
+        blocking = in_force & np.array([row is not None and row["claim_type"] != "Process" for row in rows], dtype=bool)
+        detail_families = families[detail]
+        in_core_families = levels[detail] == 0
+        is_core = np.isin(nodes[detail], core)
+
+        blocking_families = np.unique(detail_families[in_core_families & blocking])
+        core_holders = {rows[i]["assignee"] for i in np.flatnonzero(is_core) if rows[i] and rows[i]["assignee"]}
+
+        # Clusters: in-force families outside the core families citing or cited by them
+        members = np.flatnonzero(~in_core_families)
+        members = members[np.argsort(detail_families[members], kind="stable")]
+        clusters = []
+        for group in np.split(members, np.flatnonzero(np.diff(detail_families[members])) + 1) if len(members) else []:
+            live = group[in_force[group]]
+            if not len(live):
+                continue
+            holders = sorted({rows[i]["assignee"] for i in live if rows[i]["assignee"]})
+            expiries = sorted(rows[i]["expiry_date"] for i in live)
+            clusters.append({
+                "lead_patent": rows[live[0]]["number"],
+                "patents": int(len(group)),
+                "in_force": int(len(live)),
+                "citation_links": int(link_counts[linked == detail_families[group[0]]][0]),
+                "holders": holders[:3],
+                "third_party": bool(holders) and not set(holders) & core_holders,
+                "earliest_expiry": expiries[0],
+                "latest_expiry": expiries[-1]
+            })
+        clusters.sort(key=lambda cluster: (-cluster["citation_links"] * cluster["in_force"], cluster["lead_patent"]))
+
+        return FamilyLandscape(
+            core_patents=int(len(core)),
+            core_families=int(len(core_families)),
+            blocking_families=int(len(blocking_families)),
+            blocking_family_members=int((in_core_families & blocking & np.isin(detail_families, blocking_families)).sum()),
+            continuations_in_force=int((in_core_families & ~is_core & in_force).sum()),
+            reached_patents=int(len(nodes)),
+            litigation_clusters=clusters[:MAX_CLUSTERS],
+            truncated=truncated
+        )
+
+
+_graph: Optional[PatentGraph] = None
+_graph_checked = False
+_graph_lock = threading.Lock()
+
+
+def get_patent_graph() -> Optional[PatentGraph]:
+    """The graph in PATENT_GRAPH_DIR, opened once per process; None when it or the patent index is missing."""
+    global _graph, _graph_checked
+    if not _graph_checked:
+        with _graph_lock:
+            if not _graph_checked:
+                directory = settings.PATENT_GRAPH_DIR
+                patent_index = get_patent_index()
+                if patent_index is not None and directory and os.path.exists(os.path.join(directory, "meta.json")):
+                    try:
+                        _graph = PatentGraph(directory, patent_index)
+                        logger.info("patent_graph_opened", directory=directory, patents=len(_graph))
+                    except (OSError, ValueError) as e:
+                        logger.warning("patent_graph_unavailable", directory=directory, error=str(e))
+                _graph_checked = True
+    return _graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the patent citation and family graph")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build the graph from the patent index's links")
+    build.add_argument("--index", default=settings.PATENT_INDEX_PATH, help="Patent index database (default: PATENT_INDEX_PATH)")
+    build.add_argument("--out", default=settings.PATENT_GRAPH_DIR, help="Graph directory (default: PATENT_GRAPH_DIR)")
+    query = subparsers.add_parser("query", help="Show the family landscape of a molecule")
+    query.add_argument("molecule")
+    query.add_argument("--index", default=settings.PATENT_INDEX_PATH)
+    query.add_argument("--graph", default=settings.PATENT_GRAPH_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(json.dumps(build_graph(args.index, args.out), indent=2))
+    else:
+        graph = PatentGraph(args.graph, PatentIndex(args.index))
+        started = time.perf_counter()
+        landscape = graph.family_landscape(args.molecule)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps(landscape.__dict__, indent=2))
+        print(f"{elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,610 @@
+"""
+PharmaLens Patent Index
+========================
+Local patent corpus for PatentAgent: bulk patent data is stream-parsed
+into SQLite with a full-text index over titles, abstracts and claims and
+a sorted expiry index, so landscape questions are indexed queries.
+
+Provides:
+- Streaming readers for USPTO bulk full-text XML (grants and pre-grant
+  applications: concatenated XML documents, one parsed at a time) and
+  JSON patent records (arrays, NDJSON), as files, zip archives or
+  directories
+- PatentIndexWriter: batched inserts into ``patents`` (bibliographic data,
+  expiry date/day, status, claim type) and the FTS5 table ``patent_text``;
+  re-ingesting a patent number replaces it; citations, application
+  numbers, related (continuation, division, provisional) applications and
+  family ids go to ``patent_links`` for the patent graph
+- PatentIndex.landscape(): total/active/pending counts, earliest and
+  latest expiry, blocking patents, holder breakdown, geographic coverage
+  and upcoming expirations for a molecule, from FTS matches joined with
+  the expiry index
+
+Build an index from the ai_engine directory:
+
+    python -m app.services.patent_index ingest ipg240102.zip ipg240109.zip --out data/patents/patents.sqlite3
+"""
+
+import io
+import os
+import re
+import json
+import time
+import sqlite3
+import zipfile
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import structlog
+
+from app.core.config import settings
+from app.services.trial_store import iter_json_values
+
+logger = structlog.get_logger(__name__)
+
+# Rows per insert transaction
+INSERT_BATCH = 1000
+
+# Patent term: 20 years from the earliest non-provisional filing date (35 U.S.C. 154)
+PATENT_TERM_YEARS = 20
+
+EPOCH = date(1970, 1, 1)
+
+EU_COUNTRIES = frozenset("""
+    EP AT BE BG HR CY CZ DK EE FI FR DE GR HU IE IT LV LT LU MT NL PL PT RO SK SI ES SE
+""".split())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patents (
+    id INTEGER PRIMARY KEY,
+    number TEXT NOT NULL UNIQUE,
+    country TEXT,
+    kind TEXT,
+    status TEXT NOT NULL,
+    title TEXT,
+    assignee TEXT,
+    filing_date TEXT,
+    grant_date TEXT,
+    expiry_date TEXT,
+    expiry_day INTEGER,
+    term_extension_days INTEGER NOT NULL DEFAULT 0,
+    claim_type TEXT,
+    independent_claims INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS patents_expiry ON patents (expiry_day);
+CREATE TABLE IF NOT EXISTS patent_links (
+    patent_id INTEGER NOT NULL,
+    relation TEXT NOT NULL,
+    target TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS patent_links_patent ON patent_links (patent_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS patent_text USING fts5 (
+    title, abstract, claims, tokenize = 'porter unicode61'
+);
+"""
+
+
+# ======================
+# RECORDS
+# ======================
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    """YYYYMMDD or YYYY-MM-DD to ISO, None when it is not a date."""
+    digits = re.sub(r"\D", "", value or "")[:8]
+    if len(digits) != 8:
+        return None
+    try:
+        return date(int(digits[:4]), int(digits[4:6]), int(digits[6:8])).isoformat()
+    except ValueError:
+        return None
+
+
+def _day(iso: Optional[str]) -> Optional[int]:
+    return (date.fromisoformat(iso) - EPOCH).days if iso else None
+
+
+def _application_number(value: Optional[str]) -> str:
+    """Application number without separators (``16/123,456`` -> ``16123456``)."""
+    return re.sub(r"[^0-9A-Za-z]", "", value or "")
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    return " ".join("".join(element.itertext()).split()) if element is not None else ""
+
+
+def claim_type(first_claim: str) -> str:
+    """Claim category of a patent from its first independent claim."""
+    text = first_claim.lower()[:400]
+    if re.search(r"\b(process|method) (for|of) (preparing|producing|making|manufactur|synthesi)", text):
+        return "Process"
+    if re.search(r"\bmethod (of|for) (treating|preventing|reducing|inhibiting|the treatment)|\buse of\b", text):
+        return "Method of Use"
+    if re.search(r"\b(formulation|dosage form|tablet|capsule|excipient|sustained[- ]release|extended[- ]release)\b", text):
+        return "Formulation"
+    return "Composition"
+
+
+@dataclass
+class PatentRecord:
+    number: str
+    country: str
+    kind: str
+    status: str  # "granted" or "pending"
+    title: str = ""
+    abstract: str = ""
+    claims: List[str] = field(default_factory=list)
+    independent_claims: int = 0
+    assignee: str = ""
+    filing_date: Optional[str] = None
+    grant_date: Optional[str] = None
+    expiry_date: Optional[str] = None
+    term_extension_days: int = 0
+    application_number: str = ""
+    related_applications: List[str] = field(default_factory=list)
+    family_id: str = ""
+    citations: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.expiry_date is None and self.filing_date and self.status == "granted":
+            filed = date.fromisoformat(self.filing_date)
+            try:
+                expiry = filed.replace(year=filed.year + PATENT_TERM_YEARS)
+            except ValueError:  # 29 February
+                expiry = filed.replace(year=filed.year + PATENT_TERM_YEARS, day=28)
+            self.expiry_date = (expiry + timedelta(days=self.term_extension_days)).isoformat()
+
+    def links(self) -> List[Tuple[str, str]]:
+        """``(relation, target)`` rows of ``patent_links``."""
+        rows = [("application", self.application_number)] if self.application_number else []
+        rows.extend(("related", number) for number in dict.fromkeys(self.related_applications) if number)
+        if self.family_id:
+            rows.append(("family", self.family_id))
+        rows.extend(("cites", number) for number in dict.fromkeys(self.citations) if number)
+        return rows
+
+    @classmethod
+    def from_uspto_xml(cls, root: ET.Element) -> Optional["PatentRecord"]:
+        """A ``<us-patent-grant>`` or ``<us-patent-application>`` document."""
+        granted = root.tag == "us-patent-grant"
+        biblio = root.find("us-bibliographic-data-grant" if granted else "us-bibliographic-data-application")
+        if biblio is None:
+            return None
+        publication = biblio.find("publication-reference/document-id")
+        if publication is None or not publication.findtext("doc-number"):
+            return None
+        country = publication.findtext("country") or "US"
+        claims, independent = [], 0
+        for claim in root.findall("claims/claim"):
+            claims.append(_text(claim))
+            if claim.find(".//claim-ref") is None:
+                independent += 1
+        assignee = biblio.find(".//assignees/assignee//orgname")
+        extension = biblio.findtext("us-term-of-grant/us-term-extension")
+        related = [
+            _application_number(number.text)
+            for path in (".//parent-doc/document-id/doc-number", ".//child-doc/document-id/doc-number",
+                         "us-related-documents/us-provisional-application/document-id/doc-number")
+            for number in biblio.findall(path) if number.text
+        ]
+        citations = [
+            f"{cited.findtext('country') or 'US'}{(cited.findtext('doc-number') or '').strip().lstrip('0')}"
+            for cited in biblio.findall(".//patcit/document-id") if cited.findtext("doc-number")
+        ]
+        return cls(
+            number=f"{country}{publication.findtext('doc-number').lstrip('0')}",
+            country=country,
+            kind=publication.findtext("kind") or "",
+            status="granted" if granted else "pending",
+            title=_text(biblio.find("invention-title")),
+            abstract=_text(root.find("abstract")),
+            claims=claims,
+            independent_claims=independent,
+            assignee=(assignee.text or "").strip() if assignee is not None else "",
+            filing_date=_iso(biblio.findtext("application-reference/document-id/date")),
+            grant_date=_iso(publication.findtext("date")) if granted else None,
+            term_extension_days=int(extension) if extension and extension.isdigit() else 0,
+            application_number=_application_number(biblio.findtext("application-reference/document-id/doc-number")),
+            related_applications=related,
+            citations=citations
+        )
+
+    @classmethod
+    def from_json(cls, record: Dict[str, Any]) -> Optional["PatentRecord"]:
+        """
+        A JSON patent record: ``number`` (or ``publication_number``),
+        ``title``, ``abstract``, ``claims`` (list or text), ``assignee`` (or
+        ``assignees``), ``filing_date``, ``grant_date``, optional
+        ``expiry_date``, ``term_extension_days``, ``country``, ``kind``, ``status``,
+        and for the patent graph ``application_number``, ``related_applications``,
+        ``family_id`` and ``citations`` (cited patent numbers).
+        """
+        number = record.get("number") or record.get("publication_number")
+        if not number:
+            return None
+        number = str(number).replace("-", "").replace(" ", "")
+        claims = record.get("claims") or []
+        if isinstance(claims, str):
+            claims = [claim.strip() for claim in re.split(r"\n\s*(?=\d+\s*\.)", claims) if claim.strip()]
+        assignee = record.get("assignee")
+        if not assignee and record.get("assignees"):
+            first = record["assignees"][0]
+            assignee = first.get("name") if isinstance(first, dict) else first
+        grant_date = _iso(record.get("grant_date"))
+        status = record.get("status") or ("granted" if grant_date else "pending")
+        return cls(
+            number=number,
+            country=record.get("country") or re.match(r"[A-Z]*", number).group() or "US",
+            kind=record.get("kind") or "",
+            status="granted" if status.lower() in ("granted", "active", "expired") else "pending",
+            title=record.get("title") or "",
+            abstract=record.get("abstract") or "",
+            claims=[str(claim) for claim in claims],
+            # Dependent claims refer back ("The compound of claim 1, ...")
+            independent_claims=int(record.get("independent_claims") or sum(1 for claim in claims if not re.search(r"\bclaims? \d", str(claim)[:200]))),
+            assignee=assignee or "",
+            filing_date=_iso(record.get("filing_date")),
+            grant_date=grant_date,
+            expiry_date=_iso(record.get("expiry_date")),
+            term_extension_days=int(record.get("term_extension_days") or 0),
+            application_number=_application_number(record.get("application_number")),
+            related_applications=[_application_number(str(number)) for number in record.get("related_applications") or []],
+            family_id=str(record.get("family_id") or ""),
+            citations=[str(number).replace("-", "").replace(" ", "") for number in record.get("citations") or []]
+        )
+
+
+# ======================
+# STREAMING READERS
+# ======================
+
+def _xml_documents(raw: io.BufferedIOBase) -> Iterator[bytes]:
+    """Split a USPTO bulk file (concatenated XML documents) into single documents."""
+    lines: List[bytes] = []
+    for line in raw:
+        if line.startswith(b"<?xml") and lines:
+            yield b"".join(lines)
+            lines = []
+        lines.append(line)
+    if lines:
+        yield b"".join(lines)
+
+
+def _iter_file(name: str, raw: io.BufferedIOBase) -> Iterator[PatentRecord]:
+    lowered = name.lower()
+    if lowered.endswith(".xml"):
+        skipped = 0
+        for document in _xml_documents(raw):
+            try:
+                root = ET.fromstring(document)
+            except ET.ParseError:
+                skipped += 1
+                continue
+            record = PatentRecord.from_uspto_xml(root)
+            if record is not None:
+                yield record
+        if skipped:
+            logger.warning("patent_documents_skipped", file=name, skipped=skipped)
+    elif lowered.endswith((".json", ".jsonl", ".ndjson")):
+        for value in iter_json_values(io.TextIOWrapper(raw, encoding="utf-8-sig")):
+            for item in value if isinstance(value, list) else [value]:
+                record = PatentRecord.from_json(item) if isinstance(item, dict) else None
+                if record is not None:
+                    yield record
+
+
+def iter_patents(path: str) -> Iterator[PatentRecord]:
+    """Stream PatentRecords from a bulk file, zip archive or directory."""
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                yield from iter_patents(os.path.join(root, name))
+        return
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if not member.is_dir():
+                    with archive.open(member) as raw:
+                        yield from _iter_file(member.filename, raw)
+        return
+    with open(path, "rb") as raw:
+        yield from _iter_file(path, raw)
+
+
+# ======================
+# WRITER
+# ======================
+
+class PatentIndexWriter:
+    """Bulk loader for the patent database."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.executescript(SCHEMA)
+        self.count = 0
+
+    def add_all(self, records: Iterator[PatentRecord], progress_every: int = 100000):
+        batch: List[PatentRecord] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == INSERT_BATCH:
+                self._insert(batch)
+                batch = []
+                if progress_every and self.count % progress_every < INSERT_BATCH:
+                    logger.info("patent_ingest_progress", patents=self.count)
+        if batch:
+            self._insert(batch)
+
+    def _insert(self, batch: Sequence[PatentRecord]):
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            numbers = [record.number for record in batch]
+            placeholders = ",".join("?" * len(numbers))
+            # Replaced patents drop their old text row (FTS5 rowid = patents.id)
+            conn.execute(f"DELETE FROM patent_text WHERE rowid IN (SELECT id FROM patents WHERE number IN ({placeholders}))", numbers)
+            conn.execute(f"DELETE FROM patent_links WHERE patent_id IN (SELECT id FROM patents WHERE number IN ({placeholders}))", numbers)
+            conn.execute(f"DELETE FROM patents WHERE number IN ({placeholders})", numbers)
+            for record in batch:
+                cursor = conn.execute(
+                    "INSERT INTO patents (number, country, kind, status, title, assignee, filing_date, grant_date,"
+                    " expiry_date, expiry_day, term_extension_days, claim_type, independent_claims)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.number, record.country, record.kind, record.status, record.title, record.assignee,
+                        record.filing_date, record.grant_date, record.expiry_date, _day(record.expiry_date),
+                        record.term_extension_days, claim_type(record.claims[0]) if record.claims else None,
+                        record.independent_claims
+                    )
+                )
+                conn.execute(
+                    "INSERT INTO patent_text (rowid, title, abstract, claims) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, record.title, record.abstract, "\n".join(record.claims))
+                )
+                conn.executemany(
+                    "INSERT INTO patent_links (patent_id, relation, target) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, relation, target) for relation, target in record.links()]
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.count += len(batch)
+
+    def close(self) -> Dict[str, Any]:
+        self.conn.execute("INSERT INTO patent_text (patent_text) VALUES ('optimize')")
+        self.conn.execute("ANALYZE")
+        total = self.conn.execute("SELECT COUNT(*) FROM patents").fetchone()[0]
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
+        return {"ingested": self.count, "patents": total}
+
+
+def build_index(sources: Sequence[str], path: str) -> Dict[str, Any]:
+    """Ingest bulk patent files into the index at ``path`` (added to what it already holds)."""
+    started = time.perf_counter()
+    writer = PatentIndexWriter(path)
+    for source in sources:
+        writer.add_all(iter_patents(source))
+    stats = writer.close()
+    stats["elapsed_s"] = round(time.perf_counter() - started, 1)
+    logger.info("patent_index_built", path=path, **stats)
+    return stats
+
+
+# ======================
+# QUERIES
+# ======================
+
+def fts_phrase(text: str) -> str:
+    """An FTS5 phrase query for ``text`` (quotes escaped, so user input cannot inject syntax)."""
+    return '"' + " ".join(text.split()).replace('"', '""') + '"'
+
+
+@dataclass
+class PatentLandscape:
+    total_patents: int
+    active_patents: int
+    pending_applications: int
+    earliest_expiration: Optional[str]
+    latest_expiration: Optional[str]
+    patent_term_extensions: bool
+    blocking_patents: int
+    blocking_patent_numbers: List[str]
+    key_patent_holders: List[Dict[str, Any]]
+    geographic_coverage: Dict[str, bool]
+    upcoming_expirations: List[Dict[str, Any]]
+
+
+class PatentIndex:
+    """Read-only queries; one SQLite connection per thread."""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def landscape(self, molecule: str, today: Optional[date] = None, holders: int = 5) -> PatentLandscape:
+        """
+        Patents naming ``molecule`` in their title, abstract or claims.
+        Blocking patents are granted, unexpired patents that claim the
+        molecule itself (the name appears in the claims) with a composition,
+        method-of-use or formulation claim; process patents can be designed
+        around and are not counted.
+        """
+        conn = self._conn()
+        today_day = ((today or date.today()) - EPOCH).days
+        phrase = fts_phrase(molecule)
+        conn.execute("DROP TABLE IF EXISTS temp.matched")
+        conn.execute(
+            "CREATE TEMP TABLE matched AS"
+            " SELECT p.id, p.number, p.country, p.status, p.assignee, p.expiry_date, p.expiry_day,"
+            "        p.term_extension_days, p.claim_type"
+            " FROM patent_text JOIN patents p ON p.id = patent_text.rowid"
+            " WHERE patent_text MATCH ?",
+            (phrase,)
+        )
+        (total, active, pending, earliest, latest, extensions) = conn.execute(
+            "SELECT COUNT(*),"
+            "       SUM(status = 'granted' AND expiry_day >= :today),"
+            "       SUM(status = 'pending'),"
+            "       MIN(CASE WHEN status = 'granted' AND expiry_day >= :today THEN expiry_date END),"
+            "       MAX(CASE WHEN status = 'granted' AND expiry_day >= :today THEN expiry_date END),"
+            "       MAX(status = 'granted' AND expiry_day >= :today AND term_extension_days > 0)"
+            " FROM matched",
+            {"today": today_day}
+        ).fetchone()
+
+        blocking = [row[0] for row in conn.execute(
+            "SELECT number FROM matched"
+            " WHERE id IN (SELECT rowid FROM patent_text WHERE patent_text MATCH ?)"
+            "   AND status = 'granted' AND expiry_day >= ? AND claim_type != 'Process'"
+            " ORDER BY expiry_day DESC",
+            (f"claims : {phrase}", today_day)
+        )]
+
+        # Active patents per holder, with the holder's most frequent claim type
+        by_holder: Dict[str, Dict[str, int]] = {}
+        for assignee, kind, count in conn.execute(
+            "SELECT assignee, claim_type, COUNT(*) FROM matched"
+            " WHERE assignee != '' AND status = 'granted' AND expiry_day >= ? GROUP BY assignee, claim_type",
+            (today_day,)
+        ):
+            by_holder.setdefault(assignee, {})[kind or "Composition"] = count
+        holder_rows = sorted(
+            ((company, sum(kinds.values()), max(kinds, key=kinds.get)) for company, kinds in by_holder.items()),
+            key=lambda row: (-row[1], row[0])
+        )[:holders]
+
+        countries = {row[0] for row in conn.execute("SELECT DISTINCT country FROM matched WHERE status = 'granted' AND expiry_day >= ?", (today_day,))}
+
+        upcoming = [
+            {"number": number, "expiry_date": expiry, "assignee": assignee, "claim_type": kind}
+            for number, expiry, assignee, kind in conn.execute(
+                "SELECT number, expiry_date, assignee, claim_type FROM matched"
+                " WHERE status = 'granted' AND expiry_day >= ? ORDER BY expiry_day LIMIT 5",
+                (today_day,)
+            )
+        ]
+        conn.execute("DROP TABLE temp.matched")
+
+        return PatentLandscape(
+            total_patents=total,
+            active_patents=active or 0,
+            pending_applications=pending or 0,
+            earliest_expiration=earliest,
+            latest_expiration=latest,
+            patent_term_extensions=bool(extensions),
+            blocking_patents=len(blocking),
+            blocking_patent_numbers=blocking,
+            key_patent_holders=[
+                {"company": company, "patent_count": count, "key_claims": kind}
+                for company, count, kind in holder_rows
+            ],
+            geographic_coverage={
+                "us": "US" in countries,
+                "eu": bool(countries & EU_COUNTRIES),
+                "japan": "JP" in countries,
+                "china": "CN" in countries,
+                "row": bool(countries - EU_COUNTRIES - {"US", "JP", "CN"})
+            },
+            upcoming_expirations=upcoming
+        )
+
+    def claiming(self, molecule: str) -> List[int]:
+        """Ids of the patents (granted or pending) whose claims name ``molecule``."""
+        return [row[0] for row in self._conn().execute(
+            "SELECT rowid FROM patent_text WHERE patent_text MATCH ?", (f"claims : {fts_phrase(molecule)}",)
+        )]
+
+    def protection_windows(self, molecule: str) -> List[Dict[str, Any]]:
+        """Granted patents claiming ``molecule``, with grant and expiry dates (for the patent-cliff index)."""
+        rows = self._conn().execute(
+            "SELECT number, grant_date, expiry_date, claim_type FROM patents"
+            " WHERE id IN (SELECT rowid FROM patent_text WHERE patent_text MATCH ?)"
+            "   AND status = 'granted' AND expiry_date IS NOT NULL",
+            (f"claims : {fts_phrase(molecule)}",)
+        )
+        return [dict(zip(("number", "grant_date", "expiry_date", "claim_type"), row)) for row in rows]
+
+    def patents(self, ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """Bibliographic rows by patent id (ids no longer in the index are left out)."""
+        columns = ("number", "status", "title", "assignee", "expiry_date", "expiry_day", "claim_type")
+        found: Dict[int, Dict[str, Any]] = {}
+        ids = [int(i) for i in ids]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for row in self._conn().execute(
+                f"SELECT id, {', '.join(columns)} FROM patents WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                found[row[0]] = dict(zip(columns, row[1:]))
+        return found
+
+    def expiring_between(self, start: date, end: date, limit: int = 100) -> List[Dict[str, Any]]:
+        """Granted patents expiring in ``[start, end]``, soonest first (a range scan of the expiry index)."""
+        rows = self._conn().execute(
+            "SELECT number, title, assignee, expiry_date FROM patents"
+            " WHERE expiry_day BETWEEN ? AND ? AND status = 'granted' ORDER BY expiry_day LIMIT ?",
+            ((start - EPOCH).days, (end - EPOCH).days, limit)
+        )
+        return [dict(zip(("number", "title", "assignee", "expiry_date"), row)) for row in rows]
+
+
+_index: Optional[PatentIndex] = None
+_index_checked = False
+_index_lock = threading.Lock()
+
+
+def get_patent_index() -> Optional[PatentIndex]:
+    """The index at PATENT_INDEX_PATH, opened once per process; None when it has not been built."""
+    global _index, _index_checked
+    if not _index_checked:
+        with _index_lock:
+            if not _index_checked:
+                path = settings.PATENT_INDEX_PATH
+                if path and os.path.exists(path):
+                    _index = PatentIndex(path)
+                    logger.info("patent_index_opened", path=path)
+                _index_checked = True
+    return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local patent index from bulk patent data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest = subparsers.add_parser("ingest", help="Ingest USPTO bulk XML or JSON patent records (files, zips or directories)")
+    ingest.add_argument("sources", nargs="+")
+    ingest.add_argument("--out", default=settings.PATENT_INDEX_PATH, help="Database path (default: PATENT_INDEX_PATH)")
+    query = subparsers.add_parser("query", help="Show the patent landscape of a molecule")
+    query.add_argument("molecule")
+    query.add_argument("--index", default=settings.PATENT_INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        print(json.dumps(build_index(args.sources, args.out), indent=2))
+    else:
+        started = time.perf_counter()
+        landscape = PatentIndex(args.index).landscape(args.molecule)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps(landscape.__dict__, indent=2))
+        print(f"{elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+PharmaLens ROI Sensitivity
+===========================
+One-at-a-time sensitivity of a programme's risk-adjusted NPV to each input
+of the ROI model, for tornado charts and interactive what-if sliders.
+
+Provides:
+- PARAMETERS: the named inputs (peak sales, per-phase probabilities,
+  costs and durations, ramp, exclusivity, erosion, margin, discount rate),
+  shared by the sweep and by slider overrides
+- with_values(): assumptions with named inputs moved to new central values
+- sensitivity(): every input swept over a grid of relative changes while
+  the others stay at base; all perturbed programmes are valued as one
+  rNPV batch (deterministic expected case, so sweeps are smooth), and
+  the result holds tornado rows ordered by swing, elasticities at the
+  base case and the full sweep curves
+
+Sweep a programme from the ai_engine directory:
+
+    python -m app.services.roi_sensitivity --peak-sales 600 --spread 0.3
+"""
+
+import json
+import time
+import argparse
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import structlog
+
+from app.services.rnpv import value_programmes
+from app.services.roi_simulation import PHASES, RoiAssumptions
+
+logger = structlog.get_logger(__name__)
+
+# Parameter name -> (RoiAssumptions field, index into the per-phase tuple)
+PARAMETERS = {
+    "peak_sales_millions": ("peak_sales_millions", None),
+    **{f"{phase}_probability": ("phase_probabilities", i) for i, phase in enumerate(PHASES)},
+    **{f"{phase}_cost_millions": ("phase_costs_millions", i) for i, phase in enumerate(PHASES)},
+    **{f"{phase}_years": ("phase_years", i) for i, phase in enumerate(PHASES)},
+    "ramp_years": ("ramp_years", None),
+    "exclusivity_years": ("exclusivity_years", None),
+    "erosion_rate": ("erosion_rate", None),
+    "margin": ("margin", None),
+    "discount_rate": ("discount_rate", None)
+}
+
+# Upper bounds of fields that are shares or probabilities
+CAPS = {"phase_probabilities": 1.0, "erosion_rate": 0.99, "margin": 1.0}
+
+DEFAULT_SPREAD = 0.3
+DEFAULT_POINTS = 7
+
+
+def value_of(assumptions: RoiAssumptions, name: str) -> float:
+    """Central value of a named input (the mean of a range)."""
+    field, index = PARAMETERS[name]
+    value = getattr(assumptions, field)
+    if index is not None:
+        value = value[index]
+    return float(np.mean(value)) if isinstance(value, tuple) else float(value)
+
+
+def _scaled(assumptions: RoiAssumptions, name: str, factor: float) -> RoiAssumptions:
+    field, index = PARAMETERS[name]
+    cap = CAPS.get(field)
+
+    def scale(value):
+        if isinstance(value, tuple):
+            return tuple(scale(v) for v in value)
+        value *= factor
+        return min(value, cap) if cap is not None else value
+
+    current = getattr(assumptions, field)
+    if index is None:
+        updated = scale(current)
+    else:
+        updated = tuple(scale(v) if i == index else v for i, v in enumerate(current))
+    return replace(assumptions, **{field: updated})
+
+
+def with_values(assumptions: RoiAssumptions, values: Dict[str, float]) -> RoiAssumptions:
+    """Move named inputs to new central values (ranges keep their shape)."""
+    for name, value in values.items():
+        current = value_of(assumptions, name)
+        if current <= 0:
+            raise ValueError(f"{name} has no base value to scale")
+        assumptions = _scaled(assumptions, name, value / current)
+    return assumptions
+
+
+# ======================
+# Sweep
+# ======================
+
+def sensitivity(
+    assumptions: RoiAssumptions,
+    spread: float = DEFAULT_SPREAD,
+    points: int = DEFAULT_POINTS,
+    parameters: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Sweep each input from (1 - spread) to (1 + spread) times its base
+    value in ``points`` steps, holding the others at base, and value the
+    base case plus every perturbation in one rNPV batch.
+
+    Elasticities are d ln(rNPV) / d ln(input) at the base case, from the
+    grid points either side of it (None when the base rNPV is zero).
+    """
+    started = time.perf_counter()
+    names = list(parameters or PARAMETERS)
+    factors = np.linspace(1.0 - spread, 1.0 + spread, points)
+    programmes = [assumptions] + [_scaled(assumptions, name, float(f)) for name in names for f in factors]
+    valuation = value_programmes([""] * len(programmes), programmes)
+
+    base_rnpv = float(valuation.rnpv[0])
+    base_rroi = float(valuation.rroi[0])
+    rnpv = valuation.rnpv[1:].reshape(len(names), points)
+    rroi = valuation.rroi[1:].reshape(len(names), points)
+    below = int(np.flatnonzero(factors < 1.0)[-1]) if (factors < 1.0).any() else 0
+    above = int(np.flatnonzero(factors > 1.0)[0]) if (factors > 1.0).any() else points - 1
+
+    sweeps = {}
+    tornado = []
+    elasticities = {}
+    for row, name in enumerate(names):
+        values = [value_of(p, name) for p in programmes[1 + row * points:1 + (row + 1) * points]]
+        base_value = value_of(assumptions, name)
+        change = (values[above] - values[below]) / base_value if base_value else 0.0
+        elasticities[name] = (
+            round(float((rnpv[row, above] - rnpv[row, below]) / base_rnpv / change), 3)
+            if base_rnpv and change else None
+        )
+        sweeps[name] = {
+            "values": [round(v, 4) for v in values],
+            "rnpv_millions": [round(float(v), 1) for v in rnpv[row]],
+            "risk_adjusted_roi_percent": [round(float(v), 1) for v in rroi[row]]
+        }
+        tornado.append({
+            "parameter": name,
+            "base_value": round(base_value, 4),
+            "low_value": round(values[0], 4),
+            "high_value": round(values[-1], 4),
+            "rnpv_at_low_millions": round(float(rnpv[row, 0]), 1),
+            "rnpv_at_high_millions": round(float(rnpv[row, -1]), 1),
+            "roi_at_low_percent": round(float(rroi[row, 0]), 1),
+            "roi_at_high_percent": round(float(rroi[row, -1]), 1),
+            "swing_millions": round(float(rnpv[row].max() - rnpv[row].min()), 1)
+        })
+    tornado.sort(key=lambda r: r["swing_millions"], reverse=True)
+
+    return {
+        "base": {
+            "rnpv_millions": round(base_rnpv, 1),
+            "risk_adjusted_roi_percent": round(base_rroi, 1),
+            "probability_of_launch": round(float(valuation.probability_of_launch[0]), 4),
+            "assumptions": assumptions.to_dict()
+        },
+        "spread": spread,
+        "points": points,
+        "perturbations": len(programmes) - 1,
+        "tornado": tornado,
+        "elasticities": elasticities,
+        "sweeps": sweeps,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+# ======================
+# CLI
+# ======================
+
+def main():
+    parser = argparse.ArgumentParser(description="PharmaLens ROI sensitivity (tornado)")
+    parser.add_argument("--peak-sales", type=float, required=True, help="Median peak annual sales ($M)")
+    parser.add_argument("--spread", type=float, default=DEFAULT_SPREAD)
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS)
+    args = parser.parse_args()
+    result = sensitivity(RoiAssumptions(peak_sales_millions=args.peak_sales), args.spread, args.points)
+    result.pop("sweeps")
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,708 @@
+"""
+PharmaLens Safety Signals
+==========================
+Pharmacovigilance disproportionality analysis over FDA Adverse Event
+Reporting System (FAERS) quarterly data, precomputed per drug for
+ClinicalAgent.
+
+Provides:
+- Streaming readers for the FAERS ASCII quarterly dump (``$``-delimited
+  DRUG, REAC and OUTC files, zipped or extracted); drugs and MedDRA
+  preferred terms are integer-coded as they are read, and case follow-ups
+  collapse to the latest version, within a quarter and across quarters
+- SignalBuilder: drug-event report counts from a vectorized cross-join of
+  per-report drug and event codes (sort + repeat, no per-report loop);
+  counts are additive, so a new quarter is merged into an existing store
+  without re-reading earlier ones; the store keeps each case's counted
+  version (caseid -> primaryid and its drug/event codes), so a follow-up
+  in the new quarter replaces the earlier version instead of adding to it
+- disproportionality(): PRR (with Yates chi-squared), ROR (with 95% CI)
+  and the information component IC (with its lower credibility bound)
+  for every drug-event pair at once
+- SafetySignalStore: the per-drug signal tables, memory-mapped, and a
+  safety profile (top signals, serious-outcome share, safety score)
+
+Build or extend a store from the ai_engine directory:
+
+    python -m app.services.safety_signals ingest faers_ascii_2024Q1.zip faers_ascii_2024Q2.zip --out data/faers
+    python -m app.services.safety_signals ingest faers_ascii_2024Q3.zip --out data/faers --append
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import time
+import zipfile
+import argparse
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.staging import staged_directory
+
+logger = structlog.get_logger(__name__)
+
+STORE_FORMAT_VERSION = 1
+
+# Drug roles counted as exposure: primary and secondary suspect
+# (concomitant "C" and interacting "I" drugs are left out)
+SUSPECT_ROLES = frozenset({"PS", "SS"})
+
+# OUTC codes for serious outcomes: death, life-threatening, hospitalization,
+# disability, congenital anomaly, required intervention
+SERIOUS_OUTCOMES = frozenset({"DE", "LT", "HO", "DS", "CA", "RI"})
+
+# Salt and formulation words dropped so "METFORMIN HYDROCHLORIDE" and
+# "METFORMIN" code to the same active moiety
+SALT_WORDS = frozenset("""
+    HYDROCHLORIDE HCL SODIUM POTASSIUM CALCIUM MAGNESIUM MESYLATE MALEATE SULFATE ACETATE
+    CITRATE TARTRATE FUMARATE SUCCINATE BESYLATE BROMIDE CHLORIDE PHOSPHATE HYCLATE DIHYDRATE
+    MONOHYDRATE TRIHYDRATE HEMIHYDRATE ANHYDROUS
+""".split())
+
+# Pairs reported fewer times than this are kept in the counts but not in the signal tables
+SIGNAL_MIN_REPORTS = 3
+
+# Report pairs expanded per cross-join batch (bounds peak memory)
+CROSS_JOIN_BATCH = 4_000_000
+
+# Signal flags
+PRR_SIGNAL = 1  # PRR >= 2, chi-squared >= 4, at least 3 reports (Evans criteria)
+ROR_SIGNAL = 2  # lower bound of the ROR 95% CI > 1
+IC_SIGNAL = 4   # IC025 > 0
+
+
+def drug_keys(name: str) -> List[str]:
+    """Active-moiety keys of a FAERS drug entry (combination products split on ``\\``, ``/`` and ``+``)."""
+    keys = []
+    for part in re.split(r"[\\/+]", name.upper()):
+        words = [word for word in re.sub(r"[^A-Z0-9]+", " ", part).split() if word not in SALT_WORDS]
+        if words:
+            keys.append(" ".join(words))
+    return keys
+
+
+def event_key(term: str) -> str:
+    return " ".join(term.strip().split()).title()
+
+
+# ======================
+# FAERS READERS
+# ======================
+
+def _faers_tables(path: str) -> Dict[str, List[Tuple[str, Any]]]:
+    """``{"DRUG": [(name, opener), ...], ...}`` for the quarter files in a zip or directory."""
+    tables: Dict[str, List[Tuple[str, Any]]] = {"DRUG": [], "REAC": [], "OUTC": []}
+
+    def classify(name: str, opener):
+        base = os.path.basename(name).upper()
+        if base.endswith(".TXT"):
+            for table in tables:
+                if base.startswith(table):
+                    tables[table].append((name, opener))
+
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                classify(full, lambda full=full: open(full, "rb"))
+    else:
+        archive = zipfile.ZipFile(path)
+        for member in archive.namelist():
+            classify(member, lambda member=member: archive.open(member))
+    return tables
+
+
+def _rows(opener, columns: Tuple[str, ...]) -> Iterator[List[str]]:
+    """Selected columns of a ``$``-delimited FAERS file, by header name."""
+    with opener() as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="latin-1", newline=""), delimiter="$", quoting=csv.QUOTE_NONE)
+        header = [name.strip().lower() for name in next(reader, [])]
+        try:
+            indexes = [header.index(column) for column in columns]
+        except ValueError:
+            raise ValueError(f"FAERS file is missing one of the columns {columns}") from None
+        width = max(indexes) + 1
+        for row in reader:
+            if len(row) >= width:
+                yield [row[index] for index in indexes]
+
+
+# ======================
+# SIGNAL STATISTICS
+# ======================
+
+def disproportionality(a: np.ndarray, drug_reports: np.ndarray, event_reports: np.ndarray, total: int) -> Dict[str, np.ndarray]:
+    """
+    PRR, ROR and IC for drug-event pairs from their 2x2 tables.
+
+    ``a`` reports mention the drug and the event, ``drug_reports`` /
+    ``event_reports`` mention the drug / the event, out of ``total``
+    reports. Undefined ratios (no reports of the event without the drug)
+    are NaN and never flagged.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = drug_reports - a
+    c = event_reports - a
+    d = total - a - b - c
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prr = (a / (a + b)) / (c / (c + d))
+        chi2 = total * np.square(np.maximum(np.abs(a * d - b * c) - total / 2, 0)) / ((a + b) * (c + d) * (a + c) * (b + d))
+        ror = (a * d) / (b * c)
+        ror_se = np.sqrt(1 / a + 1 / b + 1 / c + 1 / d)
+        ror025 = np.exp(np.log(ror) - 1.96 * ror_se)
+        expected = (a + b) * (a + c) / total
+        ic = np.log2((a + 0.5) / (expected + 0.5))
+        # Analytic approximation of the 2.5% credibility bound (Noren et al.)
+        ic025 = ic - 3.3 * (a + 0.5) ** -0.5 - 2 * (a + 0.5) ** -1.5
+
+    for values in (prr, chi2, ror, ror025):
+        values[~np.isfinite(values)] = np.nan
+
+    enough = a >= SIGNAL_MIN_REPORTS
+    flags = np.zeros(len(a), dtype=np.uint8)
+    flags[enough & (prr >= 2) & (chi2 >= 4)] |= PRR_SIGNAL
+    flags[enough & (ror025 > 1)] |= ROR_SIGNAL
+    flags[enough & (ic025 > 0)] |= IC_SIGNAL
+    return {"prr": prr, "chi2": chi2, "ror": ror, "ror025": ror025, "ic": ic, "ic025": ic025, "flags": flags}
+
+
+# ======================
+# BUILDER
+# ======================
+
+def _take_csr(offsets: np.ndarray, values: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows ``rows`` of a CSR array, as new ``(offsets, values)``."""
+    lengths = offsets[rows + 1] - offsets[rows]
+    taken = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=taken[1:])
+    positions = np.arange(taken[-1], dtype=np.int64) + np.repeat(offsets[rows] - taken[:-1], lengths)
+    return taken, values[positions]
+
+
+@dataclass
+class CaseTable:
+    """
+    The counted version of every case, sorted by caseid: its primaryid,
+    whether it had a serious outcome and its suspect-drug and event codes
+    (CSR; empty for versions without both). Kept with the counts so a
+    follow-up in a later quarter can take the earlier version back out.
+    """
+    case_ids: np.ndarray
+    report_ids: np.ndarray
+    serious: np.ndarray
+    drug_offsets: np.ndarray
+    drug_codes: np.ndarray
+    event_offsets: np.ndarray
+    event_codes: np.ndarray
+
+    FIELDS = ("case_ids", "report_ids", "serious", "drug_offsets", "drug_codes", "event_offsets", "event_codes")
+
+    @classmethod
+    def empty(cls) -> "CaseTable":
+        no_rows = np.zeros(1, dtype=np.int64)
+        return cls(
+            np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool),
+            no_rows, np.empty(0, dtype=np.int32), no_rows.copy(), np.empty(0, dtype=np.int32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.case_ids)
+
+    def take(self, rows: np.ndarray) -> "CaseTable":
+        rows = np.asarray(rows, dtype=np.int64)
+        return CaseTable(
+            self.case_ids[rows], self.report_ids[rows], self.serious[rows],
+            *_take_csr(self.drug_offsets, self.drug_codes, rows),
+            *_take_csr(self.event_offsets, self.event_codes, rows)
+        )
+
+    def merged(self, other: "CaseTable") -> "CaseTable":
+        """Both tables' cases (which must not overlap), sorted by caseid."""
+        joined = CaseTable(
+            np.concatenate((self.case_ids, other.case_ids)),
+            np.concatenate((self.report_ids, other.report_ids)),
+            np.concatenate((self.serious, other.serious)),
+            np.concatenate((self.drug_offsets, other.drug_offsets[1:] + self.drug_offsets[-1])),
+            np.concatenate((self.drug_codes, other.drug_codes)),
+            np.concatenate((self.event_offsets, other.event_offsets[1:] + self.event_offsets[-1])),
+            np.concatenate((self.event_codes, other.event_codes))
+        )
+        return joined.take(np.argsort(joined.case_ids, kind="stable"))
+
+    def report_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """``(drug_report, drug_code, event_report, event_code, serious_ids)``, the row form the FAERS files are read into."""
+        return (
+            np.repeat(self.report_ids, np.diff(self.drug_offsets)), self.drug_codes,
+            np.repeat(self.report_ids, np.diff(self.event_offsets)), self.event_codes,
+            self.report_ids[self.serious]
+        )
+
+
+class SignalBuilder:
+    """
+    Accumulates additive drug-event report counts over FAERS quarters.
+
+    Only the latest version of a case counts: a follow-up read from a
+    later quarter takes the earlier version's contribution back out of
+    the counts (the case table records what each counted version added).
+    """
+
+    def __init__(self):
+        self.drug_ids: Dict[str, int] = {}
+        self.event_ids: Dict[str, int] = {}
+        self.quarters: List[str] = []
+        self.total_reports = 0
+        self.serious_reports = 0
+        self.cases = CaseTable.empty()
+        # Per-quarter partial counts, combined in counts()
+        self._pairs: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._drug_counts: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._event_counts: List[np.ndarray] = []
+
+    @classmethod
+    def from_store(cls, directory: str) -> "SignalBuilder":
+        """A builder holding an existing store's counts, to append new quarters to."""
+        builder = cls()
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported safety signal store format {meta.get('format_version')} in {directory}")
+        with open(os.path.join(directory, "drugs.json"), encoding="utf-8") as f:
+            builder.drug_ids = {name: index for index, name in enumerate(json.load(f))}
+        with open(os.path.join(directory, "events.json"), encoding="utf-8") as f:
+            builder.event_ids = {name: index for index, name in enumerate(json.load(f))}
+        cases_path = os.path.join(directory, "cases.npz")
+        if not os.path.exists(cases_path):
+            raise ValueError(f"Safety signal store in {directory} has no case versions; rebuild it from every quarter to append")
+        with np.load(cases_path) as cases:
+            builder.cases = CaseTable(*(cases[name] for name in CaseTable.FIELDS))
+        counts = np.load(os.path.join(directory, "counts.npz"))
+        builder._pairs.append((counts["pair_drug"], counts["pair_event"], counts["pair_reports"], counts["pair_serious"]))
+        builder._drug_counts.append((counts["drug_reports"], counts["drug_serious"]))
+        builder._event_counts.append(counts["event_reports"])
+        builder.quarters = list(meta["quarters"])
+        builder.total_reports = int(meta["total_reports"])
+        builder.serious_reports = int(meta["serious_reports"])
+        return builder
+
+    def _code(self, vocabulary: Dict[str, int], key: str) -> int:
+        code = vocabulary.get(key)
+        if code is None:
+            code = vocabulary[key] = len(vocabulary)
+        return code
+
+    def add_quarter(self, path: str):
+        """Read one FAERS quarter (zip archive or extracted directory)."""
+        started = time.perf_counter()
+        tables = _faers_tables(path)
+        if not tables["DRUG"] or not tables["REAC"]:
+            raise ValueError(f"{path} has no FAERS DRUG/REAC files")
+
+        # Latest version of each case: primaryid is caseid followed by the case version
+        latest: Dict[int, int] = {}
+        drug_report, drug_code = array("q"), array("i")
+        for _, opener in tables["DRUG"]:
+            for primaryid, caseid, role, drugname, prod_ai in _rows(opener, ("primaryid", "caseid", "role_cod", "drugname", "prod_ai")):
+                try:
+                    report, case = int(primaryid), int(caseid)
+                except ValueError:
+                    continue
+                if report > latest.get(case, -1):
+                    latest[case] = report
+                if role.strip().upper() not in SUSPECT_ROLES:
+                    continue
+                for key in drug_keys(prod_ai or drugname):
+                    drug_report.append(report)
+                    drug_code.append(self._code(self.drug_ids, key))
+
+        event_report, event_code = array("q"), array("i")
+        for _, opener in tables["REAC"]:
+            for primaryid, pt in _rows(opener, ("primaryid", "pt")):
+                if pt and primaryid.isdigit():
+                    event_report.append(int(primaryid))
+                    event_code.append(self._code(self.event_ids, event_key(pt)))
+
+        serious_ids = array("q")
+        for _, opener in tables["OUTC"]:
+            for primaryid, outcome in _rows(opener, ("primaryid", "outc_cod")):
+                if outcome.strip().upper() in SERIOUS_OUTCOMES and primaryid.isdigit():
+                    serious_ids.append(int(primaryid))
+
+        case_ids = np.fromiter(latest.keys(), dtype=np.int64, count=len(latest))
+        versions = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+
+        # Against the versions counted from earlier quarters the later one wins
+        known = self.cases
+        at = np.searchsorted(known.case_ids, case_ids)
+        found = at < len(known)
+        found[found] = known.case_ids[at[found]] == case_ids[found]
+        stored = np.full(len(case_ids), -1, dtype=np.int64)
+        stored[found] = known.report_ids[at[found]]
+        newer = versions > stored
+        superseded = at[found & newer]
+        if len(superseded):
+            previous = known.take(superseded)
+            self._add_reports(*previous.report_rows(), previous.report_ids, sign=-1)
+        case_ids, versions = case_ids[newer], versions[newer]
+
+        reports, serious, d_report, d_code, e_report, e_code = self._add_reports(
+            np.frombuffer(drug_report, dtype=np.int64), np.frombuffer(drug_code, dtype=np.int32),
+            np.frombuffer(event_report, dtype=np.int64), np.frombuffer(event_code, dtype=np.int32),
+            np.frombuffer(serious_ids, dtype=np.int64), versions
+        )
+
+        # Case rows of this quarter's versions; versions that were not counted point at an empty row
+        order = np.argsort(case_ids, kind="stable")
+        case_ids, versions = case_ids[order], versions[order]
+        row = np.searchsorted(reports, versions)
+        counted = row < len(reports)
+        counted[counted] = reports[row[counted]] == versions[counted]
+        row[~counted] = len(reports)
+
+        def csr(report: np.ndarray) -> np.ndarray:
+            offsets = np.zeros(len(reports) + 2, dtype=np.int64)
+            np.cumsum(np.bincount(report, minlength=len(reports) + 1), out=offsets[1:])
+            return offsets
+
+        quarter = CaseTable(
+            case_ids, versions, np.append(serious, False)[row],
+            *_take_csr(csr(d_report), d_code, row),
+            *_take_csr(csr(e_report), e_code, row)
+        )
+        kept = np.ones(len(known), dtype=bool)
+        kept[superseded] = False
+        self.cases = known.take(np.flatnonzero(kept)).merged(quarter)
+
+        self.quarters.append(os.path.basename(os.path.normpath(path)))
+        logger.info(
+            "faers_quarter_ingested",
+            quarter=self.quarters[-1],
+            cases=len(case_ids),
+            superseded=int(len(superseded)),
+            drug_rows=len(drug_code),
+            event_rows=len(event_code),
+            elapsed_s=round(time.perf_counter() - started, 1)
+        )
+
+    def _add_reports(
+        self,
+        drug_report: np.ndarray,
+        drug_code: np.ndarray,
+        event_report: np.ndarray,
+        event_code: np.ndarray,
+        serious_ids: np.ndarray,
+        current: np.ndarray,
+        sign: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Add (``sign`` 1) or take back out (-1) the counts of the ``current``
+        report versions. Returns the counted reports (primaryids with a
+        suspect drug and an event), their seriousness and their drug and
+        event rows as ``(report index, code)`` pairs.
+        """
+        # Dense report index over current case versions with both a suspect drug and an event
+        with_drug = np.unique(drug_report[np.isin(drug_report, current)])
+        with_event = np.unique(event_report[np.isin(event_report, current)])
+        reports = np.intersect1d(with_drug, with_event, assume_unique=True)
+        serious = np.isin(reports, serious_ids)
+
+        def dense(report: np.ndarray, code: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+            index = np.searchsorted(reports, report)
+            index[index == len(reports)] = 0
+            keep = reports[index] == report if len(reports) else np.zeros(len(report), dtype=bool)
+            # One row per (report, code), sorted by report
+            pairs = np.unique(index[keep].astype(np.int64) * width + code[keep])
+            return (pairs // width).astype(np.int64), (pairs % width).astype(np.int32)
+
+        d_report, d_code = dense(drug_report, drug_code, max(len(self.drug_ids), 1))
+        e_report, e_code = dense(event_report, event_code, max(len(self.event_ids), 1))
+
+        drug_reports = np.bincount(d_code, minlength=len(self.drug_ids))
+        drug_serious = np.bincount(d_code, weights=serious[d_report], minlength=len(self.drug_ids)).astype(np.int64)
+        self._drug_counts.append((sign * drug_reports, sign * drug_serious))
+        self._event_counts.append(sign * np.bincount(e_code, minlength=len(self.event_ids)))
+        self.total_reports += sign * len(reports)
+        self.serious_reports += sign * int(serious.sum())
+
+        # Cross-join every report's drugs with its events, in batches of drug rows
+        events_per_report = np.bincount(e_report, minlength=len(reports))
+        event_start = np.concatenate(([0], np.cumsum(events_per_report)[:-1]))
+        width = max(len(self.event_ids), 1)
+        keys, counts, serious_counts = [], [], []
+        fanout = events_per_report[d_report]
+        cumulative = np.cumsum(fanout)
+        start = 0
+        while start < len(d_report):
+            done = cumulative[start - 1] if start else 0
+            end = max(int(np.searchsorted(cumulative, done + CROSS_JOIN_BATCH, side="right")), start + 1)
+            rows = slice(start, end)
+            start = end
+            repeat = fanout[rows]
+            total = int(repeat.sum())
+            within = np.arange(total) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+            report = np.repeat(d_report[rows], repeat)
+            event = e_code[np.repeat(event_start[d_report[rows]], repeat) + within]
+            pair_keys, inverse, pair_counts = np.unique(
+                np.repeat(d_code[rows].astype(np.int64), repeat) * width + event, return_inverse=True, return_counts=True
+            )
+            keys.append(pair_keys)
+            counts.append(sign * pair_counts)
+            serious_counts.append(sign * np.bincount(inverse, weights=serious[report], minlength=len(pair_keys)).astype(np.int64))
+        if keys:
+            pair_keys = np.concatenate(keys)
+            self._pairs.append((
+                (pair_keys // width).astype(np.int32), (pair_keys % width).astype(np.int32),
+                np.concatenate(counts), np.concatenate(serious_counts)
+            ))
+        return reports, serious, d_report, d_code, e_report, e_code
+
+    def counts(self) -> Dict[str, np.ndarray]:
+        """Combined counts over every quarter added (pairs sorted by drug, then event)."""
+        n_drugs, n_events = len(self.drug_ids), len(self.event_ids)
+        width = max(n_events, 1)
+        if self._pairs:
+            keys = np.concatenate([drug.astype(np.int64) * width + event for drug, event, _, _ in self._pairs])
+            unique, inverse = np.unique(keys, return_inverse=True)
+            reports = np.bincount(inverse, weights=np.concatenate([p[2] for p in self._pairs]), minlength=len(unique))
+            serious = np.bincount(inverse, weights=np.concatenate([p[3] for p in self._pairs]), minlength=len(unique))
+        else:
+            unique, reports, serious = (np.empty(0, dtype=np.int64) for _ in range(3))
+
+        def padded(parts: Iterable[np.ndarray], size: int) -> np.ndarray:
+            total = np.zeros(size, dtype=np.int64)
+            for part in parts:
+                total[:len(part)] += part
+            return total
+
+        return {
+            "pair_drug": (unique // width).astype(np.int32),
+            "pair_event": (unique % width).astype(np.int32),
+            "pair_reports": reports.astype(np.int32),
+            "pair_serious": serious.astype(np.int32),
+            "drug_reports": padded((r for r, _ in self._drug_counts), n_drugs),
+            "drug_serious": padded((s for _, s in self._drug_counts), n_drugs),
+            "event_reports": padded(self._event_counts, n_events)
+        }
+
+    def write(self, directory: str) -> Dict[str, Any]:
+        """
+        Compute every pair's statistics and write counts, case versions and
+        per-drug signal tables. The store is built in a staging directory
+        that replaces ``directory`` when complete.
+        """
+        with staged_directory(directory) as staging:
+            meta = self._write(staging)
+        logger.info("safety_signals_computed", pairs=meta["pairs"], signals=meta["signals"], elapsed_s=meta["elapsed_s"])
+        return meta
+
+    def _write(self, directory: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        counts = self.counts()
+        np.savez(os.path.join(directory, "counts.npz"), **counts)
+        np.savez(os.path.join(directory, "cases.npz"), **{name: getattr(self.cases, name) for name in CaseTable.FIELDS})
+
+        drug, event, reports = counts["pair_drug"], counts["pair_event"], counts["pair_reports"]
+        keep = reports >= SIGNAL_MIN_REPORTS
+        drug, event = drug[keep], event[keep]
+        stats = disproportionality(
+            reports[keep], counts["drug_reports"][drug], counts["event_reports"][event], self.total_reports
+        )
+
+        # Rows grouped by drug (CSR), strongest signals first within each drug
+        order = np.lexsort((-np.nan_to_num(stats["ic025"], nan=-np.inf), drug))
+        offsets = np.zeros(len(self.drug_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(drug, minlength=len(self.drug_ids)), out=offsets[1:])
+        table = {
+            "event": event[order],
+            "reports": reports[keep][order],
+            "serious": counts["pair_serious"][keep][order],
+            **{name: values[order].astype(np.float32) for name, values in stats.items() if name != "flags"},
+            "flags": stats["flags"][order]
+        }
+        np.save(os.path.join(directory, "drug_offsets.npy"), offsets)
+        for name, values in table.items():
+            np.save(os.path.join(directory, f"signal_{name}.npy"), values)
+
+        for name, vocabulary in (("drugs", self.drug_ids), ("events", self.event_ids)):
+            with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(sorted(vocabulary, key=vocabulary.get), f, ensure_ascii=False)
+        meta = {
+            "format_version": STORE_FORMAT_VERSION,
+            "quarters": self.quarters,
+            "total_reports": self.total_reports,
+            "serious_reports": self.serious_reports,
+            "cases": len(self.cases),
+            "drugs": len(self.drug_ids),
+            "events": len(self.event_ids),
+            "pairs": int(len(counts["pair_reports"])),
+            "signal_rows": int(keep.sum()),
+            "signals": int(np.count_nonzero(stats["flags"])),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "elapsed_s": round(time.perf_counter() - started, 1)
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+
+def build_store(quarters: List[str], directory: str, append: bool = False) -> Dict[str, Any]:
+    """Ingest FAERS quarters into a signal store, optionally on top of the counts already in it."""
+    existing = append and os.path.exists(os.path.join(directory, "meta.json"))
+    builder = SignalBuilder.from_store(directory) if existing else SignalBuilder()
+    for quarter in quarters:
+        builder.add_quarter(quarter)
+    return builder.write(directory)
+
+
+# ======================
+# STORE
+# ======================
+
+@dataclass
+class SafetyProfile:
+    drug: str
+    reports: int
+    serious_fraction: float
+    signal_count: int
+    signals: List[Dict[str, Any]]
+    safety_score: float
+
+
+def _frequency(proportion: float) -> str:
+    """Reporting proportion among the drug's reports, in CIOMS-style bands."""
+    if proportion >= 0.1:
+        return "Very common"
+    if proportion >= 0.01:
+        return "Common"
+    if proportion >= 0.001:
+        return "Uncommon"
+    return "Rare"
+
+
+class SafetySignalStore:
+    """Read-only, memory-mapped per-drug signal tables."""
+
+    COLUMNS = ("event", "reports", "serious", "prr", "chi2", "ror", "ror025", "ic", "ic025", "flags")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported safety signal store format {self.meta.get('format_version')} in {directory}")
+        with open(os.path.join(directory, "drugs.json"), encoding="utf-8") as f:
+            self.drug_ids = {name: index for index, name in enumerate(json.load(f))}
+        with open(os.path.join(directory, "events.json"), encoding="utf-8") as f:
+            self.event_names: List[str] = json.load(f)
+        self.offsets = np.load(os.path.join(directory, "drug_offsets.npy"), mmap_mode="r")
+        self.columns = {name: np.load(os.path.join(directory, f"signal_{name}.npy"), mmap_mode="r") for name in self.COLUMNS}
+        counts = np.load(os.path.join(directory, "counts.npz"))
+        self.drug_reports = counts["drug_reports"]
+        self.drug_serious = counts["drug_serious"]
+
+    def drug_id(self, molecule: str) -> Optional[int]:
+        keys = drug_keys(molecule)
+        return self.drug_ids.get(keys[0]) if keys else None
+
+    def signal_table(self, molecule: str) -> Optional[Dict[str, np.ndarray]]:
+        """The molecule's drug-event rows (strongest IC025 first), or None when FAERS has no reports of it."""
+        drug = self.drug_id(molecule)
+        if drug is None:
+            return None
+        rows = slice(int(self.offsets[drug]), int(self.offsets[drug + 1]))
+        return {name: np.asarray(column[rows]) for name, column in self.columns.items()}
+
+    def profile(self, molecule: str, limit: int = 10) -> Optional[SafetyProfile]:
+        drug = self.drug_id(molecule)
+        table = self.signal_table(molecule)
+        if table is None:
+            return None
+        reports = int(self.drug_reports[drug])
+        serious_fraction = float(self.drug_serious[drug]) / reports if reports else 0.0
+        flagged = np.flatnonzero(table["flags"])
+        signals = []
+        for row in flagged[:limit]:
+            count = int(table["reports"][row])
+            signals.append({
+                "event": self.event_names[int(table["event"][row])],
+                "reports": count,
+                "serious_fraction": round(int(table["serious"][row]) / count, 3),
+                "frequency": _frequency(count / reports),
+                "prr": _rounded(table["prr"][row]),
+                "ror": _rounded(table["ror"][row]),
+                "ror025": _rounded(table["ror025"][row]),
+                "ic025": _rounded(table["ic025"][row]),
+                "methods": [name for bit, name in ((PRR_SIGNAL, "PRR"), (ROR_SIGNAL, "ROR"), (IC_SIGNAL, "IC")) if table["flags"][row] & bit]
+            })
+
+        # 10 minus penalties for serious-outcome reporting and for confirmed
+        # (IC025 > 0) signals, weighted by how serious those reports were
+        confirmed = (table["flags"] & IC_SIGNAL) != 0
+        signal_weight = float(np.sum(0.5 + table["serious"][confirmed] / table["reports"][confirmed]))
+        score = 10.0 - 4.0 * serious_fraction - min(4.0, 0.75 * np.log2(1.0 + signal_weight))
+        return SafetyProfile(
+            drug=molecule,
+            reports=reports,
+            serious_fraction=round(serious_fraction, 3),
+            signal_count=int(len(flagged)),
+            signals=signals,
+            safety_score=round(float(max(0.0, min(10.0, score))), 1)
+        )
+
+
+def _rounded(value: float) -> Optional[float]:
+    return round(float(value), 3) if np.isfinite(value) else None
+
+
+_store: Optional[SafetySignalStore] = None
+_store_checked = False
+_store_lock = threading.Lock()
+
+
+def get_signal_store() -> Optional[SafetySignalStore]:
+    """The store at SAFETY_SIGNALS_DIR, opened once per process; None when it has not been built."""
+    global _store, _store_checked
+    if not _store_checked:
+        with _store_lock:
+            if not _store_checked:
+                directory = settings.SAFETY_SIGNALS_DIR
+                if directory and os.path.exists(os.path.join(directory, "meta.json")):
+                    try:
+                        _store = SafetySignalStore(directory)
+                        logger.info("safety_signal_store_opened", directory=directory, drugs=len(_store.drug_ids))
+                    except (OSError, ValueError) as e:
+                        logger.warning("safety_signal_store_unavailable", directory=directory, error=str(e))
+                _store_checked = True
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build FAERS disproportionality signal tables")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest = subparsers.add_parser("ingest", help="Ingest FAERS ASCII quarters (zip archives or extracted directories)")
+    ingest.add_argument("quarters", nargs="+")
+    ingest.add_argument("--out", default=settings.SAFETY_SIGNALS_DIR, help="Store directory (default: SAFETY_SIGNALS_DIR)")
+    ingest.add_argument("--append", action="store_true", help="Add the quarters to the counts already in the store")
+    query = subparsers.add_parser("query", help="Show the safety profile of a molecule")
+    query.add_argument("molecule")
+    query.add_argument("--store", default=settings.SAFETY_SIGNALS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        print(json.dumps(build_store(args.quarters, args.out, append=args.append), indent=2))
+    else:
+        profile = SafetySignalStore(args.store).profile(args.molecule)
+        print(json.dumps(profile.__dict__ if profile else None, indent=2))
+
+
+if __name__ == "__main__":
+    main()
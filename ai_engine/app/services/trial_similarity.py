@@ -0,0 +1,298 @@
+"""
+PharmaLens Trial Similarity
+============================
+Text similarity over clinical trials (titles, summaries, conditions,
+keywords and eligibility criteria) for indication discovery: trials that
+read like a molecule's own trials but study other conditions point to
+repurposing candidates.
+
+Provides:
+- Hashed TF-IDF vectors: sublinear term frequency times IDF over 2^20
+  hashed features, folded into DIM signed buckets (the hashing trick, a
+  random projection that keeps cosine similarity) and L2-normalized; no
+  vocabulary is kept, so new text is vectorized the same way at query time
+- write_text_index(): two streaming passes over the export that built the
+  trial store (document frequencies, then vectors), written as a
+  memory-mapped float32 matrix whose rows line up with the store's rows;
+  build_store(text_index=True) runs it in the store's staging directory
+- build_text_index(): rebuild the index of an existing store, staged
+  next to it with the store files linked in
+- SimilarityIndex.top_k(): batched top-k cosine search, scanning the
+  matrix in row blocks with one matrix product per block for all queries
+  and a bounded heap per query
+- similar_indications(): conditions of the trials nearest a molecule's
+  trials, excluding conditions it is already trialed in
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import heapq
+import shutil
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.staging import staged_directory
+from app.services.trial_store import TrialStore, iter_trials
+
+logger = structlog.get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+DIM = 128
+HASH_BITS = 20
+
+# Documents vectorized per batch while building
+BUILD_BATCH = 2048
+
+# Matrix rows scored per block (one block @ queries.T product each)
+SEARCH_BLOCK = 65536
+
+WORD = re.compile(r"[a-z][a-z0-9]{2,}")
+
+# English filler plus boilerplate of trial records and eligibility criteria
+STOPWORDS = frozenset("""
+    the and for with without from that this these those are was were been being have has had not
+    any all such than then into onto per who whom which will would shall should may might must can
+    could other their there them they its also only more most less least each both either neither
+    study trial trials patients patient subjects subject participants participant criteria inclusion
+    exclusion eligible eligibility years year age aged months month weeks week days day history
+    prior previous within least greater known including include included
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _hashes(tokens: Iterable[str]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint32)
+
+
+def _features(hashes: np.ndarray) -> np.ndarray:
+    return (hashes & ((1 << HASH_BITS) - 1)).astype(np.int64)
+
+
+def vectorize(texts: Sequence[str], idf: np.ndarray) -> np.ndarray:
+    """Normalized hashed TF-IDF vectors, one row per text."""
+    doc_index, hashes = [], []
+    for index, text in enumerate(texts):
+        h = _hashes(tokenize(text))
+        hashes.append(h)
+        doc_index.append(np.full(len(h), index, dtype=np.int64))
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    if not hashes or not sum(len(h) for h in hashes):
+        return vectors
+    h = np.concatenate(hashes)
+    docs = np.concatenate(doc_index)
+
+    # Term frequency per (document, token hash)
+    pairs, tf = np.unique(docs << 32 | h.astype(np.int64), return_counts=True)
+    docs, h = pairs >> 32, (pairs & 0xFFFFFFFF).astype(np.uint32)
+    weights = (1.0 + np.log(tf)) * idf[_features(h)]
+    buckets = ((h >> HASH_BITS) % DIM).astype(np.int64)
+    signs = np.where(h & (1 << 31), -1.0, 1.0)
+    vectors[:] = np.bincount(docs * DIM + buckets, weights=signs * weights, minlength=len(texts) * DIM).reshape(len(texts), DIM)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def build_text_index(source: str, directory: str) -> Dict[str, Any]:
+    """
+    Rebuild the text index of the trial store in ``directory`` from the
+    same ``source`` export. The store files are linked into a staging
+    directory next to the new index, which then replaces ``directory``.
+    """
+    with staged_directory(directory) as staging:
+        for name in os.listdir(directory):
+            if not name.startswith("text_"):
+                _link(os.path.join(directory, name), os.path.join(staging, name))
+        meta = write_text_index(source, staging)
+    logger.info("trial_text_index_built", directory=directory, trials=meta["trials"], elapsed_s=meta["elapsed_s"])
+    return meta
+
+
+def _link(source: str, target: str):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def write_text_index(source: str, directory: str) -> Dict[str, Any]:
+    """
+    Write the text index into ``directory``, a trial store being built from
+    the same ``source`` export (rows follow the export order, as in the store).
+    """
+    started = time.perf_counter()
+    document_frequency = np.zeros(1 << HASH_BITS, dtype=np.int64)
+    documents = 0
+    for record in iter_trials(source):
+        document_frequency[np.unique(_features(_hashes(tokenize(record.text))))] += 1
+        documents += 1
+
+    with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+        store_trials = json.load(f)["trials"]
+    if documents != store_trials:
+        raise ValueError(f"{source} has {documents} trials but the store in {directory} has {store_trials}")
+
+    idf = (np.log((1 + documents) / (1 + document_frequency)) + 1).astype(np.float32)
+    np.save(os.path.join(directory, "text_idf.npy"), idf)
+
+    vectors = np.lib.format.open_memmap(
+        os.path.join(directory, "text_vectors.npy"), mode="w+", dtype=np.float32, shape=(documents, DIM)
+    )
+    row = 0
+    batch: List[str] = []
+    for record in iter_trials(source):
+        batch.append(record.text)
+        if len(batch) == BUILD_BATCH:
+            vectors[row:row + len(batch)] = vectorize(batch, idf)
+            row += len(batch)
+            batch = []
+    if batch:
+        vectors[row:row + len(batch)] = vectorize(batch, idf)
+    vectors.flush()
+    del vectors
+
+    meta = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "trials": documents,
+        "dim": DIM,
+        "hash_bits": HASH_BITS,
+        "elapsed_s": round(time.perf_counter() - started, 1)
+    }
+    with open(os.path.join(directory, "text_index.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class SimilarityIndex:
+    """Memory-mapped trial vectors with batched top-k cosine search."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "text_index.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != INDEX_FORMAT_VERSION or self.meta.get("dim") != DIM:
+            raise ValueError(f"Unsupported trial text index in {directory}")
+        self.idf = np.load(os.path.join(directory, "text_idf.npy"))
+        self.vectors = np.load(os.path.join(directory, "text_vectors.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def vectorize(self, texts: Sequence[str]) -> np.ndarray:
+        return vectorize(texts, self.idf)
+
+    def centroid(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        """Normalized mean vector of ``rows``, or None when they have no text."""
+        if not len(rows):
+            return None
+        mean = np.asarray(self.vectors[np.sort(rows)], dtype=np.float64).mean(axis=0)
+        norm = np.linalg.norm(mean)
+        return (mean / norm).astype(np.float32) if norm > 0 else None
+
+    def top_k(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        exclude: Optional[Sequence[Optional[np.ndarray]]] = None
+    ) -> List[List[Tuple[float, int]]]:
+        """
+        ``(score, row)`` of the ``k`` rows most similar to each query, best
+        first. ``exclude[i]`` holds sorted rows query ``i`` must not return.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        heaps: List[List[Tuple[float, int]]] = [[] for _ in range(len(queries))]
+        for start in range(0, len(self), SEARCH_BLOCK):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK])
+            scores = block @ queries.T
+            for query, heap in enumerate(heaps):
+                column = scores[:, query]
+                if exclude is not None and exclude[query] is not None and len(exclude[query]):
+                    rows = exclude[query]
+                    inside = rows[(rows >= start) & (rows < start + len(block))]
+                    column[inside - start] = -np.inf
+                take = min(k, len(column))
+                candidates = np.argpartition(column, -take)[-take:]
+                for row in candidates:
+                    score = float(column[row])
+                    if score == -np.inf:
+                        continue
+                    if len(heap) < k:
+                        heapq.heappush(heap, (score, start + int(row)))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, start + int(row)))
+        return [sorted(heap, reverse=True) for heap in heaps]
+
+
+def similar_indications(
+    store: TrialStore,
+    index: SimilarityIndex,
+    rows: np.ndarray,
+    limit: int = 5,
+    neighbours: int = 200
+) -> List[Dict[str, Any]]:
+    """
+    Conditions of the trials most similar to ``rows`` (a molecule's
+    trials) that the molecule has not been trialed in, ranked by summed
+    similarity of the trials studying them.
+    """
+    query = index.centroid(rows)
+    if query is None:
+        return []
+    rows = np.sort(np.asarray(rows, dtype=np.int64))
+    [nearest] = index.top_k(query, k=neighbours, exclude=[rows])
+    if not nearest:
+        return []
+    scores = np.array([score for score, _ in nearest], dtype=np.float64)
+    trial_rows = np.array([row for _, row in nearest], dtype=np.int64)
+
+    # Spread each neighbour's similarity over its conditions
+    starts = np.asarray(store.trial_condition_offsets[trial_rows])
+    lengths = np.asarray(store.trial_condition_offsets[trial_rows + 1]) - starts
+    conditions = store.conditions_of(trial_rows)
+    weights = np.bincount(conditions, weights=np.repeat(scores, lengths), minlength=len(store.condition_names))
+    support = np.bincount(conditions, minlength=len(store.condition_names))
+    weights[np.unique(store.conditions_of(rows))] = 0
+
+    ranked = np.argsort(-weights, kind="stable")[:limit]
+    results = []
+    for condition in ranked:
+        if weights[condition] <= 0:
+            break
+        results.append({
+            "condition": store.condition_names[int(condition)],
+            "similarity": round(float(weights[condition]) / float(scores.sum()), 3),
+            "similar_trials": int(support[condition])
+        })
+    return results
+
+
+_index: Optional[SimilarityIndex] = None
+_index_checked = False
+_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """The text index in TRIAL_STORE_DIR, opened once per process; None when it has not been built."""
+    global _index, _index_checked
+    if not _index_checked:
+        with _index_lock:
+            if not _index_checked:
+                directory = settings.TRIAL_STORE_DIR
+                if directory and os.path.exists(os.path.join(directory, "text_index.json")):
+                    try:
+                        _index = SimilarityIndex(directory)
+                    except (OSError, ValueError) as e:
+                        logger.warning("trial_text_index_unavailable", directory=directory, error=str(e))
+                _index_checked = True
+    return _index
@@ -0,0 +1,656 @@
+"""
+PharmaLens Clinical Trial Store
+================================
+Local, read-only copy of the ClinicalTrials.gov registry for ClinicalAgent.
+
+A bulk export is ingested once with a streaming parser and written as a
+directory of memory-mapped NumPy columns, so queries touch only the pages
+they need and the store can be shared by every worker process.
+
+Provides:
+- Streaming readers for ClinicalTrials.gov exports: API v2 JSON (one
+  large array, NDJSON, API pages, or a zip of per-study files) and the
+  legacy AllPublicXML format (one large XML file or a zip of per-study
+  files); a multi-GB export is never loaded whole
+- TrialStoreBuilder: per-trial columns (phase bitmask, overall status,
+  start year, enrollment, results flag) plus inverted indexes from
+  intervention and condition terms to trial rows (CSR postings)
+- TrialStore: vectorized aggregations over the rows matching a molecule:
+  phase distribution, active/completed counts and ranked indication lists
+
+Build a store (and its text similarity index, see trial_similarity) from
+the ai_engine directory:
+
+    python -m app.services.trial_store ingest ctg-studies.json.zip --out data/trials
+"""
+
+import io
+import os
+import re
+import json
+import time
+import zipfile
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.staging import staged_directory
+
+logger = structlog.get_logger(__name__)
+
+STORE_FORMAT_VERSION = 1
+
+# Phase bitmask: a Phase 1/Phase 2 trial sets both bits
+PHASE_BITS = {
+    "EARLY_PHASE1": 1,
+    "PHASE1": 2,
+    "PHASE2": 4,
+    "PHASE3": 8,
+    "PHASE4": 16,
+    "NA": 32
+}
+
+STATUSES = [
+    "UNKNOWN", "NOT_YET_RECRUITING", "RECRUITING", "ENROLLING_BY_INVITATION",
+    "ACTIVE_NOT_RECRUITING", "SUSPENDED", "TERMINATED", "COMPLETED", "WITHDRAWN",
+    "AVAILABLE", "NO_LONGER_AVAILABLE", "TEMPORARILY_NOT_AVAILABLE",
+    "APPROVED_FOR_MARKETING", "WITHHELD"
+]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+ACTIVE_STATUSES = ("NOT_YET_RECRUITING", "RECRUITING", "ENROLLING_BY_INVITATION", "ACTIVE_NOT_RECRUITING")
+
+# Words that say nothing about which drug or disease a trial studies
+STOPWORDS = frozenset("""
+    and the for with without plus of in on to or via versus vs placebo tablet tablets capsule capsules
+    injection injectable infusion oral topical dose doses dosing low high daily weekly drug drugs therapy
+    treatment standard care usual group arm control active comparator matching sodium hydrochloride
+    extended release solution cream gel patch mg ml mcg iv sc
+""".split())
+
+READ_CHUNK_CHARS = 1 << 20
+
+
+# ======================
+# STREAMING READERS
+# ======================
+
+def iter_json_values(stream: io.TextIOBase) -> Iterator[Any]:
+    """
+    Top-level values of a JSON array, NDJSON or concatenated JSON, decoded
+    one at a time from a text stream.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(READ_CHUNK_CHARS)
+    position = 0
+    eof = not buffer
+    in_array = False
+    started = False
+    while True:
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ","):
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                return
+            buffer, position = stream.read(READ_CHUNK_CHARS), 0
+            eof = not buffer
+            continue
+        if not started:
+            started = True
+            if buffer[position] == "[":
+                in_array = True
+                position += 1
+                continue
+        if in_array and buffer[position] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The value continues past the buffer; keep its start and read more
+            more = stream.read(READ_CHUNK_CHARS)
+            eof = not more
+            buffer, position = buffer[position:] + more, 0
+            continue
+        yield value
+        position = end
+
+
+def _studies_from_json(stream: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    for value in iter_json_values(stream):
+        # API pages wrap studies: {"studies": [...], "nextPageToken": ...}
+        if isinstance(value, dict) and isinstance(value.get("studies"), list):
+            yield from value["studies"]
+        elif isinstance(value, dict):
+            yield value
+
+
+def _studies_from_xml(stream: io.BufferedIOBase) -> Iterator[ET.Element]:
+    for _, element in ET.iterparse(stream, events=("end",)):
+        if element.tag == "clinical_study":
+            yield element
+            element.clear()
+
+
+def iter_trials(path: str) -> Iterator["TrialRecord"]:
+    """Stream TrialRecords from a ClinicalTrials.gov export file, zip archive or directory."""
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                yield from iter_trials(os.path.join(root, name))
+        return
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                with archive.open(member) as raw:
+                    yield from _iter_file(member.filename, raw)
+        return
+
+    with open(path, "rb") as raw:
+        yield from _iter_file(path, raw)
+
+
+def _iter_file(name: str, raw: io.BufferedIOBase) -> Iterator["TrialRecord"]:
+    lowered = name.lower()
+    if lowered.endswith(".xml"):
+        for element in _studies_from_xml(raw):
+            record = TrialRecord.from_ctgov_xml(element)
+            if record is not None:
+                yield record
+    elif lowered.endswith((".json", ".jsonl", ".ndjson")):
+        stream = io.TextIOWrapper(raw, encoding="utf-8-sig")
+        for study in _studies_from_json(stream):
+            record = TrialRecord.from_ctgov_json(study)
+            if record is not None:
+                yield record
+
+
+# ======================
+# RECORDS
+# ======================
+
+def normalize(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def terms(name: str) -> List[str]:
+    """Index terms of an intervention or condition: the whole name plus its meaningful words."""
+    key = normalize(name)
+    if not key:
+        return []
+    # Numbers stay (codes like "Compound-42", "ABT-199"), bare letters and filler words do not
+    words = [word for word in key.split() if (len(word) >= 3 or word.isdigit()) and word not in STOPWORDS]
+    return [key] + [word for word in words if word != key]
+
+
+def _phase_mask(phases: Iterable[str]) -> int:
+    mask = 0
+    for phase in phases:
+        phase = phase.strip().upper()
+        if phase in ("N/A", "NA", "NOT APPLICABLE"):
+            mask |= PHASE_BITS["NA"]
+            continue
+        for part in phase.split("/"):
+            part = part.replace(" ", "").replace("_", "")
+            if part == "EARLYPHASE1":
+                mask |= PHASE_BITS["EARLY_PHASE1"]
+            elif part in ("PHASE1", "PHASE2", "PHASE3", "PHASE4"):
+                mask |= PHASE_BITS[part]
+    return mask
+
+
+def _status_code(status: Optional[str]) -> int:
+    key = re.sub(r"[^A-Z]+", "_", (status or "").upper()).strip("_")
+    return STATUS_CODES.get(key, 0)
+
+
+def _year(date: Optional[str]) -> int:
+    match = re.search(r"\d{4}", date or "")
+    return int(match.group()) if match else 0
+
+
+def _int(value: Any) -> int:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass
+class TrialRecord:
+    nct_id: str
+    phase_mask: int
+    status: int
+    start_year: int
+    enrollment: int
+    has_results: bool
+    interventions: List[str] = field(default_factory=list)
+    conditions: List[str] = field(default_factory=list)
+    # Title, summary, keywords and eligibility criteria, for the text similarity index
+    text: str = ""
+
+    @classmethod
+    def from_ctgov_json(cls, study: Dict[str, Any]) -> Optional["TrialRecord"]:
+        """API v2 study JSON (``protocolSection`` modules)."""
+        protocol = study.get("protocolSection") or {}
+        identification = protocol.get("identificationModule") or {}
+        nct_id = identification.get("nctId")
+        if not nct_id:
+            return None
+        status = protocol.get("statusModule") or {}
+        design = protocol.get("designModule") or {}
+        interventions = []
+        for intervention in (protocol.get("armsInterventionsModule") or {}).get("interventions") or []:
+            interventions.append(intervention.get("name") or "")
+            interventions.extend(intervention.get("otherNames") or [])
+        conditions_module = protocol.get("conditionsModule") or {}
+        text = [
+            identification.get("briefTitle"),
+            identification.get("officialTitle"),
+            (protocol.get("descriptionModule") or {}).get("briefSummary"),
+            " ".join(conditions_module.get("conditions") or []),
+            " ".join(conditions_module.get("keywords") or []),
+            (protocol.get("eligibilityModule") or {}).get("eligibilityCriteria")
+        ]
+        return cls(
+            nct_id=nct_id,
+            phase_mask=_phase_mask(design.get("phases") or []),
+            status=_status_code(status.get("overallStatus")),
+            start_year=_year((status.get("startDateStruct") or {}).get("date")),
+            enrollment=_int((design.get("enrollmentInfo") or {}).get("count")),
+            has_results=bool(study.get("hasResults")),
+            interventions=[name for name in interventions if name],
+            conditions=list(conditions_module.get("conditions") or []),
+            text="\n".join(part for part in text if part)
+        )
+
+    @classmethod
+    def from_ctgov_xml(cls, element: ET.Element) -> Optional["TrialRecord"]:
+        """Legacy ``<clinical_study>`` XML."""
+        nct_id = element.findtext("id_info/nct_id")
+        if not nct_id:
+            return None
+        interventions = []
+        for intervention in element.findall("intervention"):
+            interventions.append(intervention.findtext("intervention_name") or "")
+            interventions.extend(other.text or "" for other in intervention.findall("other_name"))
+        phase = element.findtext("phase")
+        conditions = [condition.text for condition in element.findall("condition") if condition.text]
+        text = [
+            element.findtext("brief_title"),
+            element.findtext("official_title"),
+            element.findtext("brief_summary/textblock"),
+            " ".join(conditions),
+            " ".join(keyword.text or "" for keyword in element.findall("keyword")),
+            element.findtext("eligibility/criteria/textblock")
+        ]
+        return cls(
+            nct_id=nct_id,
+            phase_mask=_phase_mask([phase] if phase else []),
+            status=_status_code(element.findtext("overall_status")),
+            start_year=_year(element.findtext("start_date")),
+            enrollment=_int(element.findtext("enrollment")),
+            has_results=element.find("clinical_results") is not None,
+            interventions=[name for name in interventions if name],
+            conditions=conditions,
+            text="\n".join(part.strip() for part in text if part and part.strip())
+        )
+
+
+# ======================
+# BUILDER
+# ======================
+
+class _PostingsBuilder:
+    """term -> ascending trial rows, accumulated in compact int arrays."""
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+
+    def add(self, row: int, names: Iterable[str]):
+        seen = set()
+        for name in names:
+            for term in terms(name):
+                if term not in seen:
+                    seen.add(term)
+                    self.postings.setdefault(term, array("i")).append(row)
+
+    def write(self, directory: str, prefix: str):
+        vocabulary = sorted(self.postings)
+        lengths = np.fromiter((len(self.postings[term]) for term in vocabulary), dtype=np.int64, count=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        rows = np.empty(int(offsets[-1]), dtype=np.int32)
+        for index, term in enumerate(vocabulary):
+            rows[offsets[index]:offsets[index + 1]] = np.frombuffer(self.postings[term], dtype=np.int32)
+        np.save(os.path.join(directory, f"{prefix}_offsets.npy"), offsets)
+        np.save(os.path.join(directory, f"{prefix}_rows.npy"), rows)
+        with open(os.path.join(directory, f"{prefix}_terms.json"), "w", encoding="utf-8") as f:
+            json.dump(vocabulary, f, ensure_ascii=False)
+
+
+class TrialStoreBuilder:
+    """Accumulates TrialRecords and writes the on-disk store."""
+
+    def __init__(self):
+        self.nct_ids: List[str] = []
+        self.phase = array("B")
+        self.status = array("B")
+        self.start_year = array("h")
+        self.enrollment = array("i")
+        self.has_results = array("B")
+        self.intervention_postings = _PostingsBuilder()
+        self.condition_postings = _PostingsBuilder()
+        # Trial -> condition ids (display names) for indication rankings
+        self.condition_ids: Dict[str, int] = {}
+        self.condition_names: List[str] = []
+        self.trial_condition_offsets = array("q", [0])
+        self.trial_conditions = array("i")
+
+    def add(self, record: TrialRecord):
+        row = len(self.nct_ids)
+        self.nct_ids.append(record.nct_id)
+        self.phase.append(record.phase_mask)
+        self.status.append(record.status)
+        self.start_year.append(min(record.start_year, 32767))
+        self.enrollment.append(min(record.enrollment, 2 ** 31 - 1))
+        self.has_results.append(record.has_results)
+        self.intervention_postings.add(row, record.interventions)
+        self.condition_postings.add(row, record.conditions)
+
+        linked = set()
+        for condition in record.conditions:
+            key = normalize(condition)
+            if not key:
+                continue
+            condition_id = self.condition_ids.get(key)
+            if condition_id is None:
+                condition_id = self.condition_ids[key] = len(self.condition_names)
+                self.condition_names.append(condition.strip())
+            if condition_id not in linked:
+                linked.add(condition_id)
+                self.trial_conditions.append(condition_id)
+        self.trial_condition_offsets.append(len(self.trial_conditions))
+
+    def __len__(self) -> int:
+        return len(self.nct_ids)
+
+    def write(self, directory: str, source: str = ""):
+        """
+        Write the store; a previous store in ``directory`` (and the text
+        index built over it) is replaced. The store is built in a staging
+        directory that is renamed into place when complete.
+        """
+        with staged_directory(directory) as staging:
+            self._write(staging, source)
+
+    def _write(self, directory: str, source: str):
+        def save(name: str, values: np.ndarray):
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+
+        save("nct_ids", np.array(self.nct_ids, dtype="S16"))
+        save("phase", np.frombuffer(self.phase, dtype=np.uint8))
+        save("status", np.frombuffer(self.status, dtype=np.uint8))
+        save("start_year", np.frombuffer(self.start_year, dtype=np.int16))
+        save("enrollment", np.frombuffer(self.enrollment, dtype=np.int32))
+        save("has_results", np.frombuffer(self.has_results, dtype=np.uint8).astype(bool))
+        save("trial_condition_offsets", np.frombuffer(self.trial_condition_offsets, dtype=np.int64))
+        save("trial_conditions", np.frombuffer(self.trial_conditions, dtype=np.int32))
+        self.intervention_postings.write(directory, "intervention")
+        self.condition_postings.write(directory, "condition")
+        with open(os.path.join(directory, "conditions.json"), "w", encoding="utf-8") as f:
+            json.dump(self.condition_names, f, ensure_ascii=False)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": STORE_FORMAT_VERSION,
+                "trials": len(self.nct_ids),
+                "intervention_terms": len(self.intervention_postings.postings),
+                "condition_terms": len(self.condition_postings.postings),
+                "conditions": len(self.condition_names),
+                "source": os.path.basename(source),
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            }, f, indent=2)
+
+
+def build_store(
+    source: str, directory: str, progress_every: int = 50000, text_index: bool = False
+) -> Dict[str, Any]:
+    """
+    Ingest a ClinicalTrials.gov export into a store at ``directory``. With
+    ``text_index`` the text similarity index is built in the same staging
+    directory, so the store and its index replace the previous ones together.
+    """
+    started = time.perf_counter()
+    builder = TrialStoreBuilder()
+    for record in iter_trials(source):
+        builder.add(record)
+        if progress_every and len(builder) % progress_every == 0:
+            logger.info("trial_ingest_progress", trials=len(builder), elapsed_s=round(time.perf_counter() - started, 1))
+    with staged_directory(directory) as staging:
+        builder._write(staging, source)
+        with open(os.path.join(staging, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if text_index:
+            from app.services.trial_similarity import write_text_index
+            meta["text_index"] = write_text_index(source, staging)
+    logger.info("trial_store_built", directory=directory, trials=meta["trials"], elapsed_s=round(time.perf_counter() - started, 1))
+    return meta
+
+
+# ======================
+# STORE
+# ======================
+
+class _TermIndex:
+    """Memory-mapped CSR postings: term -> ascending trial rows."""
+
+    def __init__(self, directory: str, prefix: str):
+        with open(os.path.join(directory, f"{prefix}_terms.json"), encoding="utf-8") as f:
+            self.term_ids = {term: index for index, term in enumerate(json.load(f))}
+        self.offsets = np.load(os.path.join(directory, f"{prefix}_offsets.npy"), mmap_mode="r")
+        self.rows = np.load(os.path.join(directory, f"{prefix}_rows.npy"), mmap_mode="r")
+
+    def postings(self, term: str) -> np.ndarray:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int32)
+        return self.rows[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    def lookup(self, name: str) -> np.ndarray:
+        """
+        Rows whose names match ``name``: the exact normalized name, or every
+        one of its meaningful words (so "aspirin" also finds "Low-dose
+        Aspirin 81 mg").
+        """
+        name_terms = terms(name)
+        if not name_terms:
+            return np.empty(0, dtype=np.int32)
+        exact = self.postings(name_terms[0])
+        # Intersect from the rarest word so the working set shrinks fastest
+        postings = sorted((self.postings(word) for word in name_terms[1:] or name_terms[:1]), key=len)
+        matched = postings[0]
+        for rows in postings[1:]:
+            if not len(matched):
+                break
+            matched = np.intersect1d(matched, rows, assume_unique=True)
+        return np.union1d(exact, matched)
+
+
+@dataclass
+class TrialSummary:
+    total: int
+    active: int
+    completed: int
+    with_results: int
+    enrollment: int
+    phase_distribution: Dict[str, int]
+    status_breakdown: Dict[str, int]
+    current_indications: List[Dict[str, Any]]
+    potential_new_indications: List[Dict[str, Any]]
+    start_years: Dict[str, int]
+
+
+class TrialStore:
+    """Read-only, memory-mapped trial store."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported trial store format {self.meta.get('format_version')} in {directory}")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self.nct_ids = load("nct_ids")
+        self.phase = load("phase")
+        self.status = load("status")
+        self.start_year = load("start_year")
+        self.enrollment = load("enrollment")
+        self.has_results = load("has_results")
+        self.trial_condition_offsets = load("trial_condition_offsets")
+        self.trial_conditions = load("trial_conditions")
+        self.interventions = _TermIndex(directory, "intervention")
+        self.conditions = _TermIndex(directory, "condition")
+        with open(os.path.join(directory, "conditions.json"), encoding="utf-8") as f:
+            self.condition_names: List[str] = json.load(f)
+        self._active_codes = np.array([STATUS_CODES[status] for status in ACTIVE_STATUSES], dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return int(self.meta["trials"])
+
+    def trials_for_intervention(self, molecule: str) -> np.ndarray:
+        return self.interventions.lookup(molecule)
+
+    def trials_for_condition(self, condition: str) -> np.ndarray:
+        return self.conditions.lookup(condition)
+
+    def conditions_of(self, rows: np.ndarray) -> np.ndarray:
+        """Condition ids of all ``rows`` (concatenated CSR slices, without a Python loop)."""
+        starts = self.trial_condition_offsets[rows]
+        lengths = self.trial_condition_offsets[rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int32)
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.trial_conditions[shifts + np.arange(total)]
+
+    def _ranked_conditions(self, rows: np.ndarray, limit: int, exclude: Sequence[int] = ()) -> List[Tuple[int, int]]:
+        condition_ids, counts = np.unique(self.conditions_of(rows), return_counts=True)
+        if len(exclude):
+            keep = ~np.isin(condition_ids, exclude)
+            condition_ids, counts = condition_ids[keep], counts[keep]
+        order = np.lexsort((condition_ids, -counts))[:limit]
+        return [(int(condition_ids[i]), int(counts[i])) for i in order]
+
+    def summarize(self, rows: np.ndarray, indication_limit: int = 5) -> TrialSummary:
+        """Aggregate the trials at ``rows`` (e.g. from ``trials_for_intervention``)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        phase = np.asarray(self.phase[rows])
+        status = np.asarray(self.status[rows])
+
+        def phase_count(*names: str) -> int:
+            mask = 0
+            for name in names:
+                mask |= PHASE_BITS[name]
+            return int(np.count_nonzero(phase & mask))
+
+        completed = status == STATUS_CODES["COMPLETED"]
+        status_counts = np.bincount(status, minlength=len(STATUSES))
+
+        # Indications a molecule is established in: late-phase (3/4) trials;
+        # candidates for repurposing: early-phase or still-running trials elsewhere
+        late = (phase & (PHASE_BITS["PHASE3"] | PHASE_BITS["PHASE4"])) != 0
+        current = self._ranked_conditions(rows[late], indication_limit)
+        exploratory = ~late | np.isin(status, self._active_codes)
+        potential = self._ranked_conditions(rows[exploratory], indication_limit, [cid for cid, _ in current])
+
+        years = np.asarray(self.start_year[rows])
+        years = years[years > 0]
+        year_values, year_counts = np.unique(years, return_counts=True)
+
+        return TrialSummary(
+            total=len(rows),
+            active=int(np.isin(status, self._active_codes).sum()),
+            completed=int(completed.sum()),
+            with_results=int(np.count_nonzero(self.has_results[rows])),
+            enrollment=int(np.asarray(self.enrollment[rows], dtype=np.int64).sum()),
+            phase_distribution={
+                "phase_1": phase_count("EARLY_PHASE1", "PHASE1"),
+                "phase_2": phase_count("PHASE2"),
+                "phase_3": phase_count("PHASE3"),
+                "phase_4": phase_count("PHASE4")
+            },
+            status_breakdown={STATUSES[code].lower(): int(count) for code, count in enumerate(status_counts) if count},
+            current_indications=[{"condition": self.condition_names[cid], "trials": count} for cid, count in current],
+            potential_new_indications=[{"condition": self.condition_names[cid], "trials": count} for cid, count in potential],
+            start_years={str(int(year)): int(count) for year, count in zip(year_values, year_counts)}
+        )
+
+    def nct_ids_for(self, rows: np.ndarray, limit: int = 10) -> List[str]:
+        """NCT ids of the most recently started trials among ``rows``."""
+        rows = np.asarray(rows, dtype=np.int64)
+        recent = rows[np.argsort(-np.asarray(self.start_year[rows]), kind="stable")[:limit]]
+        return [nct_id.decode("ascii") for nct_id in self.nct_ids[recent]]
+
+
+_store: Optional[TrialStore] = None
+_store_checked = False
+_store_lock = threading.Lock()
+
+
+def get_trial_store() -> Optional[TrialStore]:
+    """The store at TRIAL_STORE_DIR, opened once per process; None when it has not been built."""
+    global _store, _store_checked
+    if not _store_checked:
+        with _store_lock:
+            if not _store_checked:
+                directory = settings.TRIAL_STORE_DIR
+                if directory and os.path.exists(os.path.join(directory, "meta.json")):
+                    try:
+                        _store = TrialStore(directory)
+                        logger.info("trial_store_opened", directory=directory, trials=len(_store))
+                    except (OSError, ValueError) as e:
+                        logger.warning("trial_store_unavailable", directory=directory, error=str(e))
+                _store_checked = True
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local clinical-trial store from a ClinicalTrials.gov export")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest = subparsers.add_parser("ingest", help="Ingest an export (JSON, NDJSON, XML, zip or directory)")
+    ingest.add_argument("source", help="Export file, zip archive or directory")
+    ingest.add_argument("--out", default=settings.TRIAL_STORE_DIR, help="Store directory (default: TRIAL_STORE_DIR)")
+    ingest.add_argument("--no-text-index", action="store_true", help="Skip the text similarity index (second pass over the export)")
+    query = subparsers.add_parser("query", help="Summarize the trials for a molecule")
+    query.add_argument("molecule")
+    query.add_argument("--store", default=settings.TRIAL_STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        meta = build_store(args.source, args.out, text_index=not args.no_text_index)
+        print(json.dumps(meta, indent=2))
+    else:
+        store = TrialStore(args.store)
+        started = time.perf_counter()
+        rows = store.trials_for_intervention(args.molecule)
+        summary = store.summarize(rows)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps(summary.__dict__, indent=2))
+        print(f"{summary.total} trials in {elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
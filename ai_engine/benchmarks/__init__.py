@@ -0,0 +1,20 @@
+"""
+PharmaLens AI Engine Benchmarks
+================================
+Timing harnesses for the AI Engine. Run from the ai_engine directory:
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.claim_screening
+    python -m benchmarks.compare <baseline.json> <current.json>
+    python -m benchmarks.load_generator --rates 5,10,20,40
+    python -m benchmarks.logging_overhead
+    python -m benchmarks.patent_cliff
+    python -m benchmarks.patent_graph
+    python -m benchmarks.patent_index
+    python -m benchmarks.rnpv
+    python -m benchmarks.roi_sensitivity
+    python -m benchmarks.roi_simulation
+    python -m benchmarks.safety_signals
+    python -m benchmarks.serialization
+    python -m benchmarks.trial_store
+"""
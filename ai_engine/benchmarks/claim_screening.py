@@ -0,0 +1,113 @@
+"""
+Claim Screening Benchmark
+==========================
+Builds a synthetic patent index (the generator of the patent index
+benchmark), signs its independent claims into the MinHash/LSH claim index
+and times freedom-to-operate screening of candidate claims, against a full
+scan of every signature. Recall is the share of the full scan's blocking
+claims (estimated similarity at or above the blocking threshold) that the
+LSH lookup also finds.
+
+Usage:
+    python -m benchmarks.claim_screening
+    python -m benchmarks.claim_screening --patents 500000 --output benchmarks/results/claim_screening.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.claim_screening import (
+    BLOCKING_SIMILARITY, ClaimScreeningIndex, build_index, candidate_claims, signatures
+)
+from app.services.patent_index import PatentIndex, build_index as build_patent_index
+from benchmarks.harness import percentile, environment_info
+from benchmarks.patent_index import MOLECULES, write_bulk_file
+
+configure_logging(settings)
+
+SCAN_BLOCK = 1 << 16
+
+
+def full_scan(index: ClaimScreeningIndex, texts: List[str]) -> set:
+    """Claims at or above the blocking similarity to any text, comparing every signature."""
+    sigs, _ = signatures(texts)
+    found = set()
+    for start in range(0, len(index), SCAN_BLOCK):
+        block = np.asarray(index.signatures[start:start + SCAN_BLOCK])
+        for sig in sigs:
+            found.update((start + np.flatnonzero((block == sig).mean(axis=1) >= BLOCKING_SIMILARITY)).tolist())
+    return found
+
+
+def time_screening(index: ClaimScreeningIndex, molecules: List[str], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for molecule in molecules:
+        texts = candidate_claims(molecule)
+        index.blocking_claims(texts)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            screening = index.blocking_claims(texts)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+
+        started = time.perf_counter()
+        scanned = full_scan(index, texts)
+        scan_s = time.perf_counter() - started
+        matched = {claim for found in index.similar_claims(texts, limit=None, threshold=BLOCKING_SIMILARITY) for _, claim in found}
+        results.append({
+            "molecule": molecule,
+            "blocking_patents": screening["blocking_patents"],
+            "recall": round(len(matched & scanned) / len(scanned), 4) if scanned else None,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "full_scan_ms": round(scan_s * 1000, 1)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patents", type=int, default=100000, help="Patents in the synthetic bulk file")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed screenings per molecule")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bulk = os.path.join(workdir, "ipg_synthetic.xml")
+        write_bulk_file(bulk, args.patents)
+        database = os.path.join(workdir, "patents.sqlite3")
+        build_patent_index([bulk], database)
+        meta = build_index(database, os.path.join(workdir, "claims"))
+        index = ClaimScreeningIndex(os.path.join(workdir, "claims"), PatentIndex(database))
+        queries = time_screening(index, MOLECULES[:3] + ["compound 42", "an unrelated molecule"], args.iterations)
+        del index
+
+    print(f"claim index: {meta['claims']} independent claims of {meta['patents']} patents, built in {meta['elapsed_s']:.1f} s")
+    print(f"{'molecule':<24}{'blocking':>10}{'recall':>8}{'p50 ms':>10}{'p99 ms':>10}{'scan ms':>10}")
+    for q in queries:
+        print(f"{q['molecule']:<24}{q['blocking_patents']:>10}{str(q['recall']):>8}{q['p50_ms']:>10}{q['p99_ms']:>10}{q['full_scan_ms']:>10}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "index": meta, "queries": queries}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
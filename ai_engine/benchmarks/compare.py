@@ -0,0 +1,93 @@
+"""
+Benchmark Comparison
+=====================
+Compare a benchmark result file against a baseline and flag regressions.
+
+A benchmark regresses when any latency percentile (p50/p95/p99) grows, or
+throughput (ops/s) drops, by more than the threshold percentage.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/baseline.json benchmarks/results/latest.json
+    python -m benchmarks.compare baseline.json latest.json --threshold 15
+
+Exits with status 1 when any regression is found.
+"""
+
+import sys
+import json
+import argparse
+from typing import Any, Dict, List
+
+LATENCY_FIELDS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    return {result["name"]: result for result in data["results"]}
+
+
+def _change_pct(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0
+    return (new - old) / old * 100.0
+
+
+def compare(baseline: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare benchmark results by name.
+
+    Returns:
+        One row per benchmark present in both files, with per-metric
+        change percentages and the list of regressed metrics
+    """
+    rows = []
+    for name, new in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+
+        changes = {field: _change_pct(old[field], new[field]) for field in LATENCY_FIELDS}
+        changes["ops_per_sec"] = _change_pct(old["ops_per_sec"], new["ops_per_sec"])
+
+        regressions = [field for field in LATENCY_FIELDS if changes[field] > threshold]
+        if changes["ops_per_sec"] < -threshold:
+            regressions.append("ops_per_sec")
+
+        rows.append({"name": name, "changes": changes, "regressions": regressions})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Baseline result JSON")
+    parser.add_argument("current", help="Result JSON to check")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent (default: 10)")
+    args = parser.parse_args()
+
+    baseline = _load(args.baseline)
+    current = _load(args.current)
+    rows = compare(baseline, current, args.threshold)
+
+    print(f"{'benchmark':<36}{'ops/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for row in rows:
+        changes = row["changes"]
+        flag = "  REGRESSION: " + ", ".join(row["regressions"]) if row["regressions"] else ""
+        print(
+            f"{row['name']:<36}{changes['ops_per_sec']:>+9.1f}%{changes['p50_ms']:>+9.1f}%"
+            f"{changes['p95_ms']:>+9.1f}%{changes['p99_ms']:>+9.1f}%{flag}"
+        )
+
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print(f"\nNot in current run: {', '.join(missing)}")
+
+    regressed = [row["name"] for row in rows if row["regressions"]]
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) regressed beyond {args.threshold}%")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark Harness
+==================
+Shared timing utilities for the AI Engine benchmark suite.
+
+Each benchmark is an async callable that performs one operation. The
+harness runs it for a warm-up phase, then for a fixed number of
+iterations at a fixed concurrency, and reports throughput, latency
+percentiles and memory use.
+"""
+
+import gc
+import sys
+import time
+import asyncio
+import platform
+import resource
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage / divisor, 1)
+
+
+async def run_benchmark(
+    name: str,
+    operation: Callable[[], Awaitable[Any]],
+    iterations: int = 200,
+    warmup: int = 20,
+    concurrency: int = 1
+) -> Dict[str, Any]:
+    """
+    Time an async operation.
+
+    Args:
+        name: Benchmark identifier used for baseline comparison
+        operation: Zero-argument coroutine function performing one operation
+        iterations: Timed operations after warm-up
+        warmup: Untimed operations run first
+        concurrency: Operations kept in flight at once
+
+    Returns:
+        Dict with ops_per_sec, latency percentiles (ms) and memory figures
+    """
+    for _ in range(warmup):
+        await operation()
+
+    gc.collect()
+    latencies: List[float] = []
+    remaining = iterations
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    # Memory is measured in a separate, shorter pass because tracemalloc
+    # slows allocation-heavy code enough to distort the timings above.
+    tracemalloc.start()
+    for _ in range(min(iterations, 20)):
+        await operation()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "name": name,
+        "iterations": len(latencies),
+        "concurrency": concurrency,
+        "ops_per_sec": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "alloc_peak_kb": round(traced_peak / 1024, 1),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def environment_info() -> Dict[str, str]:
+    """Machine details stored alongside results for fair comparisons."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
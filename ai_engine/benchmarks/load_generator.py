@@ -0,0 +1,407 @@
+"""
+Load Generator
+===============
+Open-loop load generator that replays request logs against the AI Engine,
+either in-process (httpx ASGI transport, one event loop = one worker) or
+over HTTP against a running deployment.
+
+Arrivals follow a Poisson (or constant) schedule at each offered rate,
+independent of how fast responses come back, so queueing shows up as
+latency instead of silently lowering the load. Latency is measured from
+each request's scheduled arrival time.
+
+Request logs are JSONL; each line may be
+- a request: ``{"method": "POST", "path": "/api/analyze", "body": {...}}``
+- a ``request_processed`` record from LOG_FORMAT=json logs (method and
+  path only; a body is synthesised for the endpoint)
+- a result sample such as ``test_aspirin.json`` (whole-file JSON with
+  ``molecule`` and ``processingMode``), replayed as ``/api/analyze``
+
+Each rate step runs a warm-up (discarded; make it longer than the p99
+latency) followed by a measured window on the same arrival stream. The
+report gives the latency-vs-throughput curve, the saturation point and a
+worker-count estimate for a given analyst population.
+
+Usage:
+    python -m benchmarks.load_generator --rates 5,10,20,40,80
+    python -m benchmarks.load_generator --log ../test_aspirin.json --log traffic.jsonl
+    python -m benchmarks.load_generator --url http://localhost:8000 --mix analyze=0.7,orchestrate=0.3
+    python -m benchmarks.load_generator --analysts 300 --think-time 30 --slo-ms 5000
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+
+from benchmarks.harness import percentile, environment_info
+
+MOLECULES = ["Aspirin", "Metformin", "Adalimumab", "Humira", "Imatinib", "Atorvastatin", "Sildenafil"]
+DISEASES = ["Alzheimer's Disease", "Type 2 Diabetes", "Rheumatoid Arthritis", "Breast Cancer"]
+
+# Endpoint classes: (method, path, body factory)
+ENDPOINTS: Dict[str, tuple] = {
+    "analyze": ("POST", "/api/analyze", lambda m, d: {"molecule": m}),
+    "orchestrate": ("POST", "/api/orchestrate", lambda m, d: {
+        "query": f"Assess repurposing potential of {m} for {d}", "molecule": m, "disease": d
+    }),
+    "market_roi": ("POST", "/api/agents/market/roi", lambda m, d: {"molecule": m}),
+    "exim": ("POST", "/api/agents/exim", lambda m, d: {"molecule": m}),
+    "kol": ("POST", "/api/agents/kol", lambda m, d: {"molecule": m, "disease": d}),
+    "pathways": ("POST", "/api/agents/pathways", lambda m, d: {"molecule": m, "disease": d}),
+    "health": ("GET", "/health", None)
+}
+MODE_ENDPOINTS = {"/api/analyze", "/api/orchestrate"}
+
+DEFAULT_MIX = {"analyze": 0.5, "orchestrate": 0.2, "market_roi": 0.1, "exim": 0.1, "pathways": 0.1}
+DEFAULT_MODES = {"cloud": 0.7, "secure": 0.3}
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """Parse ``name=weight,name=weight``, ignoring malformed entries."""
+    weights: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        name, _, weight = item.partition("=")
+        try:
+            if float(weight) > 0:
+                weights[name.strip()] = float(weight)
+        except ValueError:
+            continue
+    return weights
+
+
+def _endpoint_class(path: str) -> str:
+    for name, (_, endpoint_path, _) in ENDPOINTS.items():
+        if endpoint_path == path:
+            return name
+    return path
+
+
+def _synthetic(endpoint: str) -> Dict[str, Any]:
+    method, path, factory = ENDPOINTS[endpoint]
+    body = factory(random.choice(MOLECULES), random.choice(DISEASES)) if factory else None
+    return {"method": method, "path": path, "body": body}
+
+
+def load_requests(paths: List[str]) -> List[Dict[str, Any]]:
+    """Read request templates from JSONL logs or whole-file result samples."""
+    templates: List[Dict[str, Any]] = []
+    for path in paths:
+        with open(path, encoding="utf-8-sig") as handle:
+            text = handle.read()
+        try:
+            records = [json.loads(text)]
+        except ValueError:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+        for record in records:
+            if "path" in record and "body" in record:
+                templates.append({
+                    "method": record.get("method", "POST").upper(),
+                    "path": record["path"],
+                    "body": record["body"]
+                })
+            elif record.get("event") == "request_processed":
+                endpoint = _endpoint_class(record.get("path", ""))
+                if endpoint in ENDPOINTS:
+                    templates.append(_synthetic(endpoint))
+            elif "molecule" in record:
+                templates.append({
+                    "method": "POST",
+                    "path": "/api/analyze",
+                    "body": {
+                        "molecule": record["molecule"],
+                        "mode": "secure" if record.get("processingMode") == "secure" else "cloud"
+                    }
+                })
+    return templates
+
+
+class RequestMix:
+    """Draws requests by endpoint-class weight, then uniformly within a class."""
+
+    def __init__(
+        self,
+        templates: List[Dict[str, Any]],
+        mix: Dict[str, float],
+        modes: Optional[Dict[str, float]]
+    ):
+        self.by_class: Dict[str, List[Dict[str, Any]]] = {}
+        for template in templates:
+            self.by_class.setdefault(_endpoint_class(template["path"]), []).append(template)
+        if not self.by_class:
+            raise ValueError("No replayable requests found")
+
+        weights = mix or {name: float(len(items)) for name, items in self.by_class.items()}
+        self.classes = [name for name in weights if name in self.by_class]
+        if not self.classes:
+            raise ValueError(f"Mix {sorted(weights)} matches none of the logged endpoints {sorted(self.by_class)}")
+        self.weights = [weights[name] for name in self.classes]
+        self.modes = modes
+
+    def next(self) -> Dict[str, Any]:
+        endpoint = random.choices(self.classes, self.weights)[0]
+        template = random.choice(self.by_class[endpoint])
+        body = dict(template["body"]) if template["body"] is not None else None
+        if body is not None:
+            body["request_id"] = f"load-{uuid.uuid4().hex[:12]}"
+            if self.modes and template["path"] in MODE_ENDPOINTS:
+                body["mode"] = random.choices(list(self.modes), list(self.modes.values()))[0]
+        return {"method": template["method"], "path": template["path"], "body": body, "endpoint": endpoint}
+
+
+async def run_step(
+    client: httpx.AsyncClient,
+    mix: RequestMix,
+    rate: float,
+    warmup: float,
+    duration: float,
+    arrival: str,
+    timeout: float
+) -> Dict[str, Any]:
+    """
+    Offer ``rate`` requests per second for ``warmup + duration`` seconds.
+
+    Warm-up and measurement share one arrival stream, so the measured
+    window starts with the system already carrying its steady-state
+    in-flight load. Latency covers requests that arrive in the window;
+    throughput counts successful completions inside it.
+
+    Returns:
+        Achieved throughput, latency percentiles, error counts and the
+        per-endpoint p95 for the step
+    """
+    samples: List[tuple] = []
+    tasks = []
+
+    async def send(request: Dict[str, Any], scheduled: float):
+        status = "error"
+        try:
+            response = await asyncio.wait_for(
+                client.request(request["method"], request["path"], json=request["body"]),
+                timeout
+            )
+            status = str(response.status_code)
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        samples.append((request["endpoint"], scheduled, time.perf_counter(), status))
+
+    started = time.perf_counter()
+    window_start = started + warmup
+    window_end = window_start + duration
+    next_arrival = started
+    max_schedule_lag = 0.0
+    while next_arrival < window_end:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif next_arrival >= window_start:
+            max_schedule_lag = max(max_schedule_lag, -delay)
+        tasks.append(asyncio.create_task(send(mix.next(), next_arrival)))
+        next_arrival += random.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+
+    await asyncio.gather(*tasks)
+
+    measured = [s for s in samples if s[1] >= window_start]
+    errors: Dict[str, int] = {}
+    by_endpoint: Dict[str, List[float]] = {}
+    for endpoint, scheduled, finished, status in measured:
+        if status.startswith("2"):
+            by_endpoint.setdefault(endpoint, []).append(finished - scheduled)
+        else:
+            errors[status] = errors.get(status, 0) + 1
+    latencies = sorted(latency for values in by_endpoint.values() for latency in values)
+    completed_in_window = sum(
+        1 for _, _, finished, status in samples
+        if window_start <= finished <= window_end and status.startswith("2")
+    )
+
+    return {
+        "offered_rps": rate,
+        "sent": len(measured),
+        "completed": len(latencies),
+        "errors": errors,
+        "error_rate": round(sum(errors.values()) / max(len(measured), 1), 4),
+        "throughput_rps": round(completed_in_window / duration, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "max_schedule_lag_ms": round(max_schedule_lag * 1000, 1),
+        "endpoint_p95_ms": {
+            endpoint: round(percentile(sorted(values), 95) * 1000, 1)
+            for endpoint, values in sorted(by_endpoint.items())
+        }
+    }
+
+
+def find_saturation(steps: List[Dict[str, Any]], slo_ms: float, max_error_rate: float) -> Dict[str, Any]:
+    """
+    The first step that misses the offered rate by >10%, breaks the p99 SLO
+    or exceeds the error budget, and the last step before it.
+    """
+    sustainable = None
+    for step in steps:
+        reasons = []
+        if step["throughput_rps"] < 0.9 * step["offered_rps"] * (1 - step["error_rate"]):
+            reasons.append("throughput below offered rate")
+        if step["p99_ms"] > slo_ms:
+            reasons.append(f"p99 above {slo_ms:g} ms SLO")
+        if step["error_rate"] > max_error_rate:
+            reasons.append(f"error rate above {max_error_rate:.0%}")
+        if reasons:
+            return {
+                "saturated_at_rps": step["offered_rps"],
+                "reasons": reasons,
+                "max_sustainable_rps": sustainable["offered_rps"] if sustainable else None
+            }
+        sustainable = step
+    return {
+        "saturated_at_rps": None,
+        "reasons": [],
+        "max_sustainable_rps": sustainable["offered_rps"] if sustainable else None
+    }
+
+
+def estimate_workers(
+    saturation: Dict[str, Any],
+    analysts: int,
+    think_time: float,
+    target_utilization: float
+) -> Optional[Dict[str, Any]]:
+    """Workers needed for ``analysts`` each issuing one request per ``think_time`` seconds."""
+    capacity = saturation["max_sustainable_rps"]
+    if not analysts or not capacity:
+        return None
+    peak_rps = analysts / think_time
+    return {
+        "analysts": analysts,
+        "think_time_s": think_time,
+        "peak_rps": round(peak_rps, 2),
+        "measured_capacity_rps": capacity,
+        "target_utilization": target_utilization,
+        "workers": math.ceil(peak_rps / (capacity * target_utilization))
+    }
+
+
+async def run_load(args, mix: RequestMix, rates: List[float]) -> List[Dict[str, Any]]:
+    async def run_all(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+        steps = []
+        for rate in rates:
+            step = await run_step(client, mix, rate, args.warmup, args.duration, args.arrival, args.timeout)
+            steps.append(step)
+            print(
+                f"  offered {rate:>8g} rps  achieved {step['throughput_rps']:>8} rps  "
+                f"p50 {step['p50_ms']:>8} ms  p95 {step['p95_ms']:>8} ms  p99 {step['p99_ms']:>8} ms  "
+                f"errors {step['error_rate']:.1%}"
+            )
+        return steps
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=None) as client:
+            return await run_all(client)
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", limits=limits, timeout=None) as client:
+            return await run_all(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", action="append", default=[], help="Request log to replay (repeatable)")
+    parser.add_argument("--url", default=None, help="Target base URL; omit to run in-process")
+    parser.add_argument("--rates", default="5,10,20,40,80", help="Offered request rates per step (req/s)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Discarded warm-up seconds per step (longer than p99 latency)")
+    parser.add_argument("--arrival", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--mix", default=None, help="Endpoint weights, e.g. analyze=0.6,orchestrate=0.4")
+    parser.add_argument("--modes", default=None, help="Processing mode weights, e.g. cloud=0.7,secure=0.3")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--slo-ms", type=float, default=5000.0, help="p99 latency objective")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--analysts", type=int, default=0, help="Concurrent analysts to size workers for")
+    parser.add_argument("--think-time", type=float, default=30.0, help="Seconds between an analyst's requests")
+    parser.add_argument("--target-utilization", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Report JSON path (default: benchmarks/results/load_<timestamp>.json)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.log:
+        templates = load_requests(args.log)
+        mix_weights = parse_weights(args.mix)
+    else:
+        mix_weights = parse_weights(args.mix) or DEFAULT_MIX
+        templates = [_synthetic(endpoint) for endpoint in mix_weights if endpoint in ENDPOINTS for _ in range(20)]
+    modes = parse_weights(args.modes) or (None if args.log else DEFAULT_MODES)
+    mix = RequestMix(templates, mix_weights, modes)
+    rates = [float(rate) for rate in args.rates.split(",") if rate.strip()]
+
+    print(f"Target: {args.url or 'in-process'}  endpoints: {', '.join(mix.classes)}")
+    steps = asyncio.run(run_load(args, mix, rates))
+
+    saturation = find_saturation(steps, args.slo_ms, args.max_error_rate)
+    sizing = estimate_workers(saturation, args.analysts, args.think_time, args.target_utilization)
+
+    print()
+    if saturation["saturated_at_rps"] is None:
+        print(f"No saturation up to {rates[-1]:g} rps; raise --rates to find the limit")
+    else:
+        print(f"Saturated at {saturation['saturated_at_rps']:g} rps ({'; '.join(saturation['reasons'])})")
+    print(f"Max sustainable rate: {saturation['max_sustainable_rps']} rps")
+    if sizing:
+        print(
+            f"{sizing['analysts']} analysts at one request per {sizing['think_time_s']:g}s = "
+            f"{sizing['peak_rps']} rps -> {sizing['workers']} worker(s) at "
+            f"{sizing['target_utilization']:.0%} utilization"
+            + ("" if args.url else " (in-process capacity = one worker)")
+        )
+
+    environment = environment_info()
+    output = args.output or os.path.join(
+        Path(__file__).parent, "results", f"load_{environment['timestamp'].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump({
+            "environment": environment,
+            "settings": {
+                "target": args.url or "in-process",
+                "latency_mode": os.environ.get("LATENCY_MODE", "default"),
+                "arrival": args.arrival,
+                "duration_s": args.duration,
+                "warmup_s": args.warmup,
+                "endpoints": dict(zip(mix.classes, mix.weights)),
+                "modes": modes
+            },
+            "curve": steps,
+            "saturation": saturation,
+            "sizing": sizing
+        }, handle, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
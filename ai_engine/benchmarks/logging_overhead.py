@@ -0,0 +1,126 @@
+"""
+Logging Overhead Benchmark
+===========================
+Measures the event-loop cost of structured logging at a target request
+rate, comparing the synchronous console renderer with the queued JSON
+pipeline.
+
+Each simulated request emits the same log lines as an orchestrated
+analysis (request, orchestration and per-agent events). The report shows
+the time spent inside logger calls on the event loop per call and as a
+share of wall-clock time.
+
+Usage:
+    python -m benchmarks.logging_overhead --rate 1000 --seconds 5
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from types import SimpleNamespace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import structlog
+
+from app.core import logging_pipeline
+
+AGENTS = ["clinical", "patent", "iqvia", "exim", "vision"]
+
+
+def _settings(log_format: str, log_file: str, sample_rates: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        LOG_LEVEL="INFO",
+        LOG_FORMAT=log_format,
+        LOG_FILE=log_file,
+        LOG_QUEUE_SIZE=10000,
+        LOG_BATCH_SIZE=256,
+        LOG_ROTATE_BYTES=50 * 1024 * 1024,
+        LOG_BACKUP_COUNT=2,
+        LOG_SAMPLE_RATES=sample_rates
+    )
+
+
+def _emit_request(logger, request_id: int) -> float:
+    """Emit one request's worth of log lines; returns seconds spent logging."""
+    start = time.perf_counter()
+    logger.info("orchestrated_analysis_requested", query="clinical and patent outlook", molecule="Aspirin", request_id=request_id)
+    logger.info("orchestration_started", request_id=request_id, molecule="Aspirin")
+    logger.info("agents_selected", request_id=request_id, agents=AGENTS)
+    for agent in AGENTS:
+        logger.info("agent_completed", agent=agent, request_id=request_id)
+    logger.info("orchestration_completed", request_id=request_id, agents_count=len(AGENTS), total_time_ms=12.5)
+    logger.info("request_processed", method="POST", path="/api/orchestrate", status_code=200, duration_ms=12.5)
+    return time.perf_counter() - start
+
+
+async def _drive(rate: int, seconds: float):
+    logger = structlog.get_logger("benchmark")
+    interval = 1.0 / rate
+    total = int(rate * seconds)
+    per_request = []
+    started = time.perf_counter()
+    for request_id in range(total):
+        per_request.append(_emit_request(logger, request_id))
+        delay = started + (request_id + 1) * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    elapsed = time.perf_counter() - started
+    return per_request, elapsed
+
+
+def run_mode(log_format: str, rate: int, seconds: float, sample_rates: str) -> dict:
+    log_file = os.path.join(tempfile.mkdtemp(prefix="pharmalens_logbench_"), "engine.jsonl")
+    structlog.reset_defaults()
+    real_stdout = sys.stdout
+    if log_format == "console":
+        sys.stdout = open(os.devnull, "w")
+    try:
+        writer = logging_pipeline.configure_logging(_settings(log_format, log_file, sample_rates))
+        per_request, elapsed = asyncio.run(_drive(rate, seconds))
+        if writer is not None:
+            writer.close()
+    finally:
+        if sys.stdout is not real_stdout:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+    lines_per_request = 5 + len(AGENTS)
+    per_request.sort()
+    calls = len(per_request) * lines_per_request
+    logging_seconds = sum(per_request)
+    return {
+        "mode": log_format + (f" (sampled: {sample_rates})" if sample_rates else ""),
+        "requests": len(per_request),
+        "achieved_rate": round(len(per_request) / elapsed, 1),
+        "us_per_call": round(logging_seconds / calls * 1e6, 2),
+        "p99_us_per_request": round(per_request[int(len(per_request) * 0.99) - 1] * 1e6, 1),
+        "loop_share_percent": round(100 * logging_seconds / elapsed, 2),
+        "dropped": writer.dropped if writer is not None else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=1000, help="Simulated requests per second")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per mode")
+    args = parser.parse_args()
+
+    results = [
+        run_mode("console", args.rate, args.seconds, ""),
+        run_mode("json", args.rate, args.seconds, ""),
+        run_mode("json", args.rate, args.seconds, "agent_completed=0.1")
+    ]
+
+    print(f"{'mode':<42}{'req/s':>9}{'us/call':>10}{'p99 us/req':>12}{'loop %':>9}{'dropped':>9}")
+    for r in results:
+        print(f"{r['mode']:<42}{r['achieved_rate']:>9}{r['us_per_call']:>10}{r['p99_us_per_request']:>12}"
+              f"{r['loop_share_percent']:>9}{r['dropped']:>9}")
+
+
+if __name__ == "__main__":
+    main()
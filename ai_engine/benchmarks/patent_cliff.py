@@ -0,0 +1,133 @@
+"""
+Patent Cliff Benchmark
+=======================
+Generates a synthetic FDA Orange Book release (``~``-delimited products,
+patent and exclusivity files for thousands of molecules, several products
+and patents each), builds the patent cliff index and times portfolio
+patent-cliff reports: a 2,000-molecule portfolio and the whole index,
+against the baseline of one per-molecule lookup per portfolio entry.
+
+Usage:
+    python -m benchmarks.patent_cliff
+    python -m benchmarks.patent_cliff --molecules 20000 --output benchmarks/results/patent_cliff.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import zipfile
+import argparse
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.patent_cliff import PatentCliffIndex, build_index
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+SALTS = ["", " HYDROCHLORIDE", " SODIUM", " MESYLATE"]
+EXCLUSIVITY_CODES = ["NCE", "ODE", "I-", "M-", "PED", "NP"]
+
+
+def _ob_date(value: date) -> str:
+    return value.strftime("%b %d, %Y").replace(" 0", " ")
+
+
+def write_orange_book(path: str, molecules: int, seed: int = 5):
+    rng = random.Random(seed)
+    products = ["Ingredient~DF;Route~Trade_Name~Applicant~Strength~Appl_Type~Appl_No~Product_No~TE_Code~Approval_Date~RLD~RS~Type~Applicant_Full_Name"]
+    patents = ["Appl_Type~Appl_No~Product_No~Patent_No~Patent_Expire_Date_Text~Drug_Substance_Flag~Drug_Product_Flag~Patent_Use_Code~Delist_Flag~Submission_Date"]
+    exclusivities = ["Appl_Type~Appl_No~Product_No~Exclusivity_Code~Exclusivity_Date"]
+    appl_no = 10000
+    for molecule in range(molecules):
+        ingredient = f"COMPOUND {molecule}{rng.choice(SALTS)}"
+        approved = date(1985, 1, 1) + timedelta(days=rng.randrange(14000))
+        patent_numbers = [str(rng.randrange(4_000_000, 12_000_000)) for _ in range(rng.randint(0, 6))]
+        for _ in range(rng.randint(1, 3)):
+            appl_no += 1
+            for product_no in range(1, rng.randint(2, 4)):
+                products.append(
+                    f"{ingredient}~TABLET;ORAL~BRAND{molecule}~SPONSOR~{rng.choice([10, 20, 40])}MG~N~{appl_no:06d}~{product_no:03d}~~"
+                    f"{_ob_date(approved)}~Yes~Yes~RX~SPONSOR INC"
+                )
+                for number in patent_numbers:
+                    expires = approved + timedelta(days=rng.randint(365, 20 * 365))
+                    substance = rng.random() < 0.3
+                    patents.append(
+                        f"N~{appl_no:06d}~{product_no:03d}~{number}~{_ob_date(expires)}~{'Y' if substance else ''}~"
+                        f"{'Y' if not substance and rng.random() < 0.5 else ''}~{'U-' + str(rng.randrange(3000)) if rng.random() < 0.4 else ''}~~"
+                    )
+                if rng.random() < 0.5:
+                    expires = approved + timedelta(days=rng.choice([3 * 365, 5 * 365, 7 * 365]))
+                    exclusivities.append(f"N~{appl_no:06d}~{product_no:03d}~{rng.choice(EXCLUSIVITY_CODES)}~{_ob_date(expires)}")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, rows in (("products.txt", products), ("patent.txt", patents), ("exclusivity.txt", exclusivities)):
+            archive.writestr(name, "\n".join(rows) + "\n")
+
+
+def timed(fn: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {"p50_ms": round(percentile(samples, 50) * 1000, 3), "p99_ms": round(percentile(samples, 99) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--molecules", type=int, default=10000, help="Molecules in the synthetic Orange Book")
+    parser.add_argument("--portfolio", type=int, default=2000, help="Molecules in the queried portfolio")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed reports per query")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        release = os.path.join(workdir, "EOBZIP_synthetic.zip")
+        write_orange_book(release, args.molecules)
+        meta = build_index(os.path.join(workdir, "cliff"), orange_book=[release])
+        index = PatentCliffIndex(os.path.join(workdir, "cliff"))
+
+        rng = random.Random(3)
+        portfolio = [f"Compound {i}" for i in rng.sample(range(args.molecules), min(args.portfolio, args.molecules))]
+        report = index.cliff(portfolio, 2027, 2029)
+        queries = {
+            "portfolio_report": timed(lambda: index.cliff(portfolio, 2027, 2029), args.iterations),
+            "whole_index_report": timed(lambda: index.cliff([], 2027, 2029), args.iterations),
+            "per_molecule_lookups": timed(lambda: [index.loss_of_exclusivity(name) for name in portfolio], max(args.iterations // 4, 3))
+        }
+
+    print(f"index: {meta['molecules']} molecules, {meta['windows']} windows, "
+          f"{meta['coverage_intervals']} coverage intervals, built in {meta['elapsed_s']:.1f} s")
+    print(f"portfolio of {len(portfolio)}: {report['losing_exclusivity_count']} lose all protection in 2027-2029 "
+          f"{report['losses_by_year']}")
+    print(f"{'query':<24}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, q in queries.items():
+        print(f"{name:<24}{q['p50_ms']:>10}{q['p99_ms']:>10}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "environment": environment_info(),
+                "index": meta,
+                "portfolio": {"molecules": len(portfolio), "losing_exclusivity": report["losing_exclusivity_count"]},
+                "queries": queries
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Patent Graph Benchmark
+=======================
+Generates synthetic JSON patent records with continuation families
+(shared parent applications) and citations that cluster around a few
+molecules, ingests them into the patent index, builds the citation/family
+graph and times family landscapes: the bounded traversal on first request
+and the per-molecule cache afterwards.
+
+Usage:
+    python -m benchmarks.patent_graph
+    python -m benchmarks.patent_graph --patents 500000 --output benchmarks/results/patent_graph.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.patent_graph import PatentGraph, build_graph
+from app.services.patent_index import PatentIndex, build_index
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+MOLECULES = ["aspirin", "metformin", "adalimumab", "imatinib", "atorvastatin"]
+ASSIGNEES = ["Pfizer Inc.", "Novartis AG", "Roche", "Merck Sharp & Dohme", "AstraZeneca", "Sanofi", "AbbVie", "Eli Lilly"]
+CLAIMS = [
+    "A pharmaceutical composition comprising {x} and a carrier.",
+    "A method of treating a disease in a subject comprising administering {x}.",
+    "A process for preparing {x} comprising the steps of reacting an intermediate."
+]
+
+
+def write_records(path: str, patents: int, seed: int = 13):
+    """NDJSON records in families of 1-6 patents; continuations claim the parent's molecule only sometimes."""
+    rng = random.Random(seed)
+    by_topic: Dict[str, List[str]] = {}
+    number = 9_000_000
+    with open(path, "w", encoding="utf-8") as f:
+        while number < 9_000_000 + patents:
+            topic = rng.choice(MOLECULES) if rng.random() < 0.05 else f"compound {rng.randrange(20000)}"
+            parent = str(15_000_000 + number)
+            assignee = rng.choice(ASSIGNEES)
+            filed = date(2000, 1, 1) + timedelta(days=rng.randrange(7000))
+            for member in range(rng.choice([1, 1, 2, 3, 6])):
+                named = member == 0 or rng.random() < 0.4
+                molecule = topic if named else f"the compound of formula {rng.randrange(1000)}"
+                earlier = by_topic.get(topic, [])
+                cited = rng.sample(earlier, min(len(earlier), rng.randint(0, 4)))
+                cited += [f"US{rng.randrange(9_000_000, max(number, 9_000_001))}" for _ in range(rng.randint(0, 6))]
+                f.write(json.dumps({
+                    "number": f"US{number}",
+                    "title": f"Compositions and uses of {molecule}",
+                    "claims": [rng.choice(CLAIMS).format(x=molecule)],
+                    "assignee": assignee if rng.random() < 0.9 else rng.choice(ASSIGNEES),
+                    "filing_date": (filed + timedelta(days=200 * member)).isoformat(),
+                    "grant_date": (filed + timedelta(days=200 * member + 900)).isoformat(),
+                    "application_number": parent if member == 0 else str(16_000_000 + number),
+                    "related_applications": [parent] if member else [],
+                    "citations": cited
+                }) + "\n")
+                by_topic.setdefault(topic, []).append(f"US{number}")
+                number += 1
+
+
+def time_landscapes(graph: PatentGraph, molecules: List[str], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for molecule in molecules:
+        started = time.perf_counter()
+        landscape = graph.family_landscape(molecule)
+        first_s = time.perf_counter() - started
+        uncached = []
+        for _ in range(max(iterations // 5, 3)):
+            started = time.perf_counter()
+            graph._family_landscape(molecule, (date.today() - date(1970, 1, 1)).days)
+            uncached.append(time.perf_counter() - started)
+        cached = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            graph.family_landscape(molecule)
+            cached.append(time.perf_counter() - started)
+        uncached.sort()
+        cached.sort()
+        results.append({
+            "molecule": molecule,
+            "core_patents": landscape.core_patents,
+            "reached": landscape.reached_patents,
+            "blocking_families": landscape.blocking_families,
+            "continuations_in_force": landscape.continuations_in_force,
+            "clusters": len(landscape.litigation_clusters),
+            "first_ms": round(first_s * 1000, 3),
+            "traversal_p50_ms": round(percentile(uncached, 50) * 1000, 3),
+            "cached_p50_ms": round(percentile(cached, 50) * 1000, 4)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patents", type=int, default=100000, help="Patents in the synthetic records")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed cached lookups per molecule")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        records = os.path.join(workdir, "patents.ndjson")
+        write_records(records, args.patents)
+        database = os.path.join(workdir, "patents.sqlite3")
+        build_index([records], database)
+        meta = build_graph(database, os.path.join(workdir, "graph"))
+        graph = PatentGraph(os.path.join(workdir, "graph"), PatentIndex(database))
+        queries = time_landscapes(graph, MOLECULES[:3] + ["compound 42"], args.iterations)
+        del graph
+
+    print(f"graph: {meta['patents']} patents, {meta['citations']} citations, {meta['families']} families "
+          f"({meta['multi_patent_families']} with several patents), built in {meta['elapsed_s']:.1f} s")
+    print(f"{'molecule':<14}{'core':>7}{'reached':>9}{'blocking fam':>14}{'contin.':>9}{'clusters':>10}"
+          f"{'first ms':>10}{'bfs ms':>9}{'cached ms':>11}")
+    for q in queries:
+        print(f"{q['molecule']:<14}{q['core_patents']:>7}{q['reached']:>9}{q['blocking_families']:>14}"
+              f"{q['continuations_in_force']:>9}{q['clusters']:>10}{q['first_ms']:>10}{q['traversal_p50_ms']:>9}{q['cached_p50_ms']:>11}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "graph": meta, "queries": queries}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
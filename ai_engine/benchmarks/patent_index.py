@@ -0,0 +1,136 @@
+"""
+Patent Index Benchmark
+=======================
+Generates a synthetic USPTO bulk grant file (concatenated
+``<us-patent-grant>`` documents, a few molecules claimed in thousands of
+patents), ingests it through the streaming parser into the FTS5/expiry
+index and times PatentAgent landscape queries.
+
+Usage:
+    python -m benchmarks.patent_index
+    python -m benchmarks.patent_index --patents 200000 --output benchmarks/results/patent_index.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.patent_index import PatentIndex, build_index
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+MOLECULES = ["aspirin", "metformin", "adalimumab", "imatinib", "atorvastatin"]
+ASSIGNEES = ["Pfizer Inc.", "Novartis AG", "Roche", "Merck Sharp & Dohme", "AstraZeneca", "Sanofi", "AbbVie", "Eli Lilly"]
+CLAIM_OPENINGS = [
+    "A pharmaceutical composition comprising {x} and a carrier.",
+    "A method of treating a disease in a subject comprising administering {x}.",
+    "An extended-release tablet comprising {x} and an excipient.",
+    "A process for preparing {x} comprising the steps of reacting an intermediate."
+]
+
+
+def grant_document(rng: random.Random, number: int) -> str:
+    molecule = rng.choice(MOLECULES) if rng.random() < 0.1 else f"compound {rng.randrange(50000)}"
+    filed = date(1998, 1, 1) + timedelta(days=rng.randrange(9000))
+    granted = filed + timedelta(days=rng.randint(500, 1500))
+    claims = [rng.choice(CLAIM_OPENINGS).format(x=molecule)] + [
+        f"The composition of claim 1 wherein the dose is {rng.randint(1, 500)} mg." for _ in range(rng.randint(2, 8))
+    ]
+    claim_xml = "".join(
+        f'<claim id="CLM-{i:05d}" num="{i:05d}"><claim-text>{escape(text)}'
+        + ('<claim-ref idref="CLM-00001">claim 1</claim-ref>' if i > 1 else "")
+        + "</claim-text></claim>"
+        for i, text in enumerate(claims, 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<!DOCTYPE us-patent-grant SYSTEM "us-patent-grant-v47-2022-02-17.dtd" [ ]>\n'
+        '<us-patent-grant lang="EN" dtd-version="v4.7 2022-02-17">'
+        "<us-bibliographic-data-grant>"
+        f"<publication-reference><document-id><country>US</country><doc-number>{number:08d}</doc-number>"
+        f"<kind>B2</kind><date>{granted:%Y%m%d}</date></document-id></publication-reference>"
+        f"<application-reference><document-id><country>US</country><doc-number>{number + 10**7}</doc-number>"
+        f"<date>{filed:%Y%m%d}</date></document-id></application-reference>"
+        f"<us-term-of-grant><us-term-extension>{rng.choice([0, 0, 0, 120, 480])}</us-term-extension></us-term-of-grant>"
+        f"<invention-title>Compositions and uses of {escape(molecule)}</invention-title>"
+        f"<assignees><assignee><addressbook><orgname>{escape(rng.choice(ASSIGNEES))}</orgname></addressbook></assignee></assignees>"
+        "</us-bibliographic-data-grant>"
+        f"<abstract><p>Disclosed are formulations and therapeutic uses of {escape(molecule)}.</p></abstract>"
+        f"<claims>{claim_xml}</claims>"
+        "</us-patent-grant>\n"
+    )
+
+
+def write_bulk_file(path: str, patents: int, seed: int = 11):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for number in range(patents):
+            f.write(grant_document(rng, 9_000_000 + number))
+
+
+def time_landscapes(index: PatentIndex, molecules: List[str], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for molecule in molecules:
+        landscape = index.landscape(molecule)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            index.landscape(molecule)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({
+            "molecule": molecule,
+            "patents": landscape.total_patents,
+            "blocking": landscape.blocking_patents,
+            "earliest_expiration": landscape.earliest_expiration,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patents", type=int, default=50000, help="Patents in the synthetic bulk file")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed landscape queries per molecule")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bulk = os.path.join(workdir, "ipg_synthetic.xml")
+        write_bulk_file(bulk, args.patents)
+        bulk_mb = os.path.getsize(bulk) / 1e6
+        stats = build_index([bulk], os.path.join(workdir, "patents.sqlite3"))
+        index = PatentIndex(os.path.join(workdir, "patents.sqlite3"))
+        queries = time_landscapes(index, MOLECULES + ["compound 42"], args.iterations)
+        del index
+
+    print(f"ingest: {stats['patents']} patents, {bulk_mb:.0f} MB in {stats['elapsed_s']:.1f} s")
+    print(f"{'molecule':<16}{'patents':>9}{'blocking':>10}{'earliest':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for q in queries:
+        print(f"{q['molecule']:<16}{q['patents']:>9}{q['blocking']:>10}{str(q['earliest_expiration']):>12}{q['p50_ms']:>10}{q['p99_ms']:>10}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "ingest": {"bulk_mb": round(bulk_mb, 1), **stats}, "queries": queries}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
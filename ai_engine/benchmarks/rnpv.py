@@ -0,0 +1,107 @@
+"""
+rNPV Benchmark
+===============
+Times the batched risk-adjusted NPV engine on synthetic portfolios of
+repurposing programmes (lognormal peak sales, varied phase
+probabilities) against the baseline of valuing each candidate with its
+own call, as the per-molecule ROI agents do.
+
+Usage:
+    python -m benchmarks.rnpv
+    python -m benchmarks.rnpv --portfolios 1000,5000,20000 --output benchmarks/results/rnpv.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.rnpv import value_portfolio
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+
+def synthetic_portfolio(candidates: int, seed: int = 11) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    peaks = rng.lognormal(np.log(400), 0.8, candidates)
+    p2 = rng.uniform(0.4, 0.8, candidates)
+    p3 = rng.uniform(0.5, 0.85, candidates)
+    return [
+        {"molecule": f"candidate-{i}", "peak_sales_millions": float(peaks[i]), "phase_probabilities": [float(p2[i]), float(p3[i]), 0.92]}
+        for i in range(candidates)
+    ]
+
+
+def time_batches(sizes: List[int], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        portfolio = synthetic_portfolio(size)
+        valuation = value_portfolio(portfolio)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            value_portfolio(portfolio)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({
+            "candidates": size,
+            "portfolio_rnpv_millions": round(float(valuation.rnpv.sum()), 1),
+            "value_creating": int(np.count_nonzero(valuation.rnpv > 0)),
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2)
+        })
+    return results
+
+
+def time_sequential(size: int) -> Dict[str, Any]:
+    """One valuation call per candidate; checks the batch gives the same rNPVs."""
+    portfolio = synthetic_portfolio(size)
+    started = time.perf_counter()
+    sequential = np.array([value_portfolio([candidate]).rnpv[0] for candidate in portfolio])
+    elapsed = time.perf_counter() - started
+    batch = value_portfolio(portfolio).rnpv
+    return {
+        "candidates": size,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "max_abs_difference": float(np.abs(sequential - batch).max())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--portfolios", default="1000,5000,20000", help="Comma-separated portfolio sizes")
+    parser.add_argument("--sequential", type=int, default=5000, help="Candidates valued one call at a time")
+    parser.add_argument("--iterations", type=int, default=10, help="Timed valuations per portfolio size")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    batches = time_batches([int(n) for n in args.portfolios.split(",")], args.iterations)
+    sequential = time_sequential(args.sequential)
+
+    print(f"{'candidates':>11}{'rNPV $M':>14}{'rNPV > 0':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for b in batches:
+        print(f"{b['candidates']:>11}{b['portfolio_rnpv_millions']:>14}{b['value_creating']:>10}{b['p50_ms']:>10}{b['p99_ms']:>10}")
+    print(f"\nsequential: {sequential['candidates']} single-candidate calls in {sequential['elapsed_ms']} ms "
+          f"(max difference from the batch {sequential['max_abs_difference']:.2e} $M)")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "batches": batches, "sequential": sequential}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
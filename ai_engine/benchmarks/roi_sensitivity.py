@@ -0,0 +1,102 @@
+"""
+ROI Sensitivity Benchmark
+==========================
+Times tornado analyses (every ROI input swept while the others stay at
+base, all perturbations valued in one rNPV batch) at several grid sizes,
+against valuing each perturbation with its own call, and checks that
+both give the same tornado.
+
+Usage:
+    python -m benchmarks.roi_sensitivity
+    python -m benchmarks.roi_sensitivity --points 7,21,41 --output benchmarks/results/roi_sensitivity.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.rnpv import value_programmes
+from app.services.roi_sensitivity import PARAMETERS, _scaled, sensitivity
+from app.services.roi_simulation import RoiAssumptions
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+
+def time_sweeps(assumptions: RoiAssumptions, grids: List[int], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for points in grids:
+        result = sensitivity(assumptions, points=points)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            sensitivity(assumptions, points=points)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({
+            "points": points,
+            "perturbations": result["perturbations"],
+            "top_driver": result["tornado"][0]["parameter"],
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2)
+        })
+    return results
+
+
+def time_one_by_one(assumptions: RoiAssumptions, points: int) -> Dict[str, Any]:
+    """Each perturbation valued with its own call; compared with the batch sweep."""
+    factors = np.linspace(0.7, 1.3, points)
+    started = time.perf_counter()
+    swings = {}
+    for name in PARAMETERS:
+        values = [value_programmes([name], [_scaled(assumptions, name, float(f))]).rnpv[0] for f in factors]
+        swings[name] = max(values) - min(values)
+    elapsed = time.perf_counter() - started
+    batch = {row["parameter"]: row["swing_millions"] for row in sensitivity(assumptions, points=points)["tornado"]}
+    return {
+        "points": points,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "max_swing_difference": max(abs(round(swings[name], 1) - batch[name]) for name in PARAMETERS)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", default="7,21,41", help="Comma-separated grid sizes")
+    parser.add_argument("--peak-sales", type=float, default=500.0, help="Median peak annual sales ($M)")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed sweeps per grid size")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    assumptions = RoiAssumptions(peak_sales_millions=args.peak_sales)
+    grids = [int(n) for n in args.points.split(",")]
+    sweeps = time_sweeps(assumptions, grids, args.iterations)
+    baseline = time_one_by_one(assumptions, grids[-1])
+
+    print(f"{'points':>7}{'perturbations':>15}{'top driver':>22}{'p50 ms':>9}{'p99 ms':>9}")
+    for s in sweeps:
+        print(f"{s['points']:>7}{s['perturbations']:>15}{s['top_driver']:>22}{s['p50_ms']:>9}{s['p99_ms']:>9}")
+    print(f"\none call per perturbation ({baseline['points']} points): {baseline['elapsed_ms']} ms, "
+          f"max swing difference {baseline['max_swing_difference']} $M")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "sweeps": sweeps, "one_by_one": baseline}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
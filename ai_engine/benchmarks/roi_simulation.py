@@ -0,0 +1,100 @@
+"""
+ROI Simulation Benchmark
+=========================
+Times the Monte Carlo ROI engine behind MarketAgent.calculate_roi at
+several scenario counts, against the inline budget (50 ms at 100k
+scenarios), and checks that seeded runs are reproducible and that the
+summary statistics settle as the scenario count grows.
+
+Usage:
+    python -m benchmarks.roi_simulation
+    python -m benchmarks.roi_simulation --scenarios 10000,100000,1000000 --output benchmarks/results/roi_simulation.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.roi_simulation import RoiAssumptions, simulate
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+BUDGET_MS = 50.0
+BUDGET_SCENARIOS = 100_000
+
+
+def time_simulation(assumptions: RoiAssumptions, scenarios: List[int], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for n in scenarios:
+        simulate(assumptions, n)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            distribution = simulate(assumptions, n)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({
+            "scenarios": n,
+            "expected_npv_millions": distribution.expected_npv_millions,
+            "risk_adjusted_roi_percent": distribution.risk_adjusted_roi_percent,
+            "probability_of_loss": distribution.probability_of_loss,
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2)
+        })
+    return results
+
+
+def reproducible(assumptions: RoiAssumptions, seed: int = 42) -> bool:
+    first, second = simulate(assumptions, seed=seed).to_dict(), simulate(assumptions, seed=seed).to_dict()
+    first.pop("simulation_ms")
+    second.pop("simulation_ms")
+    return first == second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="10000,100000,1000000", help="Comma-separated scenario counts")
+    parser.add_argument("--peak-sales", type=float, default=500.0, help="Median peak annual sales ($M)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed simulations per scenario count")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    assumptions = RoiAssumptions(peak_sales_millions=args.peak_sales)
+    runs = time_simulation(assumptions, [int(n) for n in args.scenarios.split(",")], args.iterations)
+    seeded = reproducible(assumptions)
+
+    print(f"{'scenarios':>10}{'E[NPV] $M':>12}{'rROI %':>9}{'P(loss)':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in runs:
+        print(f"{r['scenarios']:>10}{r['expected_npv_millions']:>12}{r['risk_adjusted_roi_percent']:>9}"
+              f"{r['probability_of_loss']:>9}{r['p50_ms']:>9}{r['p99_ms']:>9}")
+    budget = next((r for r in runs if r["scenarios"] == BUDGET_SCENARIOS), None)
+    if budget:
+        verdict = "within" if budget["p50_ms"] <= BUDGET_MS else "OVER"
+        print(f"\n{BUDGET_SCENARIOS} scenarios: p50 {budget['p50_ms']} ms, {verdict} the {BUDGET_MS:.0f} ms inline budget")
+    print(f"seeded runs reproducible: {seeded}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "environment": environment_info(),
+                "assumptions": assumptions.to_dict(),
+                "runs": runs,
+                "seeded_reproducible": seeded
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+AI Engine Benchmark Suite
+==========================
+End-to-end timing of the AI Engine with fast-mode (zero) latencies, so
+results reflect real compute cost rather than simulated backend sleeps.
+
+Groups:
+- agents: each agent's analyze (or calculate_roi) on its own
+- orchestrator: MasterOrchestrator.process_query across agent mixes
+- http: FastAPI routes in-process through an httpx ASGI transport
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --groups agents,http --iterations 500
+    python -m benchmarks.run_benchmarks --output benchmarks/results/baseline.json
+
+Compare two result files with ``python -m benchmarks.compare``.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import itertools
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# Fast mode and quiet logs must be set before the app modules are imported
+os.environ.setdefault("LATENCY_MODE", "zero")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from benchmarks.harness import run_benchmark, environment_info
+
+configure_logging(settings)
+
+MOLECULES = ["Aspirin", "Metformin", "Adalimumab", "Imatinib", "Atorvastatin"]
+
+ORCHESTRATOR_MIXES = {
+    "single_clinical": ["clinical"],
+    "ip_and_market": ["patent", "market", "iqvia"],
+    "default_five": ["clinical", "patent", "iqvia", "exim", "vision"],
+    "all_agents": [
+        "clinical", "patent", "market", "iqvia", "exim", "vision",
+        "kol", "pathfinder", "web_intelligence", "internal_knowledge"
+    ]
+}
+
+Case = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+def _cycle(values: List[str]) -> Callable[[], str]:
+    state = {"index": 0}
+
+    def next_value() -> str:
+        value = values[state["index"] % len(values)]
+        state["index"] += 1
+        return value
+
+    return next_value
+
+
+def agent_cases() -> List[Case]:
+    from app.core.privacy_toggle import PrivacyManager
+    from app.agents.orchestrator import MasterOrchestrator
+
+    llm_config = PrivacyManager().get_llm_config("cloud")
+    agents = MasterOrchestrator().agents
+    molecule = _cycle(MOLECULES)
+    cases: List[Case] = []
+
+    for name, agent in agents.items():
+        if name == "market":
+            cases.append((f"agent.{name}", lambda a=agent: a.calculate_roi(molecule())))
+        elif name == "validation":
+            sample_results = {"clinical": {"safety_score": 8.1, "total_trials_found": 30}}
+            cases.append((
+                f"agent.{name}",
+                lambda a=agent: a.analyze(molecule(), sample_results, llm_config)
+            ))
+        else:
+            cases.append((f"agent.{name}", lambda a=agent: a.analyze(molecule(), llm_config)))
+    return cases
+
+
+def orchestrator_cases() -> List[Case]:
+    from app.core.privacy_toggle import PrivacyManager
+    from app.agents.orchestrator import MasterOrchestrator
+
+    llm_config = PrivacyManager().get_llm_config("cloud")
+    orchestrator = MasterOrchestrator()
+    molecule = _cycle(MOLECULES)
+
+    return [
+        (
+            f"orchestrator.{mix}",
+            lambda agents=agents: orchestrator.process_query(
+                query="Full repurposing assessment",
+                molecule=molecule(),
+                llm_config=llm_config,
+                requested_agents=agents
+            )
+        )
+        for mix, agents in ORCHESTRATOR_MIXES.items()
+    ]
+
+
+def http_cases(client) -> List[Case]:
+    molecule = _cycle(MOLECULES)
+
+    request_ids = itertools.count()
+
+    async def post(path: str, payload: Dict[str, Any]):
+        # Fresh request_id per call so idempotent replay never answers from a stored response
+        payload = {**payload, "request_id": f"bench-{next(request_ids)}"}
+        response = await client.post(path, json=payload)
+        response.raise_for_status()
+
+    async def get(path: str):
+        response = await client.get(path)
+        response.raise_for_status()
+
+    return [
+        ("http.health", lambda: get("/health")),
+        ("http.analyze", lambda: post("/api/analyze", {
+            "molecule": molecule(), "mode": "cloud", "request_id": "bench",
+            "agents": ["clinical", "patent", "market", "vision"]
+        })),
+        ("http.orchestrate", lambda: post("/api/orchestrate", {
+            "query": "Full repurposing assessment", "molecule": molecule(),
+            "mode": "cloud", "request_id": "bench"
+        })),
+        ("http.market_roi", lambda: post("/api/agents/market/roi", {"molecule": molecule(), "request_id": "bench"})),
+        ("http.exim", lambda: post("/api/agents/exim", {"molecule": molecule(), "request_id": "bench"})),
+        ("http.pathways", lambda: post("/api/agents/pathways", {
+            "molecule": molecule(), "disease": "Alzheimer's Disease", "request_id": "bench"
+        }))
+    ]
+
+
+async def run_suite(groups: List[str], iterations: int, warmup: int, concurrency: int, name_filter: str) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+
+    async def run_cases(cases: List[Case]):
+        for name, operation in cases:
+            if name_filter and name_filter not in name:
+                continue
+            result = await run_benchmark(name, operation, iterations, warmup, concurrency)
+            results.append(result)
+            print(f"  {name:<36}{result['ops_per_sec']:>10} ops/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms")
+
+    if "agents" in groups:
+        print("[agents]")
+        await run_cases(agent_cases())
+
+    if "orchestrator" in groups:
+        print("[orchestrator]")
+        await run_cases(orchestrator_cases())
+
+    if "http" in groups:
+        import httpx
+        from app.main import app
+
+        print("[http]")
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await run_cases(http_cases(client))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", default="agents,orchestrator,http", help="Comma-separated benchmark groups")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+    results = asyncio.run(run_suite(groups, args.iterations, args.warmup, args.concurrency, args.filter))
+
+    environment = environment_info()
+    output = args.output or os.path.join(
+        Path(__file__).parent, "results", f"{environment['timestamp'].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump({
+            "environment": environment,
+            "settings": {
+                "latency_mode": os.environ["LATENCY_MODE"],
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "concurrency": args.concurrency
+            },
+            "results": results
+        }, handle, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Safety Signal Benchmark
+========================
+Generates synthetic FAERS ASCII quarters (DRUG/REAC/OUTC, with case
+follow-ups and a few planted drug-event associations), ingests them into a
+signal store and reports ingest/recompute time and per-drug profile
+latency.
+
+Usage:
+    python -m benchmarks.safety_signals
+    python -m benchmarks.safety_signals --cases 400000 --quarters 2 --output benchmarks/results/safety_signals.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import zipfile
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.safety_signals import SafetySignalStore, build_store
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+# Drug -> event associated with it, planted at elevated rates
+PLANTED = {
+    "METFORMIN HYDROCHLORIDE": "LACTIC ACIDOSIS",
+    "ASPIRIN": "GASTROINTESTINAL HAEMORRHAGE",
+    "ADALIMUMAB": "INJECTION SITE REACTION",
+    "ATORVASTATIN CALCIUM": "RHABDOMYOLYSIS",
+    "IMATINIB MESYLATE": "OEDEMA PERIPHERAL"
+}
+
+
+def write_quarter(path: str, cases: int, seed: int, drugs: int = 5000, events: int = 8000):
+    rng = random.Random(seed)
+    drug_names = list(PLANTED) + [f"DRUG {i}" for i in range(drugs)]
+    event_names = [f"EVENT {i}" for i in range(events)]
+    drug_rows = ["primaryid$caseid$drug_seq$role_cod$drugname$prod_ai"]
+    reac_rows = ["primaryid$caseid$pt$drug_rec_act"]
+    outc_rows = ["primaryid$caseid$outc_cod"]
+    for case in range(cases):
+        caseid = 10_000_000 + seed * cases + case
+        for version in ([1] if rng.random() < 0.9 else [1, 2]):
+            primaryid = caseid * 10 + version
+            reported = rng.sample(drug_names, rng.randint(1, 4))
+            for seq, drug in enumerate(reported, 1):
+                drug_rows.append(f"{primaryid}${caseid}${seq}${rng.choice(('PS', 'SS', 'C'))}${drug}${drug}")
+            reactions = set(rng.sample(event_names, rng.randint(1, 3)))
+            reactions.update(PLANTED[drug] for drug in reported if drug in PLANTED and rng.random() < 0.4)
+            reac_rows.extend(f"{primaryid}${caseid}${event}$" for event in reactions)
+            if rng.random() < 0.3:
+                outc_rows.append(f"{primaryid}${caseid}${rng.choice(('HO', 'DE', 'OT'))}")
+    label = f"{seed % 100:02d}Q1"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for table, rows in (("DRUG", drug_rows), ("REAC", reac_rows), ("OUTC", outc_rows)):
+            archive.writestr(f"ASCII/{table}{label}.txt", "\n".join(rows) + "\n")
+
+
+def time_profiles(store: SafetySignalStore, molecules: List[str], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for molecule in molecules:
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            profile = store.profile(molecule)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({
+            "molecule": molecule,
+            "reports": profile.reports if profile else 0,
+            "top_signal": profile.signals[0]["event"] if profile and profile.signals else None,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=100000, help="Cases per synthetic quarter")
+    parser.add_argument("--quarters", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=50, help="Timed profile queries per molecule")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        quarters = []
+        for index in range(args.quarters):
+            path = os.path.join(workdir, f"faers_ascii_q{index + 1}.zip")
+            write_quarter(path, args.cases, seed=index + 1)
+            quarters.append(path)
+
+        directory = os.path.join(workdir, "store")
+        started = time.perf_counter()
+        build_store(quarters[:-1], directory)
+        initial_s = time.perf_counter() - started
+        started = time.perf_counter()
+        meta = build_store(quarters[-1:], directory, append=True)
+        append_s = time.perf_counter() - started
+
+        store = SafetySignalStore(directory)
+        profiles = time_profiles(store, ["Metformin", "Aspirin", "Adalimumab", "Atorvastatin", "Imatinib"], args.iterations)
+        del store
+
+    print(f"initial ingest ({args.quarters - 1} quarter(s)): {initial_s:.1f} s; "
+          f"append 1 quarter + recompute all signals: {append_s:.1f} s")
+    print(f"{meta['total_reports']} reports, {meta['pairs']} drug-event pairs, {meta['signals']} signals")
+    print(f"{'molecule':<16}{'reports':>10}{'p50 ms':>10}  top signal")
+    for p in profiles:
+        print(f"{p['molecule']:<16}{p['reports']:>10}{p['p50_ms']:>10}  {p['top_signal']}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "environment": environment_info(),
+                "ingest": {"initial_seconds": round(initial_s, 2), "append_seconds": round(append_s, 2), **meta},
+                "profiles": profiles
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
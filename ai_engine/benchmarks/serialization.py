@@ -0,0 +1,131 @@
+"""
+Response Serialization Benchmark
+=================================
+Payload size and encode time for full orchestration responses (all
+agents), comparing FastAPI's default path (jsonable_encoder + json.dumps,
+as JSONResponse renders it) with the fast path in app/core/serialization.py,
+a summary projection, gzip/brotli compression of the encoded body and the
+MessagePack transport.
+
+Usage:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --payloads 10 --iterations 200 --output benchmarks/results/serialization.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Fast mode and quiet logs must be set before the app modules are imported
+os.environ.setdefault("LATENCY_MODE", "zero")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.core import serialization
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+MOLECULES = ["Aspirin", "Metformin", "Adalimumab", "Imatinib", "Atorvastatin"]
+ALL_AGENTS = [
+    "clinical", "patent", "market", "iqvia", "exim", "vision",
+    "kol", "pathfinder", "web_intelligence", "internal_knowledge"
+]
+SUMMARY_FIELDS = "success,request_id,data.summary,data.agents_executed,data.total_processing_time_ms"
+
+
+async def build_payloads(count: int) -> List[Dict[str, Any]]:
+    """Orchestrate responses as /api/orchestrate returns them."""
+    from app.core.privacy_toggle import PrivacyManager
+    from app.agents.orchestrator import MasterOrchestrator
+
+    llm_config = PrivacyManager().get_llm_config("cloud")
+    orchestrator = MasterOrchestrator()
+    payloads = []
+    for i in range(count):
+        result = await orchestrator.process_query(
+            query="Full repurposing assessment",
+            molecule=MOLECULES[i % len(MOLECULES)],
+            llm_config=llm_config,
+            requested_agents=ALL_AGENTS
+        )
+        payloads.append({"success": True, "request_id": f"bench-{i}", "data": result})
+    return payloads
+
+
+def default_encode(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def time_case(name: str, encode: Callable[[Dict[str, Any]], bytes], payloads: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    for payload in payloads:
+        encode(payload)
+
+    samples = []
+    sizes = []
+    for i in range(iterations):
+        payload = payloads[i % len(payloads)]
+        started = time.perf_counter()
+        body = encode(payload)
+        samples.append(time.perf_counter() - started)
+        sizes.append(len(body))
+    samples.sort()
+    return {
+        "name": name,
+        "iterations": iterations,
+        "mean_bytes": round(sum(sizes) / len(sizes)),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=5, help="Distinct orchestration payloads to encode")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed encodes per case")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    payloads = asyncio.run(build_payloads(args.payloads))
+    fast = serialization.dumps
+
+    cases = [
+        ("default (jsonable_encoder + json)", default_encode),
+        (f"fast ({'orjson' if serialization.orjson else 'json fallback'})", fast),
+        ("fast + summary projection", lambda p: fast(serialization.project(p, SUMMARY_FIELDS))),
+        ("fast + gzip", lambda p: serialization.compress(fast(p), "gzip"))
+    ]
+    if serialization.brotli is not None:
+        cases.append(("fast + brotli", lambda p: serialization.compress(fast(p), "br")))
+    if serialization.msgpack is not None:
+        cases.append(("msgpack (packed arrays)", serialization.packb))
+        cases.append(("msgpack + gzip", lambda p: serialization.compress(serialization.packb(p), "gzip")))
+
+    results = [time_case(name, encode, payloads, args.iterations) for name, encode in cases]
+
+    print(f"{'case':<38}{'bytes':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['name']:<38}{r['mean_bytes']:>10}{r['mean_ms']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Clinical Trial Store Benchmark
+===============================
+Generates a synthetic ClinicalTrials.gov API v2 export (one JSON array,
+with a few "popular" molecules appearing in thousands of trials), ingests
+it through the streaming parser and times ClinicalAgent-style queries
+against the memory-mapped store, then builds the text similarity index and
+times top-k similarity searches (single and batched) and indication
+discovery.
+
+Usage:
+    python -m benchmarks.trial_store
+    python -m benchmarks.trial_store --trials 500000 --output benchmarks/results/trial_store.json
+    python -m benchmarks.trial_store --no-text-index
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging_pipeline import configure_logging
+from app.services.trial_similarity import SimilarityIndex, build_text_index, similar_indications
+from app.services.trial_store import TrialStore, build_store
+from benchmarks.harness import percentile, environment_info
+
+configure_logging(settings)
+
+POPULAR = ["Aspirin", "Metformin", "Adalimumab", "Pembrolizumab", "Atorvastatin"]
+CONDITIONS = [
+    "Type 2 Diabetes", "Non-Small Cell Lung Cancer", "Rheumatoid Arthritis", "Heart Failure",
+    "Alzheimer Disease", "Psoriasis", "Crohn Disease", "Breast Cancer", "Hypertension",
+    "Major Depressive Disorder", "Chronic Kidney Disease", "Atrial Fibrillation", "Melanoma",
+    "Multiple Sclerosis", "Asthma", "COPD", "Obesity", "Colorectal Cancer", "Stroke", "Migraine"
+]
+PHASES = [["EARLY_PHASE1"], ["PHASE1"], ["PHASE1", "PHASE2"], ["PHASE2"], ["PHASE3"], ["PHASE4"], ["NA"]]
+# Each condition's trials draw eligibility wording from their own topic words
+TOPIC_WORDS = {
+    condition: [f"{condition.split()[0].lower()}marker{i}" for i in range(25)] for condition in CONDITIONS
+}
+COMMON_WORDS = [f"clinical{i}" for i in range(2000)]
+STATUSES = ["COMPLETED", "COMPLETED", "RECRUITING", "ACTIVE_NOT_RECRUITING", "TERMINATED", "WITHDRAWN", "UNKNOWN"]
+
+
+def synthetic_study(rng: random.Random, index: int) -> Dict[str, Any]:
+    drugs = []
+    if rng.random() < 0.05:
+        drugs.append(f"Low-dose {rng.choice(POPULAR)} {rng.choice([81, 100, 500])} mg")
+    drugs.extend(f"Compound-{rng.randrange(20000)}" for _ in range(rng.randint(1, 2)))
+    conditions = rng.sample(CONDITIONS, rng.randint(1, 3))
+    topic = TOPIC_WORDS[conditions[0]]
+    criteria = [rng.choice(topic) if rng.random() < 0.6 else rng.choice(COMMON_WORDS) for _ in range(60)]
+    return {
+        "protocolSection": {
+            "identificationModule": {
+                "nctId": f"NCT{index:08d}",
+                "briefTitle": f"A Study of {drugs[0]} in {conditions[0]}"
+            },
+            "statusModule": {
+                "overallStatus": rng.choice(STATUSES),
+                "startDateStruct": {"date": f"{rng.randint(1995, 2026)}-{rng.randint(1, 12):02d}"}
+            },
+            "conditionsModule": {"conditions": conditions},
+            "eligibilityModule": {"eligibilityCriteria": "Inclusion Criteria: " + " ".join(criteria)},
+            "designModule": {"phases": rng.choice(PHASES), "enrollmentInfo": {"count": rng.randint(10, 3000)}},
+            "armsInterventionsModule": {
+                "interventions": [{"type": "DRUG", "name": drug} for drug in drugs] + [{"type": "DRUG", "name": "Placebo"}]
+            }
+        },
+        "hasResults": rng.random() < 0.3
+    }
+
+
+def write_export(path: str, trials: int, seed: int = 7):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for index in range(trials):
+            if index:
+                f.write(",\n")
+            f.write(json.dumps(synthetic_study(rng, index)))
+        f.write("\n]\n")
+
+
+def time_queries(store: TrialStore, molecules: List[str], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for molecule in molecules:
+        store.summarize(store.trials_for_intervention(molecule))
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            rows = store.trials_for_intervention(molecule)
+            store.summarize(rows)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results.append({
+            "molecule": molecule,
+            "trials": int(len(rows)),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3)
+        })
+    return results
+
+
+def time_similarity(store: TrialStore, index: SimilarityIndex, molecules: List[str], iterations: int) -> Dict[str, Any]:
+    """Single-query indication discovery per molecule, and one batched top-k over every molecule."""
+    per_molecule = []
+    for molecule in molecules:
+        rows = store.trials_for_intervention(molecule)
+        similar_indications(store, index, rows)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            found = similar_indications(store, index, rows)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        per_molecule.append({
+            "molecule": molecule,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "top_indication": found[0]["condition"] if found else None
+        })
+
+    queries = [index.centroid(store.trials_for_intervention(molecule)) for molecule in molecules]
+    queries = np.stack([query for query in queries if query is not None] * 4)
+    samples = []
+    for _ in range(max(iterations // 10, 3)):
+        started = time.perf_counter()
+        index.top_k(queries, k=100)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "molecules": per_molecule,
+        "batched": {"queries": len(queries), "k": 100, "p50_ms": round(percentile(samples, 50) * 1000, 3)}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=200000, help="Trials in the synthetic export")
+    parser.add_argument("--iterations", type=int, default=100, help="Timed queries per molecule")
+    parser.add_argument("--no-text-index", action="store_true", help="Skip building and timing the similarity index")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        export = os.path.join(workdir, "ctg-studies.json")
+        write_export(export, args.trials)
+        export_mb = os.path.getsize(export) / 1e6
+
+        started = time.perf_counter()
+        meta = build_store(export, os.path.join(workdir, "store"), progress_every=0)
+        ingest_s = time.perf_counter() - started
+
+        store = TrialStore(os.path.join(workdir, "store"))
+        queries = time_queries(store, POPULAR + ["Compound-42", "Unknown-Molecule"], args.iterations)
+
+        similarity = None
+        if not args.no_text_index:
+            started = time.perf_counter()
+            build_text_index(export, os.path.join(workdir, "store"))
+            text_index_s = time.perf_counter() - started
+            index = SimilarityIndex(os.path.join(workdir, "store"))
+            # Popular molecules are trialed in every synthetic condition; niche compounds leave room for candidates
+            molecules = POPULAR[:2] + ["Compound-42", "Compound-1234", "Compound-7777"]
+            similarity = {"build_seconds": round(text_index_s, 2), **time_similarity(store, index, molecules, args.iterations)}
+            del index
+        del store
+
+    print(f"ingest: {meta['trials']} trials, {export_mb:.0f} MB export in {ingest_s:.1f} s "
+          f"({meta['trials'] / ingest_s:,.0f} trials/s)")
+    print(f"{'molecule':<20}{'trials':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for q in queries:
+        print(f"{q['molecule']:<20}{q['trials']:>10}{q['p50_ms']:>10}{q['p99_ms']:>10}")
+    if similarity:
+        print(f"\ntext index built in {similarity['build_seconds']:.1f} s")
+        print(f"{'similar indications':<20}{'p50 ms':>10}  top candidate")
+        for q in similarity["molecules"]:
+            print(f"{q['molecule']:<20}{q['p50_ms']:>10}  {q['top_indication']}")
+        batched = similarity["batched"]
+        print(f"batched top-{batched['k']} for {batched['queries']} queries: {batched['p50_ms']} ms")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "environment": environment_info(),
+                "ingest": {"trials": meta["trials"], "export_mb": round(export_mb, 1), "seconds": round(ingest_s, 2)},
+                "queries": queries,
+                "similarity": similarity
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Shared fixtures: one event loop and one running application (lifespan
+entered once) for the whole session, with on-disk state in a temporary
+directory.
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+import tempfile
+import contextlib
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+STATE_DIR = tempfile.mkdtemp(prefix="pharmalens-tests-")
+
+os.environ.update({
+    "LOG_LEVEL": "WARNING",
+    "LATENCY_MODE": "zero",
+    "TRACING_ENABLED": "false",
+    "PROFILING_ENABLED": "false",
+    "METRICS_MULTIPROC_DIR": "",
+    "IDEMPOTENCY_STORE_PATH": os.path.join(STATE_DIR, "idempotency", "responses.sqlite3"),
+    "PROFILING_DIR": os.path.join(STATE_DIR, "profiles"),
+    "TRACING_JSONL_PATH": os.path.join(STATE_DIR, "traces", "traces.jsonl")
+})
+
+
+def new_request_id() -> str:
+    return f"test-{uuid.uuid4()}"
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def run(loop):
+    return loop.run_until_complete
+
+
+@pytest.fixture(scope="session")
+def app(loop):
+    from app.main import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app, run):
+    stack = contextlib.AsyncExitStack()
+
+    async def start():
+        await stack.enter_async_context(app.router.lifespan_context(app))
+        transport = httpx.ASGITransport(app=app)
+        return await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url="http://test"))
+
+    client = run(start())
+    yield client
+    run(stack.aclose())
@@ -0,0 +1,60 @@
+"""
+Admission control: shed requests get a 429 with Retry-After, or the stale
+result of an earlier identical request restamped with their own
+request_id, and either way carry CORS headers.
+"""
+
+import pytest
+
+from app.core.admission import AdmissionController, admission_control
+from tests.conftest import new_request_id
+
+ORIGIN = "http://localhost:5173"
+
+
+@pytest.fixture
+def saturated(monkeypatch, run):
+    """The single-agent class with one slot, no queue, and that slot taken."""
+    controller = AdmissionController("single_agent", 1, 0, 0.1)
+    monkeypatch.setitem(admission_control.controllers, "single_agent", controller)
+    slot = controller.slot()
+
+    def hold():
+        run(slot.__aenter__())
+
+    yield hold
+    if controller.active:
+        run(slot.__aexit__(None, None, None))
+
+
+def _roi(client, run, molecule, request_id):
+    return run(client.post(
+        "/api/agents/market/roi",
+        json={"molecule": molecule, "seed": 3, "request_id": request_id},
+        headers={"Origin": ORIGIN}
+    ))
+
+
+def test_shed_request_gets_retry_after_and_cors(client, run, saturated):
+    saturated()
+    response = _roi(client, run, "never-answered", new_request_id())
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert response.json()["endpoint_class"] == "single_agent"
+
+
+def test_stale_result_is_restamped_with_new_request_id(client, run, saturated):
+    first = _roi(client, run, "metformin", new_request_id())
+    assert first.status_code == 200
+
+    saturated()
+    request_id = new_request_id()
+    stale = _roi(client, run, "metformin", request_id)
+
+    assert stale.status_code == 200
+    assert stale.headers["x-cache"] == "stale"
+    assert stale.headers["access-control-allow-origin"] == ORIGIN
+    assert stale.json()["request_id"] == request_id
+    assert stale.json()["data"] == first.json()["data"]
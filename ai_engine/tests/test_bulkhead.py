@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.bulkhead import BulkheadFull, ExecutionPool, agent_slot, bulkheads, offload
+from tests.conftest import new_request_id
+
+
+def test_full_queue_rejects_with_retry_after(run):
+    pool = ExecutionPool("test.full", 1, 0, 1.0)
+
+    async def scenario():
+        async with pool.slot():
+            with pytest.raises(BulkheadFull) as rejected:
+                async with pool.slot():
+                    pass
+        return rejected.value
+
+    rejected = run(scenario())
+    assert rejected.reason == "queue_full"
+    assert 1 <= rejected.retry_after <= 120
+    assert pool.status()["active"] == 0
+
+
+def test_queue_timeout_rejects(run):
+    pool = ExecutionPool("test.timeout", 1, 1, 0.05)
+
+    async def scenario():
+        async with pool.slot():
+            with pytest.raises(BulkheadFull) as rejected:
+                async with pool.slot():
+                    pass
+        return rejected.value
+
+    assert run(scenario()).reason == "queue_timeout"
+    assert pool.waiting == 0
+
+
+def test_queued_work_runs_in_order(run):
+    pool = ExecutionPool("test.queue", 1, 4, 1.0)
+    order = []
+
+    async def work(i):
+        async with pool.slot():
+            order.append(i)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        await asyncio.gather(*(work(i) for i in range(4)))
+
+    run(scenario())
+    assert order == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("agent, mode", [
+    ("market", "cloud"), ("patent", "cloud"), ("clinical", "local"), ("internal_knowledge", "cloud")
+])
+def test_offload_runs_on_the_agents_pool_threads(run, agent, mode):
+    pool = bulkheads.for_agent(agent, mode)
+
+    async def in_slot():
+        async with agent_slot(agent, mode=mode):
+            held = pool.active
+            thread = await offload(agent, lambda: threading.current_thread().name)
+            return held, pool.active, thread
+
+    # Inside agent_slot the held slot is reused rather than a second one taken
+    held, during, thread = run(in_slot())
+    assert held == during == 1
+    assert thread.startswith(f"pharmalens-{pool.name}")
+
+    # Outside one, the work takes a slot of the agent's cloud pool
+    cloud = bulkheads.for_agent(agent, "cloud")
+    thread, active = run(offload(agent, lambda: (threading.current_thread().name, cloud.active)))
+    assert thread.startswith(f"pharmalens-{cloud.name}") and active == 1
+    assert pool.active == cloud.active == 0
+
+
+def test_saturated_pool_is_503_with_retry_after(client, run, monkeypatch):
+    saturated = ExecutionPool("cloud.agents", 1, 0, 1.0)
+    monkeypatch.setitem(bulkheads.pools, "cloud.agents", saturated)
+
+    async def scenario():
+        async with saturated.slot():
+            return await client.post(
+                "/api/agents/market/roi",
+                json={"molecule": "Metformin", "request_id": new_request_id()}
+            )
+
+    response = run(scenario())
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "cloud.agents" in response.json()["error"]
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+
+from app.core import metrics
+from app.core.cancellation import REQUESTS_CANCELLED
+from app.services.llm_service import LLMService
+from tests.conftest import new_request_id
+
+LOCAL_LLM = {"provider": "local", "model": "llama-3-8b", "model_path": "unused.gguf", "max_tokens": 500}
+
+
+class _Llama:
+    """Streams a token every few milliseconds until the caller stops reading."""
+
+    def __init__(self):
+        self.tokens = 0
+
+    def __call__(self, prompt, max_tokens, **options):
+        for _ in range(max_tokens):
+            time.sleep(0.005)
+            self.tokens += 1
+            yield {"choices": [{"text": "token "}]}
+
+
+async def _call(app, path, payload, disconnect_when):
+    """Drive the ASGI app directly; the client disconnects once ``disconnect_when`` is set."""
+    body = json.dumps(payload).encode()
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnect_when.wait()
+        return {"type": "http.disconnect"}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("test", 80)
+    }
+    await asyncio.wait_for(app(scope, receive, send), 5)
+    return next(message["status"] for message in messages if message["type"] == "http.response.start")
+
+
+def test_disconnect_cancels_agents_and_llm_generation(client, app, run, monkeypatch):
+    orchestrator = app.state.orchestrator
+    llm = LLMService()
+    llm.llama_model = _Llama()
+    generating = asyncio.Event()
+    cancelled = []
+
+    async def analyze(molecule, llm_config):
+        generating.set()
+        try:
+            return await llm.generate_completion(f"Summarize the trials of {molecule}", LOCAL_LLM)
+        except asyncio.CancelledError:
+            cancelled.append("clinical")
+            raise
+
+    # Clinical runs first and blocks in generation; patent and market are never started
+    monkeypatch.setattr(orchestrator, "_determine_agents", lambda sub_tasks: ["clinical", "patent", "market"])
+    monkeypatch.setattr(orchestrator.agents["clinical"], "analyze", analyze)
+
+    before = {
+        "requests": REQUESTS_CANCELLED.value(route="/api/orchestrate"),
+        "agents": metrics.AGENTS_CANCELLED.value(agent="clinical"),
+        "patent": metrics.AGENT_RUNS_AVOIDED.value(agent="patent"),
+        "market": metrics.AGENT_RUNS_AVOIDED.value(agent="market"),
+        "llm": metrics.LLM_CANCELLED.value(provider="local"),
+        "tokens": metrics.LLM_TOKENS_AVOIDED.value(provider="local")
+    }
+
+    async def scenario():
+        disconnect = asyncio.Event()
+
+        async def disconnect_while_generating():
+            await generating.wait()
+            await asyncio.sleep(0.05)
+            disconnect.set()
+
+        asyncio.create_task(disconnect_while_generating())
+        status = await _call(app, "/api/orchestrate", {
+            "query": "Clinical trial, patent and market outlook", "molecule": "Metformin", "request_id": new_request_id()
+        }, disconnect)
+        # The generation thread notices the stop at its next token
+        for _ in range(100):
+            if metrics.LLM_TOKENS_AVOIDED.value(provider="local") > before["tokens"]:
+                break
+            await asyncio.sleep(0.01)
+        return status
+
+    assert run(scenario()) == 499
+    assert cancelled == ["clinical"]
+    assert llm.llama_model.tokens < LOCAL_LLM["max_tokens"]
+    assert REQUESTS_CANCELLED.value(route="/api/orchestrate") == before["requests"] + 1
+    assert metrics.AGENTS_CANCELLED.value(agent="clinical") == before["agents"] + 1
+    assert metrics.AGENT_RUNS_AVOIDED.value(agent="patent") == before["patent"] + 1
+    assert metrics.AGENT_RUNS_AVOIDED.value(agent="market") == before["market"] + 1
+    assert metrics.LLM_CANCELLED.value(provider="local") == before["llm"] + 1
+    avoided = metrics.LLM_TOKENS_AVOIDED.value(provider="local") - before["tokens"]
+    assert avoided == LOCAL_LLM["max_tokens"] - llm.llama_model.tokens + 1
+
+
+def test_completed_requests_are_not_cancelled(client, app, run):
+    before = REQUESTS_CANCELLED.value(route="/api/analyze")
+
+    async def scenario():
+        # The client only disconnects after the response has been sent
+        return await _call(app, "/api/analyze", {
+            "molecule": "Metformin", "request_id": new_request_id(), "agents": ["market"]
+        }, asyncio.Event())
+
+    assert run(scenario()) == 200
+    assert REQUESTS_CANCELLED.value(route="/api/analyze") == before
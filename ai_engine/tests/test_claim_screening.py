@@ -0,0 +1,143 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.services import patent_index
+from app.services.claim_screening import (
+    BANDS, BLOCKING_SIMILARITY, NUM_PERM, ClaimScreeningIndex, band_keys, build_index, shingles, signatures
+)
+from app.services.patent_index import PatentIndex
+
+TODAY = date(2026, 1, 1)
+
+CLAIM = (
+    "A pharmaceutical composition comprising metformin hydrochloride in an amount from 250 mg to 1000 mg, "
+    "a hydrophilic polymer matrix of hydroxypropyl methylcellulose having a viscosity between 4000 and "
+    "100000 centipoise, microcrystalline cellulose as a filler, magnesium stearate as a lubricant, and a "
+    "film coating of polyvinyl alcohol, wherein the composition releases not more than forty percent of "
+    "the metformin within two hours and not less than eighty percent within ten hours in phosphate buffer."
+)
+# One word changed: a near-duplicate of CLAIM
+NEAR_DUPLICATE = CLAIM.replace("magnesium stearate", "calcium stearate")
+UNRELATED = (
+    "A method of manufacturing a semiconductor wafer comprising depositing a silicon nitride layer by "
+    "chemical vapour deposition, patterning the layer with a photoresist mask, and etching exposed regions "
+    "with a fluorine plasma at a pressure below ten millitorr."
+)
+
+
+def _patent(number, claims, status="granted", expiry="2035-01-01", **extra):
+    return {
+        "number": number, "title": f"Patent {number}", "claims": claims, "assignee": "Acme Pharma",
+        "filing_date": "2015-01-01", "grant_date": "2017-01-01" if status == "granted" else None,
+        "status": status, "expiry_date": expiry if status == "granted" else None, **extra
+    }
+
+
+def _ingest(path, records):
+    source = f"{path}.json"
+    with open(source, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    patent_index.build_index([source], path)
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    path = str(tmp_path / "patents.sqlite3")
+    _ingest(path, [
+        _patent("US1", [CLAIM, "The composition of claim 1, wherein the tablet is scored."]),
+        _patent("US2", [CLAIM], expiry="2020-01-01"),
+        _patent("US3", [CLAIM], status="pending"),
+        _patent("US4", [UNRELATED])
+    ])
+    directory = str(tmp_path / "claims")
+    meta = build_index(path, directory)
+    return path, directory, meta
+
+
+def _jaccard(a, b):
+    a, b = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(a & b) / len(a | b)
+
+
+def test_shingles_normalize_words():
+    assert np.array_equal(shingles("The Compound of metformin salt"), shingles("compound metformin, SALT"))
+    assert len(shingles("metformin salt")) == 2
+    assert len(shingles("")) == 0
+
+
+def test_signatures_estimate_jaccard():
+    sigs, nonempty = signatures([CLAIM, NEAR_DUPLICATE, UNRELATED, "the of and"])
+    assert sigs.shape == (4, NUM_PERM) and sigs.dtype == np.uint32
+    assert nonempty.tolist() == [True, True, True, False]
+    assert not sigs[3].any()
+
+    estimate = (sigs[0] == sigs[1]).mean()
+    assert abs(estimate - _jaccard(CLAIM, NEAR_DUPLICATE)) < 0.1
+    assert (sigs[0] == sigs[2]).mean() < 0.1
+    assert np.array_equal(signatures([CLAIM])[0][0], sigs[0])
+
+
+def test_band_keys_agree_only_for_equal_bands():
+    sigs, _ = signatures([CLAIM, CLAIM, UNRELATED])
+    keys = band_keys(sigs)
+    assert keys.shape == (BANDS, 3)
+    assert np.array_equal(keys[:, 0], keys[:, 1])
+    assert not (keys[:, 0] == keys[:, 2]).any()
+
+
+def test_build_indexes_independent_claims_only(indexed):
+    _, directory, meta = indexed
+    index = ClaimScreeningIndex(directory, PatentIndex(indexed[0]))
+    assert meta["claims"] == 4 and meta["patents"] == 4
+    assert sorted(index.claim_numbers.tolist()) == [1, 1, 1, 1]
+
+
+def test_near_duplicate_is_found_and_unrelated_rejected(indexed):
+    path, directory, _ = indexed
+    index = ClaimScreeningIndex(directory, PatentIndex(path))
+    near, unrelated_query = index.similar_claims([NEAR_DUPLICATE, "A method of treating gout with colchicine."])
+
+    assert len(near) == 3
+    assert all(similarity >= BLOCKING_SIMILARITY for similarity, _ in near)
+    assert unrelated_query == []
+    candidates = index.candidates(signatures([NEAR_DUPLICATE])[0])[0]
+    assert len(candidates) == 3  # the LSH lookup alone never reaches the unrelated claim
+
+
+def test_blocking_claims_keep_granted_unexpired_patents(indexed):
+    path, directory, _ = indexed
+    index = ClaimScreeningIndex(directory, PatentIndex(path))
+    result = index.blocking_claims([NEAR_DUPLICATE], today=TODAY)
+
+    assert result["blocking_patents"] == 1
+    assert [row["number"] for row in result["blocking_claims"]] == ["US1"]
+    assert sorted(row["number"] for row in result["similar_claims"]) == ["US1", "US2", "US3"]
+    assert index.blocking_claims([NEAR_DUPLICATE], today=date(2036, 1, 1))["blocking_patents"] == 0
+
+
+def test_claims_of_replaced_patents_are_skipped(indexed):
+    path, directory, _ = indexed
+    # Re-ingesting US1 gives it a new id that the claim index has not seen
+    _ingest(path, [_patent("US1", [UNRELATED])])
+    index = ClaimScreeningIndex(directory, PatentIndex(path))
+    result = index.blocking_claims([CLAIM], today=TODAY)
+
+    assert result["blocking_patents"] == 0
+    assert sorted(row["number"] for row in result["similar_claims"]) == ["US2", "US3"]
+
+
+def test_rebuild_swaps_the_directory_under_open_indexes(indexed, tmp_path):
+    path, directory, _ = indexed
+    index = ClaimScreeningIndex(directory, PatentIndex(path))
+    before = np.array(index.signatures)
+
+    _ingest(path, [_patent("US5", [NEAR_DUPLICATE])])
+    build_index(path, directory)
+    # The open index still reads the files it mapped; a new one sees the rebuild
+    assert np.array_equal(index.signatures, before)
+    assert len(ClaimScreeningIndex(directory, PatentIndex(path))) == 5
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".claims.")]
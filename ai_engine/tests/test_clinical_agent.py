@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from app.agents import clinical_agent
+from app.agents.clinical_agent import ClinicalAgent
+from app.services.safety_signals import SafetyProfile
+from app.services.trial_similarity import SimilarityIndex
+from app.services.trial_store import TrialStore, build_store
+
+LLM_CONFIG = {"provider": "openai", "model": "gpt-4"}
+
+GLUCOSE = "Fasting glucose and glycated haemoglobin response in adults with insulin resistance"
+
+
+def _study(nct_id, intervention, title, conditions, phases=("PHASE2",), status="COMPLETED"):
+    return {
+        "protocolSection": {
+            "identificationModule": {"nctId": nct_id, "briefTitle": title},
+            "statusModule": {"overallStatus": status, "startDateStruct": {"date": "2019-03"}},
+            "designModule": {"phases": list(phases), "enrollmentInfo": {"count": 100}},
+            "armsInterventionsModule": {"interventions": [{"name": intervention}]},
+            "conditionsModule": {"conditions": list(conditions)}
+        },
+        "hasResults": True
+    }
+
+
+# Metformin is established in diabetes (phase 3) and explored in PCOS; a
+# dapagliflozin trial reads like its diabetes trial but studies prediabetes
+STUDIES = [
+    _study("NCT00000001", "Metformin", GLUCOSE, ["Type 2 Diabetes"], ("PHASE3",)),
+    _study("NCT00000002", "Metformin", "Ovulation in polycystic ovary syndrome", ["PCOS"], status="RECRUITING"),
+    _study("NCT00000003", "Dapagliflozin", GLUCOSE, ["Prediabetes"]),
+    _study("NCT00000004", "Salbutamol", "Bronchodilator response in asthma", ["Asthma"])
+]
+
+
+class _SignalStore:
+    def profile(self, molecule):
+        if molecule.lower() != "metformin":
+            return None
+        signals = [
+            {"event": f"Event {i}", "frequency": "Common", "serious_fraction": 0.15 * i} for i in range(8)
+        ]
+        return SafetyProfile("METFORMIN", 400, 0.3, len(signals), signals, 7.5)
+
+
+@pytest.fixture
+def local_data(tmp_path, monkeypatch):
+    source = tmp_path / "ctgov.json"
+    with open(source, "w", encoding="utf-8") as f:
+        json.dump({"studies": STUDIES}, f)
+    directory = str(tmp_path / "trials")
+    build_store(str(source), directory, text_index=True)
+    store, index = TrialStore(directory), SimilarityIndex(directory)
+    monkeypatch.setattr(clinical_agent, "get_trial_store", lambda: store)
+    monkeypatch.setattr(clinical_agent, "get_similarity_index", lambda: index)
+    monkeypatch.setattr(clinical_agent, "get_signal_store", lambda: _SignalStore())
+
+
+def test_analysis_from_the_local_stores(run, local_data):
+    result = run(ClinicalAgent().analyze("Metformin", LLM_CONFIG))
+
+    assert result["trial_data_source"] == "clinicaltrials_gov_local"
+    assert (result["total_trials_found"], result["active_trials"], result["completed_trials"]) == (2, 1, 1)
+    assert result["current_indications"] == ["Type 2 Diabetes"]
+    # Exploratory trials first, then conditions of similar trials the molecule never included
+    assert result["potential_new_indications"][:2] == ["PCOS", "Prediabetes"]
+    evidence = result["trial_evidence"]
+    assert evidence["trials_with_results"] == 2 and evidence["total_enrollment"] == 200
+    similar = evidence["similar_trial_indications"]
+    assert similar[0]["condition"] == "Prediabetes" and similar[0]["similarity"] > 0.5
+    assert not {"Type 2 Diabetes", "PCOS"} & {item["condition"] for item in similar}
+
+    assert result["safety_data_source"] == "faers" and result["safety_score"] == 7.5
+    assert len(result["adverse_events"]) == 5 and len(result["safety_signals"]) == 8
+    assert [event["severity"] for event in result["adverse_events"]] == ["Non-serious"] * 4 + ["Serious"]
+    assert result["pharmacovigilance"] == {"faers_reports": 400, "serious_fraction": 0.3, "signal_count": 8}
+
+
+def test_molecules_without_data_fall_back_per_source(run, local_data, monkeypatch):
+    result = run(ClinicalAgent().analyze("Unknownumab", LLM_CONFIG))
+    # The trial store answers (with no trials); the signal store has no profile
+    assert result["trial_data_source"] == "clinicaltrials_gov_local" and result["total_trials_found"] == 0
+    assert result["safety_data_source"] == "simulated"
+
+    monkeypatch.setattr(clinical_agent, "get_trial_store", lambda: None)
+    assert run(ClinicalAgent().analyze("Metformin", LLM_CONFIG))["trial_data_source"] == "simulated"
@@ -0,0 +1,55 @@
+"""
+/api/debug/* is off by default and token-protected when enabled; stored
+profiles are pruned to the newest PROFILING_MAX_PROFILES.
+"""
+
+import os
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.core.profiling import RequestProfiler, StackSampler
+
+
+@pytest.fixture
+def debug_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_ENDPOINTS_ENABLED", True)
+    monkeypatch.setattr(settings, "DEBUG_TOKEN", "s3cret")
+
+
+def test_debug_endpoints_hidden_by_default(client, run):
+    for path in ("/api/debug/pools", "/api/debug/event-loop", "/api/debug/traces/abc", "/api/debug/profiles/abc"):
+        assert run(client.get(path)).status_code == 404
+
+
+def test_debug_endpoints_require_token(client, run, debug_enabled):
+    assert run(client.get("/api/debug/pools")).status_code == 403
+    assert run(client.get("/api/debug/pools", headers={"X-Debug-Token": "wrong"})).status_code == 403
+
+    response = run(client.get("/api/debug/pools", headers={"X-Debug-Token": "s3cret"}))
+    assert response.status_code == 200
+    assert "single_agent" in response.json()["data"]["admission"]
+
+
+def test_profiles_pruned_to_newest(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), max_profiles=2)
+    for i in range(4):
+        profiler.save(StackSampler(threading.get_ident()), f"req-{i}", {"route": "/test"})
+        for suffix in ("summary", "speedscope"):
+            os.utime(tmp_path / f"req-{i}.{suffix}.json", (1000 + i, 1000 + i))
+    profiler.prune()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "req-2.speedscope.json", "req-2.summary.json", "req-3.speedscope.json", "req-3.summary.json"
+    ]
+    assert profiler.load("req-0") is None
+    assert profiler.load("req-3")["request_id"] == "req-3"
+
+
+def test_profiling_token_compare_accepts_any_text():
+    profiler = RequestProfiler("unused", token="s3cret")
+
+    assert profiler.should_profile({"x-profile": "1", "x-profile-token": "s3cret"}, {})
+    assert not profiler.should_profile({}, {"profile": "1", "profile_token": "é"})
+    assert not RequestProfiler("unused", token="é").should_profile({}, {"profile": "1", "profile_token": "e"})
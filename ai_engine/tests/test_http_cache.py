@@ -0,0 +1,63 @@
+from app.core.http_cache import etag_for, if_none_match, payload_etag
+from app.core.serialization import dumps, packb
+from tests.conftest import new_request_id
+
+
+def test_etag_ignores_request_id_and_timings():
+    first = etag_for(b'{"request_id": "a", "data": {"x": 1, "processing_time_ms": 3.1, "analysis_date": "2026-01-01"}}', "application/json")
+    second = etag_for(b'{"data": {"analysis_date": "2026-02-02", "x": 1, "processing_time_ms": 9.9}, "request_id": "b"}', "application/json")
+    changed = etag_for(b'{"request_id": "a", "data": {"x": 2}}', "application/json")
+    assert first == second
+    assert changed != first
+
+
+def test_volatile_values_are_blanked_only_where_they_are_keys():
+    base = {"data": {"note": 'say "elapsed_ms":1', "rows": [{"timestamp": "t1", "v": 1}], "duration_ms": 1.5}}
+    moved = {"data": {"note": 'say "elapsed_ms":1', "rows": [{"timestamp": "t2", "v": 1}], "duration_ms": 99}}
+    edited = {"data": {"note": 'say "elapsed_ms":2', "rows": [{"timestamp": "t1", "v": 1}], "duration_ms": 1.5}}
+    assert payload_etag(base) == payload_etag(moved)
+    assert payload_etag(base) != payload_etag(edited)
+    assert payload_etag({"request_id": 'a\\"b', "x": 1}) == payload_etag({"request_id": "c", "x": 1})
+
+
+def test_formats_have_their_own_etag():
+    content = {"data": {"x": 1}}
+    assert etag_for(packb(content), "application/msgpack") != etag_for(b'{"data": {"x": 1}}', "application/json")
+
+
+def test_payload_and_body_etags_agree():
+    payload = {"request_id": "a", "data": {"values": [1.5, 2.5, 3.5, 4.5], "name": "x", "elapsed_ms": 4}}
+    assert payload_etag(payload, "application/json") == etag_for(dumps(payload), "application/json")
+    assert payload_etag(payload, "application/msgpack") == etag_for(packb(payload), "application/msgpack")
+
+
+def test_if_none_match_weak_comparison():
+    etag = etag_for(b'{"x": 1}', "application/json")
+    assert if_none_match(etag[:-1] + '-gzip"', etag) == etag[:-1] + '-gzip"'
+    assert if_none_match('W/"other"', etag) is None
+    assert if_none_match("*", etag) == etag
+
+
+def test_new_request_id_revalidates_to_304(client, run):
+    async def post(headers=None):
+        return await client.post(
+            "/api/agents/market/roi",
+            json={"molecule": "Metformin", "request_id": new_request_id(), "seed": 11},
+            headers=headers or {}
+        )
+
+    first = run(post())
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag == etag_for(first.content, "application/json")
+    revalidated = run(post({"If-None-Match": etag}))
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert not revalidated.content
+
+    other = run(client.post(
+        "/api/agents/market/roi",
+        json={"molecule": "Aspirin", "request_id": new_request_id(), "seed": 11},
+        headers={"If-None-Match": etag}
+    ))
+    assert other.status_code == 200
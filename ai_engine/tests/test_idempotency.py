@@ -0,0 +1,99 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.core.idempotency import Idempotency, ResponseStore, StoredResponse, request_key
+from tests.conftest import new_request_id
+
+RESPONSE = StoredResponse(200, "application/json", b'{"success": true}')
+
+
+@pytest.fixture
+def idempotency(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"), retention_seconds=60.0, pending_timeout=60.0)
+    yield Idempotency(store, max_stored_bytes=1_000_000)
+    store.close()
+
+
+def test_request_key_ignores_key_order_but_not_content():
+    key, payload_hash = request_key("POST", "/api/x", b'{"request_id": "r1", "molecule": "a", "n": 1}')
+    same = request_key("POST", "/api/x", b'{"n": 1, "molecule": "a", "request_id": "r1"}')
+    other = request_key("POST", "/api/x", b'{"request_id": "r1", "molecule": "b", "n": 1}')
+    assert same == (key, payload_hash)
+    assert other[0] == key and other[1] != payload_hash
+    assert request_key("POST", "/api/x", b'{"molecule": "a"}') is None
+
+
+def test_replay_after_completion(idempotency, run):
+    async def scenario():
+        first = await idempotency.begin("k", "h")
+        await idempotency.finish("k", RESPONSE)
+        return first, await idempotency.begin("k", "h")
+
+    first, second = run(scenario())
+    assert first == ("execute", None)
+    assert second == ("replayed", RESPONSE)
+
+
+def test_duplicate_attaches_to_the_original(idempotency, run):
+    async def scenario():
+        assert await idempotency.begin("k", "h") == ("execute", None)
+        duplicate = asyncio.ensure_future(idempotency.begin("k", "h"))
+        await asyncio.sleep(0.01)
+        assert not duplicate.done()
+        await idempotency.finish("k", RESPONSE)
+        return await duplicate
+
+    assert run(scenario()) == ("attached", RESPONSE)
+
+
+def test_failed_original_lets_the_duplicate_run(idempotency, run):
+    async def scenario():
+        await idempotency.begin("k", "h")
+        duplicate = asyncio.ensure_future(idempotency.begin("k", "h"))
+        await asyncio.sleep(0.01)
+        await idempotency.finish("k", None)
+        return await duplicate
+
+    assert run(scenario()) == ("execute", None)
+
+
+def test_different_payload_conflicts_in_flight_and_after(idempotency, run):
+    async def scenario():
+        await idempotency.begin("k", "h")
+        in_flight = await asyncio.wait_for(idempotency.begin("k", "other"), 1.0)
+        await idempotency.finish("k", RESPONSE)
+        return in_flight, await idempotency.begin("k", "other")
+
+    assert run(scenario()) == (("conflict", None), ("conflict", None))
+
+
+def test_store_error_falls_back_to_executing(idempotency, run, monkeypatch):
+    def broken(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(idempotency.store, "claim", broken)
+    monkeypatch.setattr(idempotency.store, "complete", broken)
+
+    async def scenario():
+        outcome = await idempotency.begin("k", "h")
+        await idempotency.finish("k", RESPONSE)
+        return outcome
+
+    assert run(scenario()) == ("execute", None)
+
+
+def test_endpoint_replays_and_rejects_reuse(client, run):
+    request_id = new_request_id()
+
+    async def post(molecule):
+        return await client.post("/api/agents/market/roi", json={"molecule": molecule, "request_id": request_id, "seed": 1})
+
+    first = run(post("Metformin"))
+    replay = run(post("Metformin"))
+    reused = run(post("Aspirin"))
+    assert first.status_code == 200 and "X-Idempotent-Replay" not in first.headers
+    assert replay.headers["X-Idempotent-Replay"] == "replayed"
+    assert replay.content == first.content
+    assert reused.status_code == 422
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.core import latency
+from app.core.latency import LatencyModel
+
+RECORDED = {"clinical.analyze": [1.4, 0.9, 1.1, 1.2], "vision.analyze": []}
+
+
+def test_zero_mode_never_waits(run, monkeypatch):
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(latency.asyncio, "sleep", sleep)
+    model = LatencyModel("zero", recorded=RECORDED)
+    assert model.delay("clinical.analyze", 0.8, 2.0) == 0.0
+    run(model.wait("clinical.analyze", 0.8, 2.0))
+    assert slept == []
+
+    run(LatencyModel("fixed", percentile=0.5).wait("patent.analyze", 0.3))
+    assert slept == [0.3]
+
+
+@pytest.mark.parametrize("percentile, expected", [(0.0, 0.9), (0.5, 1.2), (0.99, 1.4), (1.0, 1.4), (7.0, 1.4)])
+def test_fixed_mode_takes_a_percentile_of_the_samples(percentile, expected):
+    model = LatencyModel("fixed", percentile=percentile, scale=2.0, recorded=RECORDED)
+    assert model.delay("clinical.analyze", 0.0, 10.0) == pytest.approx(2.0 * expected)
+
+
+def test_fixed_mode_without_samples_uses_the_default_range():
+    model = LatencyModel("fixed", percentile=0.25, recorded=RECORDED)
+    # No samples for the key, or an empty list (dropped when loading)
+    assert model.delay("patent.analyze", 1.0, 3.0) == pytest.approx(1.5)
+    assert model.delay("vision.analyze", 1.0, 3.0) == pytest.approx(1.5)
+    assert "vision.analyze" not in model.recorded
+
+
+def test_recorded_mode_draws_from_samples_or_falls_back_to_uniform(monkeypatch):
+    model = LatencyModel("recorded", scale=0.5, recorded=RECORDED)
+    draws = {model.delay("clinical.analyze", 0.0, 0.0) for _ in range(200)}
+    assert draws == {0.45, 0.55, 0.6, 0.7}
+
+    monkeypatch.setattr(latency.random, "uniform", lambda low, high: (low + high) / 2)
+    assert model.delay("patent.analyze", 1.0, 3.0) == pytest.approx(1.0)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="fast"):
+        LatencyModel("fast")
+
+
+def test_from_settings_loads_the_recording(tmp_path, monkeypatch):
+    recording = tmp_path / "latency.json"
+    recording.write_text(json.dumps(RECORDED))
+    for name, value in {"LATENCY_MODE": "fixed", "LATENCY_PERCENTILE": 0.0, "LATENCY_SCALE": 1.0,
+                        "LATENCY_RECORDED_FILE": str(recording)}.items():
+        monkeypatch.setattr(latency.settings, name, value)
+    assert LatencyModel.from_settings().delay("clinical.analyze", 0.0, 10.0) == 0.9
+
+    # An unreadable recording leaves every key on its default range
+    recording.write_text("{not json")
+    assert LatencyModel.from_settings().recorded == {}
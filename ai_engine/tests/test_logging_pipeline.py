@@ -0,0 +1,98 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+import structlog
+
+from app.core import logging_pipeline
+from app.core.logging_pipeline import (
+    LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED_OUT, AsyncLogWriter, EventSampler, parse_sample_rates
+)
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("agent_completed=0.1, request_processed = 2,bad=x,novalue,") == {
+        "agent_completed": 0.1, "request_processed": 1.0
+    }
+    assert parse_sample_rates(None) == {} and parse_sample_rates("quiet=-1") == {"quiet": 0.0}
+
+
+@pytest.mark.parametrize("draw, kept", [(0.05, True), (0.1, False), (0.9, False)])
+def test_sampler_keeps_a_fraction_of_info_events(monkeypatch, draw, kept):
+    monkeypatch.setattr(logging_pipeline.random, "random", lambda: draw)
+    sampler = EventSampler({"agent_completed": 0.1})
+    before = LOG_RECORDS_SAMPLED_OUT.value(event="agent_completed")
+
+    if kept:
+        assert sampler(None, "info", {"event": "agent_completed"}) == {"event": "agent_completed", "sample_rate": 0.1}
+    else:
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "info", {"event": "agent_completed"})
+    assert LOG_RECORDS_SAMPLED_OUT.value(event="agent_completed") == before + (not kept)
+
+
+def test_sampler_never_drops_unlisted_events_or_warnings(monkeypatch):
+    monkeypatch.setattr(logging_pipeline.random, "random", lambda: 0.99)
+    sampler = EventSampler({"agent_completed": 0.0})
+    assert sampler(None, "info", {"event": "request_processed"}) == {"event": "request_processed"}
+    for level in ("warning", "error", "critical", "exception"):
+        assert sampler(None, level, {"event": "agent_completed"}) == {"event": "agent_completed"}
+
+
+def test_writer_renders_batches_and_reports_drops(tmp_path):
+    path = str(tmp_path / "logs" / "app.jsonl")
+    # Nothing drains until close, so the queue fills up
+    writer = AsyncLogWriter(path, max_queue_size=3, batch_size=2, flush_interval_seconds=60)
+    before = LOG_RECORDS_DROPPED.value()
+    for i in range(5):
+        writer.submit({"event": "tick", "i": i, "timestamp": 0.25})
+    writer.close()
+
+    lines = _lines(path)
+    assert [line["i"] for line in lines if "i" in line] == [0, 1, 2]
+    assert lines[0]["timestamp"] == "1970-01-01T00:00:00.250000Z"
+    # The first batch written after the drops reports them
+    assert lines[2] == {"event": "log_records_dropped", "level": "warning", "dropped_total": 2}
+    assert writer.dropped == 2 and LOG_RECORDS_DROPPED.value() == before + 2
+
+
+def test_writer_rotates_by_size(tmp_path):
+    path = str(tmp_path / "app.jsonl")
+    writer = AsyncLogWriter(path, batch_size=1, max_bytes=100, backup_count=2, flush_interval_seconds=60)
+    for i in range(4):
+        writer.submit({"event": "x" * 100, "i": i})
+    writer.close()
+
+    # Every record fills a file; the oldest beyond the two backups is gone
+    assert [line["i"] for line in _lines(f"{path}.1")] == [3]
+    assert [line["i"] for line in _lines(f"{path}.2")] == [2]
+    assert _lines(path) == [] and not (tmp_path / "app.jsonl.3").exists()
+
+
+def test_json_mode_queues_sampled_records(tmp_path, monkeypatch):
+    saved = structlog.get_config()
+    monkeypatch.setattr(logging_pipeline, "_writer", None)
+    settings = SimpleNamespace(
+        LOG_LEVEL="INFO", LOG_FORMAT="json", LOG_FILE=str(tmp_path / "app.jsonl"), LOG_SAMPLE_RATES="noisy=0",
+        LOG_QUEUE_SIZE=100, LOG_BATCH_SIZE=10, LOG_ROTATE_BYTES=0, LOG_BACKUP_COUNT=0
+    )
+    try:
+        writer = logging_pipeline.configure_logging(settings)
+        logger = structlog.get_logger("pipeline-test")
+        logger.info("noisy", n=1)
+        logger.info("kept", n=2)
+        logger.warning("noisy", n=3)
+        logger.debug("filtered", n=4)
+        logging_pipeline.shutdown_logging()
+    finally:
+        structlog.configure(**saved)
+
+    assert writer is not None
+    lines = _lines(settings.LOG_FILE)
+    assert [(line["event"], line["n"], line["level"]) for line in lines] == [("kept", 2, "info"), ("noisy", 3, "warning")]
+    assert all(line["timestamp"].endswith("Z") for line in lines)
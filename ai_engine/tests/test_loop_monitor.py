@@ -0,0 +1,98 @@
+import asyncio
+import importlib.util
+import sys
+import time
+
+import pytest
+
+from app.core import loop_monitor
+from app.core.loop_monitor import EVENT_LOOP_BLOCKS, EventLoopMonitor
+
+AGENT_SOURCE = '''
+def _analyze_slowly(work):
+    return work()
+'''
+
+MAIN_SOURCE = '''
+import fake_agent
+
+
+def analyze_endpoint(work):
+    return fake_agent._analyze_slowly(work)
+'''
+
+
+@pytest.fixture
+def fake_app(tmp_path, monkeypatch):
+    """A stand-in app directory: agents/fake_agent.py called from main.py."""
+    (tmp_path / "agents").mkdir()
+    (tmp_path / "agents" / "fake_agent.py").write_text(AGENT_SOURCE)
+    (tmp_path / "main.py").write_text(MAIN_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path / "agents"))
+    monkeypatch.delitem(sys.modules, "fake_agent", raising=False)
+    spec = importlib.util.spec_from_file_location("fake_main", tmp_path / "main.py")
+    main = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(main)
+
+    monkeypatch.setattr(loop_monitor, "_APP_DIR", str(tmp_path))
+    monkeypatch.setattr(loop_monitor, "_AGENTS_DIR", str(tmp_path / "agents"))
+    monkeypatch.setattr(loop_monitor, "_MAIN_FILE", str(tmp_path / "main.py"))
+    return main
+
+
+def test_attribute_stack(fake_app):
+    capture = fake_app.analyze_endpoint(lambda: loop_monitor.attribute_stack(sys._getframe()))
+    assert capture["agent"] == "fake_agent"
+    assert capture["route"] == "analyze_endpoint"
+    # The innermost frame under the app directory, not the test's lambda
+    assert capture["culprit"].endswith("fake_agent.py:3 _analyze_slowly")
+
+    assert loop_monitor.attribute_stack(sys._getframe()) == {"agent": None, "route": None, "culprit": None}
+
+
+def test_blocking_call_is_attributed_to_the_agent_and_route(fake_app, run):
+    monitor = EventLoopMonitor(interval_seconds=0.01, block_threshold_seconds=0.05)
+    before = EVENT_LOOP_BLOCKS.value(agent="fake_agent", route="analyze_endpoint")
+
+    async def scenario():
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            fake_app.analyze_endpoint(lambda: time.sleep(0.3))
+            await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+
+    run(scenario())
+    report = monitor.report()
+    [offender] = report["worst_offenders"]
+    assert (offender["agent"], offender["route"], offender["count"]) == ("fake_agent", "analyze_endpoint", 1)
+    assert offender["max_blocked_ms"] >= 250 and "_analyze_slowly" in offender["stack"]
+    assert report["max_lag_ms"] >= 250 and report["blocks_recorded"] == 1
+    # The application's own monitor may be watching the same loop and count the stall too
+    assert EVENT_LOOP_BLOCKS.value(agent="fake_agent", route="analyze_endpoint") >= before + 1
+
+
+def _capture(culprit):
+    return {"agent": "clinical_agent", "route": "analyze", "culprit": culprit, "stack": f"stack of {culprit}"}
+
+
+def test_offenders_keep_the_worst_stalls():
+    monitor = EventLoopMonitor(max_offenders=2)
+    monitor._record_block(_capture("a"), 0.2)
+    monitor._record_block(_capture("a"), 0.4)
+    monitor._record_block(_capture("b"), 0.3)
+    # Full: a smaller new stall is ignored, a larger one evicts the smallest (b)
+    monitor._record_block(_capture("c"), 0.1)
+    monitor._record_block(_capture("d"), 0.5)
+
+    report = monitor.report()
+    assert [(e["culprit"], e["count"], e["max_blocked_ms"]) for e in report["worst_offenders"]] == [
+        ("d", 1, 500.0), ("a", 2, 400.0)
+    ]
+    assert report["worst_offenders"][1]["total_blocked_ms"] == 600.0
+    assert report["blocks_recorded"] == 3
+    assert monitor.report(limit=1)["worst_offenders"][0]["culprit"] == "d"
+
+    monitor._record_block({"agent": None, "route": None, "culprit": None, "stack": ""}, 0.6)
+    assert monitor.report()["worst_offenders"][0]["culprit"] == "outside app"
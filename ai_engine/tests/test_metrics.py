@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+
+from app.core.metrics import MetricsRegistry
+
+
+def _registry(multiproc_dir=None):
+    registry = MetricsRegistry(multiproc_dir=multiproc_dir)
+    requests = registry.counter("app_requests_total", "Requests", ("route",))
+    in_flight = registry.gauge("app_in_flight", "In flight")
+    latency = registry.histogram("app_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    return registry, requests, in_flight, latency
+
+
+def test_exposition_format():
+    registry, requests, in_flight, latency = _registry()
+    requests.inc(route="/api/analyze")
+    requests.inc(2, route='/a"b\\c')
+    in_flight.set(3)
+    in_flight.dec(0.5)
+    for value in (0.05, 0.1, 0.5, 7.0):
+        latency.observe(value, route="/api/analyze")
+    cache = registry.counter("pharmalens_cache_requests_total", "Cache lookups", ("cache", "result"))
+    cache.inc(3, cache="landscape", result="hit")
+    cache.inc(cache="landscape", result="miss")
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == [
+        "# HELP app_requests_total Requests",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{route="/api/analyze"} 1',
+        'app_requests_total{route="/a\\"b\\\\c"} 2'
+    ]
+    assert "app_in_flight 2.5" in lines
+    # Buckets are cumulative; bisect_left puts a value equal to a bound in that bucket
+    assert [line for line in lines if line.startswith("app_latency_seconds")] == [
+        'app_latency_seconds_bucket{route="/api/analyze",le="0.1"} 2',
+        'app_latency_seconds_bucket{route="/api/analyze",le="1"} 3',
+        'app_latency_seconds_bucket{route="/api/analyze",le="+Inf"} 4',
+        'app_latency_seconds_sum{route="/api/analyze"} 7.65',
+        'app_latency_seconds_count{route="/api/analyze"} 4'
+    ]
+    assert 'pharmalens_cache_hit_ratio{cache="landscape"} 0.75' in lines
+    assert latency.mean(route="/api/analyze") == 7.65 / 4 and latency.mean(route="/other") == 0
+
+
+def test_snapshot_is_a_copy():
+    registry, _, _, latency = _registry()
+    latency.observe(0.5, route="/")
+    snapshot = registry.snapshot()
+    latency.observe(0.5, route="/")
+    assert snapshot["app_latency_seconds"]["values"] == [[["/"], [[0, 1, 0], 0.5]]]
+
+
+def test_workers_snapshots_are_merged(tmp_path):
+    registry, requests, in_flight, latency = _registry(str(tmp_path))
+    requests.inc(route="/api/analyze")
+    latency.observe(0.05, route="/api/analyze")
+    in_flight.set(1)
+
+    # Another worker's snapshot, with a label set this worker has not seen
+    other, other_requests, other_in_flight, other_latency = _registry()
+    other_requests.inc(4, route="/api/analyze")
+    other_requests.inc(route="/health")
+    other_latency.observe(2.0, route="/api/analyze")
+    other_in_flight.set(2)
+    with open(tmp_path / "metrics_99999.json", "w", encoding="utf-8") as f:
+        json.dump(other.snapshot(), f)
+    # Unreadable snapshots (a worker killed mid-write) are skipped
+    (tmp_path / "metrics_99998.json").write_text("{")
+
+    merged = registry.collect()
+    assert sorted((tuple(labels), value) for labels, value in merged["app_requests_total"]["values"]) == [
+        (("/api/analyze",), 5.0), (("/health",), 1.0)
+    ]
+    assert merged["app_in_flight"]["values"] == [[[], 3.0]]
+    assert merged["app_latency_seconds"]["values"] == [[["/api/analyze"], [[1, 0, 1], 2.05]]]
+    assert os.path.exists(tmp_path / f"metrics_{os.getpid()}.json")
+
+    # Merging must not write into either worker's own values
+    assert requests.value(route="/api/analyze") == 1 and in_flight.value() == 1
+    registry.remove_snapshot()
+    assert not os.path.exists(tmp_path / f"metrics_{os.getpid()}.json")
+
+
+def test_concurrent_recording_loses_no_updates():
+    registry, requests, in_flight, latency = _registry()
+    threads, rounds = 8, 5000
+
+    def record():
+        for _ in range(rounds):
+            requests.inc(route="/")
+            in_flight.inc()
+            latency.observe(0.5, route="/")
+
+    workers = [threading.Thread(target=record) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert requests.value(route="/") == in_flight.value() == threads * rounds
+    [[_, (buckets, total)]] = registry.snapshot()["app_latency_seconds"]["values"]
+    assert buckets == [0, threads * rounds, 0] and total == 0.5 * threads * rounds
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from app.agents import patent_agent
+from app.agents.patent_agent import PatentAgent
+from app.services import claim_screening, patent_graph, patent_index
+from app.services.claim_screening import ClaimScreeningIndex
+from app.services.patent_graph import PatentGraph
+from app.services.patent_index import PatentIndex
+
+COMPOSITION = "A pharmaceutical composition comprising Metformin and a pharmaceutically acceptable carrier."
+COMPOUND = "A compound which is Metformin or a pharmaceutically acceptable salt thereof."
+
+
+def _patent(number, claims, assignee="Acme Pharma", expiry="2040-01-01", **links):
+    return {
+        "number": number, "title": f"Patent {number}", "claims": claims, "assignee": assignee,
+        "filing_date": "2020-01-01", "grant_date": "2022-01-01", "expiry_date": expiry, **links
+    }
+
+
+# US1 claims metformin itself. US3 opens with a Process claim, so the
+# landscape does not count it, but its second claim duplicates a candidate
+# claim. US2 continues US1's application; US4 is a third party citing US1.
+PATENTS = [
+    _patent("US1", [COMPOSITION], application_number="A1"),
+    _patent("US2", ["An extended-release tablet comprising a swellable matrix."], related_applications=["A1"]),
+    _patent("US3", ["A process for preparing metformin by crystallisation.", COMPOUND], assignee="Rival Inc"),
+    _patent("US4", ["A compound of formula I."], assignee="Rival Inc", citations=["US1"])
+]
+
+
+@pytest.fixture
+def services(tmp_path, monkeypatch):
+    path = str(tmp_path / "patents.sqlite3")
+    with open(tmp_path / "patents.json", "w", encoding="utf-8") as f:
+        json.dump(PATENTS, f)
+    patent_index.build_index([str(tmp_path / "patents.json")], path)
+    patent_graph.build_graph(path, str(tmp_path / "graph"))
+    claim_screening.build_index(path, str(tmp_path / "claims"))
+
+    index = PatentIndex(path)
+    graph = PatentGraph(str(tmp_path / "graph"), index)
+    claims = ClaimScreeningIndex(str(tmp_path / "claims"), index)
+    monkeypatch.setattr(patent_agent, "get_patent_index", lambda: index)
+    monkeypatch.setattr(patent_agent, "get_patent_graph", lambda: graph)
+    monkeypatch.setattr(patent_agent, "get_claim_index", lambda: claims)
+    monkeypatch.setattr(patent_agent, "get_patent_cliff_index", lambda: None)
+    return index, graph, claims
+
+
+def test_local_index_merges_landscape_and_claim_screening(run, services):
+    result = run(PatentAgent()._query_patent_index("Metformin"))
+
+    assert result["patent_data_source"] == "local_patent_index"
+    assert result["total_patents"] == 2 and result["active_patents"] == 2
+    # US1 blocks in both the landscape and the screening; US3 only through its duplicated claim
+    assert result["blocking_patent_numbers"] == ["US1", "US3"]
+    assert result["blocking_patents"] == 2 and result["fto_score"] == 6.5
+    assert (result["freedom_to_operate"], result["ip_risk_level"]) == ("Moderate Risk", "Medium")
+    assert result["claim_screening"]["blocking_patents"] == 2
+    assert result["geographic_coverage"]["us"] and not result["geographic_coverage"]["eu"]
+
+    families = result["patent_families"]
+    assert families["blocking_families"] == 1 and families["continuations_in_force"] == 1
+    assert [cluster["holders"] for cluster in families["litigation_clusters"]] == [["Rival Inc"]]
+
+
+def test_screen_claims_uses_the_threshold(run, services):
+    agent = PatentAgent()
+    screened = run(agent.screen_claims([COMPOUND]))
+    assert screened["blocking_patents"] == 1 and screened["freedom_to_operate"] == "Moderate Risk"
+    # A quarter of the shingles differ: below the default threshold, blocking under a looser one
+    variant = COMPOUND.replace("thereof", "or solvate thereof")
+    assert run(agent.screen_claims([variant]))["freedom_to_operate"] == "Clear"
+    assert run(agent.screen_claims([variant], threshold=0.7))["blocking_patents"] == 1
+
+
+def test_analyze_without_local_indexes_is_simulated(run, monkeypatch):
+    for getter in ("get_patent_index", "get_patent_graph", "get_claim_index", "get_patent_cliff_index"):
+        monkeypatch.setattr(patent_agent, getter, lambda: None)
+    agent = PatentAgent()
+
+    result = run(agent.analyze("Metformin", {"provider": "openai", "model": "gpt-4"}))
+    assert result["patent_data_source"] == "simulated" and result["molecule"] == "Metformin"
+    assert run(agent.screen_claims([COMPOUND])) is None
+
+
+@pytest.mark.parametrize("blocking, status", [(0, ("Clear", "Low")), (2, ("Moderate Risk", "Medium")), (3, ("High Risk", "High"))])
+def test_fto_status(blocking, status):
+    assert PatentAgent._fto_status(blocking) == status
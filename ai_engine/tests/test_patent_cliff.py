@@ -0,0 +1,106 @@
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.services.patent_cliff import PatentCliffBuilder, PatentCliffIndex, build_index, day
+from tests.conftest import new_request_id
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    builder = PatentCliffBuilder()
+    # Windows are keyed by active-moiety key (see molecule_key)
+    # Alpha: two overlapping patents, protected 2005 through 2027
+    builder.add("ALPHA", date(2005, 1, 1), date(2020, 6, 30), "substance_patent", "US1")
+    builder.add("ALPHA", date(2015, 1, 1), date(2027, 3, 31), "use_patent", "US2")
+    # Beta: a patent, a gap in 2019, then an exclusivity ending in 2028
+    builder.add("BETA", date(2010, 1, 1), date(2018, 12, 31), "product_patent", "US3")
+    builder.add("BETA", date(2020, 1, 1), date(2028, 7, 1), "exclusivity", "NCE")
+    # Gamma: already unprotected by 2015
+    builder.add("GAMMA", date(2000, 1, 1), date(2014, 12, 31), "patent", "US4")
+    directory = tmp_path_factory.mktemp("cliff")
+    builder.write(str(directory))
+    return PatentCliffIndex(str(directory))
+
+
+def test_coverage_is_merged(index):
+    alpha = index.ids["ALPHA"]
+    lo, hi = index.coverage_offsets[alpha], index.coverage_offsets[alpha + 1]
+    assert hi - lo == 1
+    assert index.coverage_ends[lo] == day(date(2027, 3, 31))
+
+
+def test_overlaps(index):
+    ids = index.molecule_ids(["Alpha", "Beta", "Gamma"])
+    assert index.overlaps(ids, date(2019, 3, 1), date(2019, 6, 1)).tolist() == [True, False, False]
+    assert index.overlaps(ids, date(2026, 1, 1), date(2026, 12, 31)).tolist() == [True, True, False]
+
+
+def test_losing_exclusivity_window(index):
+    found = index.losing_exclusivity(date(2027, 1, 1), date(2028, 12, 31))
+    assert [index.molecule_names[i] for i in found] == ["ALPHA", "BETA"]
+    ids = index.molecule_ids(["beta"])
+    assert index.losing_exclusivity(date(2028, 1, 1), date(2028, 12, 31), ids).tolist() == ids.tolist()
+    assert len(index.losing_exclusivity(date(2021, 1, 1), date(2026, 12, 31))) == 0
+
+
+def test_timeline_fractions(index):
+    coverage = index.timeline(index.molecule_ids(["beta"]), [2018, 2019, 2020])
+    assert coverage[0].tolist() == pytest.approx([1.0, 0.0, 1.0])
+
+
+def test_cliff_report(index):
+    report = index.cliff(["Alpha", "Beta", "Gamma", "Delta"], 2027, 2028)
+    assert report["losing_exclusivity_count"] == 2
+    assert report["losses_by_year"] == {2027: 1, 2028: 1}
+    assert report["already_unprotected"] == 1
+    assert report["not_found"] == ["Delta"]
+    assert [e["molecule"] for e in report["losing_exclusivity"]] == ["Alpha", "Beta"]
+
+
+def test_repeated_exclusivity_codes_stay_separate(tmp_path):
+    source = tmp_path / "orange_book"
+    source.mkdir()
+    (source / "products.txt").write_text(
+        "Ingredient~Appl_Type~Appl_No~Product_No~Approval_Date\n"
+        "DELTAMAB~N~011111~001~Jan 1, 2000\n"
+        "DELTAMAB~N~011111~002~Jan 1, 2010\n"
+    )
+    # The same code on two products: 2000-2003 and 2010-2013, with a gap between
+    (source / "exclusivity.txt").write_text(
+        "Appl_Type~Appl_No~Product_No~Exclusivity_Code~Exclusivity_Date\n"
+        "N~011111~001~NP~Jan 1, 2003\n"
+        "N~011111~002~NP~Jan 1, 2013\n"
+    )
+    meta = build_index(str(tmp_path / "index"), orange_book=[str(source)])
+    index = PatentCliffIndex(str(tmp_path / "index"))
+    assert meta["windows"] == 2
+    coverage = index.timeline(index.molecule_ids(["deltamab"]), [2001, 2005, 2011])
+    assert coverage[0].tolist() == pytest.approx([1.0, 0.0, 1.0])
+
+
+def test_rewrite_swaps_the_directory_under_open_indexes(tmp_path):
+    builder = PatentCliffBuilder()
+    builder.add("ALPHA", date(2005, 1, 1), date(2020, 6, 30), "substance_patent", "US1")
+    directory = str(tmp_path / "cliff")
+    builder.write(directory)
+    index = PatentCliffIndex(directory)
+    before = np.array(index.ends)
+
+    builder.add("BETA", date(2010, 1, 1), date(2018, 12, 31), "product_patent", "US3")
+    builder.write(directory)
+    # The open index keeps what it loaded; a new one sees the complete rewrite
+    assert np.array_equal(index.ends, before) and len(index) == 1
+    assert len(PatentCliffIndex(directory)) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".cliff.")]
+
+
+@pytest.mark.parametrize("years", [[0], [2020, 10000]])
+def test_timeline_years_are_bounded(client, run, years):
+    response = run(client.post(
+        "/api/portfolio/patent-cliff",
+        json={"start_year": 2025, "end_year": 2030, "timeline_years": years, "request_id": new_request_id()}
+    ))
+    assert response.status_code == 422
@@ -0,0 +1,148 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.services import patent_index
+from app.services.patent_graph import PatentGraph, _components, _csr, build_graph
+from app.services.patent_index import PatentIndex
+
+TODAY = date(2026, 1, 1)
+
+COMPOSITION = "A pharmaceutical composition comprising metformin and a carrier."
+FORMULATION = "An extended-release tablet comprising a swellable polymer matrix."
+PROCESS = "A process for preparing a biguanide salt by crystallisation."
+OTHER = "A compound of formula I for inhibiting a kinase."
+
+
+def _patent(number, claims, assignee="Acme Pharma", expiry="2035-01-01", **links):
+    return {
+        "number": number, "title": f"Patent {number}", "claims": [claims], "assignee": assignee,
+        "filing_date": "2015-01-01", "grant_date": "2017-01-01", "status": "granted", "expiry_date": expiry, **links
+    }
+
+
+# Core family of US10 (the patent claiming metformin): US11 continues its
+# application, US12 and US13 share its family id. Citing families: US20+US21
+# (a third party, one link) and US30 (the core holder, three links). US40
+# cites US20, two hops from the core. US50 also claims metformin, but expired.
+PATENTS = [
+    _patent("US10", COMPOSITION, application_number="A10", family_id="F1"),
+    _patent("US11", FORMULATION, application_number="A11", related_applications=["A10"]),
+    _patent("US12", PROCESS, family_id="F1"),
+    _patent("US13", FORMULATION, family_id="F1", expiry="2020-01-01"),
+    _patent("US20", OTHER, assignee="Rival Inc", application_number="A20", citations=["US10"]),
+    _patent("US21", OTHER, assignee="Rival Inc", related_applications=["A20"]),
+    _patent("US30", OTHER, citations=["US10", "US11", "US12"]),
+    _patent("US40", OTHER, assignee="Third Co", citations=["US20"]),
+    _patent("US50", COMPOSITION, expiry="2019-01-01"),
+    _patent("US60", OTHER, assignee="Unlinked Ltd")
+]
+
+
+def _build(tmp_path, records=PATENTS):
+    path = str(tmp_path / "patents.sqlite3")
+    source = str(tmp_path / "patents.json")
+    with open(source, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    patent_index.build_index([source], path)
+    directory = str(tmp_path / "graph")
+    meta = build_graph(path, directory)
+    return PatentGraph(directory, PatentIndex(path)), meta
+
+
+@pytest.fixture
+def graph(tmp_path):
+    return _build(tmp_path)[0]
+
+
+def _numbers(graph, nodes):
+    ids = np.asarray(graph.node_ids[np.asarray(nodes)]).tolist()
+    return sorted(row["number"] for row in graph.patent_index.patents(ids).values())
+
+
+def _node(graph, number):
+    (found,) = [i for i, row in graph.patent_index.patents(np.asarray(graph.node_ids).tolist()).items() if row["number"] == number]
+    return int(graph.nodes([found])[0])
+
+
+def test_csr_deduplicates_and_sorts():
+    offsets, targets = _csr(np.array([2, 0, 2, 0, 2]), np.array([1, 3, 0, 3, 1]), 4)
+    assert offsets.tolist() == [0, 1, 1, 3, 3]
+    assert targets.tolist() == [3, 0, 1]
+
+
+def test_components_label_by_smallest_member():
+    # 0-1-2 chained in reverse order, 3 alone, 4-5
+    labels = _components(np.array([2, 1, 5]), np.array([1, 0, 4]), 6)
+    assert labels.tolist() == [0, 0, 0, 3, 4, 4]
+
+
+def test_build_groups_families(tmp_path):
+    graph, meta = _build(tmp_path)
+    assert meta["patents"] == len(PATENTS)
+    assert meta["citations"] == 5
+    # {US10..US13}, {US20, US21} and four single-patent families
+    assert meta["families"] == 6 and meta["multi_patent_families"] == 2
+    core = graph.family_closure(np.array([_node(graph, "US10")]))
+    assert _numbers(graph, core) == ["US10", "US11", "US12", "US13"]
+
+
+def test_expand_levels_depth_and_budget(graph):
+    core = np.array([_node(graph, "US10")])
+    nodes, levels, truncated = graph.expand(core)
+    reached = dict(zip(_numbers(graph, nodes), levels.tolist()))
+
+    assert not truncated
+    assert {n for n, level in reached.items() if level == 0} == {"US10", "US11", "US12", "US13"}
+    assert {n for n, level in reached.items() if level == 1} == {"US20", "US21", "US30"}
+    assert {n for n, level in reached.items() if level == 2} == {"US40"}
+    assert "US60" not in reached
+
+    nodes, levels, truncated = graph.expand(core, depth=1)
+    assert len(nodes) == 7 and not truncated
+    nodes, levels, truncated = graph.expand(core, max_nodes=5)
+    assert truncated and len(nodes) == 5 and (levels == 0).sum() == 4
+
+
+def test_family_landscape(graph):
+    landscape = graph.family_landscape("metformin", today=TODAY)
+
+    assert landscape.core_patents == 2  # US10 and the expired US50
+    assert landscape.core_families == 2
+    # In force and not Process: US10 and US11 of the F1 family; US50 has expired
+    assert landscape.blocking_families == 1
+    assert landscape.blocking_family_members == 2
+    # US11 and US12 are in force in the core family without claiming the molecule
+    assert landscape.continuations_in_force == 2
+    assert landscape.reached_patents == 9
+    assert not landscape.truncated
+
+    clusters = landscape.litigation_clusters
+    assert [c["citation_links"] for c in clusters] == [3, 1]
+    assert clusters[0]["holders"] == ["Acme Pharma"] and not clusters[0]["third_party"]
+    assert clusters[1]["patents"] == 2 and clusters[1]["in_force"] == 2
+    assert clusters[1]["holders"] == ["Rival Inc"] and clusters[1]["third_party"]
+
+
+def test_family_landscape_is_cached_per_day(graph):
+    first = graph.family_landscape("Metformin", today=TODAY)
+    assert graph.family_landscape("  metformin ", today=TODAY) is first
+
+    later = graph.family_landscape("metformin", today=date(2036, 1, 1))
+    assert later is not first
+    assert later.blocking_families == 0 and later.litigation_clusters == []
+    assert graph.family_landscape("unknown molecule", today=TODAY).core_patents == 0
+
+
+def test_rebuild_swaps_the_directory_under_open_graphs(tmp_path):
+    graph, _ = _build(tmp_path)
+    before = np.array(graph.family)
+
+    rebuilt, meta = _build(tmp_path, [_patent("US70", OTHER)])
+    # The open graph still reads the arrays it mapped; a new one sees the rebuild
+    assert np.array_equal(graph.family, before) and len(graph) == len(PATENTS)
+    assert meta["patents"] == len(PATENTS) + 1 and len(rebuilt) == len(PATENTS) + 1
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".graph.")]
@@ -0,0 +1,189 @@
+import json
+import sqlite3
+import xml.etree.ElementTree as ET
+from datetime import date
+
+import pytest
+
+from app.services import patent_index
+from app.services.patent_index import PatentIndex, PatentRecord, iter_patents
+
+TODAY = date(2026, 1, 1)
+
+GRANT = """<?xml version="1.0" encoding="UTF-8"?>
+<us-patent-grant>
+  <us-bibliographic-data-grant>
+    <publication-reference><document-id>
+      <country>US</country><doc-number>09012345</doc-number><kind>B2</kind><date>20150414</date>
+    </document-id></publication-reference>
+    <application-reference><document-id>
+      <country>US</country><doc-number>13/456,789</doc-number><date>20120301</date>
+    </document-id></application-reference>
+    <us-term-of-grant><us-term-extension>412</us-term-extension></us-term-of-grant>
+    <us-related-documents>
+      <continuation><relation><parent-doc><document-id><doc-number>12/000,111</doc-number></document-id></parent-doc></relation></continuation>
+      <us-provisional-application><document-id><doc-number>61/222,333</doc-number></document-id></us-provisional-application>
+    </us-related-documents>
+    <invention-title>Extended-release   metformin tablet</invention-title>
+    <us-references-cited>
+      <us-citation><patcit><document-id><country>US</country><doc-number>07000001</doc-number></document-id></patcit></us-citation>
+      <us-citation><patcit><document-id><country>EP</country><doc-number>1234567</doc-number></document-id></patcit></us-citation>
+    </us-references-cited>
+    <assignees><assignee><addressbook><orgname> Acme Pharma </orgname></addressbook></assignee></assignees>
+  </us-bibliographic-data-grant>
+  <abstract><p>A tablet releasing <b>metformin</b> over twelve hours.</p></abstract>
+  <claims>
+    <claim id="CLM-1"><claim-text>1. An extended-release tablet comprising metformin.</claim-text></claim>
+    <claim id="CLM-2"><claim-text>2. The tablet of <claim-ref idref="CLM-1">claim 1</claim-ref>, scored.</claim-text></claim>
+  </claims>
+</us-patent-grant>
+"""
+
+APPLICATION = """<?xml version="1.0" encoding="UTF-8"?>
+<us-patent-application>
+  <us-bibliographic-data-application>
+    <publication-reference><document-id>
+      <country>US</country><doc-number>20200123456</doc-number><kind>A1</kind><date>20200416</date>
+    </document-id></publication-reference>
+    <application-reference><document-id><doc-number>16/555,666</doc-number><date>20190110</date></document-id></application-reference>
+    <invention-title>Metformin salt</invention-title>
+  </us-bibliographic-data-application>
+  <claims><claim><claim-text>1. A process for preparing metformin salt.</claim-text></claim></claims>
+</us-patent-application>
+"""
+
+
+def _patent(number, claims, assignee="Acme Pharma", expiry="2035-01-01", country=None, **extra):
+    return {
+        "number": number, "title": f"Patent {number}", "claims": claims, "assignee": assignee,
+        "filing_date": "2015-01-01", "grant_date": "2017-01-01", "expiry_date": expiry,
+        **({"country": country} if country else {}), **extra
+    }
+
+
+# Metformin patents: Acme holds a composition and a formulation patent in
+# force, plus an expired one; Rival holds a process patent and an EP
+# method-of-use patent; a JP patent only mentions metformin in its title.
+PATENTS = [
+    _patent("US100", ["A pharmaceutical composition comprising metformin."], term_extension_days=300),
+    _patent("US101", ["An extended-release tablet comprising metformin."], expiry="2030-06-30"),
+    _patent("US102", ["A pharmaceutical composition comprising metformin."], expiry="2020-01-01"),
+    _patent("US103", ["A process for preparing metformin hydrochloride."], assignee="Rival Inc"),
+    _patent("EP200", ["A method of treating obesity with metformin."], assignee="Rival Inc"),
+    _patent("JP300", ["A compound of formula I."], assignee="Nippon Co", title="Metformin combinations"),
+    {"number": "US20200999", "title": "Metformin salt", "claims": ["A salt of metformin."], "filing_date": "2019-01-01"},
+    _patent("US400", ["A compound for inhibiting a kinase."])
+]
+
+
+def _ingest(path, records):
+    source = f"{path}.{len(records)}.json"
+    with open(source, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    return patent_index.build_index([source], path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "patents.sqlite3")
+    _ingest(path, PATENTS)
+    return PatentIndex(path)
+
+
+def test_from_uspto_xml_grant():
+    record = PatentRecord.from_uspto_xml(ET.fromstring(GRANT.encode()))
+    assert (record.number, record.country, record.kind, record.status) == ("US9012345", "US", "B2", "granted")
+    assert record.title == "Extended-release metformin tablet"
+    assert record.abstract == "A tablet releasing metformin over twelve hours."
+    assert record.independent_claims == 1 and len(record.claims) == 2
+    assert record.assignee == "Acme Pharma"
+    assert (record.filing_date, record.grant_date) == ("2012-03-01", "2015-04-14")
+    # Twenty years from filing plus the term extension
+    assert record.term_extension_days == 412 and record.expiry_date == "2033-04-17"
+    assert record.application_number == "13456789"
+    assert record.related_applications == ["12000111", "61222333"]
+    assert record.citations == ["US7000001", "EP1234567"]
+
+
+def test_from_uspto_xml_application_and_bulk_file(tmp_path):
+    record = PatentRecord.from_uspto_xml(ET.fromstring(APPLICATION.encode()))
+    assert record.status == "pending" and record.grant_date is None and record.expiry_date is None
+    assert record.number == "US20200123456"
+    assert PatentRecord.from_uspto_xml(ET.fromstring(b"<us-patent-grant/>")) is None
+
+    # Bulk files concatenate documents; broken ones are skipped
+    bulk = tmp_path / "ipg.xml"
+    bulk.write_text(GRANT + '<?xml version="1.0"?>\n<us-patent-grant><broken>\n' + APPLICATION)
+    assert [r.number for r in iter_patents(str(bulk))] == ["US9012345", "US20200123456"]
+
+
+def test_from_json():
+    record = PatentRecord.from_json({
+        "publication_number": "US-8 123 456",
+        "claims": "1. A compound of formula I.\n2. The compound of claim 1, as a salt.\n3. A method of use.",
+        "assignees": [{"name": "Acme Pharma"}],
+        "filing_date": "20100301",
+        "grant_date": "2012-05-01",
+        "status": "Expired",
+        "related_applications": ["12/345,678"],
+        "citations": ["US-7 000 001"]
+    })
+    assert record.number == "US8123456" and record.country == "US"
+    assert record.status == "granted" and record.independent_claims == 2
+    assert record.claims[1] == "2. The compound of claim 1, as a salt."
+    assert record.assignee == "Acme Pharma"
+    assert record.filing_date == "2010-03-01" and record.expiry_date == "2030-03-01"
+    assert record.related_applications == ["12345678"] and record.citations == ["US7000001"]
+
+    extended = PatentRecord.from_json({"number": "EP1", "filing_date": "2012-02-29", "grant_date": "2014-01-01", "term_extension_days": 10})
+    assert extended.country == "EP" and extended.expiry_date == "2032-03-10"
+    # Dates that do not exist are dropped
+    assert PatentRecord.from_json({"number": "US3", "filing_date": "20100229"}).filing_date is None
+    assert PatentRecord.from_json({"title": "No number"}) is None
+    assert PatentRecord.from_json({"number": "US2"}).status == "pending"
+
+
+def test_reingest_replaces_text_and_links(tmp_path):
+    path = str(tmp_path / "patents.sqlite3")
+    _ingest(path, [_patent("US1", ["A composition comprising metformin."], citations=["US9"], family_id="F1")])
+    stats = _ingest(path, [_patent("US1", ["A composition comprising sitagliptin."], citations=["US8"])])
+    assert stats["patents"] == 1
+
+    index = PatentIndex(path)
+    assert index.landscape("metformin", today=TODAY).total_patents == 0
+    assert index.landscape("sitagliptin", today=TODAY).total_patents == 1
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM patent_text").fetchone()[0] == 1
+        assert conn.execute("SELECT relation, target FROM patent_links").fetchall() == [("cites", "US8")]
+
+
+def test_landscape(index):
+    landscape = index.landscape("Metformin", today=TODAY)
+
+    assert landscape.total_patents == 7
+    # In force: US100, US101, US103, EP200 and JP300; US102 has expired and US20200999 is pending
+    assert landscape.active_patents == 5
+    assert landscape.pending_applications == 1
+    assert (landscape.earliest_expiration, landscape.latest_expiration) == ("2030-06-30", "2035-01-01")
+    assert landscape.patent_term_extensions
+    # The Process patent and JP300 (metformin only in its title) do not block
+    assert landscape.blocking_patents == 3
+    assert sorted(landscape.blocking_patent_numbers) == ["EP200", "US100", "US101"]
+    assert landscape.key_patent_holders == [
+        {"company": "Acme Pharma", "patent_count": 2, "key_claims": "Composition"},
+        {"company": "Rival Inc", "patent_count": 2, "key_claims": "Method of Use"},
+        {"company": "Nippon Co", "patent_count": 1, "key_claims": "Composition"}
+    ]
+    assert landscape.geographic_coverage == {"us": True, "eu": True, "japan": True, "china": False, "row": False}
+    assert landscape.upcoming_expirations[0]["number"] == "US101"
+
+
+def test_landscape_counts_follow_expiry(index):
+    later = index.landscape("metformin", today=date(2031, 1, 1))
+    assert later.total_patents == 7 and later.active_patents == 4
+    assert later.blocking_patent_numbers and "US101" not in later.blocking_patent_numbers
+    assert index.landscape("metformin", holders=1, today=TODAY).key_patent_holders[0]["company"] == "Acme Pharma"
+
+    expired = index.landscape("metformin", today=date(2040, 1, 1))
+    assert expired.active_patents == expired.blocking_patents == 0
+    assert not any(expired.geographic_coverage.values()) and expired.key_patent_holders == []
@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.rnpv import value_portfolio, value_programmes
+from app.services.roi_simulation import RoiAssumptions
+from tests.conftest import new_request_id
+
+# A: spend two years, then earn; gates at 1 and 2 years (p = 0.5, 0.8).
+# B: no gates, so every cash flow counts in full.
+PORTFOLIO = [
+    {"molecule": "A", "cash_flows": [-10.0, -20.0, 50.0, 50.0], "phase_gates": [1.0, 2.0], "phase_probabilities": [0.5, 0.8]},
+    {"molecule": "B", "cash_flows": [-5.0, 30.0]}
+]
+
+
+def _discount(year: float, rate: float = 0.10) -> float:
+    # Cash arrives mid-year
+    return (1.0 + rate) ** -(year + 0.5)
+
+
+# Survival of A by mid-year: 1 (no gate passed), 0.5, 0.5 * 0.8, 0.5 * 0.8
+RNPV_A = -10 * _discount(0) - 20 * 0.5 * _discount(1) + 50 * 0.4 * _discount(2) + 50 * 0.4 * _discount(3)
+NPV_A = -10 * _discount(0) - 20 * _discount(1) + 50 * _discount(2) + 50 * _discount(3)
+COST_A = 10 * _discount(0) + 20 * 0.5 * _discount(1)
+RNPV_B = -5 * _discount(0) + 30 * _discount(1)
+
+
+def test_hand_computed_portfolio():
+    valuation = value_portfolio(PORTFOLIO, discount_rate=0.10)
+    assert valuation.rnpv[0] == pytest.approx(RNPV_A)
+    assert valuation.rnpv[1] == pytest.approx(RNPV_B)
+    assert valuation.npv[0] == pytest.approx(NPV_A)
+    assert valuation.risk_adjusted_cost[0] == pytest.approx(COST_A)
+    assert valuation.rroi[0] == pytest.approx(RNPV_A / COST_A * 100.0)
+    assert valuation.probability_of_launch.tolist() == pytest.approx([0.4, 1.0])
+    assert valuation.expected_cash_flows[:4].tolist() == pytest.approx([-15.0, 20.0, 20.0, 20.0])
+    assert [c["molecule"] for c in valuation.ranking()] == ["B", "A"]  # RNPV_B > RNPV_A
+
+
+def test_batch_matches_single_candidate_calls():
+    programmes = [RoiAssumptions(peak_sales_millions=p) for p in (150.0, 400.0, 900.0)]
+    batch = value_programmes(["x", "y", "z"], programmes)
+    for i, programme in enumerate(programmes):
+        assert value_programmes(["single"], [programme]).rnpv[0] == pytest.approx(batch.rnpv[i])
+    # More peak sales never lowers the value
+    assert batch.rnpv[0] < batch.rnpv[1] < batch.rnpv[2]
+
+
+def test_portfolio_endpoint(client, run):
+    response = run(client.post(
+        "/api/portfolio/rnpv",
+        json={"candidates": PORTFOLIO, "discount_rate": 0.10, "request_id": new_request_id()}
+    ))
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["portfolio_rnpv_millions"] == pytest.approx(round(RNPV_A + RNPV_B, 1))
+    assert data["expected_launches"] == pytest.approx(1.4)
+    assert data["ranking"][0]["molecule"] == "B"
@@ -0,0 +1,60 @@
+import numpy as np
+
+from app.services.rnpv import value_programmes
+from app.services.roi_sensitivity import PARAMETERS, _scaled, sensitivity, value_of, with_values
+from app.services.roi_simulation import RoiAssumptions
+from tests.conftest import new_request_id
+
+ASSUMPTIONS = RoiAssumptions(peak_sales_millions=500.0)
+
+
+def test_tornado_is_ordered_by_swing():
+    result = sensitivity(ASSUMPTIONS, points=7)
+    swings = [row["swing_millions"] for row in result["tornado"]]
+
+    assert swings == sorted(swings, reverse=True)
+    assert result["perturbations"] == len(PARAMETERS) * 7
+    assert {row["parameter"] for row in result["tornado"]} == set(PARAMETERS)
+    assert result["tornado"][0]["swing_millions"] > result["tornado"][-1]["swing_millions"]
+
+
+def test_batch_sweep_matches_one_valuation_per_perturbation():
+    batch = {row["parameter"]: row["swing_millions"] for row in sensitivity(ASSUMPTIONS, points=5)["tornado"]}
+    for name in PARAMETERS:
+        values = [
+            value_programmes([name], [_scaled(ASSUMPTIONS, name, float(f))]).rnpv[0]
+            for f in np.linspace(0.7, 1.3, 5)
+        ]
+        assert abs(round(max(values) - min(values), 1) - batch[name]) <= 0.1
+
+
+def test_elasticity_signs():
+    result = sensitivity(ASSUMPTIONS, parameters=["peak_sales_millions", "discount_rate", "phase_3_cost_millions"])
+    elasticities = result["elasticities"]
+
+    assert elasticities["peak_sales_millions"] > 0
+    assert elasticities["discount_rate"] < 0
+    assert elasticities["phase_3_cost_millions"] < 0
+    rnpv = result["sweeps"]["peak_sales_millions"]["rnpv_millions"]
+    assert rnpv == sorted(rnpv)
+
+
+def test_with_values_moves_central_values_and_caps_probabilities():
+    moved = with_values(ASSUMPTIONS, {"peak_sales_millions": 800.0, "margin": 0.5, "phase_2_probability": 0.9})
+
+    assert value_of(moved, "peak_sales_millions") == 800.0
+    assert abs(value_of(moved, "margin") - 0.5) < 1e-9
+    assert moved.margin[0] < moved.margin[1] < moved.margin[2]
+    assert abs(value_of(moved, "phase_2_probability") - 0.9) < 1e-9
+    assert value_of(with_values(ASSUMPTIONS, {"phase_3_probability": 2.0}), "phase_3_probability") == 1.0
+
+
+def test_sensitivity_endpoint(client, run):
+    body = {"molecule": "metformin", "seed": 5, "points": 5, "request_id": new_request_id()}
+    response = run(client.post("/api/agents/market/sensitivity", json=body))
+    assert response.status_code == 200
+    tornado = response.json()["data"]["tornado"]
+    assert [row["swing_millions"] for row in tornado] == sorted((row["swing_millions"] for row in tornado), reverse=True)
+
+    body = {"molecule": "metformin", "overrides": {"bogus_input": 1.0}, "request_id": new_request_id()}
+    assert run(client.post("/api/agents/market/sensitivity", json=body)).status_code == 422
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.roi_simulation import RoiAssumptions, simulate
+from tests.conftest import new_request_id
+
+ASSUMPTIONS = RoiAssumptions(peak_sales_millions=500.0)
+
+
+def _summary(distribution):
+    summary = distribution.to_dict()
+    summary.pop("simulation_ms")
+    return summary
+
+
+def test_seeded_simulation_is_reproducible():
+    first = _summary(simulate(ASSUMPTIONS, 20_000, seed=42))
+    second = _summary(simulate(ASSUMPTIONS, 20_000, seed=42))
+    assert first == second
+    assert _summary(simulate(ASSUMPTIONS, 20_000, seed=43)) != first
+
+
+def test_summary_is_consistent():
+    distribution = simulate(ASSUMPTIONS, 20_000, seed=7)
+    npv = distribution.npv_percentiles
+    assert npv["p5"] <= npv["p25"] <= npv["p50"] <= npv["p75"] <= npv["p95"]
+    assert 0.0 < distribution.probability_of_approval < 1.0
+    assert 0.0 <= distribution.probability_of_loss <= 1.0
+
+
+@pytest.mark.parametrize("scenarios", [0, -5])
+def test_scenarios_must_be_positive(scenarios):
+    with pytest.raises(ValueError):
+        simulate(ASSUMPTIONS, scenarios)
+
+
+def test_seeded_roi_endpoint_is_reproducible(client, run):
+    async def call():
+        response = await client.post(
+            "/api/agents/market/roi",
+            json={"molecule": "Metformin", "request_id": new_request_id(), "seed": 5}
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        data["roi_distribution"].pop("simulation_ms")
+        return data["roi_distribution"], data["roi_percentage"], data["key_competitors"]
+
+    assert run(call()) == run(call())
@@ -0,0 +1,124 @@
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from app.services.safety_signals import (
+    IC_SIGNAL, PRR_SIGNAL, ROR_SIGNAL, SafetySignalStore, build_store, disproportionality
+)
+
+
+def test_disproportionality_on_a_hand_computed_table():
+    # 2x2 table: a = drug and event, b = drug without the event,
+    # c = event without the drug, d = neither
+    a, b, c, d = 10, 90, 40, 9860
+    n = a + b + c + d
+    stats = disproportionality(np.array([a]), np.array([a + b]), np.array([a + c]), n)
+
+    prr = (a / (a + b)) / (c / (c + d))
+    ror = (a * d) / (b * c)
+    ror025 = math.exp(math.log(ror) - 1.96 * math.sqrt(1 / a + 1 / b + 1 / c + 1 / d))
+    chi2 = n * (abs(a * d - b * c) - n / 2) ** 2 / ((a + b) * (c + d) * (a + c) * (b + d))
+    expected = (a + b) * (a + c) / n
+    ic = math.log2((a + 0.5) / (expected + 0.5))
+    ic025 = ic - 3.3 * (a + 0.5) ** -0.5 - 2 * (a + 0.5) ** -1.5
+
+    assert stats["prr"][0] == pytest.approx(prr)  # 24.75
+    assert stats["ror"][0] == pytest.approx(ror)
+    assert stats["ror025"][0] == pytest.approx(ror025)
+    assert stats["chi2"][0] == pytest.approx(chi2)
+    assert stats["ic"][0] == pytest.approx(ic)
+    assert stats["ic025"][0] == pytest.approx(ic025)
+    assert stats["flags"][0] == PRR_SIGNAL | ROR_SIGNAL | IC_SIGNAL
+
+
+def test_sparse_and_undefined_pairs_are_not_flagged():
+    # Two reports only; and an event never reported without the drug (c = 0)
+    stats = disproportionality(np.array([2, 5]), np.array([10, 50]), np.array([4, 5]), 1000)
+    assert stats["flags"][0] == 0
+    assert np.isnan(stats["prr"][1]) and np.isnan(stats["ror"][1])
+    assert not stats["flags"][1] & (PRR_SIGNAL | ROR_SIGNAL)
+
+
+def _quarter(root, name, drugs, reactions, outcomes=()):
+    """A FAERS ASCII quarter directory from (primaryid, caseid, role, drug), (primaryid, pt) and (primaryid, outc) rows."""
+    directory = root / name
+    directory.mkdir()
+    tag = name[-4:].upper()
+    (directory / f"DRUG{tag}.txt").write_text(
+        "primaryid$caseid$drug_seq$role_cod$drugname$prod_ai\n"
+        + "".join(f"{p}${c}$1${role}${drug}$\n" for p, c, role, drug in drugs)
+    )
+    (directory / f"REAC{tag}.txt").write_text("primaryid$caseid$pt\n" + "".join(f"{p}$0${pt}\n" for p, pt in reactions))
+    (directory / f"OUTC{tag}.txt").write_text("primaryid$caseid$outc_cod\n" + "".join(f"{p}$0${o}\n" for p, o in outcomes))
+    return str(directory)
+
+
+@pytest.fixture
+def quarters(tmp_path):
+    # Case 100 is reported in Q1 (primaryid 1001) and followed up in Q2 (1002)
+    # with a different event; within Q1 case 200 has two versions
+    q1 = _quarter(
+        tmp_path, "faers_24q1",
+        [(1001, 100, "PS", "ASPIRIN"), (2001, 200, "PS", "METFORMIN HYDROCHLORIDE"), (2002, 200, "PS", "METFORMIN")],
+        [(1001, "Headache"), (2001, "Nausea"), (2002, "Vomiting")],
+        [(2002, "HO")]
+    )
+    q2 = _quarter(
+        tmp_path, "faers_24q2",
+        [(1002, 100, "PS", "ASPIRIN"), (3001, 300, "PS", "ASPIRIN"), (3001, 300, "C", "METFORMIN")],
+        [(1002, "Rash"), (3001, "Headache")],
+        [(1002, "DE")]
+    )
+    return q1, q2
+
+
+def _counts(directory):
+    with open(os.path.join(directory, "drugs.json")) as f:
+        drugs = json.load(f)
+    with open(os.path.join(directory, "events.json")) as f:
+        events = json.load(f)
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    counts = np.load(os.path.join(directory, "counts.npz"))
+    pairs = {
+        (drugs[d], events[e]): (int(r), int(s))
+        for d, e, r, s in zip(counts["pair_drug"], counts["pair_event"], counts["pair_reports"], counts["pair_serious"])
+        if r
+    }
+    drug_reports = {drugs[i]: int(r) for i, r in enumerate(counts["drug_reports"]) if r}
+    return meta["total_reports"], meta["serious_reports"], pairs, drug_reports
+
+
+EXPECTED = (
+    3, 2,
+    {("ASPIRIN", "Rash"): (1, 1), ("ASPIRIN", "Headache"): (1, 0), ("METFORMIN", "Vomiting"): (1, 1)},
+    {"ASPIRIN": 2, "METFORMIN": 1}
+)
+
+
+def test_follow_ups_count_once(tmp_path, quarters):
+    build_store(list(quarters), str(tmp_path / "store"))
+    assert _counts(str(tmp_path / "store")) == EXPECTED
+
+
+@pytest.mark.parametrize("order", [(0, 1), (1, 0)])
+def test_append_replaces_superseded_versions(tmp_path, quarters, order):
+    directory = str(tmp_path / "store")
+    build_store([quarters[order[0]]], directory)
+    build_store([quarters[order[1]]], directory, append=True)
+    assert _counts(directory) == EXPECTED
+
+
+def test_rebuild_swaps_the_directory_under_open_stores(tmp_path, quarters):
+    directory = str(tmp_path / "store")
+    build_store([quarters[0]], directory)
+    store = SafetySignalStore(directory)
+    offsets = np.array(store.offsets)
+    build_store([quarters[1]], directory, append=True)
+    # The mapped files of the previous build are unlinked, not truncated
+    assert np.array_equal(np.asarray(store.offsets), offsets)
+    assert SafetySignalStore(directory).meta["quarters"] == ["faers_24q1", "faers_24q2"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".store.")]
@@ -0,0 +1,138 @@
+import msgpack
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.serialization import (
+    MSGPACK_MEDIA_TYPE, brotli, negotiate_encoding, packb, preferred_format, project, unpackb
+)
+from tests.conftest import new_request_id
+
+PORTFOLIO = [
+    {"molecule": "A", "cash_flows": [-10.0, -20.0, 50.0, 50.0], "phase_gates": [1.0, 2.0], "phase_probabilities": [0.5, 0.8]},
+    {"molecule": "B", "cash_flows": [-5.0, 30.0]}
+]
+
+
+def _round_trip(payload):
+    return unpackb(packb(payload))
+
+
+def test_numeric_lists_are_packed_and_restored():
+    floats = [0.1 * i for i in range(10)]
+    small_ints = list(range(-50, 50))
+    large_ints = [2 ** 40 + i for i in range(40)]
+    body = packb({"floats": floats, "small": small_ints, "large": large_ints})
+
+    raw = msgpack.unpackb(body, raw=False, strict_map_key=False)
+    assert [raw[key].code for key in ("floats", "small", "large")] == [1, 3, 4]
+    assert unpackb(body) == {"floats": floats, "small": small_ints, "large": large_ints}
+
+
+def test_mixed_and_short_lists_keep_their_types():
+    mixed = [1, 2.5, 2 ** 53 + 1, 4, 5.0]
+    restored = _round_trip({"mixed": mixed, "short": [1.5, 2.5], "strings": ["a", "b", "c", "d"]})
+
+    assert restored["mixed"] == mixed
+    assert [type(v) for v in restored["mixed"]] == [int, float, int, int, float]
+    assert restored["short"] == [1.5, 2.5]
+    assert restored["strings"] == ["a", "b", "c", "d"]
+
+
+def test_numpy_arrays_round_trip():
+    restored = _round_trip({"f8": np.linspace(0, 1, 5), "i4": np.arange(6, dtype=np.int32), "b": np.array([True, False])})
+
+    assert restored["f8"] == pytest.approx([0.0, 0.25, 0.5, 0.75, 1.0])
+    assert restored["i4"] == [0, 1, 2, 3, 4, 5]
+    assert restored["b"] == [True, False]
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "json"),
+    ("application/json", "json"),
+    ("application/msgpack", "msgpack"),
+    ("application/x-msgpack, application/json;q=0.5", "msgpack"),
+    ("application/json, application/msgpack;q=0.9", "json"),
+    ("application/msgpack;q=0, application/json", "json"),
+    ("*/*", "json")
+])
+def test_accept_negotiation(accept, expected):
+    assert preferred_format(accept) == expected
+
+
+def test_endpoint_speaks_msgpack_both_ways(client, run):
+    request = {"candidates": PORTFOLIO, "discount_rate": 0.10, "request_id": new_request_id()}
+    as_json = run(client.post("/api/portfolio/rnpv", json=request)).json()
+    response = run(client.post(
+        "/api/portfolio/rnpv",
+        content=packb({**request, "request_id": new_request_id()}),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE, "Accept": MSGPACK_MEDIA_TYPE}
+    ))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(MSGPACK_MEDIA_TYPE)
+    as_msgpack = unpackb(response.content)
+    assert as_msgpack["data"]["ranking"] == as_json["data"]["ranking"]
+    assert as_msgpack["data"]["portfolio_rnpv_millions"] == as_json["data"]["portfolio_rnpv_millions"]
+
+
+def test_malformed_msgpack_body_is_rejected(client, run):
+    response = run(client.post(
+        "/api/portfolio/rnpv", content=b"\xc1\xc1", headers={"Content-Type": MSGPACK_MEDIA_TYPE}
+    ))
+    assert response.status_code == 400
+
+
+def _rnpv(client, run, query="", headers=None):
+    request = {"candidates": PORTFOLIO, "discount_rate": 0.10, "request_id": new_request_id()}
+    return run(client.post(f"/api/portfolio/rnpv{query}", json=request, headers=headers or {}))
+
+
+def test_projection_keeps_and_drops_paths():
+    payload = {"a": {"b": 1, "c": 2}, "rows": [{"x": 1, "y": 2}, {"x": 3, "y": 4}], "d": 5}
+
+    assert project(payload, fields="a.b,rows.x") == {"a": {"b": 1}, "rows": [{"x": 1}, {"x": 3}]}
+    assert project(payload, exclude="a.c,rows.y,d") == {"a": {"b": 1}, "rows": [{"x": 1}, {"x": 3}]}
+    assert payload["a"] == {"b": 1, "c": 2}
+
+
+def test_fields_projection_through_the_endpoint(client, run):
+    full = _rnpv(client, run).json()
+    projected = _rnpv(client, run, "?fields=success,data.ranking.molecule").json()
+
+    assert projected == {"success": True, "data": {"ranking": [{"molecule": r["molecule"]} for r in full["data"]["ranking"]]}}
+    excluded = _rnpv(client, run, "?exclude=data.ranking,request_id").json()
+    assert "request_id" not in excluded and "ranking" not in excluded["data"]
+    assert excluded["data"]["portfolio_rnpv_millions"] == full["data"]["portfolio_rnpv_millions"]
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("*", "br" if brotli is not None else "gzip"),
+    ("br, gzip;q=0.5", "br" if brotli is not None else "gzip")
+])
+def test_encoding_negotiation(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_gzip_round_trip_through_the_endpoint(client, run, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_BYTES", 0)
+    plain = _rnpv(client, run, headers={"Accept-Encoding": "identity"})
+    compressed = _rnpv(client, run, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.json()["data"]["ranking"] == plain.json()["data"]["ranking"]
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_round_trip_through_the_endpoint(client, run, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_BYTES", 0)
+    response = _rnpv(client, run, headers={"Accept-Encoding": "br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.json()["success"] is True
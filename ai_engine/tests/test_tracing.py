@@ -0,0 +1,44 @@
+"""
+JSON-lines trace export: the file rotates at its size cap, and a trace is
+still loaded whole when a rotation splits it.
+"""
+
+import os
+
+from app.core.tracing import JsonLinesExporter, Span, load_trace
+
+
+def _spans(trace_id, count):
+    spans = []
+    for i in range(count):
+        span = Span(f"step-{i}", trace_id)
+        span.end_ns = span.start_ns + 1000
+        spans.append(span)
+    return spans
+
+
+def test_exporter_rotates_at_size_cap(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    exporter = JsonLinesExporter(path, max_bytes=2000, backup_count=2)
+    for _ in range(20):
+        exporter.export(_spans("a" * 32, 3))
+
+    assert os.path.exists(f"{path}.1") and os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    for name in (path, f"{path}.1", f"{path}.2"):
+        if os.path.exists(name):
+            assert os.path.getsize(name) < 2000 + 1500
+
+
+def test_load_trace_reads_rotated_files(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    exporter = JsonLinesExporter(path, max_bytes=1500, backup_count=3)
+    trace_id = "b" * 32
+    for _ in range(4):
+        exporter.export(_spans(trace_id, 2))
+        exporter.export(_spans("c" * 32, 1))
+
+    assert os.path.exists(f"{path}.1")
+    assert len(load_trace(path, trace_id, backup_count=3)) == 8
+    assert len(load_trace(path, trace_id)) < 8
+    assert load_trace(str(tmp_path / "missing.jsonl"), trace_id, backup_count=3) == []
@@ -0,0 +1,106 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.services import trial_similarity
+from app.services.trial_similarity import DIM, HASH_BITS, SimilarityIndex, build_text_index, tokenize, vectorize
+from app.services.trial_store import TrialStore, build_store
+
+FLAT_IDF = np.ones(1 << HASH_BITS, dtype=np.float32)
+
+DIABETES = "Metformin lowers fasting glucose and glycated haemoglobin in adults with type 2 diabetes"
+DIABETES_TOO = "Glycated haemoglobin and fasting glucose response to metformin in type 2 diabetes"
+ASTHMA = "Inhaled corticosteroid reduces bronchial hyperresponsiveness and exacerbations in asthma"
+
+
+def _study(nct_id, title, conditions):
+    return {
+        "protocolSection": {
+            "identificationModule": {"nctId": nct_id, "briefTitle": title},
+            "statusModule": {"overallStatus": "COMPLETED"},
+            "armsInterventionsModule": {"interventions": [{"name": "Drug"}]},
+            "conditionsModule": {"conditions": list(conditions)}
+        }
+    }
+
+
+def _export(path, studies):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"studies": studies}, f)
+    return str(path)
+
+
+STUDIES = [
+    _study("NCT00000001", DIABETES, ["Type 2 Diabetes"]),
+    _study("NCT00000002", DIABETES_TOO, ["Type 2 Diabetes"]),
+    _study("NCT00000003", ASTHMA, ["Asthma"]),
+    _study("NCT00000004", "Metformin glucose response in polycystic ovary syndrome", ["Polycystic Ovary Syndrome"])
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    source = _export(tmp_path / "ctgov.json", STUDIES)
+    directory = str(tmp_path / "trials")
+    meta = build_store(source, directory, text_index=True)
+    assert meta["text_index"]["trials"] == len(STUDIES)
+    return source, directory
+
+
+def test_tokenize_drops_stopwords_and_short_words():
+    assert tokenize("A Phase 2 Study of Metformin in patients with T2D") == ["phase", "metformin", "t2d"]
+
+
+def test_vectorize_is_normalized_and_order_free():
+    vectors = vectorize([DIABETES, DIABETES_TOO, ASTHMA, "", "the of and"], FLAT_IDF)
+    assert vectors.shape == (5, DIM) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1)
+    assert not vectors[3:].any()
+    assert np.allclose(vectorize([" ".join(reversed(DIABETES.split()))], FLAT_IDF)[0], vectors[0])
+    assert vectors[0] @ vectors[1] > 0.5 > vectors[0] @ vectors[2]
+    assert not vectorize([], FLAT_IDF).size
+
+
+def test_vectorize_weights_rare_terms_by_idf():
+    idf = FLAT_IDF.copy()
+    common = trial_similarity._features(trial_similarity._hashes(["glucose"]))
+    idf[common] = 0
+    weighted = vectorize(["glucose asthma"], idf)[0]
+    assert np.allclose(weighted, vectorize(["asthma"], FLAT_IDF)[0])
+
+
+def test_top_k_ranks_by_cosine_and_excludes_rows(store, monkeypatch):
+    _, directory = store
+    index = SimilarityIndex(directory)
+    query = index.vectorize([DIABETES])
+
+    [ranked] = index.top_k(query, k=4)
+    assert [row for _, row in ranked][:2] == [0, 1] and ranked[-1][1] == 2
+    assert [score for score, _ in ranked] == sorted((score for score, _ in ranked), reverse=True)
+    assert ranked[0][0] > 0.9  # the trial text adds its conditions to the title
+
+    excluded, unrestricted = index.top_k(np.vstack([query, query]), k=2, exclude=[np.array([0, 1]), None])
+    assert [row for _, row in excluded] == [3, 2]
+    assert [row for _, row in unrestricted] == [0, 1]
+
+    # Blocks smaller than k: the heaps merge candidates across blocks
+    monkeypatch.setattr(trial_similarity, "SEARCH_BLOCK", 1)
+    assert index.top_k(query, k=4) == [ranked]
+
+
+def test_build_text_index_swaps_a_rebuilt_index_in(store, tmp_path):
+    source, directory = store
+    index = SimilarityIndex(directory)
+    before = np.array(index.vectors)
+
+    build_text_index(source, directory)
+    assert np.array_equal(index.vectors, before)
+    assert len(TrialStore(directory)) == len(SimilarityIndex(directory)) == len(STUDIES)
+
+    with pytest.raises(ValueError):
+        build_text_index(_export(tmp_path / "other.json", STUDIES[:1]), directory)
+    # The failed rebuild leaves the live store and index in place
+    assert len(SimilarityIndex(directory)) == len(STUDIES)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".trials.")]
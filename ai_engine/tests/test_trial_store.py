@@ -0,0 +1,56 @@
+import json
+import os
+
+import numpy as np
+
+from app.services.trial_store import TrialStore, build_store
+
+
+def _study(nct_id, interventions, conditions, phases=("PHASE2",), status="COMPLETED"):
+    return {
+        "protocolSection": {
+            "identificationModule": {"nctId": nct_id, "briefTitle": f"Study of {interventions[0]}"},
+            "statusModule": {"overallStatus": status, "startDateStruct": {"date": "2019-03"}},
+            "designModule": {"phases": list(phases), "enrollmentInfo": {"count": 120}},
+            "armsInterventionsModule": {"interventions": [{"name": name} for name in interventions]},
+            "conditionsModule": {"conditions": list(conditions)}
+        },
+        "hasResults": False
+    }
+
+
+def _export(path, studies):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"studies": studies}, f)
+    return str(path)
+
+
+def test_build_and_query(tmp_path):
+    source = _export(tmp_path / "ctgov.json", [
+        _study("NCT00000001", ["Metformin"], ["Type 2 Diabetes"], ("PHASE3",)),
+        _study("NCT00000002", ["Metformin Hydrochloride"], ["Polycystic Ovary Syndrome"], status="RECRUITING"),
+        _study("NCT00000003", ["Aspirin"], ["Type 2 Diabetes"])
+    ])
+    meta = build_store(source, str(tmp_path / "trials"))
+    store = TrialStore(str(tmp_path / "trials"))
+    rows = store.trials_for_intervention("metformin")
+    assert meta["trials"] == 3
+    assert sorted(store.nct_ids_for(rows)) == ["NCT00000001", "NCT00000002"]
+    assert len(store.trials_for_condition("Type 2 Diabetes")) == 2
+
+
+def test_rebuild_swaps_the_directory_under_open_stores(tmp_path):
+    directory = str(tmp_path / "trials")
+    build_store(_export(tmp_path / "first.json", [_study("NCT00000001", ["Metformin"], ["Obesity"])]), directory)
+    store = TrialStore(directory)
+    rows = np.array(store.trials_for_intervention("Metformin"))
+
+    build_store(_export(tmp_path / "second.json", [
+        _study("NCT00000009", ["Aspirin"], ["Pain"]),
+        _study("NCT00000010", ["Metformin"], ["Obesity"])
+    ]), directory)
+    # The open store still reads the files it mapped; a new one sees the rebuild
+    assert np.array_equal(store.trials_for_intervention("Metformin"), rows)
+    assert store.nct_ids_for(rows) == ["NCT00000001"]
+    assert TrialStore(directory).nct_ids_for(TrialStore(directory).trials_for_intervention("Metformin")) == ["NCT00000010"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".trials.")]
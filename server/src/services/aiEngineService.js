@@ -6,11 +6,79 @@
  */
 
 const axios = require('axios');
+const crypto = require('crypto');
 const { logger, auditLog } = require('../utils/logger');
 
 // AI Engine base URL (configurable via environment)
 const AI_ENGINE_BASE_URL = process.env.AI_ENGINE_URL || 'http://localhost:8000';
 
+// Optional MessagePack transport: AI_ENGINE_FORMAT=msgpack (requires @msgpack/msgpack)
+let msgpack = null;
+let extensionCodec = null;
+if (process.env.AI_ENGINE_FORMAT === 'msgpack') {
+  try {
+    msgpack = require('@msgpack/msgpack');
+    extensionCodec = new msgpack.ExtensionCodec();
+    // Engine ext types: numeric arrays packed as little-endian buffers
+    const packedArrayTypes = { 1: Float64Array, 2: Float32Array, 3: Int32Array, 4: BigInt64Array };
+    Object.entries(packedArrayTypes).forEach(([type, ArrayType]) => {
+      extensionCodec.register({
+        type: Number(type),
+        encode: () => null,
+        decode: (data) => Array.from(
+          new ArrayType(data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength)),
+          Number
+        )
+      });
+    });
+  } catch (error) {
+    logger.warn('AI_ENGINE_FORMAT=msgpack but @msgpack/msgpack is not installed; using JSON');
+    msgpack = null;
+  }
+}
+
+/**
+ * Decode a binary engine response body (MessagePack or JSON) in place
+ */
+const decodeBody = (response) => {
+  if (!msgpack || !response || !Buffer.isBuffer(response.data)) {
+    return;
+  }
+  const contentType = response.headers?.['content-type'] || '';
+  if (contentType.startsWith('application/msgpack')) {
+    response.data = msgpack.decode(response.data, { extensionCodec });
+  } else if (response.data.length) {
+    const text = response.data.toString('utf8');
+    try {
+      response.data = JSON.parse(text);
+    } catch (error) {
+      response.data = text;
+    }
+  }
+};
+
+// Last response per request (minus request_id) for ETag revalidation:
+// the engine answers 304 when the cached copy is still current
+const ETAG_CACHE_MAX_ENTRIES = 200;
+const etagCache = new Map();
+
+const etagCacheKey = (config) => {
+  const { request_id: _requestId, ...payload } = config.data || {};
+  return `${config.method} ${config.url} ${JSON.stringify(payload)}`;
+};
+
+const rememberEtag = (response) => {
+  const etag = response.headers?.etag;
+  if (!etag || !response.config?.__etagKey) {
+    return;
+  }
+  etagCache.delete(response.config.__etagKey);
+  etagCache.set(response.config.__etagKey, { etag, data: response.data });
+  if (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+    etagCache.delete(etagCache.keys().next().value);
+  }
+};
+
 // Axios instance with default configuration
 const aiClient = axios.create({
   baseURL: AI_ENGINE_BASE_URL,
@@ -24,7 +92,26 @@ const aiClient = axios.create({
 // Request interceptor for logging
 aiClient.interceptors.request.use(
   (config) => {
+    // W3C trace context so engine spans join this request's trace
+    const traceId = crypto.randomBytes(16).toString('hex');
+    const spanId = crypto.randomBytes(8).toString('hex');
+    config.headers['traceparent'] = `00-${traceId}-${spanId}-01`;
+    if (config.data && config.data.request_id) {
+      config.headers['X-Request-ID'] = config.data.request_id;
+    }
+    if (msgpack) {
+      config.headers['Accept'] = 'application/msgpack, application/json;q=0.9';
+      config.responseType = 'arraybuffer';
+    }
+    config.__etagKey = etagCacheKey(config);
+    config.__requestId = config.data?.request_id;
+    const cached = etagCache.get(config.__etagKey);
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag;
+    }
+
     logger.debug('AI Engine request', {
+      traceId,
       url: config.url,
       method: config.method,
       data: config.data
@@ -40,13 +127,37 @@ aiClient.interceptors.request.use(
 // Response interceptor for logging
 aiClient.interceptors.response.use(
   (response) => {
+    decodeBody(response);
+    rememberEtag(response);
     logger.debug('AI Engine response', {
       status: response.status,
       url: response.config.url
     });
     return response;
   },
-  (error) => {
+  async (error) => {
+    // 304 Not Modified: the cached copy is current
+    const cached = error.config && etagCache.get(error.config.__etagKey);
+    if (error.response?.status === 304 && cached) {
+      logger.debug('AI Engine response not modified', { url: error.config.url });
+      // The cached copy answered an earlier request: echo this request's id
+      const data = cached.data && cached.data.request_id !== undefined && error.config.__requestId
+        ? { ...cached.data, request_id: error.config.__requestId }
+        : cached.data;
+      return { ...error.response, status: 200, data };
+    }
+
+    decodeBody(error.response);
+    // Engine shed the request (429) or a bulkhead was saturated (503):
+    // retry once if it asks for a short wait
+    const retryAfter = parseInt(error.response?.headers?.['retry-after'], 10);
+    if ([429, 503].includes(error.response?.status) && !error.config.__shedRetry && retryAfter <= 10) {
+      error.config.__shedRetry = true;
+      logger.warn('AI Engine busy, retrying', { url: error.config.url, retryAfter });
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      return aiClient.request(error.config);
+    }
+
     logger.error('AI Engine response error', {
       status: error.response?.status,
       message: error.message,